@@ -0,0 +1,4 @@
+from django.contrib import admin
+from . import models
+
+admin.site.register(models.ChangeRecord)
@@ -0,0 +1,23 @@
+from django.apps import AppConfig
+
+
+class AuditConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'audit'
+
+    def ready(self):
+        import atexit
+
+        from django.apps import apps
+        from django.core.signals import request_finished
+        from django.db.models.signals import post_delete
+        from operations.signals import products_bulk_updated
+        from . import history
+
+        for model in apps.get_models():
+            if issubclass(model, history.HistoryMixin):
+                post_delete.connect(history.on_deleted, sender=model, dispatch_uid=f'audit.history.delete.{model._meta.label_lower}')
+        products_bulk_updated.connect(history.on_products_bulk_updated, dispatch_uid='audit.history.bulk')
+        request_finished.connect(history.on_request_finished, dispatch_uid='audit.history.request')
+        # Whatever is still buffered when the process exits
+        atexit.register(history.flush_at_exit)
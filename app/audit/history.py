@@ -0,0 +1,287 @@
+"""
+Change history of the audited models.
+
+Models that inherit HistoryMixin list their HISTORY_FIELDS (attnames) and
+the HISTORY_MASKED ones whose values are never stored (Business.sol_key).
+from_db() keeps the loaded values of those fields, so save() diffs them
+against the current ones without a query, and only a real change produces
+a ChangeRecord with {field: [before, after]}. Deletes (cascades included)
+and bulk product operations (products_bulk_updated, one record per product
+with the operation id and kind) are recorded too. The user is the one
+authenticated in the request being served (HistoryMiddleware).
+
+Saves never write the history themselves: each record is handed to
+transaction.on_commit(), so rolled back changes (savepoints included) are
+never recorded, and after the commit it goes to an in-memory buffer. A
+writer thread drains the buffer every FLUSH_INTERVAL seconds, or as soon as
+it holds BATCH_SIZE records, with one bulk INSERT per batch. With
+BACKGROUND off the buffer is written at the end of each request instead
+(and whenever it fills up). If a batch fails, its records are written one
+by one: a record the database rejects is logged and dropped, and when the
+database cannot be reached the rest go back to the buffer for the next
+flush. What is still buffered when the process exits is written by an
+atexit hook, on a connection of its own; a killed process loses at most
+the records of the last interval.
+
+Settings (all optional):
+
+    HISTORY = {
+        'ENABLED': True,
+        'BACKGROUND': True,
+        'BATCH_SIZE': 500,
+        'FLUSH_INTERVAL': 1.0,   # seconds
+    }
+"""
+import logging
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, connections, router, transaction
+from django.utils import timezone
+
+logger = logging.getLogger('sisfac.history')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKGROUND': True,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+MASK = "***"
+
+_request = ContextVar('sisfac_history_request', default=None)
+
+# Committed records not written yet (ChangeRecord field values)
+_buffer = []
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_writer = None
+
+
+def get_setting(name):
+    return getattr(settings, 'HISTORY', {}).get(name, DEFAULTS[name])
+
+
+def current_user_id():
+    """Id of the user authenticated in the current request, or None."""
+    # DRF sets the user it authenticates on the underlying HttpRequest too
+    user = getattr(_request.get(), "user", None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def record(model_name, object_id, business_id, action, changes, user_id=None, using=None):
+    """Queues a ChangeRecord, to be buffered if and when the current transaction commits."""
+    if not get_setting('ENABLED'):
+        return
+    row = {
+        "business_id": business_id,
+        "model": model_name,
+        "object_id": object_id,
+        "action": action,
+        "changes": changes,
+        "user_id": user_id if user_id is not None else current_user_id(),
+        "changed_at": timezone.now(),
+    }
+    transaction.on_commit(lambda: _enqueue(row), using=using)
+
+
+def _enqueue(row):
+    with _lock:
+        _buffer.append(row)
+        full = len(_buffer) >= get_setting('BATCH_SIZE')
+    if get_setting('BACKGROUND'):
+        _start_writer()
+        if full:
+            _wakeup.set()
+    elif full:
+        flush()
+
+
+def _start_writer():
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _lock:
+        # Also started again in a forked worker, where the parent's thread does not exist
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_run_writer, name="history-writer", daemon=True)
+            _writer.start()
+
+
+def _run_writer():
+    while True:
+        _wakeup.wait(get_setting('FLUSH_INTERVAL'))
+        _wakeup.clear()
+        if _buffer:
+            # The thread's connection follows CONN_MAX_AGE, as in a request
+            close_old_connections()
+            flush()
+
+
+def flush():
+    """Writes the buffered records. Returns how many were written."""
+    with _lock:
+        rows = _buffer[:]
+        _buffer.clear()
+    if not rows:
+        return 0
+    from .models import ChangeRecord
+
+    try:
+        with transaction.atomic(using=router.db_for_write(ChangeRecord)):
+            ChangeRecord.objects.bulk_create(
+                [ChangeRecord(**row) for row in rows], batch_size=get_setting('BATCH_SIZE'),
+            )
+    except Exception:
+        logger.warning("Could not write %d history records at once, writing them one by one", len(rows), exc_info=True)
+        return _write_each(ChangeRecord, rows)
+    return len(rows)
+
+
+def _write_each(model, rows):
+    written = 0
+    for index, row in enumerate(rows):
+        try:
+            with transaction.atomic(using=router.db_for_write(model)):
+                model.objects.create(**row)
+        except (OperationalError, InterfaceError):
+            # The database is unreachable: keep the rest for the next flush
+            logger.exception("Could not write history records, %d kept for later", len(rows) - index)
+            with _lock:
+                _buffer[:0] = rows[index:]
+            break
+        except Exception:
+            logger.exception("Dropped history record %s", row)
+        else:
+            written += 1
+    return written
+
+
+def flush_at_exit():
+    """atexit hook: writes what is still buffered."""
+    if not _buffer:
+        return
+    # A transaction left open by the exiting code is rolled back (as it would
+    # be anyway) so its locks are released, and the records are written from
+    # a thread of its own, on a new connection, whatever state (atomic block,
+    # broken connection) this thread's connections were left in
+    connections.close_all()
+    thread = threading.Thread(target=_flush_and_close, name="history-exit-flush")
+    thread.start()
+    thread.join()
+
+
+def _flush_and_close():
+    try:
+        flush()
+    finally:
+        connections.close_all()
+
+
+def _masked(value):
+    return MASK if value else None
+
+
+class HistoryMixin:
+    """
+    Model mixin: records the changes of HISTORY_FIELDS on save(). Put it
+    before models.Model in the bases. HISTORY_BUSINESS_FIELD is the attname
+    of the business id ("id" for the business itself).
+    """
+    HISTORY_FIELDS = ()
+    HISTORY_MASKED = ()
+    HISTORY_BUSINESS_FIELD = "business_id"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._history_loaded = {
+            name: instance.__dict__[name] for name in cls.HISTORY_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        result = super().save(*args, **kwargs)
+
+        fields = self.HISTORY_FIELDS
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            written = {self._meta.get_field(name).attname for name in update_fields}
+            fields = [name for name in fields if name in written]
+        loaded = getattr(self, "_history_loaded", {})
+
+        changes = {}
+        for name in fields:
+            if name not in self.__dict__:
+                continue  # deferred and not written
+            after = self.__dict__[name]
+            if adding:
+                before = None
+            elif name in loaded:
+                before = loaded[name]
+                if before == after:
+                    continue
+            else:
+                continue  # loaded deferred: the previous value is unknown
+            if name in self.HISTORY_MASKED:
+                before, after = _masked(before), _masked(after)
+            changes[name] = [before, after]
+            loaded[name] = self.__dict__[name]
+        self._history_loaded = loaded
+
+        if adding or changes:
+            self.record_history("C" if adding else "U", changes)
+        return result
+
+    def record_history(self, action, changes):
+        record(
+            self._meta.model_name, self.pk, getattr(self, self.HISTORY_BUSINESS_FIELD), action, changes,
+            using=router.db_for_write(type(self), instance=self),
+        )
+
+
+def on_deleted(sender, instance, **kwargs):
+    instance.record_history("D", {})
+
+
+def on_products_bulk_updated(sender, business_id, product_ids, operation, **kwargs):
+    changes = {"operation": operation.pk, "kind": operation.kind}
+    for product_id in product_ids:
+        record(sender._meta.model_name, product_id, business_id, "B", changes, user_id=operation.user_id)
+
+
+def on_request_finished(sender, **kwargs):
+    if not get_setting('BACKGROUND'):
+        flush()
+
+
+class HistoryMiddleware:
+    """Makes the request (and so its authenticated user) visible to the history records."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:14
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_id', models.BigIntegerField(blank=True, null=True)),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('C', 'Creado'), ('U', 'Modificado'), ('D', 'Eliminado'), ('B', 'Operación masiva')], max_length=1)),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('changed_at', models.DateTimeField()),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'object_id', 'changed_at'], name='audit_chang_model_f64086_idx'), models.Index(fields=['business_id', 'changed_at'], name='audit_chang_busines_2d6682_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from operations.tenancy import TenantQuerySet
+
+
+class ChangeRecord(models.Model):
+    """
+    Append-only history entry: an audited object was created, changed,
+    deleted or touched by a bulk product operation (see audit.history).
+    `business_id` and `object_id` are plain columns, so the history of an
+    object outlives it.
+    """
+    ACTION_CHOICES = [
+        ("C", "Creado"),
+        ("U", "Modificado"),
+        ("D", "Eliminado"),
+        ("B", "Operación masiva"),
+    ]
+
+    business_id = models.BigIntegerField(null=True, blank=True)
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=1, choices=ACTION_CHOICES)
+    # {field: [before, after]}; masked fields hold "***" instead of the value
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False,
+    )
+    changed_at = models.DateTimeField()
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "object_id", "changed_at"]),
+            models.Index(fields=["business_id", "changed_at"]),
+        ]
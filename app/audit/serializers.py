@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from . import models
+
+
+class ChangeRecordSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True, default=None)
+
+    class Meta:
+        model = models.ChangeRecord
+        fields = ['id', 'model', 'object_id', 'action', 'changes', 'user', 'username', 'changed_at']
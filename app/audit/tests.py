@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase
+from django.utils import timezone
+
+from . import history
+from .models import ChangeRecord
+
+
+class FlushTests(TestCase):
+    """A failed batch does not lose the history records it held."""
+
+    def setUp(self):
+        history._buffer.clear()
+        self.addCleanup(history._buffer.clear)
+
+    def row(self, object_id):
+        return {
+            "business_id": 1, "model": "product", "object_id": object_id, "action": "U",
+            "changes": {"name": ["a", "b"]}, "user_id": None, "changed_at": timezone.now(),
+        }
+
+    def test_rejected_record_is_dropped_and_the_others_written(self):
+        history._buffer.extend([self.row(1), self.row(None), self.row(3)])
+        with self.assertLogs('sisfac.history', 'WARNING'):
+            self.assertEqual(history.flush(), 2)
+        self.assertEqual(sorted(ChangeRecord.objects.values_list("object_id", flat=True)), [1, 3])
+        self.assertEqual(history._buffer, [])
+
+    def test_records_are_kept_while_the_database_is_unreachable(self):
+        rows = [self.row(1), self.row(2)]
+        history._buffer.extend(rows)
+        unreachable = mock.patch.object(ChangeRecord.objects, "create", side_effect=OperationalError)
+        with unreachable, mock.patch.object(ChangeRecord.objects, "bulk_create", side_effect=OperationalError):
+            with self.assertLogs('sisfac.history', 'WARNING'):
+                self.assertEqual(history.flush(), 0)
+        self.assertEqual(history._buffer, rows)
+
+        self.assertEqual(history.flush(), 2)
+        self.assertEqual(ChangeRecord.objects.count(), 2)
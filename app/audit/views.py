@@ -0,0 +1,38 @@
+from rest_framework import viewsets
+from rest_framework.pagination import PageNumberPagination
+from operations.tenancy import TenantViewSetMixin
+from . import models, serializers
+
+
+class ChangeRecordPagination(PageNumberPagination):
+    """Paginación del historial de cambios"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ChangeRecordViewSet(TenantViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Historial de cambios del negocio, del más reciente al más antiguo.
+    Filtros opcionales: model (business, category, product, profile),
+    object_id (junto con model), user, date_from y date_to.
+    """
+    queryset = models.ChangeRecord.objects.select_related('user').order_by('-changed_at', '-id')
+    serializer_class = serializers.ChangeRecordSerializer
+    pagination_class = ChangeRecordPagination
+    tenant_resource = 'history'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('model'):
+            queryset = queryset.filter(model=params['model'])
+            if params.get('object_id', '').isdigit():
+                queryset = queryset.filter(object_id=params['object_id'])
+        if params.get('user', '').isdigit():
+            queryset = queryset.filter(user_id=params['user'])
+        if params.get('date_from'):
+            queryset = queryset.filter(changed_at__date__gte=params['date_from'])
+        if params.get('date_to'):
+            queryset = queryset.filter(changed_at__date__lte=params['date_to'])
+        return queryset
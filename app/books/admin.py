@@ -1,3 +1,7 @@
 from django.contrib import admin
+from . import models
 
-# Register your models here.
+admin.site.register(models.Account)
+admin.site.register(models.JournalEntry)
+admin.site.register(models.AccountBalance)
+admin.site.register(models.PeriodClose)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class BooksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'books'
+
+    def ready(self):
+        from operations.signals import order_status_changed
+        from taxes.signals import document_status_changed
+        from . import ledger
+
+        # Entries are posted in the same transaction as the status change
+        order_status_changed.connect(ledger.on_order_status_changed, dispatch_uid='books.ledger.order')
+        document_status_changed.connect(ledger.on_document_status_changed, dispatch_uid='books.ledger.document')
@@ -0,0 +1,353 @@
+"""
+Double-entry ledger.
+
+Entries are posted automatically from Order and SunatDocument status
+transitions (see BooksConfig.ready), in the same transaction as the change:
+
+- Paid order: cash (1011) against receivables (1212) for businesses that
+  issue SUNAT documents, whose revenue comes from the document; against
+  sales (7011) for the others.
+- Issued sale document: receivables (1212) against sales (7011) and IGV
+  (40111); credit notes (07) post the opposite.
+- Issued purchase document: purchases (6011) and IGV against payables (4212).
+
+Entries are never modified: when an order stops being paid or a document
+is voided, a reversing entry is posted. Amounts are in soles (documents in
+dollars use their exchange rate).
+
+Every posting adds its debits and credits to AccountBalance (one row per
+account and month) with an upsert, so trial balances and income statements
+read O(accounts) rows per month. close_period() freezes a month: it stores
+the cumulative balances in AccountSnapshot and later postings dated in it
+go to the first open month. Postings and closes lock the business' Ledger
+row, so a posting never lands in a month that a concurrent close is
+freezing; the Business row itself stays free for the other writes.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from core.db import upsert_increment
+from operations.models import Business, Order, OrderItem
+from reports.rollups import LINE_REVENUE
+from taxes.models import SunatDocument
+from . import models
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+CASH = "1011"
+RECEIVABLES = "1212"
+IGV = "40111"
+PAYABLES = "4212"
+PURCHASES = "6011"
+SALES = "7011"
+
+DEFAULT_CHART = [
+    (CASH, "Caja", "ASSET"),
+    (RECEIVABLES, "Facturas, boletas y otros comprobantes por cobrar", "ASSET"),
+    (IGV, "IGV - Cuenta propia", "LIABILITY"),
+    (PAYABLES, "Facturas, boletas y otros comprobantes por pagar", "LIABILITY"),
+    (PURCHASES, "Compras de mercaderías", "EXPENSE"),
+    (SALES, "Ventas de mercaderías", "INCOME"),
+]
+
+CREDIT_NOTE = "07"
+
+
+class LedgerError(Exception):
+    """An entry or a period close that the ledger cannot accept."""
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(period):
+    return date(period.year + period.month // 12, period.month % 12 + 1, 1)
+
+
+def chart(business_id):
+    """{code: account id} of a business, creating the default chart if needed."""
+    accounts = dict(models.Account.objects.filter(business_id=business_id).values_list("code", "id"))
+    missing = [row for row in DEFAULT_CHART if row[0] not in accounts]
+    if missing:
+        models.Account.objects.bulk_create(
+            [models.Account(business_id=business_id, code=code, name=name, kind=kind) for code, name, kind in missing],
+            ignore_conflicts=True,
+        )
+        accounts = dict(models.Account.objects.filter(business_id=business_id).values_list("code", "id"))
+    return accounts
+
+
+def last_closed_period(business_id):
+    return models.PeriodClose.objects.filter(business_id=business_id).aggregate(last=Max("period"))["last"]
+
+
+def ledger_for_update(business_id):
+    """Ledger of a business, created if needed and locked until the end of the transaction."""
+    ledger = models.Ledger.objects.select_for_update().filter(business_id=business_id).first()
+    if ledger is None:
+        models.Ledger.objects.bulk_create(
+            [models.Ledger(business_id=business_id, closed_through=last_closed_period(business_id))],
+            ignore_conflicts=True,
+        )
+        ledger = models.Ledger.objects.select_for_update().get(business_id=business_id)
+    return ledger
+
+
+def post(business_id, day, description, source_type, source_id, lines, is_reversal=False):
+    """
+    Posts a journal entry. `lines` are (account code, debit, credit) tuples
+    and must balance. Days in a closed period move to the first open month.
+    Returns the JournalEntry, or None when every amount is zero.
+    """
+    lines = [(code, debit, credit) for code, debit, credit in lines if debit or credit]
+    if not lines:
+        return None
+    if sum(debit for _, debit, _ in lines) != sum(credit for _, _, credit in lines):
+        raise LedgerError(f"El asiento de {source_type} {source_id} no cuadra.")
+
+    accounts = chart(business_id)
+    with transaction.atomic():
+        # Waits for a running close_period(): an entry read as open cannot land in the month it closes
+        last_closed = ledger_for_update(business_id).closed_through
+        if last_closed is not None and month_start(day) <= last_closed:
+            day = next_month(last_closed)
+        entry = models.JournalEntry.objects.create(
+            business_id=business_id, date=day, description=description[:255],
+            source_type=source_type, source_id=source_id, is_reversal=is_reversal,
+        )
+        models.JournalLine.objects.bulk_create([
+            models.JournalLine(entry=entry, account_id=accounts[code], debit=debit, credit=credit)
+            for code, debit, credit in lines
+        ])
+        totals = defaultdict(lambda: [ZERO, ZERO])
+        for code, debit, credit in lines:
+            totals[accounts[code]][0] += debit
+            totals[accounts[code]][1] += credit
+        upsert_increment(
+            models.AccountBalance,
+            ["business_id", "account_id", "period"],
+            [
+                {"business_id": business_id, "account_id": account_id, "period": month_start(day),
+                 "debit": debit, "credit": credit}
+                for account_id, (debit, credit) in totals.items()
+            ],
+        )
+    return entry
+
+
+def _signed(lines, sign):
+    # A reversal swaps debits and credits instead of posting negative amounts
+    return lines if sign > 0 else [(code, credit, debit) for code, debit, credit in lines]
+
+
+def posted_lines(source_type, source_id):
+    """
+    Lines of the last entry of a source, so a reversal undoes exactly what
+    was posted even if the order's items changed since. [] if not posted.
+    """
+    entry = (
+        models.JournalEntry.objects.filter(source_type=source_type, source_id=source_id)
+        .order_by("-id").only("id", "is_reversal").first()
+    )
+    if entry is None or entry.is_reversal:
+        return []
+    return list(entry.lines.values_list("account__code", "debit", "credit"))
+
+
+# -- sources --------------------------------------------------------------
+
+def order_lines(order):
+    total = OrderItem.objects.filter(order=order).aggregate(total=Sum(LINE_REVENUE))["total"] or ZERO
+    tax_enabled = Business.objects.filter(pk=order.business_id).values_list("tax_enabled", flat=True).first()
+    # With SUNAT documents the revenue is recognized when the document is issued
+    counterpart = RECEIVABLES if tax_enabled else SALES
+    return [(CASH, total, ZERO), (counterpart, ZERO, total)]
+
+
+def post_order(order, sign, day=None):
+    lines = order_lines(order) if sign > 0 else _signed(posted_lines("ORDER", order.pk), -1)
+    return post(
+        order.business_id,
+        day or timezone.localdate(),
+        f"{'Reversión de cobro' if sign < 0 else 'Cobro'} del pedido {order.pk}",
+        "ORDER", order.pk, lines, is_reversal=sign < 0,
+    )
+
+
+def _in_soles(document, amount):
+    if document.currency != "PEN" and document.exchange_rate:
+        return (amount * document.exchange_rate).quantize(CENT)
+    return amount
+
+
+def document_lines(document):
+    total = _in_soles(document, document.total)
+    igv = _in_soles(document, document.total_igv)
+    net = total - igv
+    if document.direction == "PURCHASE":
+        lines = [(PURCHASES, net, ZERO), (IGV, igv, ZERO), (PAYABLES, ZERO, total)]
+    else:
+        lines = [(RECEIVABLES, total, ZERO), (IGV, ZERO, igv), (SALES, ZERO, net)]
+    return _signed(lines, -1) if document.document_type.code == CREDIT_NOTE else lines
+
+
+def post_document(document, sign, day=None):
+    lines = document_lines(document) if sign > 0 else _signed(posted_lines("DOCUMENT", document.pk), -1)
+    return post(
+        document.business_id,
+        day or (document.issue_date if sign > 0 else timezone.localdate()),
+        f"{'Anulación de ' if sign < 0 else ''}{document.document_type.code} {document.series}-{document.number}",
+        "DOCUMENT", document.pk, lines, is_reversal=sign < 0,
+    )
+
+
+def on_order_status_changed(sender, order, previous_status, **kwargs):
+    if order.status == "PAID" and previous_status != "PAID":
+        post_order(order, 1)
+    elif previous_status == "PAID" and order.status != "PAID":
+        post_order(order, -1)
+
+
+def on_document_status_changed(sender, document, previous_status, **kwargs):
+    if document.status == "ISSUED" and previous_status != "ISSUED":
+        post_document(document, 1)
+    elif previous_status == "ISSUED" and document.status != "ISSUED":
+        post_document(document, -1)
+
+
+def backfill(business_id=None):
+    """
+    Posts the paid orders and issued documents that have no entry yet (data
+    from before the ledger). Returns the number of entries posted.
+    """
+    orders = Order.objects.filter(status="PAID")
+    documents = SunatDocument.objects.filter(status="ISSUED").select_related("document_type")
+    if business_id is not None:
+        orders = orders.filter(business_id=business_id)
+        documents = documents.filter(business_id=business_id)
+    posted = {
+        (source_type, source_id)
+        for source_type, source_id in models.JournalEntry.objects.filter(
+            **({"business_id": business_id} if business_id is not None else {})
+        ).values_list("source_type", "source_id").distinct().iterator()
+    }
+
+    count = 0
+    for order in orders.order_by("id").iterator():
+        if ("ORDER", order.pk) not in posted:
+            count += bool(post_order(order, 1, day=timezone.localdate(order.created_at)))
+    for document in documents.order_by("issue_date", "id").iterator():
+        if ("DOCUMENT", document.pk) not in posted:
+            count += bool(post_document(document, 1))
+    return count
+
+
+# -- statements -----------------------------------------------------------
+
+def _accounts(business_id):
+    return {
+        account["id"]: account
+        for account in models.Account.objects.filter(business_id=business_id).values("id", "code", "name", "kind")
+    }
+
+
+def _rows(accounts, totals, kinds=None):
+    rows = []
+    for account_id, account in sorted(accounts.items(), key=lambda item: item[1]["code"]):
+        if kinds is not None and account["kind"] not in kinds:
+            continue
+        debit, credit = totals.get(account_id, (ZERO, ZERO))
+        if not debit and not credit:
+            continue
+        debit, credit = debit.quantize(CENT), credit.quantize(CENT)
+        rows.append({**account, "debit": debit, "credit": credit, "balance": debit - credit})
+    return rows
+
+
+def cumulative_balances(business_id, period):
+    """
+    {account id: (debit, credit)} accumulated until the end of `period`:
+    the latest snapshot at or before it plus the monthly balances after it.
+    """
+    close = (
+        models.PeriodClose.objects.filter(business_id=business_id, period__lte=period)
+        .order_by("-period").first()
+    )
+    totals = defaultdict(lambda: (ZERO, ZERO))
+    movements = models.AccountBalance.objects.filter(business_id=business_id, period__lte=period)
+    if close is not None:
+        for account_id, debit, credit in close.snapshots.values_list("account_id", "debit", "credit"):
+            totals[account_id] = (debit, credit)
+        movements = movements.filter(period__gt=close.period)
+    for row in movements.values("account_id").annotate(debit=Sum("debit"), credit=Sum("credit")).order_by():
+        debit, credit = totals[row["account_id"]]
+        totals[row["account_id"]] = (debit + row["debit"], credit + row["credit"])
+    return totals
+
+
+def trial_balance(business_id, period):
+    """Accounts with their cumulative debits, credits and balance at the end of `period`."""
+    rows = _rows(_accounts(business_id), cumulative_balances(business_id, period))
+    return {
+        "period": period,
+        "accounts": rows,
+        "debit": sum((row["debit"] for row in rows), ZERO),
+        "credit": sum((row["credit"] for row in rows), ZERO),
+    }
+
+
+def income_statement(business_id, period_from, period_to):
+    """Income and expense accounts moved between two periods, and the net result."""
+    totals = {
+        row["account_id"]: (row["debit"], row["credit"])
+        for row in models.AccountBalance.objects.filter(
+            business_id=business_id, period__gte=period_from, period__lte=period_to,
+        ).values("account_id").annotate(debit=Sum("debit"), credit=Sum("credit")).order_by()
+    }
+    accounts = _accounts(business_id)
+    income = _rows(accounts, totals, kinds=("INCOME",))
+    expenses = _rows(accounts, totals, kinds=("EXPENSE",))
+    for row in income:
+        row["amount"] = -row["balance"]
+    for row in expenses:
+        row["amount"] = row["balance"]
+    total_income = sum((row["amount"] for row in income), ZERO)
+    total_expenses = sum((row["amount"] for row in expenses), ZERO)
+    return {
+        "period_from": period_from,
+        "period_to": period_to,
+        "income": income,
+        "expenses": expenses,
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net_result": total_income - total_expenses,
+    }
+
+
+def close_period(business_id, period):
+    """Closes `period` (first day of the month) for a business and snapshots its balances."""
+    period = month_start(period)
+    with transaction.atomic():
+        # Serializes closes and postings of the same business
+        ledger = ledger_for_update(business_id)
+        last_closed = ledger.closed_through
+        if last_closed is not None and period <= last_closed:
+            raise LedgerError(f"El periodo {period:%Y-%m} ya está cerrado (último cierre: {last_closed:%Y-%m}).")
+        if period >= month_start(timezone.localdate()):
+            raise LedgerError(f"El periodo {period:%Y-%m} aún no ha terminado.")
+        totals = cumulative_balances(business_id, period)
+        close = models.PeriodClose.objects.create(business_id=business_id, period=period)
+        models.AccountSnapshot.objects.bulk_create([
+            models.AccountSnapshot(close=close, account_id=account_id, debit=debit, credit=credit)
+            for account_id, (debit, credit) in totals.items()
+        ])
+        ledger.closed_through = period
+        ledger.save(update_fields=["closed_through"])
+    return close
@@ -0,0 +1,27 @@
+"""
+Django management command to post the journal entries of the paid orders
+and issued documents recorded before the ledger existed. Sources that
+already have an entry are skipped, so it can be run more than once.
+"""
+from django.core.management.base import BaseCommand
+from books import ledger
+
+
+class Command(BaseCommand):
+    help = 'Registra los asientos de los pedidos pagados y comprobantes emitidos que aún no tienen uno'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            help='ID del negocio (si no se especifica, procesa todos)',
+        )
+
+    def handle(self, *args, **options):
+        posted = ledger.backfill(business_id=options.get('business_id'))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Asientos registrados: {posted}'
+            )
+        )
@@ -0,0 +1,62 @@
+"""
+Django management command to close an accounting month: stores the
+cumulative balance of every account in AccountSnapshot, so later statements
+start from the snapshot instead of adding up every earlier month.
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from books import ledger
+from operations.models import Business
+
+
+class Command(BaseCommand):
+    help = 'Cierra un periodo contable y guarda los saldos acumulados de cada cuenta'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            type=str,
+            help='Periodo AAAA-MM (por defecto, el mes anterior)',
+        )
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            help='ID del negocio (si no se especifica, cierra todos)',
+        )
+
+    def handle(self, *args, **options):
+        if options.get('period'):
+            try:
+                period = datetime.strptime(options['period'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--period debe tener el formato AAAA-MM')
+        else:
+            period = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        businesses = Business.objects.order_by('id')
+        if options.get('business_id') is not None:
+            businesses = businesses.filter(pk=options['business_id'])
+            if not businesses.exists():
+                raise CommandError(f"No existe el negocio {options['business_id']}")
+
+        closed = skipped = 0
+        for business_id in businesses.values_list('id', flat=True):
+            try:
+                close = ledger.close_period(business_id, period)
+            except ledger.LedgerError as exc:
+                skipped += 1
+                self.stdout.write(self.style.WARNING(f'  - Negocio {business_id}: {exc}'))
+                continue
+            closed += 1
+            self.stdout.write(f'  ✓ Negocio {business_id}: {close.snapshots.count()} cuentas')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Periodo: {period:%Y-%m}\n'
+                f'   Negocios cerrados: {closed}\n'
+                f'   Negocios omitidos: {skipped}'
+            )
+        )
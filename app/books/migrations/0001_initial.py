@@ -0,0 +1,110 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:56
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('operations', '0002_profile_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Account',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10)),
+                ('name', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('ASSET', 'Activo'), ('LIABILITY', 'Pasivo'), ('EQUITY', 'Patrimonio'), ('INCOME', 'Ingreso'), ('EXPENSE', 'Gasto')], max_length=10)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accounts', to='operations.business')),
+            ],
+            options={
+                'ordering': ['business', 'code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='books.account')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_balances', to='operations.business')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JournalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('description', models.CharField(max_length=255)),
+                ('source_type', models.CharField(choices=[('ORDER', 'Pedido'), ('DOCUMENT', 'Comprobante')], max_length=10)),
+                ('source_id', models.BigIntegerField()),
+                ('is_reversal', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='journal_entries', to='operations.business')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JournalLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='lines', to='books.account')),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='books.journalentry')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PeriodClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_closes', to='operations.business')),
+            ],
+            options={
+                'ordering': ['business', 'period'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='books.account')),
+                ('close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='books.periodclose')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.UniqueConstraint(fields=('business', 'code'), name='uq_account_business_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountbalance',
+            constraint=models.UniqueConstraint(fields=('business', 'account', 'period'), name='uq_accountbalance_business_account_period'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['business', 'date'], name='books_journ_busines_3f3d67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['source_type', 'source_id'], name='books_journ_source__2d2a36_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='periodclose',
+            constraint=models.UniqueConstraint(fields=('business', 'period'), name='uq_periodclose_business_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountsnapshot',
+            constraint=models.UniqueConstraint(fields=('close', 'account'), name='uq_accountsnapshot_close_account'),
+        ),
+    ]
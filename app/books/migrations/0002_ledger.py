@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0001_initial'),
+        ('operations', '0004_productbulkoperation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ledger',
+            fields=[
+                ('business', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to='operations.business')),
+                ('closed_through', models.DateField(blank=True, null=True)),
+            ],
+        ),
+    ]
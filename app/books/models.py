@@ -1,3 +1,146 @@
+from decimal import Decimal
 from django.db import models
+from operations.models import Business
+from operations.tenancy import TenantQuerySet
 
-# Create your models here.
+
+class Account(models.Model):
+    """
+    Ledger account of a business (PCGE codes). The default chart is created
+    on the first posting of each business (see books.ledger.DEFAULT_CHART).
+    """
+    KIND_CHOICES = [
+        ("ASSET", "Activo"),
+        ("LIABILITY", "Pasivo"),
+        ("EQUITY", "Patrimonio"),
+        ("INCOME", "Ingreso"),
+        ("EXPENSE", "Gasto"),
+    ]
+
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="accounts")
+    code = models.CharField(max_length=10)
+    name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        ordering = ["business", "code"]
+        constraints = [
+            models.UniqueConstraint(fields=["business", "code"], name="uq_account_business_code"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.code} {self.name}"
+
+
+class JournalEntry(models.Model):
+    """
+    Balanced journal entry. Entries are never edited: a change in the source
+    (an order no longer paid, a voided document) posts a reversing entry.
+    """
+    SOURCE_CHOICES = [
+        ("ORDER", "Pedido"),
+        ("DOCUMENT", "Comprobante"),
+    ]
+
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="journal_entries")
+    date = models.DateField()
+    description = models.CharField(max_length=255)
+
+    source_type = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    source_id = models.BigIntegerField()
+    is_reversal = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["business", "date"]),
+            models.Index(fields=["source_type", "source_id"]),
+        ]
+
+
+class JournalLine(models.Model):
+    entry = models.ForeignKey(JournalEntry, on_delete=models.CASCADE, related_name="lines")
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name="lines")
+    debit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+
+class AccountBalance(models.Model):
+    """
+    Debits and credits of an account in a month (period = first day).
+    Maintained incrementally by every posting, so trial balances and income
+    statements read one row per account and month instead of the lines.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="account_balances")
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="balances")
+    period = models.DateField()
+
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business", "account", "period"],
+                name="uq_accountbalance_business_account_period",
+            ),
+        ]
+
+
+class Ledger(models.Model):
+    """
+    Ledger state of a business: the last closed period. Postings and closes
+    lock this row (see books.ledger) instead of the Business row, which the
+    foreign keys of every other write of the business would wait on.
+    """
+    business = models.OneToOneField(Business, on_delete=models.CASCADE, primary_key=True, related_name="ledger")
+    closed_through = models.DateField(null=True, blank=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+
+class PeriodClose(models.Model):
+    """
+    Closed month of a business. Postings dated in a closed month go to the
+    first open one; its snapshots hold the cumulative balances at its end.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="period_closes")
+    period = models.DateField()
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        ordering = ["business", "period"]
+        constraints = [
+            models.UniqueConstraint(fields=["business", "period"], name="uq_periodclose_business_period"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.business_id} {self.period:%Y-%m}"
+
+
+class AccountSnapshot(models.Model):
+    """Cumulative debits and credits of an account at the end of a closed period."""
+    close = models.ForeignKey(PeriodClose, on_delete=models.CASCADE, related_name="snapshots")
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="snapshots")
+
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["close", "account"], name="uq_accountsnapshot_close_account"),
+        ]
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from django.utils import timezone
+from rest_framework import serializers
+from . import models
+
+
+class AccountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Account
+        fields = ['id', 'code', 'name', 'kind']
+
+
+class JournalLineSerializer(serializers.ModelSerializer):
+    account_code = serializers.CharField(source='account.code', read_only=True)
+    account_name = serializers.CharField(source='account.name', read_only=True)
+
+    class Meta:
+        model = models.JournalLine
+        fields = ['id', 'account', 'account_code', 'account_name', 'debit', 'credit']
+
+
+class JournalEntrySerializer(serializers.ModelSerializer):
+    lines = JournalLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = models.JournalEntry
+        fields = ['id', 'date', 'description', 'source_type', 'source_id', 'is_reversal', 'created_at', 'lines']
+
+
+class PeriodField(serializers.Field):
+    """Periodo contable AAAA-MM, como el primer día del mes."""
+    default_error_messages = {'invalid': 'Debe tener el formato AAAA-MM.'}
+
+    def to_internal_value(self, data):
+        try:
+            return datetime.strptime(str(data), '%Y-%m').date()
+        except ValueError:
+            self.fail('invalid')
+
+    def to_representation(self, value):
+        return value.strftime('%Y-%m')
+
+
+class PeriodSerializer(serializers.Serializer):
+    """Periodo de un balance de comprobación (por defecto, el mes actual)."""
+    period = PeriodField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('period', timezone.localdate().replace(day=1))
+        return attrs
+
+
+class PeriodRangeSerializer(serializers.Serializer):
+    """Rango de periodos de un estado de resultados (por defecto, el año en curso)."""
+    period_from = PeriodField(required=False)
+    period_to = PeriodField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('period_to', timezone.localdate().replace(day=1))
+        attrs.setdefault('period_from', attrs['period_to'].replace(month=1))
+        if attrs['period_from'] > attrs['period_to']:
+            raise serializers.ValidationError({'period_from': 'Debe ser anterior o igual a period_to.'})
+        return attrs
+
+
+class StatementRowSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    code = serializers.CharField()
+    name = serializers.CharField()
+    kind = serializers.CharField()
+    debit = serializers.DecimalField(max_digits=16, decimal_places=2)
+    credit = serializers.DecimalField(max_digits=16, decimal_places=2)
+    balance = serializers.DecimalField(max_digits=16, decimal_places=2)
+
+
+class IncomeStatementRowSerializer(StatementRowSerializer):
+    amount = serializers.DecimalField(max_digits=16, decimal_places=2)
+
+
+class TrialBalanceSerializer(serializers.Serializer):
+    period = PeriodField()
+    accounts = StatementRowSerializer(many=True)
+    debit = serializers.DecimalField(max_digits=16, decimal_places=2)
+    credit = serializers.DecimalField(max_digits=16, decimal_places=2)
+
+
+class IncomeStatementSerializer(serializers.Serializer):
+    period_from = PeriodField()
+    period_to = PeriodField()
+    income = IncomeStatementRowSerializer(many=True)
+    expenses = IncomeStatementRowSerializer(many=True)
+    total_income = serializers.DecimalField(max_digits=16, decimal_places=2)
+    total_expenses = serializers.DecimalField(max_digits=16, decimal_places=2)
+    net_result = serializers.DecimalField(max_digits=16, decimal_places=2)
@@ -1,3 +1,127 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Sum
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import User
+from operations.models import Business, Category, Order, OrderItem, Product
+from taxes.models import DocumentType, Party, SunatDocument
+from . import ledger
+from .models import AccountBalance, JournalEntry, Ledger, PeriodClose
+
+
+class LedgerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789', tax_enabled=True)
+        cls.user = User.objects.create_user('cajero', password='x')
+        category = Category.objects.create(business=cls.business, name='Bebidas')
+        cls.product = Product.objects.create(
+            business=cls.business, category=category, name='Agua', sell_price=Decimal('2.00'),
+            buy_price=Decimal('1.00'), unit_of_measurement='U',
+        )
+        cls.party = Party.objects.create(business=cls.business, doc_type='1', doc_number='12345678', name='Juan')
+        cls.boleta = DocumentType.objects.create(code='03', name='Boleta')
+        cls.credit_note = DocumentType.objects.create(code='07', name='Nota de crédito')
+
+    def document(self, number, total, issue_date=date(2026, 3, 2), document_type=None):
+        taxable = (total / Decimal('1.18')).quantize(Decimal('0.01'))
+        document = SunatDocument.objects.create(
+            business=self.business, document_type=document_type or self.boleta, series='B001', number=number,
+            issue_date=issue_date, party=self.party, total_taxable=taxable, total_igv=total - taxable, total=total,
+        )
+        document.status = 'ISSUED'
+        document.save()
+        return document
+
+    def balances(self):
+        """{account code: debit - credit} over every period."""
+        rows = AccountBalance.objects.filter(business=self.business).values('account__code').annotate(
+            debit=Sum('debit'), credit=Sum('credit'),
+        )
+        return {row['account__code']: row['debit'] - row['credit'] for row in rows}
+
+    def assertEntriesBalance(self):
+        for entry in JournalEntry.objects.all():
+            totals = entry.lines.aggregate(debit=Sum('debit'), credit=Sum('credit'))
+            self.assertEqual(totals['debit'], totals['credit'], entry.description)
+
+
+class PostingTests(LedgerTestCase):
+    """Every source posts a balanced entry, and undoing the source reverses it."""
+
+    def test_unbalanced_entry_is_rejected(self):
+        with self.assertRaises(ledger.LedgerError):
+            ledger.post(self.business.pk, date(2026, 3, 2), 'x', 'ORDER', 1, [
+                (ledger.CASH, Decimal('10.00'), ledger.ZERO), (ledger.SALES, ledger.ZERO, Decimal('9.99')),
+            ])
+        self.assertFalse(JournalEntry.objects.exists())
+
+    def test_paid_order_and_its_reversal(self):
+        order = Order.objects.create(business=self.business)
+        OrderItem.objects.create(order=order, product=self.product, quantity=3, price=Decimal('2.00'), created_by=self.user)
+        order.status = 'PAID'
+        order.save()
+        self.assertEqual(self.balances(), {ledger.CASH: Decimal('6.00'), ledger.RECEIVABLES: Decimal('-6.00')})
+
+        # Items changed after paying: the reversal undoes what was posted
+        OrderItem.objects.filter(order=order).update(quantity=5)
+        order.status = 'OPEN'
+        order.save()
+        self.assertEqual(set(self.balances().values()), {Decimal('0.00')})
+        self.assertEqual(JournalEntry.objects.filter(is_reversal=True).count(), 1)
+        self.assertEntriesBalance()
+
+    def test_voided_document_and_credit_note_reverse_the_sale(self):
+        sale = self.document(1, Decimal('118.00'))
+        self.assertEqual(self.balances(), {
+            ledger.RECEIVABLES: Decimal('118.00'), ledger.IGV: Decimal('-18.00'), ledger.SALES: Decimal('-100.00'),
+        })
+        self.document(2, Decimal('118.00'), document_type=self.credit_note)
+        self.assertEqual(set(self.balances().values()), {Decimal('0.00')})
+
+        sale.status = 'VOID'
+        sale.save()
+        self.assertEqual(self.balances(), {
+            ledger.RECEIVABLES: Decimal('-118.00'), ledger.IGV: Decimal('18.00'), ledger.SALES: Decimal('100.00'),
+        })
+        self.assertEntriesBalance()
+        trial = ledger.trial_balance(self.business.pk, date(2026, 12, 1))
+        self.assertEqual(trial['debit'], trial['credit'])
+
+
+class CloseTests(LedgerTestCase):
+    """A closed month is frozen: later postings dated in it go to the next open month."""
+
+    def test_postings_roll_into_the_next_open_month(self):
+        self.document(1, Decimal('118.00'), issue_date=date(2026, 1, 15))
+        before = ledger.trial_balance(self.business.pk, date(2026, 1, 1))
+        ledger.close_period(self.business.pk, date(2026, 1, 20))
+        self.assertEqual(Ledger.objects.get(business=self.business).closed_through, date(2026, 1, 1))
+
+        late = self.document(2, Decimal('59.00'), issue_date=date(2026, 1, 28))
+        entry = JournalEntry.objects.get(source_type='DOCUMENT', source_id=late.pk)
+        self.assertEqual(entry.date, date(2026, 2, 1))
+        self.assertEqual(
+            set(AccountBalance.objects.filter(business=self.business).values_list('period', flat=True)),
+            {date(2026, 1, 1), date(2026, 2, 1)},
+        )
+        self.assertEqual(ledger.trial_balance(self.business.pk, date(2026, 1, 1)), before)
+        self.assertEqual(ledger.trial_balance(self.business.pk, date(2026, 2, 1))['debit'], before['debit'] + Decimal('59.00'))
+
+    def test_closed_or_open_month_cannot_be_closed(self):
+        ledger.close_period(self.business.pk, date(2026, 2, 1))
+        with self.assertRaises(ledger.LedgerError):
+            ledger.close_period(self.business.pk, date(2026, 1, 1))
+        with self.assertRaises(ledger.LedgerError):
+            ledger.close_period(self.business.pk, date.today())
+        self.assertEqual(PeriodClose.objects.count(), 1)
+
+    def test_ledger_row_starts_from_the_existing_closes(self):
+        PeriodClose.objects.create(business=self.business, period=date(2026, 1, 1))
+        entry = ledger.post(self.business.pk, date(2026, 1, 10), 'x', 'ORDER', 1, [
+            (ledger.CASH, Decimal('5.00'), ledger.ZERO), (ledger.SALES, ledger.ZERO, Decimal('5.00')),
+        ])
+        self.assertEqual(entry.date, date(2026, 2, 1))
+        self.assertEqual(Ledger.objects.get(business=self.business).closed_through, date(2026, 1, 1))
@@ -0,0 +1,9 @@
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'accounts', views.AccountViewSet, basename='accounts')
+router.register(r'entries', views.JournalEntryViewSet, basename='journal-entries')
+router.register(r'statements', views.StatementViewSet, basename='statements')
+
+urlpatterns = router.urls
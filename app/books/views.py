@@ -1,3 +1,86 @@
-from django.shortcuts import render
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from operations.tenancy import TenantViewSetMixin
+from . import ledger, models, serializers
 
-# Create your views here.
+
+class AccountViewSet(TenantViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """Plan de cuentas del negocio."""
+    queryset = models.Account.objects.all()
+    serializer_class = serializers.AccountSerializer
+    tenant_resource = 'books'
+
+
+class JournalEntryPagination(PageNumberPagination):
+    """Paginación del libro diario"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class JournalEntryViewSet(TenantViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Libro diario del negocio. Filtros opcionales: date_from, date_to,
+    source_type y source_id.
+    """
+    queryset = models.JournalEntry.objects.prefetch_related('lines__account').order_by('-date', '-id')
+    serializer_class = serializers.JournalEntrySerializer
+    pagination_class = JournalEntryPagination
+    tenant_resource = 'books'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('date_from'):
+            queryset = queryset.filter(date__gte=params['date_from'])
+        if params.get('date_to'):
+            queryset = queryset.filter(date__lte=params['date_to'])
+        if params.get('source_type'):
+            queryset = queryset.filter(source_type=params['source_type'])
+        if params.get('source_id', '').isdigit():
+            queryset = queryset.filter(source_id=params['source_id'])
+        return queryset
+
+
+class StatementViewSet(TenantViewSetMixin, viewsets.GenericViewSet):
+    """
+    Estados contables leídos de los saldos mensuales por cuenta (y del último
+    cierre), sin recorrer los asientos.
+    """
+    queryset = models.AccountBalance.objects.all()
+    tenant_resource = 'books'
+
+    def get_business_id(self):
+        tenant = self.get_tenant()
+        return tenant.business_id if tenant else None
+
+    def no_business_response(self):
+        return Response(
+            {'detail': 'Indique business_id para consultar los estados contables.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=['get'], url_path='trial-balance', url_name='trial-balance')
+    def trial_balance(self, request):
+        """Balance de comprobación acumulado al cierre de un periodo. Parámetros: period (AAAA-MM)."""
+        params = serializers.PeriodSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        business_id = self.get_business_id()
+        if business_id is None:
+            return self.no_business_response()
+        data = ledger.trial_balance(business_id, params.validated_data['period'])
+        return Response(serializers.TrialBalanceSerializer(data).data)
+
+    @action(detail=False, methods=['get'], url_path='income-statement', url_name='income-statement')
+    def income_statement(self, request):
+        """Estado de resultados entre dos periodos. Parámetros: period_from, period_to (AAAA-MM)."""
+        params = serializers.PeriodRangeSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        business_id = self.get_business_id()
+        if business_id is None:
+            return self.no_business_response()
+        params = params.validated_data
+        data = ledger.income_statement(business_id, params['period_from'], params['period_to'])
+        return Response(serializers.IncomeStatementSerializer(data).data)
@@ -3,3 +3,4 @@ from . import models
 
 # Register your models here.
 admin.site.register(models.User)
+admin.site.register(models.BulkLoad)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import instrumentation
+
+        connection_created.connect(
+            instrumentation.install_execute_wrapper, dispatch_uid='core.instrumentation.execute_wrapper'
+        )
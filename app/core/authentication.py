@@ -0,0 +1,222 @@
+"""
+Authentication helpers shared by the DRF views and the async (ASGI) views.
+
+ClaimsJWTAuthentication is the stateless fast path: it trusts the claims
+that core.tokens adds to access tokens and builds request.user (with its
+profile) from them instead of loading the user and the profile. The only
+per-request check is the cached token state of the user: its active flags
+and the token_version of the user and of its profile. User.save() bumps
+the user's version when is_staff, is_superuser or is_active change, and
+Profile.save() the profile's when the role, business or active flag
+change; both drop the cached state, so tokens issued before the change
+stop working (401, the client refreshes). An inactive user or profile is
+rejected outright. The state is read from the primary database, never
+from a replica that may not have the change yet.
+With a per-process cache (LocMemCache) other workers notice within
+JWT_CLAIMS['STATE_CACHE_TIMEOUT'] seconds; with a shared cache, at once.
+
+Settings (all optional):
+
+    JWT_CLAIMS = {
+        'STATE_CACHE_TIMEOUT': 60,
+    }
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed as DRFAuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import USER_VERSION_CLAIM, VERSION_CLAIM
+
+DEFAULTS = {
+    'STATE_CACHE_TIMEOUT': 60,
+}
+
+# (model field, claim). Users and profiles built from the claims come from
+# from_db() with these fields loaded and the rest deferred: reading another
+# field loads it and save() only writes the loaded ones.
+USER_CLAIMS = (
+    (api_settings.USER_ID_FIELD, api_settings.USER_ID_CLAIM),
+    ('username', 'username'),
+    ('is_staff', 'is_staff'),
+    ('is_superuser', 'is_superuser'),
+    ('token_version', USER_VERSION_CLAIM),
+)
+PROFILE_CLAIMS = (('id', 'pid'), ('business_id', 'bid'), ('role', 'role'), ('token_version', VERSION_CLAIM))
+
+
+def get_setting(name):
+    return getattr(settings, 'JWT_CLAIMS', {}).get(name, DEFAULTS[name])
+
+
+def token_state_key(user_id):
+    return f'auth:token-state:v2:{user_id}'
+
+
+def forget_token_state(user_id):
+    """Drops the cached token state of a user."""
+    cache.delete(token_state_key(user_id))
+
+
+def has_claims(validated_token):
+    return VERSION_CLAIM in validated_token and USER_VERSION_CLAIM in validated_token
+
+
+def _state_queryset(user_id):
+    # (is_active, token_version, profile token_version, profile is_active)
+    return get_user_model().objects.using(DEFAULT_DB_ALIAS).filter(
+        **{api_settings.USER_ID_FIELD: user_id}
+    ).values_list('is_active', 'token_version', 'profile__token_version', 'profile__is_active')
+
+
+def _check_state(state, validated_token):
+    if state is None:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    is_active, user_version, profile_version, profile_active = state
+    if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    if profile_active is False:
+        raise AuthenticationFailed('Profile is inactive', code='profile_inactive')
+    if user_version != validated_token[USER_VERSION_CLAIM] or (profile_version or 0) != validated_token[VERSION_CLAIM]:
+        raise InvalidToken('Token revoked: the user or profile changed, refresh the token')
+
+
+def check_token_state(validated_token):
+    key = token_state_key(validated_token[api_settings.USER_ID_CLAIM])
+    state = cache.get(key)
+    if state is None:
+        state = _state_queryset(validated_token[api_settings.USER_ID_CLAIM]).first()
+        if state is not None:
+            cache.set(key, state, get_setting('STATE_CACHE_TIMEOUT'))
+    _check_state(state, validated_token)
+
+
+async def acheck_token_state(validated_token):
+    key = token_state_key(validated_token[api_settings.USER_ID_CLAIM])
+    state = await cache.aget(key)
+    if state is None:
+        state = await _state_queryset(validated_token[api_settings.USER_ID_CLAIM]).afirst()
+        if state is not None:
+            await cache.aset(key, state, get_setting('STATE_CACHE_TIMEOUT'))
+    _check_state(state, validated_token)
+
+
+def _from_claims(model, values):
+    # from_db() expects the loaded values in the order of the model fields
+    fields = [field for field in model._meta.concrete_fields if field.attname in values]
+    instance = model.from_db(
+        DEFAULT_DB_ALIAS,
+        [field.attname for field in fields],
+        # Claims are JSON: the user id comes as a string
+        [field.to_python(values[field.attname]) for field in fields],
+    )
+    instance.from_claims = True
+    return instance
+
+
+def user_from_claims(validated_token):
+    """
+    User (and its profile, cached on user.profile) rebuilt from the claims
+    of a token issued by core.tokens. Both are marked with from_claims.
+    """
+    user_model = get_user_model()
+    # is_active was just checked by check_token_state()
+    user = _from_claims(user_model, {
+        'is_active': True, **{field: validated_token[claim] for field, claim in USER_CLAIMS},
+    })
+    reverse = user_model._meta.get_field('profile')
+    if validated_token['pid'] is None:
+        profile = None
+    else:
+        profile = _from_claims(reverse.related_model, {
+            'user_id': user.pk, **{field: validated_token[claim] for field, claim in PROFILE_CLAIMS},
+        })
+        reverse.field.set_cached_value(profile, user)
+    # A cached None makes user.profile raise DoesNotExist without a query
+    reverse.set_cached_value(user, profile)
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that builds the user from the token claims. Tokens
+    without them (issued before core.tokens, or before the user version
+    claim) still go to the database.
+    """
+
+    def get_user(self, validated_token):
+        if not has_claims(validated_token):
+            return super().get_user(validated_token)
+        check_token_state(validated_token)
+        return user_from_claims(validated_token)
+
+
+async def aauthenticate(request):
+    """
+    Async counterpart of JWTAuthentication.authenticate.
+
+    Token validation is pure CPU work; only the user lookup touches the
+    database, and it goes through the async ORM so the event loop is not
+    blocked. Tokens with claims skip the lookup like ClaimsJWTAuthentication.
+    Returns (user, validated_token) or None when no JWT was sent.
+    """
+    backend = JWTAuthentication()
+    header = backend.get_header(request)
+    if header is None:
+        return None
+
+    raw_token = backend.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = backend.get_validated_token(raw_token)
+    if has_claims(validated_token):
+        await acheck_token_state(validated_token)
+        return user_from_claims(validated_token), validated_token
+
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken('Token contained no recognizable user identification') from e
+
+    user_model = get_user_model()
+    try:
+        user = await user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+    except user_model.DoesNotExist as e:
+        raise AuthenticationFailed('User not found', code='user_not_found') from e
+
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+    return user, validated_token
+
+
+def async_login_required(view):
+    """
+    Decorator for async views: authenticates the JWT and sets
+    request.user / request.auth, answering 401 like DRF's IsAuthenticated.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await aauthenticate(request)
+        except DRFAuthenticationFailed as exc:
+            return JsonResponse(exc.detail, status=exc.status_code, safe=False)
+
+        if result is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=401,
+            )
+
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+
+    return wrapper
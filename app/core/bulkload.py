@@ -0,0 +1,216 @@
+"""
+Resumable PostgreSQL bulk loader.
+
+Input CSV files are processed in chunks. For each chunk, in one transaction:
+
+1. the rows are streamed with COPY into a temporary staging table whose
+   columns are all text (no parsing in Python),
+2. the loader validates them and resolves foreign keys set-wise in SQL
+   (UPDATE ... FROM joins), marking invalid rows with a rejection reason,
+3. the valid rows are merged into the real tables with INSERT ... SELECT,
+4. rejected lines and the BulkLoadChunk record are written.
+
+Since the chunk record commits together with the merged rows, a load that is
+interrupted can be run again and continues after the last merged chunk.
+Subclasses define the staging columns and the resolve/merge SQL.
+"""
+import csv
+import hashlib
+import time
+
+from django.db import connection, transaction
+
+from .models import BulkLoad, BulkLoadChunk, BulkLoadRejection
+from .pgcopy import copy_into
+
+STAGE_TABLE = 'bulk_stage'
+
+# Safe casts: NULL instead of an error that would abort the chunk's transaction
+SAFE_CASTS = """
+CREATE OR REPLACE FUNCTION pg_temp.try_numeric(value text) RETURNS numeric AS $$
+BEGIN
+    RETURN NULLIF(value, '')::numeric;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION pg_temp.try_date(value text) RETURNS date AS $$
+BEGIN
+    RETURN NULLIF(value, '')::date;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+"""
+
+
+class LoadError(Exception):
+    """The input cannot be loaded (missing columns, wrong database...)."""
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Loader:
+    """
+    Base class of a bulk load kind.
+
+    columns: CSV columns copied into the staging table (all text); the
+        staging table also gets `line` (input line number) and `error`.
+    required: columns that must be present in the CSV header.
+    group_by: columns whose consecutive equal values must stay in the same
+        chunk (e.g. the lines of one document).
+    resolve_columns: extra staging columns filled by resolve(),
+        as {name: SQL type}.
+    """
+    kind = None
+    columns = []
+    required = []
+    group_by = []
+    resolve_columns = {}
+
+    def __init__(self, stdout=None):
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    # -- hooks -----------------------------------------------------------
+
+    def resolve(self, cursor):
+        """Validates the staging rows and fills the resolve_columns."""
+        raise NotImplementedError
+
+    def merge(self, cursor):
+        """Writes the valid staging rows (error IS NULL) into the real tables."""
+        raise NotImplementedError
+
+    # -- helpers for subclasses ------------------------------------------
+
+    def reject(self, cursor, condition, reason, params=()):
+        """Marks not yet rejected staging rows matching `condition` with `reason`."""
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} SET error = %s WHERE error IS NULL AND ({condition})',
+            [reason, *params],
+        )
+
+    def reject_groups(self, cursor, reason):
+        """Rejects every row of a group (group_by) when one of its rows was rejected."""
+        keys = ', '.join(self.group_by)
+        match = ' AND '.join(f's.{column} IS NOT DISTINCT FROM bad.{column}' for column in self.group_by)
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET error = %s '
+            f'FROM (SELECT DISTINCT {keys} FROM {STAGE_TABLE} WHERE error IS NOT NULL) bad '
+            f'WHERE s.error IS NULL AND {match}',
+            [reason],
+        )
+
+    # -- driver ----------------------------------------------------------
+
+    def run(self, path, chunk_size=50000, restart=False):
+        if connection.vendor != 'postgresql':
+            raise LoadError('La carga masiva requiere PostgreSQL.')
+
+        checksum = file_checksum(path)
+        load = None
+        if not restart:
+            load = (
+                BulkLoad.objects
+                .filter(kind=self.kind, checksum=checksum, chunk_size=chunk_size)
+                .exclude(status='DONE')
+                .order_by('-id')
+                .first()
+            )
+        if load is None:
+            load = BulkLoad.objects.create(kind=self.kind, source=str(path), checksum=checksum, chunk_size=chunk_size)
+        done = set(load.chunks.values_list('index', flat=True))
+        if done:
+            self.log(f'Reanudando carga {load.id}: {len(done)} chunks ya cargados')
+
+        load.status = 'RUNNING'
+        load.save(update_fields=['status', 'updated_at'])
+        try:
+            for index, first_line, rows in self.chunks(path, chunk_size):
+                if index in done:
+                    continue
+                started = time.monotonic()
+                loaded, rejected = self.load_chunk(load, index, first_line, rows)
+                elapsed = time.monotonic() - started
+                self.log(
+                    f'  chunk {index}: {loaded} cargadas, {rejected} rechazadas '
+                    f'({len(rows) / max(elapsed, 0.001):,.0f} filas/s)'
+                )
+        except Exception as exc:
+            load.status = 'FAILED'
+            load.error_message = str(exc)
+            load.save(update_fields=['status', 'error_message', 'updated_at'])
+            raise
+
+        load.status = 'DONE'
+        load.error_message = None
+        load.save(update_fields=['status', 'error_message', 'updated_at'])
+        return load
+
+    def chunks(self, path, chunk_size):
+        """
+        Yields (index, first_line, rows) with rows as tuples in `columns`
+        order prefixed by the line number. A chunk only ends where the
+        group_by values change, so a group is never split.
+        """
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            reader = csv.DictReader(file)
+            header = set(reader.fieldnames or [])
+            missing = [column for column in self.required if column not in header]
+            if missing:
+                raise LoadError(f'Faltan columnas en el archivo: {", ".join(missing)}')
+
+            index, rows, first_line, last_key = 0, [], 2, None
+            for record in reader:
+                line = reader.line_num
+                row = (line, *((record.get(column) or '').strip() for column in self.columns))
+                key = tuple(record.get(column) for column in self.group_by)
+                if len(rows) >= chunk_size and key != last_key:
+                    yield index, first_line, rows
+                    index, rows, first_line = index + 1, [], line
+                rows.append(row)
+                last_key = key
+            if rows:
+                yield index, first_line, rows
+
+    def load_chunk(self, load, index, first_line, rows):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(SAFE_CASTS)
+            definitions = ', '.join(
+                ['line integer'] + [f'{column} text' for column in self.columns] + ['error text']
+                + [f'{name} {sql_type}' for name, sql_type in self.resolve_columns.items()]
+            )
+            cursor.execute(f'CREATE TEMP TABLE {STAGE_TABLE} ({definitions}) ON COMMIT DROP')
+            copy_into(STAGE_TABLE, ['line', *self.columns], rows)
+            cursor.execute(f'ANALYZE {STAGE_TABLE}')
+
+            self.resolve(cursor)
+            self.merge(cursor)
+
+            chunk = BulkLoadChunk.objects.create(
+                load=load, index=index, first_line=first_line, rows=len(rows), loaded=0, rejected=0,
+            )
+            cursor.execute(
+                f'INSERT INTO {BulkLoadRejection._meta.db_table} (chunk_id, line, reason) '
+                f'SELECT %s, line, LEFT(error, 255) FROM {STAGE_TABLE} WHERE error IS NOT NULL',
+                [chunk.id],
+            )
+            rejected = cursor.rowcount
+            chunk.loaded, chunk.rejected = len(rows) - rejected, rejected
+            chunk.save(update_fields=['loaded', 'rejected'])
+
+            load.rows_loaded += chunk.loaded
+            load.rows_rejected += rejected
+            load.save(update_fields=['rows_loaded', 'rows_rejected', 'updated_at'])
+        return chunk.loaded, rejected
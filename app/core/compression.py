@@ -0,0 +1,262 @@
+"""
+Response compression and ETags for the API.
+
+CompressionMiddleware negotiates Accept-Encoding (zstd, br, gzip, in that
+order of preference among those the client accepts with q > 0) and
+compresses JSON, CSV and plain text responses above MIN_SIZE, including
+streaming ones (the sales register export), which are compressed chunk by
+chunk and flushed every STREAM_FLUSH_SIZE bytes of input. HTML is left
+alone (BREACH), as are responses that already have a Content-Encoding
+(WhiteNoise's precompressed static files) and server-sent events.
+
+On GET/HEAD it also sets a weak ETag hashed from the body that was already
+rendered, before compressing it, and answers a matching If-None-Match with
+304 Not Modified without compressing anything. The tag is weak because the
+same representation is sent with different encodings.
+
+brotli and zstandard are optional: the codecs whose package is not installed
+are not offered, gzip is always available.
+
+Settings (all optional):
+
+    COMPRESSION = {
+        'ENABLED': True,
+        'MIN_SIZE': 1024,                  # bytes; smaller bodies go uncompressed
+        'LEVELS': {'zstd': 3, 'br': 4, 'gzip': 6},
+        'STREAMING_LEVELS': {'zstd': 1, 'br': 2, 'gzip': 4},
+        'STREAM_FLUSH_SIZE': 64 * 1024,
+        'CONTENT_TYPES': ('application/json', 'text/csv', 'text/plain'),
+        'ETAG': True,
+    }
+"""
+import hashlib
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    # Levels tuned for CPU: past these the size barely improves and the time grows fast
+    'LEVELS': {'zstd': 3, 'br': 4, 'gzip': 6},
+    'STREAMING_LEVELS': {'zstd': 1, 'br': 2, 'gzip': 4},
+    'STREAM_FLUSH_SIZE': 64 * 1024,
+    'CONTENT_TYPES': ('application/json', 'text/csv', 'text/plain'),
+    'ETAG': True,
+}
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+def get_setting(name):
+    return getattr(settings, 'COMPRESSION', {}).get(name, DEFAULTS[name])
+
+
+class _Gzip:
+    def __init__(self, level):
+        # wbits=31: gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_codecs():
+    """Codecs by encoding name, in order of preference."""
+    codecs = {}
+    if zstandard is not None:
+        codecs['zstd'] = _Zstd
+    if brotli is not None:
+        codecs['br'] = _Brotli
+    codecs['gzip'] = _Gzip
+    return codecs
+
+
+CODECS = available_codecs()
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header):
+    """Encoding to use for a request's Accept-Encoding, or None."""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    # Ties keep the server's preference (the order of CODECS)
+    for coding in CODECS:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(coding, content, level):
+    compressor = CODECS[coding](level)
+    return compressor.compress(content) + compressor.finish()
+
+
+def compress_stream(chunks, compressor, flush_size):
+    read = 0
+    for chunk in chunks:
+        output = compressor.compress(chunk)
+        read += len(chunk)
+        if read >= flush_size:
+            output += compressor.flush()
+            read = 0
+        if output:
+            yield output
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, compressor, flush_size):
+    read = 0
+    async for chunk in chunks:
+        output = compressor.compress(chunk)
+        read += len(chunk)
+        if read >= flush_size:
+            output += compressor.flush()
+            read = 0
+        if output:
+            yield output
+    yield compressor.finish()
+
+
+def content_etag(content):
+    return f'W/"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type in get_setting('CONTENT_TYPES') and not response.has_header('Content-Encoding')
+
+
+class CompressionMiddleware:
+    """
+    Compresses API responses and adds ETags. Place it right after
+    InstrumentationMiddleware so it sees the final response headers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not get_setting('ENABLED') or not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if not response.streaming and get_setting('ETAG'):
+            response = self.set_etag(request, response)
+            if response.status_code == 304:
+                return response
+
+        coding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+        if response.streaming:
+            compressor = CODECS[coding](get_setting('STREAMING_LEVELS')[coding])
+            flush_size = get_setting('STREAM_FLUSH_SIZE')
+            if response.is_async:
+                response.streaming_content = acompress_stream(response.streaming_content, compressor, flush_size)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, compressor, flush_size)
+            del response['Content-Length']
+        else:
+            if len(response.content) < get_setting('MIN_SIZE'):
+                return response
+            compressed = compress(coding, response.content, get_setting('LEVELS')[coding])
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        return response
+
+    def set_etag(self, request, response):
+        if request.method not in CONDITIONAL_METHODS or response.status_code != 200:
+            return response
+        if not response.has_header('ETag'):
+            # Hashes the body the view already rendered: nothing is rendered twice
+            response['ETag'] = content_etag(response.content)
+        if not response.has_header('Cache-Control'):
+            # Tenant data: browsers may keep it, but must revalidate with the ETag
+            patch_cache_control(response, private=True, no_cache=True)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
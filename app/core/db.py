@@ -0,0 +1,102 @@
+"""
+Database helpers shared across apps.
+"""
+from itertools import chain
+
+from django.db import connection
+from django.db.models import F, Max
+
+
+def upsert_increment(model, key_fields, rows):
+    """
+    Adds the non-key values of each row to the matching record, creating the
+    record when it does not exist yet.
+
+    `rows` is a list of dicts using field attnames (e.g. "business_id"); every
+    row must have the same keys. On PostgreSQL this is a single
+    INSERT ... ON CONFLICT (key_fields) DO UPDATE statement, so concurrent
+    writers never lose increments; `key_fields` must match a unique
+    constraint of the model.
+    """
+    if not rows:
+        return
+
+    fields = list(rows[0])
+    value_fields = [name for name in fields if name not in key_fields]
+
+    if connection.vendor != 'postgresql':
+        for row in rows:
+            keys = {name: row[name] for name in key_fields}
+            values = {name: row[name] for name in value_fields}
+            obj, created = model.objects.get_or_create(**keys, defaults=values)
+            if not created:
+                model.objects.filter(pk=obj.pk).update(**{name: F(name) + value for name, value in values.items()})
+        return
+
+    opts = model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    columns = [quote(opts.get_field(name).column) for name in fields]
+    key_columns = [quote(opts.get_field(name).column) for name in key_fields]
+    value_columns = [quote(opts.get_field(name).column) for name in value_fields]
+
+    row_placeholder = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    sql = (
+        f'INSERT INTO {table} ({", ".join(columns)}) '
+        f'VALUES {", ".join([row_placeholder] * len(rows))} '
+        f'ON CONFLICT ({", ".join(key_columns)}) DO UPDATE SET '
+        + ', '.join(f'{column} = {table}.{column} + EXCLUDED.{column}' for column in value_columns)
+    )
+    params = [row[name] for row in rows for name in fields]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def advisory_lock(name):
+    """
+    Takes a PostgreSQL advisory lock on `name` until the current transaction
+    ends, so the transactions that take it run one at a time. Elsewhere it
+    does nothing: SQLite, used by the tests, has a single writer anyway.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [name])
+
+
+def reserve_ids(model, count):
+    """
+    Reserves `count` primary keys for rows inserted with explicit ids (COPY,
+    or bulk_create when the ids are needed before inserting). Returns them
+    in ascending order: a range when the block is consecutive, as it usually
+    is, otherwise an iterator over its consecutive runs.
+
+    On PostgreSQL every id is drawn with nextval() from the table's sequence
+    in a single statement, so concurrent inserts never get one of them; an
+    insert running at the same time may take ids in between, which only
+    splits the block into runs. Elsewhere the block starts after the current
+    maximum, which is only safe with a single writer.
+    """
+    if count <= 0:
+        return range(0)
+
+    opts = model._meta
+    if connection.vendor != 'postgresql':
+        last = model.objects.aggregate(last=Max(opts.pk.attname))['last'] or 0
+        return range(last + 1, last + count + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [opts.db_table, opts.pk.column])
+        sequence = cursor.fetchone()[0]
+        # Runs of consecutive ids: id - row_number() is constant within a run
+        cursor.execute(
+            'SELECT MIN(id), MAX(id) FROM ('
+            '  SELECT id, id - ROW_NUMBER() OVER (ORDER BY id) AS run'
+            '  FROM (SELECT nextval(%s) AS id FROM generate_series(1, %s)) AS drawn'
+            ') AS numbered GROUP BY run ORDER BY 1',
+            [sequence, count],
+        )
+        runs = [range(first, last + 1) for first, last in cursor.fetchall()]
+    if len(runs) == 1:
+        return runs[0]
+    return chain.from_iterable(runs)
@@ -0,0 +1,207 @@
+"""
+Sparse fieldsets and lean read-only serializers.
+
+On GET requests, ?fields=id,name,sell_price limits the response to those
+fields and ?expand=category replaces a foreign key id with the nested
+object. The view mixin also trims the SQL to match: only() loads the
+columns behind the kept fields and select_related() joins just the
+expanded relations.
+
+LeanSerializer reproduces the output of a ModelSerializer whose fields are
+all model fields, for hot list endpoints. Instead of building and running
+DRF Field objects for every row, it reads attributes through a plan of
+(name, attribute, formatter) tuples computed once per field selection.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from .instrumentation import TimedSerializerMixin
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def split_param(params, name):
+    """Comma-separated query parameter as a tuple, or None when absent."""
+    value = params.get(name)
+    if value is None:
+        return None
+    return tuple(part.strip() for part in value.split(',') if part.strip())
+
+
+class SparseFieldsetMixin:
+    """
+    ModelSerializer mixin accepting fields=[...] and expand=[...].
+    expandable_fields maps a relation to the serializer used when expanded.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in expand or ():
+            if name in self.expandable_fields and name in self.fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+        if fields is not None:
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+
+
+# -- lean serializers -----------------------------------------------------
+
+def _datetime(value):
+    # Same output as rest_framework.fields.DateTimeField with the ISO format
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _formatter(field):
+    if field.is_relation:
+        return None
+    if isinstance(field, models.DecimalField):
+        if not api_settings.COERCE_DECIMAL_TO_STRING:
+            return None
+        places = field.decimal_places
+        return lambda value: f'{value:.{places}f}'
+    if isinstance(field, models.DateTimeField):
+        return _datetime
+    if isinstance(field, (models.DateField, models.TimeField)):
+        return _isoformat
+    if isinstance(field, models.UUIDField):
+        return str
+    return None
+
+
+@lru_cache(maxsize=256)
+def _plan(serializer_class, fields, expand):
+    opts = serializer_class.Meta.model._meta
+    plan = []
+    for name in serializer_class.Meta.fields:
+        if fields is not None and name not in fields:
+            continue
+        field = opts.get_field(name)
+        nested = serializer_class.expandable_fields.get(name) if name in expand else None
+        if nested is not None:
+            plan.append((name, name, _plan(nested, None, ())))
+        else:
+            plan.append((name, field.attname, _formatter(field)))
+    return tuple(plan)
+
+
+def _represent(instance, plan):
+    data = {}
+    for name, attribute, format in plan:
+        value = getattr(instance, attribute)
+        if value is None or format is None:
+            data[name] = value
+        elif isinstance(format, tuple):
+            data[name] = _represent(value, format)
+        else:
+            data[name] = format(value)
+    return data
+
+
+class LeanSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only serializer with the output of `mirror`, a ModelSerializer
+    (with SparseFieldsetMixin) listing only model fields in Meta.fields.
+    """
+    mirror = None
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.plan = _plan(self.mirror, fields, tuple(sorted(expand or ())))
+
+    def to_representation(self, instance):
+        return _represent(instance, self.plan)
+
+
+# -- views ----------------------------------------------------------------
+
+def trim_queryset(queryset, serializer_class, fields=None, expand=()):
+    """
+    Restricts `queryset` to the columns and joins needed to render
+    serializer_class with the given selection. Left untouched when a field
+    is not a concrete model field (e.g. computed fields).
+    """
+    if issubclass(serializer_class, LeanSerializer):
+        serializer_class = serializer_class.mirror
+    if not isinstance(getattr(serializer_class.Meta, 'fields', None), (list, tuple)):
+        return queryset
+    expandable = getattr(serializer_class, 'expandable_fields', {})
+    opts = queryset.model._meta
+    columns, related = [], []
+    for name in serializer_class.Meta.fields:
+        if fields is not None and name not in fields:
+            continue
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return queryset
+        if not field.concrete:
+            return queryset
+        nested = expandable.get(name) if name in expand else None
+        if nested is None:
+            columns.append(name)
+            continue
+        related.append(name)
+        nested_opts = nested.Meta.model._meta
+        for nested_name in nested.Meta.fields:
+            try:
+                nested_field = nested_opts.get_field(nested_name)
+            except FieldDoesNotExist:
+                return queryset
+            columns.append(f'{name}__{nested_field.name}')
+    queryset = queryset.select_related(None)
+    if related:
+        # select_related() without arguments would follow every relation
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+class SparseFieldsetViewMixin:
+    """
+    ViewSet mixin: on GET, passes ?fields= and ?expand= to the serializer
+    and trims the queryset of list/retrieve accordingly. The list action
+    uses lean_serializer_class when set.
+    """
+    lean_serializer_class = None
+
+    def get_fieldset(self):
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return None, ()
+        params = self.request.query_params
+        return split_param(params, 'fields'), split_param(params, 'expand') or ()
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.lean_serializer_class is not None:
+            return self.lean_serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_fieldset()
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, (SparseFieldsetMixin, LeanSerializer)):
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            fields, expand = self.get_fieldset()
+            queryset = trim_queryset(queryset, self.get_serializer_class(), fields, expand)
+        return queryset
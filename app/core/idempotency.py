@@ -0,0 +1,129 @@
+"""
+Idempotency keys for the POS write endpoints.
+
+A POST sent with an Idempotency-Key header creates an IdempotencyRecord for
+(scope, key) in the same transaction as the write, scope being the
+request's business, so keys generated by different businesses never clash.
+The first request stores its response there; retries with the same key
+replay it (with an Idempotent-Replayed: true header) after one indexed
+lookup, without running the view again.
+
+Concurrent duplicates serialize on the record's row: on PostgreSQL the
+second INSERT waits on the unique index until the first transaction ends,
+then reads the committed record and replays it. If the first request
+fails (an error response or an exception) its record is not kept, so the
+retry runs normally. Reusing a key with a different payload is rejected
+with 422.
+
+Records expire after IDEMPOTENCY['TTL'] seconds; expired keys are treated
+as new and purge_idempotency_keys deletes them.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+DEFAULTS = {
+    'TTL': 24 * 60 * 60,
+}
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def get_setting(name):
+    return getattr(settings, 'IDEMPOTENCY', {}).get(name, DEFAULTS[name])
+
+
+def request_scope(view, request):
+    """Business of the request ("b<id>"), or its user when it has none."""
+    tenant = view.get_tenant() if hasattr(view, 'get_tenant') else None
+    if tenant is not None and tenant.business_id is not None:
+        return f'b{tenant.business_id}'
+    return f'u{request.user.pk}'
+
+
+def request_fingerprint(request):
+    # From the parsed data: the raw body may already have been consumed by DRF
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{request.method} {request.path} {payload}'.encode()).hexdigest()
+
+
+class IdempotentCreateMixin:
+    """
+    ViewSet mixin: create() honours the Idempotency-Key header. Requests
+    without it are not affected.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            raise exceptions.ValidationError({HEADER: f'Debe tener como máximo {MAX_KEY_LENGTH} caracteres.'})
+
+        scope = request_scope(self, request)
+        fingerprint = request_fingerprint(request)
+        with transaction.atomic():
+            record = IdempotencyRecord.objects.select_for_update().filter(scope=scope, key=key).first()
+            if record is not None and record.expires_at <= timezone.now():
+                record.delete()
+                record = None
+            if record is None:
+                try:
+                    with transaction.atomic():
+                        record = IdempotencyRecord.objects.create(
+                            scope=scope, key=key, fingerprint=fingerprint,
+                            expires_at=timezone.now() + timedelta(seconds=get_setting('TTL')),
+                        )
+                except IntegrityError:
+                    # A concurrent request with the same key committed first
+                    record = IdempotencyRecord.objects.select_for_update().get(scope=scope, key=key)
+                else:
+                    response = super().create(request, *args, **kwargs)
+                    if status.is_success(response.status_code):
+                        record.response_status = response.status_code
+                        record.response_data = response.data
+                        record.save(update_fields=['response_status', 'response_data'])
+                    else:
+                        record.delete()
+                    return response
+            return self.replay(record, fingerprint)
+
+    def replay(self, record, fingerprint):
+        if record.fingerprint != fingerprint:
+            return Response(
+                {'detail': 'La clave de idempotencia ya se usó con otra solicitud.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if record.response_status is None:
+            # Only reachable on databases without row locks
+            return Response(
+                {'detail': 'La solicitud original aún se está procesando.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        response = Response(record.response_data, status=record.response_status)
+        response[REPLAYED_HEADER] = 'true'
+        return response
+
+
+def purge_expired(batch_size=5000):
+    """Deletes the expired records in batches. Returns the number deleted."""
+    deleted = 0
+    while True:
+        ids = list(
+            IdempotencyRecord.objects.filter(expires_at__lte=timezone.now())
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += IdempotencyRecord.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,344 @@
+"""
+Per-request instrumentation: query count, DB time, serializer time and
+total latency, aggregated per resolved view/action (e.g. "ProductViewSet.list").
+
+- A database execute wrapper (installed on every new connection) and
+  TimedSerializerMixin record into the RequestMetrics of the current request,
+  held in a context variable so it works for sync and async views alike.
+- InstrumentationMiddleware opens the RequestMetrics, adds a Server-Timing
+  header, checks the endpoint's budget and logs a warning when it is
+  exceeded, together with the most repeated statement (the usual N+1 tell).
+- Totals are kept in process memory and exposed in Prometheus text format by
+  core.views.metrics. Each worker process reports its own counters; the
+  scraper aggregates them. Other apps can append their own metrics with
+  registry.add_collector() (e.g. the job queues, read from the database).
+
+Work done after the response is returned (StreamingHttpResponse bodies) is
+not measured.
+
+Settings (all optional):
+
+    INSTRUMENTATION = {
+        'ENABLED': True,
+        'SERVER_TIMING': True,
+        'METRICS_TOKEN': None,          # Bearer token required by /internal/metrics/
+        'DEFAULT_BUDGET': {'queries': 50, 'ms': 1000},
+        'BUDGETS': {
+            'ProductViewSet.list': {'queries': 5, 'ms': 300},
+        },
+        'DUPLICATE_QUERY_THRESHOLD': 5,  # same statement this many times => N+1 warning
+    }
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('sisfac.instrumentation')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'METRICS_TOKEN': None,
+    'DEFAULT_BUDGET': {'queries': 50, 'ms': 1000},
+    'BUDGETS': {},
+    'DUPLICATE_QUERY_THRESHOLD': 5,
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+UNRESOLVED = 'unresolved'
+
+# Only these statements are tracked for repetitions (not BEGIN/SAVEPOINT...)
+DML_PREFIXES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+_current = ContextVar('sisfac_request_metrics', default=None)
+
+
+def get_setting(name):
+    return getattr(settings, 'INSTRUMENTATION', {}).get(name, DEFAULTS[name])
+
+
+class RequestMetrics:
+    """Measurements of a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint = UNRESOLVED
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.statements = Counter()
+        self._serializer_depth = 0
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if sql.lstrip()[:6].upper() in DML_PREFIXES:
+            self.statements[sql] += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_metrics():
+    """RequestMetrics of the request being served, or None outside a request."""
+    return _current.get()
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - start)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """connection_created receiver: times every statement run on the connection."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent in to_representation to the current request's
+    serializer time. Nested serializers are only counted once.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        metrics._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics._serializer_depth -= 1
+            if metrics._serializer_depth == 0:
+                metrics.serializer_time += time.perf_counter() - start
+
+
+def endpoint_name(view_func, method):
+    """
+    "ProductViewSet.list" for DRF viewsets, "ClassName.get" for class-based
+    views and "module.function" for function views.
+    """
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is not None:
+        actions = getattr(view_func, 'actions', None) or {}
+        return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+    return f'{view_func.__module__}.{getattr(view_func, "__name__", type(view_func).__name__)}'
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.responses = Counter()
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.budget_exceeded = 0
+
+
+class MetricsRegistry:
+    """Process-wide totals per (endpoint, method)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(_EndpointStats)
+        self._collectors = []
+
+    def add_collector(self, collector):
+        """Adds a callable returning more metrics, in the same text format, to render()."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def observe(self, metrics, method, status_code, over_budget):
+        with self._lock:
+            stats = self._stats[metrics.endpoint, method]
+            stats.responses[status_code] += 1
+            stats.latency.observe(metrics.elapsed)
+            stats.queries.observe(metrics.queries)
+            stats.db_seconds += metrics.db_time
+            stats.serializer_seconds += metrics.serializer_time
+            stats.budget_exceeded += int(over_budget)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            items = sorted(self._stats.items())
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            def labels(endpoint, method, **extra):
+                pairs = {'endpoint': endpoint, 'method': method, **extra}
+                return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items()) + '}'
+
+            family('sisfac_http_responses_total', 'counter', 'Responses per endpoint and status code.')
+            for (endpoint, method), stats in items:
+                for status_code, count in sorted(stats.responses.items()):
+                    lines.append(f'sisfac_http_responses_total{labels(endpoint, method, status=status_code)} {count}')
+
+            for name, attr, help_text in (
+                ('sisfac_http_request_duration_seconds', 'latency', 'Total request latency.'),
+                ('sisfac_db_queries_per_request', 'queries', 'Database queries per request.'),
+            ):
+                family(name, 'histogram', help_text)
+                for (endpoint, method), stats in items:
+                    histogram = getattr(stats, attr)
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{labels(endpoint, method, le=bound)} {count}')
+                    lines.append(f'{name}_bucket{labels(endpoint, method, le="+Inf")} {histogram.count}')
+                    lines.append(f'{name}_sum{labels(endpoint, method)} {histogram.sum}')
+                    lines.append(f'{name}_count{labels(endpoint, method)} {histogram.count}')
+
+            for name, attr, help_text in (
+                ('sisfac_db_time_seconds_total', 'db_seconds', 'Time spent executing database queries.'),
+                ('sisfac_serializer_time_seconds_total', 'serializer_seconds', 'Time spent in serializers.'),
+                ('sisfac_budget_exceeded_total', 'budget_exceeded', 'Requests over their query or latency budget.'),
+            ):
+                family(name, 'counter', help_text)
+                for (endpoint, method), stats in items:
+                    lines.append(f'{name}{labels(endpoint, method)} {getattr(stats, attr)}')
+
+        text = '\n'.join(lines) + '\n'
+        for collector in self._collectors:
+            try:
+                text += collector()
+            except Exception:
+                # A failing collector must not take the endpoint metrics down with it
+                logger.exception('Metrics collector %s failed', getattr(collector, '__qualname__', collector))
+        return text
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def budget_for(endpoint):
+    return {**get_setting('DEFAULT_BUDGET'), **get_setting('BUDGETS').get(endpoint, {})}
+
+
+def check_budget(metrics, method, path):
+    """Logs a warning when the request went over its budget. Returns True if it did."""
+    budget = budget_for(metrics.endpoint)
+    elapsed_ms = metrics.elapsed * 1000
+    breaches = []
+    if budget.get('queries') is not None and metrics.queries > budget['queries']:
+        breaches.append(f'queries {metrics.queries} > {budget["queries"]}')
+    if budget.get('ms') is not None and elapsed_ms > budget['ms']:
+        breaches.append(f'latency {elapsed_ms:.0f}ms > {budget["ms"]}ms')
+
+    repeated = None
+    if metrics.statements:
+        sql, times = metrics.statements.most_common(1)[0]
+        if times >= get_setting('DUPLICATE_QUERY_THRESHOLD'):
+            repeated = (sql, times)
+
+    if breaches:
+        extra = f'; most repeated ({repeated[1]}x): {repeated[0][:300]}' if repeated else ''
+        logger.warning(
+            'Budget exceeded for %s %s (%s): %s%s',
+            method, path, metrics.endpoint, ', '.join(breaches), extra,
+        )
+    elif repeated:
+        logger.warning(
+            'Possible N+1 in %s %s (%s): statement executed %sx: %s',
+            method, path, metrics.endpoint, repeated[1], repeated[0][:300],
+        )
+    return bool(breaches)
+
+
+def server_timing(metrics):
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'ser;dur={metrics.serializer_time * 1000:.1f}',
+        f'total;dur={metrics.elapsed * 1000:.1f}',
+    ])
+
+
+class InstrumentationMiddleware:
+    """
+    Measures every request. Place it first in MIDDLEWARE so the latency
+    includes the rest of the middleware stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not get_setting('ENABLED'):
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not get_setting('ENABLED'):
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.endpoint = endpoint_name(view_func, request.method)
+
+    def finish(self, request, response, metrics):
+        over_budget = check_budget(metrics, request.method, request.path)
+        registry.observe(metrics, request.method, response.status_code, over_budget)
+        if get_setting('SERVER_TIMING'):
+            response['Server-Timing'] = server_timing(metrics)
+        return response
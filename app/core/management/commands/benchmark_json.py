@@ -0,0 +1,99 @@
+"""
+Django management command to compare the JSON renderers and parsers of the
+API (see core.renderers) on large product and document lists.
+
+Serializes up to --rows products and documents from the configured database
+with the API serializers, then renders and parses them --repeat times with
+DRF's JSONRenderer/JSONParser and with FastJSONRenderer/FastJSONParser,
+checking that both produce the same bytes.
+
+Example:
+    docker compose exec app python manage.py benchmark_json --rows 10000
+"""
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from operations.models import Product
+from operations.serializers import ProductListSerializer
+from taxes.models import SunatDocument
+from taxes.serializers import SunatDocumentSerializer
+
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compara el renderer/parser JSON de DRF con el basado en orjson sobre listas grandes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Número máximo de productos y de comprobantes a serializar (5000 por defecto)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Repeticiones por medición; se reporta la mediana (20 por defecto)',
+        )
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson no está instalado: no hay nada que comparar.')
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows y --repeat deben ser positivos')
+
+        rows = options['rows']
+        datasets = {
+            'productos': ProductListSerializer(Product.objects.order_by('id')[:rows], many=True).data,
+            'comprobantes': SunatDocumentSerializer(
+                SunatDocument.objects.order_by('id')[:rows], many=True,
+            ).data,
+        }
+        if not any(datasets.values()):
+            raise CommandError('No hay datos: ejecute primero generate_dataset.')
+
+        standard, fast = JSONRenderer(), renderers.FastJSONRenderer()
+        for name, data in datasets.items():
+            if not data:
+                self.stdout.write(f'  - {name}: sin filas, omitido')
+                continue
+            expected = standard.render(data)
+            content = fast.render(data)
+            if content != expected:
+                raise CommandError(f'La salida de FastJSONRenderer difiere de JSONRenderer en {name}.')
+
+            render_std = median_ms(lambda: standard.render(data), options['repeat'])
+            render_fast = median_ms(lambda: fast.render(data), options['repeat'])
+            parse_std = median_ms(lambda: JSONParser().parse(io.BytesIO(content)), options['repeat'])
+            parse_fast = median_ms(lambda: renderers.FastJSONParser().parse(io.BytesIO(content)), options['repeat'])
+
+            self.stdout.write(
+                f'  ✓ {name}: {len(data)} filas, {len(content) / 1024:.0f} KiB\n'
+                f'      render  DRF {render_std:8.1f} ms   orjson {render_fast:8.1f} ms   '
+                f'x{render_std / max(render_fast, 1e-6):.1f}\n'
+                f'      parse   DRF {parse_std:8.1f} ms   orjson {parse_fast:8.1f} ms   '
+                f'x{parse_std / max(parse_fast, 1e-6):.1f}'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Salida idéntica entre ambos renderers\n'
+                f'   Mediana de {options["repeat"]} repeticiones'
+            )
+        )
@@ -0,0 +1,80 @@
+"""
+Django management command to bulk load catalogs and historical documents
+from CSV files with PostgreSQL COPY. Loads are resumable: running the same
+file again continues after the last loaded chunk.
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from operations.loaders import ProductLoader
+from taxes.loaders import DocumentLoader
+
+from core.bulkload import LoadError
+from core.models import BulkLoadRejection
+
+LOADERS = {
+    ProductLoader.kind: ProductLoader,
+    DocumentLoader.kind: DocumentLoader,
+}
+
+
+class Command(BaseCommand):
+    help = 'Carga masiva de productos o comprobantes históricos desde un CSV (PostgreSQL COPY)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=sorted(LOADERS),
+            help='Tipo de carga',
+        )
+        parser.add_argument(
+            'path',
+            type=str,
+            help='Ruta del archivo CSV (con encabezados)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Filas por transacción (50000 por defecto)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignora una carga anterior incompleta del mismo archivo y empieza de cero',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'No existe el archivo {path}')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser mayor a 0')
+
+        loader = LOADERS[options['kind']](stdout=self.stdout)
+        try:
+            load = loader.run(path, chunk_size=options['chunk_size'], restart=options['restart'])
+        except LoadError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Carga {load.id} completada!\n'
+                f'   Filas cargadas: {load.rows_loaded}\n'
+                f'   Filas rechazadas: {load.rows_rejected}'
+            )
+        )
+
+        rejections = (
+            BulkLoadRejection.objects
+            .filter(chunk__load=load)
+            .order_by('line')
+            .values_list('line', 'reason')[:10]
+        )
+        for line, reason in rejections:
+            self.stdout.write(self.style.WARNING(f'   Línea {line}: {reason}'))
+        if load.rows_rejected > len(rejections):
+            self.stdout.write(f'   ... ver todas las líneas rechazadas en el admin (carga {load.id})')
+
+        if loader.kind == DocumentLoader.kind and load.rows_loaded:
+            self.stdout.write('   Ejecuta backfill_rollups para actualizar los reportes de las fechas cargadas.')
@@ -0,0 +1,536 @@
+"""
+Django management command to generate a synthetic dataset for benchmarks.
+
+Creates N businesses, each with M products, parties and K orders (with items
+and SUNAT documents), using realistic distributions:
+- product popularity follows a Zipf law (a few products sell most),
+- prices are log-normal, quantities and items per order are geometric,
+- orders are spread over --days with more sales on Fridays/Saturdays and at
+  midday, 85% paid, 8% cancelled and 7% open,
+- paid orders get a factura (RUC customers) or boleta, a few are voided and
+  a few get a credit note.
+
+Rows are written in batches with bulk_create, or with PostgreSQL COPY
+(--copy). Primary keys are reserved up front so children reference their
+parents without reading them back. Everything is deterministic from --seed.
+"""
+import itertools
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.db import reserve_ids
+from core.pgcopy import copy_rows
+from operations.models import Business, Category, Order, OrderItem, Product, Profile
+from taxes.models import DocumentType, Party, SunatDocument, SunatDocumentItem, SunatDocumentKey
+
+User = get_user_model()
+
+DOCUMENT_TYPES = [
+    ('01', 'Factura'),
+    ('03', 'Boleta'),
+    ('07', 'Nota de crédito'),
+    ('08', 'Nota de débito'),
+]
+
+CATEGORY_NAMES = [
+    'Herramientas', 'Electricidad', 'Plomería', 'Pinturas', 'Jardín',
+    'Ferretería', 'Iluminación', 'Baños', 'Cocinas', 'Pisos',
+    'Maderas', 'Seguridad', 'Automotriz', 'Limpieza', 'Organización',
+]
+
+PRODUCT_WORDS = [
+    'Martillo', 'Taladro', 'Foco', 'Cable', 'Tubo', 'Llave', 'Pintura', 'Brocha',
+    'Manguera', 'Tornillo', 'Clavo', 'Cerradura', 'Lija', 'Cinta', 'Interruptor',
+    'Enchufe', 'Grifo', 'Silicona', 'Escalera', 'Linterna',
+]
+
+PRODUCT_QUALIFIERS = [
+    'Industrial', 'Económico', 'Premium', 'LED', 'PVC', 'Acero', 'Cobre',
+    'Blanco', 'Negro', 'Mediano', 'Grande', 'Pequeño', '1/2"', '3/4"', '10m',
+]
+
+UNITS = ['U'] * 14 + ['BX', 'B', 'KG', 'L', 'ML', 'G']
+
+FIRST_NAMES = [
+    'Juan', 'María', 'José', 'Rosa', 'Luis', 'Carmen', 'Carlos', 'Ana', 'Jorge', 'Lucía',
+    'Miguel', 'Elena', 'Pedro', 'Sofía', 'Víctor', 'Patricia', 'César', 'Gabriela',
+]
+
+LAST_NAMES = [
+    'Quispe', 'Flores', 'Sánchez', 'García', 'Rodríguez', 'Huamán', 'Mamani', 'Chávez',
+    'Torres', 'Ramírez', 'Vargas', 'Rojas', 'Castillo', 'Mendoza', 'Díaz', 'Gutiérrez',
+]
+
+COMPANY_WORDS = [
+    'Constructora', 'Inversiones', 'Comercial', 'Servicios', 'Corporación', 'Distribuidora',
+    'Andina', 'del Sur', 'Norte', 'Lima', 'Pacífico', 'Industrial', 'Global', 'Inca',
+]
+
+COMPANY_SUFFIXES = ['S.A.C.', 'S.A.', 'E.I.R.L.', 'S.R.L.']
+
+# Ventas relativas por día de la semana (lunes = 0)
+WEEKDAY_WEIGHTS = [0.9, 0.85, 0.9, 1.0, 1.25, 1.4, 0.7]
+
+ORDER_STATUSES = ['PAID', 'CANCELLED', 'OPEN']
+ORDER_STATUS_WEIGHTS = [0.85, 0.08, 0.07]
+
+IGV_RATE = Decimal('0.18')
+CENT = Decimal('0.01')
+UNIT_PRICE_PLACES = Decimal('0.0001')
+
+
+def category_name(i):
+    name = CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+    return name if i < len(CATEGORY_NAMES) else f'{name} {i // len(CATEGORY_NAMES) + 1}'
+
+
+def money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def geometric(rng, mean, maximum):
+    """1, 2, 3... with P(k) decreasing geometrically, capped at `maximum`."""
+    p = 1 / mean
+    return min(maximum, 1 + int(math.log(1 - rng.random()) / math.log(1 - p))) if p < 1 else 1
+
+
+class Writer:
+    """
+    Buffers rows per model and writes them in batches, with bulk_create or
+    PostgreSQL COPY. Rows are dicts of field attnames including the primary
+    key and timestamps; every row of a model must have the same keys.
+    Buffers are flushed in the order models were first written, so parents
+    always reach the database before their children.
+    """
+
+    def __init__(self, use_copy, batch_size):
+        self.use_copy = use_copy
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.written = {}
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, rows in self.buffers.items():
+            if not rows:
+                continue
+            if self.use_copy:
+                fields = list(rows[0])
+                copy_rows(model, fields, ([row[name] for name in fields] for row in rows))
+            else:
+                model.objects.bulk_create([model(**row) for row in rows])
+            self.written[model] = self.written.get(model, 0) + len(rows)
+            rows.clear()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Lets bulk_create keep the given created_at/updated_at instead of now()."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un dataset sintético y reproducible para benchmarks: N negocios con '
+        'productos, clientes, pedidos e ítems, y comprobantes SUNAT'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=3, help='Cantidad de negocios (N)')
+        parser.add_argument('--products', type=int, default=1000, help='Productos por negocio (M)')
+        parser.add_argument('--orders', type=int, default=2000, help='Pedidos por negocio (K)')
+        parser.add_argument('--parties', type=int, default=500, help='Clientes por negocio')
+        parser.add_argument('--categories', type=int, default=10, help='Categorías por negocio')
+        parser.add_argument('--max-items', type=int, default=12, help='Máximo de ítems por pedido')
+        parser.add_argument('--mean-items', type=float, default=2.5, help='Promedio de ítems por pedido')
+        parser.add_argument('--days', type=int, default=365, help='Días de historia de los pedidos')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Exponente de popularidad de productos')
+        parser.add_argument(
+            '--document-ratio',
+            type=float,
+            default=0.8,
+            help='Proporción de pedidos pagados con comprobante SUNAT',
+        )
+        parser.add_argument('--void-ratio', type=float, default=0.02, help='Proporción de comprobantes anulados')
+        parser.add_argument(
+            '--credit-note-ratio',
+            type=float,
+            default=0.01,
+            help='Proporción de comprobantes con nota de crédito',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Semilla para datos reproducibles')
+        parser.add_argument('--prefix', default='Bench', help='Prefijo del nombre de los negocios generados')
+        parser.add_argument('--password', default='bench-pass', help='Contraseña de los usuarios propietarios')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Carga con COPY de PostgreSQL en lugar de bulk_create',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Elimina los negocios generados previamente con el mismo prefijo',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy requiere PostgreSQL.')
+
+        existing = Business.objects.filter(name__startswith=f'{prefix} ')
+        if existing.exists():
+            if not options['reset']:
+                raise CommandError(
+                    f'Ya existen negocios con el prefijo "{prefix}". Usa --reset para regenerarlos.'
+                )
+            deleted = self.reset(existing, prefix)
+            self.stdout.write(f'Eliminados {deleted} registros del dataset anterior')
+
+        self.document_types = {
+            code: DocumentType.objects.get_or_create(code=code, defaults={'name': name})[0].id
+            for code, name in DOCUMENT_TYPES
+        }
+
+        totals = {}
+        started = time.monotonic()
+        for index in range(1, options['businesses'] + 1):
+            business_started = time.monotonic()
+            # Un generador por negocio: agregar negocios no altera los anteriores
+            rng = random.Random(f'{options["seed"]}:{index}')
+            writer = Writer(options['copy'], options['batch_size'])
+            with transaction.atomic(), explicit_timestamps(Category, Product, Order, OrderItem):
+                self.generate_business(index, rng, writer, options)
+                writer.flush()
+
+            rows = sum(writer.written.values())
+            elapsed = time.monotonic() - business_started
+            for model, count in writer.written.items():
+                totals[model] = totals.get(model, 0) + count
+            self.stdout.write(
+                f'  {prefix} {index}: {rows} filas en {elapsed:.1f}s ({rows / max(elapsed, 0.001):,.0f} filas/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Dataset generado:'))
+        self.stdout.write(f'   - Negocios: {options["businesses"]}')
+        for model, label in (
+            (Category, 'Categorías'),
+            (Product, 'Productos'),
+            (Party, 'Clientes'),
+            (Order, 'Pedidos'),
+            (OrderItem, 'Ítems de pedido'),
+            (SunatDocument, 'Comprobantes'),
+            (SunatDocumentItem, 'Ítems de comprobante'),
+        ):
+            self.stdout.write(f'   - {label}: {totals.get(model, 0)}')
+        self.stdout.write(f'   - Tiempo total: {time.monotonic() - started:.1f}s')
+        self.stdout.write(f'   - Usuarios: {prefix.lower()}_owner_<n> / {options["password"]}')
+        self.stdout.write('   Ejecuta backfill_rollups para poblar los reportes.')
+
+    def reset(self, businesses, prefix):
+        """
+        Deletes the generated businesses child tables first, since products,
+        categories, parties and referenced documents are PROTECTed.
+        """
+        business_ids = list(businesses.values_list('id', flat=True))
+        documents = SunatDocument.objects.filter(business_id__in=business_ids)
+        deleted = 0
+        with transaction.atomic():
+            for queryset in (
+                documents.filter(ref_document__isnull=False),
+                documents,
+                Order.objects.filter(business_id__in=business_ids),
+                Product.objects.filter(business_id__in=business_ids),
+                Category.objects.filter(business_id__in=business_ids),
+                Party.objects.filter(business_id__in=business_ids),
+                User.objects.filter(username__startswith=f'{prefix.lower()}_'),
+                Business.objects.filter(id__in=business_ids),
+            ):
+                deleted += queryset.delete()[0]
+        return deleted
+
+    def generate_business(self, index, rng, writer, options):
+        prefix = options['prefix']
+        now = timezone.now()
+        start = now - timedelta(days=options['days'])
+
+        business = Business.objects.create(
+            name=f'{prefix} {index}',
+            ruc=f'20{index:09d}',
+            tax_enabled=True,
+        )
+        owner = User.objects.create_user(
+            username=f'{prefix.lower()}_owner_{index}',
+            email=f'owner{index}@{prefix.lower()}.test',
+            password=options['password'],
+        )
+        Profile.objects.create(user=owner, business=business, role='PR')
+
+        category_ids = reserve_ids(Category, options['categories'])
+        for i, category_id in enumerate(category_ids):
+            writer.add(Category, {
+                'id': category_id,
+                'business_id': business.id,
+                'name': category_name(i),
+                'description': None,
+                'created_at': start,
+                'updated_at': start,
+            })
+
+        products = self.generate_products(index, rng, writer, options, business, category_ids, start)
+        parties = self.generate_parties(rng, writer, options, business)
+        self.generate_orders(rng, writer, options, business, owner, products, parties, start, now)
+
+    def generate_products(self, index, rng, writer, options, business, category_ids, start):
+        """Returns [(id, sell_price, tax_affectation, description)] ordered by popularity."""
+        products = []
+        for i, product_id in enumerate(reserve_ids(Product, options['products'])):
+            buy_price = money(Decimal(min(5000.0, max(0.5, rng.lognormvariate(3.2, 1.0)))))
+            sell_price = money(buy_price * Decimal(str(round(rng.uniform(1.15, 1.8), 2))))
+            name = f'{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_QUALIFIERS)} {i}'
+            writer.add(Product, {
+                'id': product_id,
+                'business_id': business.id,
+                'category_id': rng.choice(category_ids),
+                'code': f'P{index:03d}-{i:07d}',
+                'name': name,
+                'description': None,
+                'stock': int(rng.expovariate(1 / 80)),
+                'sell_price': sell_price,
+                'buy_price': buy_price,
+                'unit_of_measurement': rng.choice(UNITS),
+                'created_at': start,
+                'updated_at': start,
+            })
+            # ~3% de productos exonerados de IGV
+            products.append((product_id, sell_price, '20' if rng.random() < 0.03 else '10', name))
+        # La popularidad no depende del orden de creación
+        rng.shuffle(products)
+        return products
+
+    def generate_parties(self, rng, writer, options, business):
+        """Returns {'generic': id, 'persons': [ids], 'companies': [ids]}."""
+        parties = {'persons': [], 'companies': []}
+        party_ids = iter(reserve_ids(Party, options['parties'] + 1))
+
+        parties['generic'] = next(party_ids)
+        writer.add(Party, self.party_row(parties['generic'], business, '0', '00000000', 'Clientes Varios'))
+
+        used = set()
+        for party_id in party_ids:
+            company = rng.random() < 0.3
+            while True:
+                if company:
+                    doc_type, doc_number = '6', f'{rng.choice(["10", "20"])}{rng.randint(0, 999999999):09d}'
+                else:
+                    doc_type, doc_number = '1', f'{rng.randint(10000000, 99999999)}'
+                if (doc_type, doc_number) not in used:
+                    used.add((doc_type, doc_number))
+                    break
+            if company:
+                name = f'{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}'
+                parties['companies'].append(party_id)
+            else:
+                name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}'
+                parties['persons'].append(party_id)
+            writer.add(Party, self.party_row(party_id, business, doc_type, doc_number, name))
+        return parties
+
+    def party_row(self, party_id, business, doc_type, doc_number, name):
+        return {
+            'id': party_id,
+            'business_id': business.id,
+            'doc_type': doc_type,
+            'doc_number': doc_number,
+            'name': name,
+            'address': '',
+            'email': '',
+            'phone': '',
+            'is_active': True,
+        }
+
+    def generate_orders(self, rng, writer, options, business, owner, products, parties, start, now):
+        tz = timezone.get_current_timezone()
+        days = [start.date() + timedelta(days=offset) for offset in range(options['days'] + 1)]
+        # Más ventas en días recientes (crecimiento) y en viernes/sábado
+        day_weights = list(itertools.accumulate(
+            WEEKDAY_WEIGHTS[day.weekday()] * (0.6 + 0.4 * offset / len(days))
+            for offset, day in enumerate(days)
+        ))
+        product_weights = list(itertools.accumulate(
+            1 / (rank ** options['zipf']) for rank in range(1, len(products) + 1)
+        ))
+
+        order_ids = reserve_ids(Order, options['orders'])
+        # Comprobantes + notas de crédito nunca superan el doble de pedidos;
+        # los IDs no usados solo dejan huecos en la secuencia
+        document_ids = iter(reserve_ids(SunatDocument, options['orders'] * 2))
+        created = sorted(
+            self.order_datetime(rng, days, day_weights, tz, now) for _ in range(options['orders'])
+        )
+        numbers = {}
+        today = timezone.localdate(now)
+
+        for order_id, created_at in zip(order_ids, created):
+            status = rng.choices(ORDER_STATUSES, ORDER_STATUS_WEIGHTS)[0]
+            lines = {}
+            for product in rng.choices(
+                products, cum_weights=product_weights,
+                k=geometric(rng, options['mean_items'], options['max_items']),
+            ):
+                lines[product] = lines.get(product, 0) + geometric(rng, 1.8, 50)
+
+            with_document = status == 'PAID' and rng.random() < options['document_ratio']
+            writer.add(Order, {
+                'id': order_id,
+                'business_id': business.id,
+                'status': status,
+                'payment_term': 'CASH' if rng.random() < 0.9 else 'CREDIT',
+                'currency': 'PEN',
+                'issued_at': created_at + timedelta(minutes=rng.randint(1, 30)) if with_document else None,
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+
+            items = []
+            for (product_id, price, tax_affectation, description), quantity in lines.items():
+                discount = money(price * quantity * Decimal(rng.randint(5, 15)) / 100) if rng.random() < 0.1 else None
+                items.append((product_id, price, tax_affectation, description, quantity, discount))
+                writer.add(OrderItem, {
+                    'order_id': order_id,
+                    'product_id': product_id,
+                    'quantity': quantity,
+                    'price': price,
+                    'discount': discount,
+                    'created_by_id': owner.id,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                })
+
+            if with_document:
+                self.generate_document(
+                    rng, writer, options, business, parties, document_ids, numbers,
+                    order_id, created_at, items, today,
+                )
+
+    def order_datetime(self, rng, days, day_weights, tz, now):
+        day = rng.choices(days, cum_weights=day_weights)[0]
+        # Horario comercial 8:00-21:00 con pico al mediodía
+        minutes = int(rng.triangular(8 * 60, 21 * 60, 13 * 60))
+        moment = timezone.make_aware(datetime.combine(day, datetime.min.time()), tz) + timedelta(minutes=minutes)
+        return min(moment, now)
+
+    def generate_document(self, rng, writer, options, business, parties, document_ids, numbers,
+                          order_id, created_at, items, today):
+        factura = bool(parties['companies']) and rng.random() < 0.25
+        if factura:
+            document_type, series, party_id = '01', 'F001', rng.choice(parties['companies'])
+        else:
+            document_type, series = '03', 'B001'
+            generic = not parties['persons'] or rng.random() < 0.6
+            party_id = parties['generic'] if generic else rng.choice(parties['persons'])
+
+        document_id = next(document_ids)
+        issue_date = timezone.localdate(created_at)
+        status = 'VOID' if rng.random() < options['void_ratio'] else 'ISSUED'
+        lines = self.document_lines(items)
+        self.add_document(
+            writer, business, document_id, document_type, series, numbers,
+            issue_date, party_id, order_id, status, lines, ref_document_id=None,
+        )
+
+        if status == 'ISSUED' and rng.random() < options['credit_note_ratio']:
+            self.add_document(
+                writer, business, next(document_ids), '07', 'FC01' if factura else 'BC01', numbers,
+                min(today, issue_date + timedelta(days=rng.randint(0, 10))), party_id, None,
+                'ISSUED', lines, ref_document_id=document_id,
+            )
+
+    def document_lines(self, items):
+        """(product_id, description, quantity, unit_price, discount, tax_affectation, line_total, igv)"""
+        lines = []
+        for product_id, price, tax_affectation, description, quantity, discount in items:
+            taxed = tax_affectation == '10'
+            # El precio de venta incluye IGV
+            unit_price = (price / (1 + IGV_RATE) if taxed else price).quantize(UNIT_PRICE_PLACES)
+            discount = money(discount / (1 + IGV_RATE) if taxed else discount) if discount else Decimal('0.00')
+            line_total = money(unit_price * quantity - discount)
+            igv = money(line_total * IGV_RATE) if taxed else Decimal('0.00')
+            lines.append((product_id, description, quantity, unit_price, discount, tax_affectation, line_total, igv))
+        return lines
+
+    def add_document(self, writer, business, document_id, document_type, series, numbers,
+                     issue_date, party_id, order_id, status, lines, ref_document_id):
+        key = (document_type, series)
+        numbers[key] = numbers.get(key, 0) + 1
+        total_taxable = sum((line[6] for line in lines if line[5] == '10'), Decimal('0.00'))
+        total_igv = sum((line[7] for line in lines), Decimal('0.00'))
+        total = sum((line[6] for line in lines), Decimal('0.00')) + total_igv
+
+        writer.add(SunatDocument, {
+            'id': document_id,
+            'business_id': business.id,
+            'direction': 'SALE',
+            'document_type_id': self.document_types[document_type],
+            'series': series,
+            'number': numbers[key],
+            'issue_date': issue_date,
+            'party_id': party_id,
+            'order_id': order_id,
+            'currency': 'PEN',
+            'exchange_rate': None,
+            'payment_term': 'CASH',
+            'due_date': None,
+            'total_taxable': total_taxable,
+            'total_igv': total_igv,
+            'total': total,
+            'status': status,
+            'ref_document_id': ref_document_id,
+        })
+        writer.add(SunatDocumentKey, {
+            'document_id': document_id,
+            'business_id': business.id,
+            'direction': 'SALE',
+            'document_type_id': self.document_types[document_type],
+            'series': series,
+            'number': numbers[key],
+            'order_id': order_id,
+        })
+        for product_id, description, quantity, unit_price, discount, tax_affectation, line_total, _ in lines:
+            writer.add(SunatDocumentItem, {
+                'document_id': document_id,
+                'issue_date': issue_date,
+                'product_id': product_id,
+                'description': description,
+                'quantity': Decimal(quantity),
+                'unit_price': unit_price,
+                'discount': discount,
+                'tax_affectation': tax_affectation,
+                'igv_rate': IGV_RATE,
+                'line_total': line_total,
+            })
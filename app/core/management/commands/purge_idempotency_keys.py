@@ -0,0 +1,29 @@
+"""
+Django management command to delete the expired idempotency records
+(see core.idempotency), in batches so the table is never locked for long.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from core.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Elimina las claves de idempotencia vencidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Registros eliminados por lote (5000 por defecto)',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+        deleted = purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Claves eliminadas: {deleted}'
+            )
+        )
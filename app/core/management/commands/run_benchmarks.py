@@ -0,0 +1,362 @@
+"""
+Django management command to benchmark the core API flows in-process.
+
+Runs scripted scenarios (product search, checkout, document issue/list)
+through the full Django stack with the test client against the configured
+database (the docker-compose Postgres when run inside the app container),
+and writes a JSON report with latency percentiles, query counts and the git
+commit, so runs of different commits can be compared with --compare.
+
+Example:
+    docker compose exec app python manage.py generate_dataset --businesses 3 --products 5000 --orders 20000
+    docker compose exec -e GIT_COMMIT=$(git rev-parse HEAD) app \
+        python manage.py run_benchmarks --output /app/benchmarks/$(git rev-parse --short HEAD).json
+"""
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import time
+from datetime import date
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from operations.models import Business, Order, OrderItem, Product, Profile
+from taxes.models import DocumentType, Party, SunatDocument
+
+SERVER_TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+SEARCH_TERMS = ['martillo', 'foco', 'cable', 'pintura', 'llave', 'tubo', 'led', 'acero']
+
+BENCH_SERIES = 'B999'
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def git_commit():
+    commit = os.environ.get('GIT_COMMIT')
+    if commit:
+        return commit
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Scenario:
+    """
+    A benchmarked flow. run() performs one iteration through the client and
+    returns the responses it produced; each one must be < 400 to count as ok.
+    """
+    name = None
+
+    def __init__(self, bench):
+        self.bench = bench
+        self.client = bench.client
+
+    def setup(self):
+        pass
+
+    def run(self, iteration):
+        raise NotImplementedError
+
+
+class ProductSearch(Scenario):
+    """GET /api/products/?search=... (DRF, paginado)"""
+    name = 'product_search'
+
+    def run(self, iteration):
+        term = SEARCH_TERMS[iteration % len(SEARCH_TERMS)]
+        return [self.client.get('/api/products/', {'search': term, 'ordering': '-sell_price'})]
+
+
+class ProductSearchAsync(Scenario):
+    """GET /api/async/products/?search=... (vista asíncrona)"""
+    name = 'product_search_async'
+
+    def run(self, iteration):
+        term = SEARCH_TERMS[iteration % len(SEARCH_TERMS)]
+        return [self.client.get('/api/async/products/', {'search': term, 'ordering': '-sell_price'})]
+
+
+class Checkout(Scenario):
+    """Crea un pedido, agrega 3 ítems y lo marca como pagado."""
+    name = 'checkout'
+
+    def setup(self):
+        self.products = list(
+            Product.objects.filter(business=self.bench.business).values('id', 'sell_price')[:200]
+        )
+        if not self.products:
+            raise CommandError('El negocio no tiene productos. Ejecuta generate_dataset primero.')
+
+    def run(self, iteration):
+        responses = [self.client.post(
+            '/api/orders/', {'business': self.bench.business.id}, content_type='application/json'
+        )]
+        if responses[0].status_code >= 400:
+            return responses
+        order_id = responses[0].json()['id']
+        for offset in range(3):
+            product = self.products[(iteration * 3 + offset) % len(self.products)]
+            responses.append(self.client.post('/api/order-items/', {
+                'order': order_id,
+                'product': product['id'],
+                'quantity': 1 + offset,
+                'price': str(product['sell_price']),
+                'created_by': self.bench.user.id,
+            }, content_type='application/json'))
+        responses.append(self.client.patch(
+            f'/api/orders/{order_id}/', {'status': 'PAID'}, content_type='application/json'
+        ))
+        return responses
+
+
+class DocumentIssue(Scenario):
+    """Crea una boleta en borrador con un ítem y la emite."""
+    name = 'document_issue'
+
+    def setup(self):
+        business = self.bench.business
+        self.document_type = DocumentType.objects.get_or_create(code='03', defaults={'name': 'Boleta'})[0]
+        self.party = Party.objects.get_or_create(
+            business=business, doc_type='0', doc_number='00000000', defaults={'name': 'Clientes Varios'}
+        )[0]
+        self.next_number = (
+            SunatDocument.objects.filter(
+                business=business, document_type=self.document_type, series=BENCH_SERIES
+            ).aggregate(last=Max('number'))['last'] or 0
+        ) + 1
+
+    def run(self, iteration):
+        number, self.next_number = self.next_number, self.next_number + 1
+        responses = [self.client.post('/taxes/sunat-documents/', {
+            'business': self.bench.business.id,
+            'document_type': self.document_type.id,
+            'series': BENCH_SERIES,
+            'number': number,
+            'issue_date': date.today().isoformat(),
+            'party': self.party.id,
+            'total_taxable': '100.00',
+            'total_igv': '18.00',
+            'total': '118.00',
+        }, content_type='application/json')]
+        if responses[0].status_code >= 400:
+            return responses
+        document_id = responses[0].json()['id']
+        responses.append(self.client.post('/taxes/sunat-document-items/', {
+            'document': document_id,
+            'description': 'Producto de prueba',
+            'quantity': '1',
+            'unit_price': '100.00',
+            'line_total': '100.00',
+        }, content_type='application/json'))
+        responses.append(self.client.patch(
+            f'/taxes/sunat-documents/{document_id}/', {'status': 'ISSUED'}, content_type='application/json'
+        ))
+        return responses
+
+
+class DocumentList(Scenario):
+    """GET /taxes/sunat-documents/"""
+    name = 'document_list'
+
+    def run(self, iteration):
+        return [self.client.get('/taxes/sunat-documents/')]
+
+
+class DocumentStatusAsync(Scenario):
+    """GET /taxes/async/sunat-documents/status/?ids=... (20 comprobantes)"""
+    name = 'document_status_async'
+
+    def setup(self):
+        self.ids = list(
+            SunatDocument.objects.filter(business=self.bench.business)
+            .order_by('-id').values_list('id', flat=True)[:20]
+        )
+
+    def run(self, iteration):
+        return [self.client.get('/taxes/async/sunat-documents/status/', {'ids': ','.join(map(str, self.ids))})]
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (ProductSearch, ProductSearchAsync, Checkout, DocumentIssue, DocumentList, DocumentStatusAsync)
+}
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los benchmarks de los flujos principales de la API y genera un reporte JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios',
+            default=','.join(SCENARIOS),
+            help=f'Escenarios separados por comas ({", ".join(SCENARIOS)})',
+        )
+        parser.add_argument('--iterations', type=int, default=100, help='Iteraciones por escenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Iteraciones de calentamiento (no se miden)')
+        parser.add_argument('--business-id', type=int, help='Negocio a usar (por defecto el primero del dataset)')
+        parser.add_argument('--prefix', default='Bench', help='Prefijo de los negocios de generate_dataset')
+        parser.add_argument('--output', help='Archivo donde escribir el reporte JSON (por defecto stdout)')
+        parser.add_argument('--compare', help='Reporte JSON anterior contra el cual comparar')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=10.0,
+            help='Porcentaje de aumento del p95 o de consultas considerado regresión (con --compare)',
+        )
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Escenarios desconocidos: {", ".join(unknown)}')
+
+        if options['business_id']:
+            business = Business.objects.filter(pk=options['business_id']).first()
+        else:
+            business = Business.objects.filter(name__startswith=f'{options["prefix"]} ').order_by('id').first()
+        if business is None:
+            raise CommandError('No se encontró el negocio. Ejecuta generate_dataset primero.')
+
+        profile = Profile.objects.select_related('user').filter(business=business).order_by('id').first()
+        if profile is None:
+            raise CommandError(f'El negocio {business.id} no tiene usuarios.')
+
+        self.business = business
+        self.user = profile.user
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        self.client = Client(
+            raise_request_exception=False,
+            HTTP_HOST=host,
+            HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(self.user)}',
+        )
+
+        report = {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'settings': os.environ.get('DJANGO_SETTINGS_MODULE'),
+            },
+            'dataset': {
+                'business_id': business.id,
+                'products': Product.objects.filter(business=business).count(),
+                'orders': Order.objects.filter(business=business).count(),
+                'order_items': OrderItem.objects.filter(order__business=business).count(),
+                'documents': SunatDocument.objects.filter(business=business).count(),
+            },
+            'iterations': options['iterations'],
+            'scenarios': {},
+        }
+
+        for name in names:
+            self.stderr.write(f'Ejecutando {name}...')
+            report['scenarios'][name] = self.run_scenario(SCENARIOS[name](self), options)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['output'])), exist_ok=True)
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Reporte escrito en {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            self.compare(report, options['compare'], options['threshold'])
+
+    def run_scenario(self, scenario, options):
+        scenario.setup()
+        for iteration in range(options['warmup']):
+            scenario.run(iteration)
+
+        latencies, queries, db_times, serializer_times = [], [], [], []
+        requests = errors = 0
+        statuses = {}
+        for iteration in range(options['iterations']):
+            start = time.perf_counter()
+            responses = scenario.run(options['warmup'] + iteration)
+            latencies.append(time.perf_counter() - start)
+
+            iteration_queries = iteration_db = iteration_serializer = 0.0
+            for response in responses:
+                requests += 1
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                errors += response.status_code >= 400
+                timing = {
+                    match.group(1): (float(match.group(2)), match.group(3))
+                    for match in SERVER_TIMING.finditer(response.get('Server-Timing', ''))
+                }
+                if 'db' in timing:
+                    iteration_db += timing['db'][0]
+                    iteration_queries += int(timing['db'][1] or 0)
+                if 'ser' in timing:
+                    iteration_serializer += timing['ser'][0]
+            queries.append(iteration_queries)
+            db_times.append(iteration_db)
+            serializer_times.append(iteration_serializer)
+
+        latencies.sort()
+        return {
+            'description': (type(scenario).__doc__ or '').strip(),
+            'iterations': options['iterations'],
+            'requests': requests,
+            'errors': errors,
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+            'latency_ms': {
+                'mean': round(statistics.mean(latencies) * 1000, 2),
+                'p50': round(percentile(latencies, 50) * 1000, 2),
+                'p95': round(percentile(latencies, 95) * 1000, 2),
+                'p99': round(percentile(latencies, 99) * 1000, 2),
+                'max': round(latencies[-1] * 1000, 2),
+            },
+            'queries_per_iteration': round(statistics.mean(queries), 2),
+            'db_ms_per_iteration': round(statistics.mean(db_times), 2),
+            'serializer_ms_per_iteration': round(statistics.mean(serializer_times), 2),
+        }
+
+    def compare(self, report, baseline_path, threshold):
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        self.stderr.write(f'\nComparación contra {baseline.get("commit") or baseline_path}:')
+        regressions = 0
+        for name, current in report['scenarios'].items():
+            previous = baseline.get('scenarios', {}).get(name)
+            if previous is None:
+                self.stderr.write(f'  {name}: sin datos en la línea base')
+                continue
+            for label, before, after in (
+                ('p95', previous['latency_ms']['p95'], current['latency_ms']['p95']),
+                ('consultas', previous['queries_per_iteration'], current['queries_per_iteration']),
+            ):
+                change = (after - before) / before * 100 if before else 0.0
+                regressed = change > threshold
+                regressions += regressed
+                line = f'  {name} {label}: {before} -> {after} ({change:+.1f}%)'
+                self.stderr.write(self.style.ERROR(line) if regressed else line)
+
+        if regressions:
+            raise CommandError(f'{regressions} regresiones sobre el umbral de {threshold}%')
+        self.stderr.write(self.style.SUCCESS('✅ Sin regresiones'))
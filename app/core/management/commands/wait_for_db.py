@@ -1,10 +1,12 @@
 """
-Django command to wait for the database to be available.
+Django command to wait for the databases to be available: the primary and
+every read replica in DATABASES.
 """
 import time
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.db import connections
 from django.db.utils import OperationalError
 from django.core.management.base import BaseCommand
 
@@ -15,13 +17,17 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
-            try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        for alias in connections:
+            db_up = False
+            while db_up is False:
+                try:
+                    self.check(databases=[alias])
+                    # The checks only connect when a model check needs it
+                    connections[alias].ensure_connection()
+                    db_up = True
+                except (Psycopg2OpError, OperationalError):
+                    self.stdout.write(f'Database {alias} unavailable, waiting 1 second...')
+                    time.sleep(1)
+            self.stdout.write(f'  ✓ {alias}')
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('source', models.CharField(max_length=255)),
+                ('checksum', models.CharField(max_length=64)),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('RUNNING', 'En curso'), ('DONE', 'Completado'), ('FAILED', 'Fallido')], default='RUNNING', max_length=10)),
+                ('rows_loaded', models.BigIntegerField(default=0)),
+                ('rows_rejected', models.BigIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'checksum', 'chunk_size'], name='core_bulklo_kind_346ee9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BulkLoadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('first_line', models.PositiveIntegerField()),
+                ('rows', models.PositiveIntegerField()),
+                ('loaded', models.PositiveIntegerField()),
+                ('rejected', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('load', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='core.bulkload')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BulkLoadRejection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.PositiveIntegerField()),
+                ('reason', models.CharField(max_length=255)),
+                ('chunk', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rejections', to='core.bulkloadchunk')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='bulkloadchunk',
+            constraint=models.UniqueConstraint(fields=('load', 'index'), name='uq_bulkloadchunk_load_index'),
+        ),
+    ]
@@ -1,6 +1,111 @@
 from django.contrib.auth.models import AbstractUser
-# from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 
 
 class User(AbstractUser):
-    pass
+    # Bumped when a field that access tokens depend on changes, which
+    # revokes the tokens issued before (see core.authentication)
+    token_version = models.PositiveIntegerField(default=1, editable=False)
+
+    TOKEN_FIELDS = ("is_staff", "is_superuser", "is_active")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_token_fields = {
+            name: instance.__dict__[name] for name in cls.TOKEN_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_loaded_token_fields", {})
+        if any(getattr(self, name) != value for name, value in loaded.items()):
+            self.token_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "token_version"}
+        super().save(*args, **kwargs)
+        self._loaded_token_fields = {name: getattr(self, name) for name in self.TOKEN_FIELDS}
+        # The next request re-reads the token state instead of the cached one
+        from .authentication import forget_token_state
+
+        user_id = self.pk
+        transaction.on_commit(lambda: forget_token_state(user_id))
+
+
+class BulkLoad(models.Model):
+    """
+    One run of the bulk loader over an input file (see core.bulkload).
+    A load is identified by kind + file checksum + chunk size, so running
+    the same file again resumes it, skipping the chunks already merged.
+    """
+    STATUS_CHOICES = [
+        ("RUNNING", "En curso"),
+        ("DONE", "Completado"),
+        ("FAILED", "Fallido"),
+    ]
+
+    kind = models.CharField(max_length=30)
+    source = models.CharField(max_length=255)
+    checksum = models.CharField(max_length=64)
+    chunk_size = models.PositiveIntegerField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="RUNNING")
+    rows_loaded = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["kind", "checksum", "chunk_size"])]
+
+
+class BulkLoadChunk(models.Model):
+    """
+    A chunk merged into the real tables. It is written in the same
+    transaction as the merge, so it exists if and only if the chunk was loaded.
+    """
+    load = models.ForeignKey(BulkLoad, on_delete=models.CASCADE, related_name="chunks")
+    index = models.PositiveIntegerField()
+    first_line = models.PositiveIntegerField()
+    rows = models.PositiveIntegerField()
+    loaded = models.PositiveIntegerField()
+    rejected = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["load", "index"], name="uq_bulkloadchunk_load_index"),
+        ]
+
+
+class BulkLoadRejection(models.Model):
+    """Input line rejected by validation or FK resolution, with the reason."""
+    chunk = models.ForeignKey(BulkLoadChunk, on_delete=models.CASCADE, related_name="rejections")
+    line = models.PositiveIntegerField()
+    reason = models.CharField(max_length=255)
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Response of a POST sent with an Idempotency-Key header, replayed to the
+    retries of the same request (see core.idempotency). `scope` is the
+    business of the request ("b<id>"), or the user for platform admins
+    without one ("u<id>").
+    """
+    scope = models.CharField(max_length=30)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key"], name="uq_idempotency_scope_key"),
+        ]
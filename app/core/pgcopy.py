@@ -0,0 +1,77 @@
+"""
+PostgreSQL COPY helpers for bulk loads.
+
+COPY ... FROM STDIN streams rows in PostgreSQL's text format over a single
+statement, skipping the per-row parsing and planning of INSERT; it is the
+fastest way to load millions of rows. Rows are produced lazily and encoded
+as the server reads them, so memory stays flat regardless of the input size.
+"""
+import io
+from datetime import date, datetime
+
+from django.db import connection
+
+
+def _encode(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class RowStream(io.TextIOBase):
+    """Read-only file object over an iterable of row tuples, in COPY text format."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = ''
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += '\t'.join(map(_encode, row)) + '\n'
+            self.count += 1
+        if size < 0:
+            chunk, self._buffer = self._buffer, ''
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def copy_into(table, columns, rows):
+    """
+    COPY `rows` (tuples in `columns` order) into `table`, both given as
+    database names. Returns the number of rows copied.
+    """
+    quote = connection.ops.quote_name
+    stream = RowStream(rows)
+    sql = f'COPY {quote(table)} ({", ".join(quote(column) for column in columns)}) FROM STDIN'
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, stream, size=65536)
+    return stream.count
+
+
+def copy_rows(model, fields, rows):
+    """
+    COPY `rows` into the table of `model`. `fields` are field attnames
+    (e.g. "business_id") in the order of each row tuple. Values are written
+    as-is: every NOT NULL column without a database default (including
+    primary keys and auto_now timestamps) must be provided.
+    """
+    opts = model._meta
+    return copy_into(opts.db_table, [opts.get_field(name).column for name in fields], rows)
@@ -0,0 +1,308 @@
+"""
+Read replica routing.
+
+ReplicaRouter sends every write, migration and read inside a transaction to
+`default` (the primary). Other reads go to a replica only while a request
+allows it, as decided by ReplicaRoutingMiddleware:
+
+- Only safe requests (GET/HEAD/OPTIONS): list/retrieve actions, reports and
+  exports. Streaming bodies (the sales register export) are read with the
+  same routing while they are sent.
+- Read-your-writes: once a request writes, the rest of it reads from the
+  primary, and the client (its Authorization header, or session cookie)
+  stays pinned to the primary for PIN_SECONDS, longer than the lag a
+  replica may have and still be used.
+- The lag of each replica is measured at most every LAG_CHECK_INTERVAL
+  seconds per process. A replica more than MAX_LAG seconds behind, or
+  unreachable, is skipped; with none left the request reads from the
+  primary. One replica is picked per request so its reads see a single
+  timeline.
+
+Outside requests (commands, job workers) everything uses the primary,
+except inside `with replica_reads():`. Reads whose results are cached
+under a version bumped on commit (reports.analytics) run inside
+`with primary_reads():`, so a lagging replica can never store data older
+than the version it is cached under.
+
+Pins are kept in the cache named by CACHE, which every process must share
+(e.g. a DatabaseCache, always read from the primary). With a per-process
+cache (LocMemCache, DummyCache) a pin would only hold within the process
+that served the write, so replicas are not used at all and an error is
+logged.
+
+Settings (all optional):
+
+    READ_REPLICAS = {
+        'ALIASES': None,            # database aliases; by default every one but 'default'
+        'MAX_LAG': 5.0,             # seconds
+        'LAG_CHECK_INTERVAL': 5.0,  # seconds
+        'PIN_SECONDS': 10,
+        'CACHE': 'default',         # cache alias of the pins
+    }
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('sisfac.routing')
+
+DEFAULTS = {
+    'ALIASES': None,
+    'MAX_LAG': 5.0,
+    'LAG_CHECK_INTERVAL': 5.0,
+    'PIN_SECONDS': 10,
+    'CACHE': 'default',
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds behind the primary; 0 when it has replayed everything it received
+LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_routing = ContextVar('sisfac_db_routing', default=None)
+
+# Cache backends only visible to the process that writes them
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+# alias -> (monotonic time of the check, lag in seconds or None if unreachable)
+_lags = {}
+_lags_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'READ_REPLICAS', {}).get(name, DEFAULTS[name])
+
+
+_refused = False
+
+
+def pin_cache():
+    return caches[get_setting('CACHE')]
+
+
+def replica_aliases():
+    """Replicas that may be read from; none while the pins' cache is not shared."""
+    global _refused
+    aliases = get_setting('ALIASES')
+    if aliases is None:
+        aliases = [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+    if aliases and isinstance(pin_cache(), PROCESS_LOCAL_CACHES):
+        if not _refused:
+            _refused = True
+            logger.error(
+                "Read replicas are disabled: cache %r is not shared between processes "
+                "(set READ_REPLICAS['CACHE'] to a shared cache)", get_setting('CACHE'),
+            )
+        return []
+    return aliases
+
+
+def measure_lag(alias):
+    """Seconds `alias` is behind the primary, or None if it cannot be queried."""
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0] or 0)
+    except DatabaseError:
+        logger.warning('Replica %s is unreachable', alias, exc_info=True)
+        return None
+
+
+def replica_lag(alias):
+    """Lag of `alias`, measured again when the last measure is older than LAG_CHECK_INTERVAL."""
+    now = time.monotonic()
+    checked = _lags.get(alias)
+    if checked is not None and now - checked[0] < get_setting('LAG_CHECK_INTERVAL'):
+        return checked[1]
+    lag = measure_lag(alias)
+    with _lags_lock:
+        _lags[alias] = (now, lag)
+    return lag
+
+
+def healthy_replica():
+    """A replica within MAX_LAG, picked at random, or None."""
+    max_lag = get_setting('MAX_LAG')
+    healthy = []
+    for alias in replica_aliases():
+        lag = replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            healthy.append(alias)
+    return random.choice(healthy) if healthy else None
+
+
+class Routing:
+    """Routing state of a request (or of a replica_reads() block)."""
+    __slots__ = ("allow_replica", "wrote", "alias")
+
+    def __init__(self, allow_replica):
+        self.allow_replica = allow_replica
+        self.wrote = False
+        # Replica picked on the first read; None until then
+        self.alias = None
+
+    def read_alias(self):
+        if not self.allow_replica or self.wrote:
+            return None
+        if self.alias is None:
+            self.alias = healthy_replica() or DEFAULT_DB_ALIAS
+        return self.alias
+
+
+@contextmanager
+def replica_reads():
+    """Reads of the block go to a replica (e.g. exports run from a command)."""
+    token = _routing.set(Routing(allow_replica=bool(replica_aliases())))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Reads of the block go to the primary, even within a request that allows replicas."""
+    token = _routing.set(Routing(allow_replica=False))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS entry; see the module docstring."""
+
+    def db_for_read(self, model, **hints):
+        # DatabaseCache entries (pins among them) are written and read on the primary
+        if model._meta.app_label == "django_cache":
+            return DEFAULT_DB_ALIAS
+        routing = _routing.get()
+        if routing is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return routing.read_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def client_key(request):
+    """Identity of the client for pinning, or None if it sent no credentials."""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return 'db:pin:' + hashlib.blake2b(credentials.encode(), digest_size=16).hexdigest()
+
+
+class _RoutedStream:
+    """Iterates a streaming body with the request's routing in place."""
+
+    def __init__(self, routing, chunks):
+        self.routing = routing
+        self.chunks = iter(chunks)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = _routing.set(self.routing)
+        try:
+            return next(self.chunks)
+        finally:
+            _routing.reset(token)
+
+
+class _ARoutedStream:
+    """Async version of _RoutedStream (ASGI streaming bodies)."""
+
+    def __init__(self, routing, chunks):
+        self.routing = routing
+        self.chunks = aiter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        token = _routing.set(self.routing)
+        try:
+            # sync_to_async calls made while awaiting copy this context
+            return await anext(self.chunks)
+        finally:
+            _routing.reset(token)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sets the routing of each request and pins the client to the primary
+    after a write. Place it after AuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        routing, key = self.start(request)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response, routing, key)
+
+    async def __acall__(self, request):
+        routing, key = self.start(request)
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response, routing, key)
+
+    def start(self, request):
+        key = client_key(request)
+        allow_replica = request.method in SAFE_METHODS and bool(replica_aliases())
+        if allow_replica and key is not None and pin_cache().get(key):
+            allow_replica = False
+        return Routing(allow_replica), key
+
+    def finish(self, request, response, routing, key):
+        if key is not None and (routing.wrote or request.method not in SAFE_METHODS):
+            pin_cache().set(key, 1, get_setting('PIN_SECONDS'))
+        if response.streaming and routing.allow_replica:
+            stream = _ARoutedStream if response.is_async else _RoutedStream
+            response.streaming_content = stream(routing, response.streaming_content)
+        return response
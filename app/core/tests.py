@@ -1,3 +1,452 @@
-from django.test import TestCase
+import gzip
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from operations.models import Business, Category, Order, Product, Profile
+from . import bulkload, compression, db, instrumentation, renderers, routing
+from .idempotency import REPLAYED_HEADER
+from .models import BulkLoad, BulkLoadChunk, IdempotencyRecord, User
+from .tokens import add_claims
+
+
+class TokenRevocationTests(TestCase):
+    """Access tokens built from claims stop working when what they claim changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.profile = Profile.objects.create(user=cls.staff, business=cls.business, role='PR')
+        cls.superuser = User.objects.create_user('root', password='x', is_superuser=True)
+
+    def setUp(self):
+        # Token states cached by other tests refer to rolled back rows
+        cache.clear()
+
+    def token(self, user):
+        return 'JWT ' + str(add_claims(AccessToken.for_user(user), user))
+
+    def get(self, token, url):
+        return self.client.get(url, HTTP_AUTHORIZATION=token)
+
+    def save(self, instance):
+        # Dropping the cached token state runs on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def test_losing_staff_revokes_the_token(self):
+        token = self.token(self.staff)
+        self.assertEqual(self.get(token, '/api/profiles/').status_code, 200)
+        self.staff.is_staff = False
+        self.save(self.staff)
+        self.assertEqual(self.get(token, '/api/profiles/').status_code, 401)
+        self.assertEqual(self.get(self.token(self.staff), '/api/profiles/').status_code, 403)
+
+    def test_losing_superuser_without_profile_revokes_the_token(self):
+        token = self.token(self.superuser)
+        self.assertEqual(self.get(token, '/api/businesses/').status_code, 200)
+        self.superuser.is_superuser = False
+        self.save(self.superuser)
+        self.assertEqual(self.get(token, '/api/businesses/').status_code, 401)
+
+    def test_role_change_revokes_the_token(self):
+        token = self.token(self.staff)
+        self.profile.role = 'EM'
+        self.save(self.profile)
+        self.assertEqual(self.get(token, '/api/profiles/me/').status_code, 401)
+        self.assertEqual(self.get(self.token(User.objects.get(pk=self.staff.pk)), '/api/profiles/me/').status_code, 200)
+
+    def test_inactive_profile_cannot_authenticate_or_refresh(self):
+        token = self.token(self.staff)
+        refresh = str(RefreshToken.for_user(self.staff))
+        self.profile.is_active = False
+        self.save(self.profile)
+        self.assertEqual(self.get(token, '/api/profiles/me/').status_code, 401)
+        self.assertEqual(self.get(self.token(User.objects.get(pk=self.staff.pk)), '/api/profiles/me/').status_code, 401)
+        response = self.client.post('/auth/jwt/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_unrelated_change_keeps_the_token(self):
+        token = self.token(self.staff)
+        self.staff.first_name = 'Ana'
+        self.save(self.staff)
+        self.assertEqual(self.get(token, '/api/profiles/').status_code, 200)
+
+
+class IdempotencyTests(TestCase):
+    """POSTs retried with the same Idempotency-Key are replayed, not run again."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.user = User.objects.create_user('cajero', password='x')
+        Profile.objects.create(user=cls.user, business=cls.business, role='AD')
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(self.user), self.user))
+
+    def post(self, data, key='pos-1'):
+        return self.client.post('/api/orders/', data, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response(self):
+        data = {'business': self.business.pk, 'payment_term': 'CASH'}
+        first = self.post(data)
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn(REPLAYED_HEADER, first)
+
+        retry = self.post(data)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry[REPLAYED_HEADER], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_same_key_with_another_payload_is_rejected(self):
+        self.assertEqual(self.post({'business': self.business.pk, 'payment_term': 'CASH'}).status_code, 201)
+        response = self.post({'business': self.business.pk, 'payment_term': 'CREDIT'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_request_does_not_keep_the_key(self):
+        self.assertEqual(self.post({'business': self.business.pk, 'status': 'PAID'}).status_code, 400)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self.post({'business': self.business.pk}).status_code, 201)
+
+    def test_expired_key_runs_again(self):
+        data = {'business': self.business.pk}
+        self.assertEqual(self.post(data).status_code, 201)
+        IdempotencyRecord.objects.update(expires_at=timezone.now())
+        response = self.post(data)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(REPLAYED_HEADER, response)
+        self.assertEqual(Order.objects.count(), 2)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """Replicas are only used with a shared pin cache, and never for cached reports."""
+
+    def setUp(self):
+        routing._refused = False
+
+    @override_settings(READ_REPLICAS={'ALIASES': ['replica_1']})
+    def test_process_local_pin_cache_disables_replicas(self):
+        with self.assertLogs('sisfac.routing', 'ERROR'):
+            self.assertEqual(routing.replica_aliases(), [])
+
+    @override_settings(
+        READ_REPLICAS={'ALIASES': ['replica_1'], 'CACHE': 'routing'},
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'routing': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_routing_cache'},
+        },
+    )
+    def test_shared_pin_cache_enables_replicas(self):
+        self.assertEqual(routing.replica_aliases(), ['replica_1'])
+        router = routing.ReplicaRouter()
+        with mock.patch.object(routing, 'healthy_replica', return_value='replica_1'), routing.replica_reads():
+            self.assertEqual(router.db_for_read(Order), 'replica_1')
+            # Pins are read from the primary
+            self.assertEqual(router.db_for_read(caches['routing'].cache_model_class), 'default')
+            with routing.primary_reads():
+                self.assertEqual(router.db_for_read(Order), 'default')
+
+
+class InstrumentationTests(TestCase):
+    """Requests are counted per endpoint and checked against their budgets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.user = User.objects.create_user('admin', password='x')
+        Profile.objects.create(user=cls.user, business=business, role='AD')
+
+    def setUp(self):
+        cache.clear()
+        instrumentation.registry.reset()
+        self.addCleanup(instrumentation.registry.reset)
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(self.user), self.user))
+
+    def metric(self, text, name, **labels):
+        prefix = name + '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+        values = [line.split()[-1] for line in text.splitlines() if line.startswith(prefix + ' ')]
+        return values[0] if values else None
+
+    def test_request_is_counted_under_its_endpoint(self):
+        response = self.client.get('/api/products/')
+        self.assertIn('queries"', response['Server-Timing'])
+        self.client.get('/api/products/')
+
+        text = instrumentation.registry.render()
+        endpoint = {'endpoint': 'ProductViewSet.list', 'method': 'GET'}
+        self.assertEqual(self.metric(text, 'sisfac_http_responses_total', **endpoint, status=200), '2')
+        self.assertEqual(self.metric(text, 'sisfac_db_queries_per_request_count', **endpoint), '2')
+        self.assertEqual(self.metric(text, 'sisfac_budget_exceeded_total', **endpoint), '0')
+
+    @override_settings(INSTRUMENTATION={'BUDGETS': {'ProductViewSet.list': {'queries': 0}}})
+    def test_request_over_budget_is_logged_and_counted(self):
+        with self.assertLogs('sisfac.instrumentation', 'WARNING') as logs:
+            self.client.get('/api/products/')
+        self.assertIn('Budget exceeded for GET /api/products/ (ProductViewSet.list): queries', logs.output[0])
+        text = instrumentation.registry.render()
+        self.assertEqual(
+            self.metric(text, 'sisfac_budget_exceeded_total', endpoint='ProductViewSet.list', method='GET'), '1'
+        )
+
+    def test_repeated_statement_is_reported(self):
+        metrics = instrumentation.RequestMetrics()
+        metrics.endpoint = 'OrderViewSet.list'
+        for _ in range(5):
+            metrics.record_query('SELECT * FROM operations_product WHERE id = %s', 0.001)
+        metrics.record_query('SAVEPOINT s1', 0.001)
+        with self.assertLogs('sisfac.instrumentation', 'WARNING') as logs:
+            self.assertFalse(instrumentation.check_budget(metrics, 'GET', '/api/orders/'))
+        self.assertIn('Possible N+1', logs.output[0])
+        self.assertEqual(metrics.queries, 6)
+
+    @override_settings(INSTRUMENTATION={'METRICS_TOKEN': 'secreto'})
+    def test_metrics_endpoint_requires_the_token(self):
+        self.assertEqual(self.client.get('/internal/metrics/').status_code, 403)
+        response = self.client.get('/internal/metrics/', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE sisfac_http_responses_total counter', response.content)
+
+
+class RendererTests(SimpleTestCase):
+    """The orjson renderer writes the same bytes as DRF's, falling back to it when orjson refuses the data."""
+
+    data = {
+        'price': Decimal('2.50'), 'at': datetime(2026, 3, 1, 10, 0, 0, 123456, tzinfo=dt_timezone.utc),
+        'name': 'Agua\u2028mineral', 1: None,
+    }
+
+    def test_output_matches_drf(self):
+        self.assertEqual(renderers.render_json(self.data), JSONRenderer().render(self.data))
+        self.assertEqual(
+            renderers.render_json(self.data, indent=True),
+            JSONRenderer().render(self.data, renderer_context={'indent': 2}),
+        )
+
+    def test_integers_beyond_64_bits(self):
+        data = {'id': 2 ** 64, 'ids': [-2 ** 70, 1]}
+        self.assertEqual(renderers.render_json(data), b'{"id":18446744073709551616,"ids":[-1180591620717411303424,1]}')
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_unserializable_data_still_fails(self):
+        with self.assertRaises(TypeError):
+            renderers.render_json({'value': object()})
+
+
+class NegotiationTests(SimpleTestCase):
+    """The server's preferred codec among those the client accepts with q > 0."""
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate('gzip, deflate, br, zstd'), 'zstd')
+        self.assertEqual(compression.negotiate('gzip;q=1.0, br;q=0.5'), 'gzip')
+        self.assertEqual(compression.negotiate('zstd;q=0, br'), 'br')
+        self.assertEqual(compression.negotiate('*;q=0.1, zstd;q=0'), 'br')
+        self.assertEqual(compression.negotiate('GZIP;q=bad, gzip'), 'gzip')
+
+    def test_nothing_acceptable(self):
+        for header in ('', 'identity', 'deflate', 'gzip;q=0', '*;q=0'):
+            self.assertIsNone(compression.negotiate(header), header)
+
+    def test_stream_is_compressed_chunk_by_chunk(self):
+        chunks = [f'{line},Agua,2.00\n'.encode() * 50 for line in range(20)]
+        middleware = compression.CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks), content_type='text/csv')
+        )
+        request = RequestFactory().get('/taxes/export/', HTTP_ACCEPT_ENCODING='gzip')
+        with override_settings(COMPRESSION={'STREAM_FLUSH_SIZE': 1024}):
+            response = middleware(request)
+            parts = list(response.streaming_content)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertGreater(len(parts), 2)
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+    def test_html_and_encoded_responses_are_left_alone(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        for response in (
+            HttpResponse(b'<p>' * 1000, content_type='text/html'),
+            HttpResponse(b'{}' * 1000, content_type='application/json', headers={'Content-Encoding': 'br'}),
+        ):
+            result = compression.CompressionMiddleware(lambda request: response)(request)
+            self.assertFalse(result.has_header('ETag'))
+            self.assertNotEqual(result.get('Content-Encoding'), 'gzip')
+
+
+class CompressionTests(TestCase):
+    """API responses get a weak ETag from the uncompressed body and are compressed when large enough."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.user = User.objects.create_user('admin', password='x')
+        Profile.objects.create(user=cls.user, business=business, role='AD')
+        category = Category.objects.create(business=business, name='Bebidas')
+        Product.objects.bulk_create([
+            Product(
+                business=business, category=category, name=f'Producto {number}', description='Botella de vidrio',
+                sell_price=Decimal('2.00'), buy_price=Decimal('1.00'), unit_of_measurement='U',
+            )
+            for number in range(20)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(self.user), self.user))
+
+    def test_etag_is_the_same_for_every_encoding(self):
+        plain = self.client.get('/api/products/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertTrue(plain['ETag'].startswith('W/"'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertIn('no-cache', plain['Cache-Control'])
+
+        compressed = self.client.get('/api/products/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['ETag'], plain['ETag'])
+        self.assertEqual(compressed['Content-Length'], str(len(compressed.content)))
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+    def test_matching_if_none_match_returns_304(self):
+        etag = self.client.get('/api/products/')['ETag']
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        Product.objects.update(stock=5)
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_small_bodies_and_writes_are_not_tagged_or_compressed(self):
+        response = self.client.get('/api/products/', {'fields': 'id', 'page_size': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(response.has_header('ETag'))
+        product = Product.objects.first()
+        response = self.client.patch(
+            f'/api/products/{product.pk}/', {'name': 'Agua'}, content_type='application/json',
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ReserveIdsTests(TestCase):
+    """Reserved ids come after the rows already there and are usable as explicit keys."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.first = Category.objects.create(business=cls.business, name='Bebidas')
+
+    def test_block_is_consecutive_and_free(self):
+        ids = db.reserve_ids(Category, 3)
+        self.assertEqual(list(ids), [self.first.pk + 1, self.first.pk + 2, self.first.pk + 3])
+        Category.objects.bulk_create([
+            Category(pk=pk, business=self.business, name=f'Categoría {pk}') for pk in ids
+        ])
+        self.assertEqual(Category.objects.count(), 4)
+        self.assertGreater(db.reserve_ids(Category, 1)[0], max(ids))
+
+    def test_nothing_to_reserve(self):
+        self.assertEqual(list(db.reserve_ids(Category, 0)), [])
+        self.assertEqual(list(db.reserve_ids(Category, -1)), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'nextval() needs PostgreSQL')
+    def test_sequence_does_not_hand_out_reserved_ids(self):
+        ids = list(db.reserve_ids(Category, 5))
+        self.assertEqual(len(ids), 5)
+        later = Category.objects.create(business=self.business, name='Snacks')
+        self.assertNotIn(later.pk, ids)
+        self.assertGreater(later.pk, max(ids))
+
+
+class RecordingLoader(bulkload.Loader):
+    """Loader whose chunks only record themselves, failing once at `fail_at`."""
+    kind = 'tests'
+    columns = ['document', 'item']
+    required = ['document']
+    group_by = ['document']
+
+    def __init__(self, fail_at=None):
+        super().__init__()
+        self.fail_at = fail_at
+        self.loaded = []
+
+    def load_chunk(self, load, index, first_line, rows):
+        if index == self.fail_at:
+            self.fail_at = None
+            raise RuntimeError('conexión perdida')
+        BulkLoadChunk.objects.create(
+            load=load, index=index, first_line=first_line, rows=len(rows), loaded=len(rows), rejected=0,
+        )
+        self.loaded.append(index)
+        return len(rows), 0
+
+
+class BulkLoadTests(TestCase):
+    """Chunks never split a group, and an interrupted load resumes after its last merged chunk."""
+
+    def csv(self, text):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'carga.csv'
+        path.write_text(text, encoding='utf-8')
+        return path
+
+    def test_chunks_keep_groups_together(self):
+        path = self.csv('document,item\nA,1\nA,2\nA,3\nB,1\nC,1\nC,2\n')
+        chunks = list(RecordingLoader().chunks(path, 2))
+        self.assertEqual(
+            [(index, first_line, [row[1:] for row in rows]) for index, first_line, rows in chunks],
+            [
+                (0, 2, [('A', '1'), ('A', '2'), ('A', '3')]),
+                (1, 5, [('B', '1'), ('C', '1'), ('C', '2')]),
+            ],
+        )
+
+    def test_missing_required_column(self):
+        path = self.csv('item\n1\n')
+        with self.assertRaisesMessage(bulkload.LoadError, 'document'):
+            list(RecordingLoader().chunks(path, 2))
+
+    def test_requires_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('runs on PostgreSQL')
+        with self.assertRaises(bulkload.LoadError):
+            RecordingLoader().run(self.csv('document\nA\n'))
+
+    def test_interrupted_load_resumes(self):
+        path = self.csv('document\nA\nB\nC\nD\n')
+        loader = RecordingLoader(fail_at=2)
+        with mock.patch.object(bulkload.connection, 'vendor', 'postgresql'):
+            with self.assertRaisesMessage(RuntimeError, 'conexión perdida'):
+                loader.run(path, chunk_size=1)
+            load = BulkLoad.objects.get()
+            self.assertEqual((load.status, load.error_message), ('FAILED', 'conexión perdida'))
+
+            self.assertEqual(loader.run(path, chunk_size=1), load)
+            self.assertEqual(loader.loaded, [0, 1, 2, 3])
+            load.refresh_from_db()
+            self.assertEqual((load.status, load.error_message, load.chunks.count()), ('DONE', None, 4))
+
+            # A finished load is not resumed, and restart ignores an unfinished one
+            loader.run(path, chunk_size=1)
+            self.assertEqual(BulkLoad.objects.count(), 2)
+            BulkLoad.objects.filter(pk=load.pk).update(status='FAILED')
+            loader.run(path, chunk_size=1, restart=True)
+            self.assertEqual(BulkLoad.objects.count(), 3)
@@ -1,3 +1,28 @@
-from django.shortcuts import render
+"""
+Vistas internas de la plataforma.
+"""
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .instrumentation import get_setting, registry
+
+
+@require_GET
+def metrics(request):
+    """
+    GET /internal/metrics/
+    Métricas por endpoint en formato de texto de Prometheus. Requiere
+    Authorization: Bearer <INSTRUMENTATION['METRICS_TOKEN']>; sin token
+    configurado solo responde con DEBUG activo.
+    """
+    token = get_setting('METRICS_TOKEN')
+    if token:
+        sent = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(sent.encode(), token.encode()):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from . import models
+
+admin.site.register(models.ProductCost)
+admin.site.register(models.PurchaseLot)
+admin.site.register(models.StockMovement)
+admin.site.register(models.InventoryPeriod)
+admin.site.register(models.ReorderRule)
+admin.site.register(models.ReorderSuggestion)
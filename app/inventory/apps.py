@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class InventoryConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'inventory'
+
+    def ready(self):
+        from operations.signals import order_status_changed, products_bulk_stock_locking, products_bulk_updated
+        from taxes.signals import document_status_changed
+        from . import valuation
+
+        # Stock movements are recorded in the same transaction as the status change
+        order_status_changed.connect(valuation.on_order_status_changed, dispatch_uid='inventory.valuation.order')
+        document_status_changed.connect(valuation.on_document_status_changed, dispatch_uid='inventory.valuation.document')
+        products_bulk_stock_locking.connect(
+            valuation.on_products_bulk_stock_locking, dispatch_uid='inventory.valuation.bulk_locking'
+        )
+        products_bulk_updated.connect(valuation.on_products_bulk_updated, dispatch_uid='inventory.valuation.bulk')
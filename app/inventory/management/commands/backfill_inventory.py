@@ -0,0 +1,28 @@
+"""
+Django management command to record the stock movements of the issued
+purchase documents and paid orders from before the inventory app, in date
+order. Sources that already have movements are skipped, and Product.stock
+is not changed.
+"""
+from django.core.management.base import BaseCommand
+from inventory import valuation
+
+
+class Command(BaseCommand):
+    help = 'Registra los movimientos de inventario de las compras y pedidos pagados que aún no tienen uno'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            help='ID del negocio (si no se especifica, procesa todos)',
+        )
+
+    def handle(self, *args, **options):
+        processed = valuation.backfill(business_id=options.get('business_id'))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Compras y pedidos procesados: {processed}'
+            )
+        )
@@ -0,0 +1,38 @@
+"""
+Django management command to flag the products at or below their reorder
+point and compute their suggested purchase quantities (see
+inventory.reorders). Meant to run nightly over every business.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from inventory import reorders
+
+
+class Command(BaseCommand):
+    help = 'Calcula los productos bajo su punto de reorden y las cantidades sugeridas de compra'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            help='ID del negocio (si no se especifica, procesa todos)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Negocios procesados por lote (100 por defecto)',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser mayor a 0')
+        businesses, flagged = reorders.compute_all(
+            business_id=options.get('business_id'), chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Negocios procesados: {businesses}\n'
+                f'   Productos por reponer: {flagged}'
+            )
+        )
@@ -0,0 +1,59 @@
+"""
+Django management command to snapshot the closing inventory of a month, so
+valuations after it start from the snapshot instead of adding up every
+earlier movement. Meant to run monthly; snapshotting a month twice is a no-op.
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from inventory import valuation
+from operations.models import Business
+
+
+class Command(BaseCommand):
+    help = 'Guarda las unidades y el valor del inventario de cada producto al cierre de un mes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            type=str,
+            help='Periodo AAAA-MM (por defecto, el mes anterior)',
+        )
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            help='ID del negocio (si no se especifica, procesa todos)',
+        )
+
+    def handle(self, *args, **options):
+        if options.get('period'):
+            try:
+                period = datetime.strptime(options['period'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--period debe tener el formato AAAA-MM')
+        else:
+            period = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+        if period >= timezone.localdate().replace(day=1):
+            raise CommandError(f'El periodo {period:%Y-%m} aún no ha terminado.')
+
+        businesses = Business.objects.order_by('id')
+        if options.get('business_id') is not None:
+            businesses = businesses.filter(pk=options['business_id'])
+            if not businesses.exists():
+                raise CommandError(f"No existe el negocio {options['business_id']}")
+
+        count = 0
+        for business_id in businesses.values_list('id', flat=True):
+            inventory_period = valuation.snapshot_period(business_id, period)
+            products = inventory_period.business.inventory_snapshots.filter(period=period).count()
+            count += 1
+            self.stdout.write(f'  ✓ Negocio {business_id}: {products} productos')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Periodo: {period:%Y-%m}\n'
+                f'   Negocios procesados: {count}'
+            )
+        )
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:02
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('operations', '0002_profile_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCost',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cost', serialize=False, to='operations.product')),
+                ('method', models.CharField(choices=[('AVERAGE', 'Promedio ponderado'), ('FIFO', 'PEPS (FIFO)')], default='AVERAGE', max_length=10)),
+                ('quantity', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14)),
+                ('value', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=16)),
+                ('last_unit_cost', models.DecimalField(decimal_places=6, default=Decimal('0.000000'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_costs', to='operations.business')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventoryPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_periods', to='operations.business')),
+            ],
+            options={
+                'ordering': ['business', 'period'],
+                'constraints': [models.UniqueConstraint(fields=('business', 'period'), name='uq_inventoryperiod_business_period')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14)),
+                ('value', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=16)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshots', to='operations.business')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshots', to='operations.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'period', 'product'), name='uq_inventorysnapshot_business_period_product')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PurchaseLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('remaining', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('unit_cost', models.DecimalField(decimal_places=6, max_digits=14)),
+                ('source_type', models.CharField(max_length=10)),
+                ('source_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_lots', to='operations.business')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_lots', to='operations.product')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('remaining__gt', 0)), fields=['product', 'date', 'id'], name='purchaselot_open_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.CharField(choices=[('PURCHASE', 'Compra'), ('SALE', 'Venta'), ('RETURN', 'Devolución'), ('ADJUSTMENT', 'Ajuste')], max_length=10)),
+                ('quantity', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('value', models.DecimalField(decimal_places=4, max_digits=16)),
+                ('source_type', models.CharField(choices=[('ORDER', 'Pedido'), ('DOCUMENT', 'Comprobante'), ('MANUAL', 'Manual')], max_length=10)),
+                ('source_id', models.BigIntegerField(blank=True, null=True)),
+                ('is_reversal', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='operations.business')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='operations.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['business', 'date'], name='inventory_s_busines_90602f_idx'), models.Index(fields=['product', 'date'], name='inventory_s_product_51fcd9_idx'), models.Index(fields=['source_type', 'source_id'], name='inventory_s_source__18ec1c_idx')],
+            },
+        ),
+    ]
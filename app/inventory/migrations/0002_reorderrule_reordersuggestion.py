@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('operations', '0002_profile_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderRule',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reorder_rule', serialize=False, to='operations.product')),
+                ('reorder_point', models.PositiveIntegerField(blank=True, null=True)),
+                ('safety_stock', models.PositiveIntegerField(default=0)),
+                ('lead_time_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('review_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('order_multiple', models.PositiveIntegerField(default=1)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_rules', to='operations.business')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reorder_suggestion', serialize=False, to='operations.product')),
+                ('stock', models.IntegerField()),
+                ('daily_sales', models.DecimalField(decimal_places=4, max_digits=12)),
+                ('reorder_point', models.PositiveIntegerField()),
+                ('suggested_quantity', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestions', to='operations.business')),
+            ],
+        ),
+    ]
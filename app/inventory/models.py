@@ -0,0 +1,195 @@
+from decimal import Decimal
+from django.db import models
+from operations.models import Business, Product
+from operations.tenancy import TenantQuerySet
+
+
+class ProductCost(models.Model):
+    """
+    Running valuation of a product: units on hand and their total cost,
+    updated by every stock movement (see inventory.valuation). The average
+    unit cost is value / quantity.
+    """
+    METHOD_CHOICES = [
+        ("AVERAGE", "Promedio ponderado"),
+        ("FIFO", "PEPS (FIFO)"),
+    ]
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="cost")
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="product_costs")
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES, default="AVERAGE")
+
+    quantity = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal("0.0000"))
+    value = models.DecimalField(max_digits=16, decimal_places=4, default=Decimal("0.0000"))
+    # Cost used when issuing without stock on hand
+    last_unit_cost = models.DecimalField(max_digits=14, decimal_places=6, default=Decimal("0.000000"))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    @property
+    def unit_cost(self):
+        if self.quantity > 0:
+            return self.value / self.quantity
+        return self.last_unit_cost
+
+
+class PurchaseLot(models.Model):
+    """
+    Units received at a unit cost (a purchase document item, a return).
+    `remaining` is consumed oldest first by the issues of the product.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="purchase_lots")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="purchase_lots")
+    date = models.DateField()
+
+    quantity = models.DecimalField(max_digits=14, decimal_places=4)
+    remaining = models.DecimalField(max_digits=14, decimal_places=4)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=6)
+
+    source_type = models.CharField(max_length=10)
+    source_id = models.BigIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        indexes = [
+            # Open lots of a product, oldest first
+            models.Index(
+                fields=["product", "date", "id"],
+                condition=models.Q(remaining__gt=0),
+                name="purchaselot_open_idx",
+            ),
+        ]
+
+
+class StockMovement(models.Model):
+    """
+    Kardex line: signed quantity and value of a receipt or issue of a
+    product. Never edited; undoing a source records the opposite movement.
+    """
+    KIND_CHOICES = [
+        ("PURCHASE", "Compra"),
+        ("SALE", "Venta"),
+        ("RETURN", "Devolución"),
+        ("ADJUSTMENT", "Ajuste"),
+    ]
+    SOURCE_CHOICES = [
+        ("ORDER", "Pedido"),
+        ("DOCUMENT", "Comprobante"),
+        ("MANUAL", "Manual"),
+    ]
+
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="stock_movements")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_movements")
+    date = models.DateField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+
+    quantity = models.DecimalField(max_digits=14, decimal_places=4)
+    value = models.DecimalField(max_digits=16, decimal_places=4)
+
+    source_type = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    source_id = models.BigIntegerField(null=True, blank=True)
+    is_reversal = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["business", "date"]),
+            models.Index(fields=["product", "date"]),
+            models.Index(fields=["source_type", "source_id"]),
+        ]
+
+
+class InventoryPeriod(models.Model):
+    """Month (first day) whose closing inventory was snapshotted for a business."""
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="inventory_periods")
+    period = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        ordering = ["business", "period"]
+        constraints = [
+            models.UniqueConstraint(fields=["business", "period"], name="uq_inventoryperiod_business_period"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.business_id} {self.period:%Y-%m}"
+
+
+class InventorySnapshot(models.Model):
+    """
+    Units and value of a product at the end of a snapshotted month. Kept up
+    to date when a movement is dated in (or before) that month.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="inventory_snapshots")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="inventory_snapshots")
+    period = models.DateField()
+
+    quantity = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal("0.0000"))
+    value = models.DecimalField(max_digits=16, decimal_places=4, default=Decimal("0.0000"))
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business", "period", "product"],
+                name="uq_inventorysnapshot_business_period_product",
+            ),
+        ]
+
+
+class ReorderRule(models.Model):
+    """
+    Reorder parameters of a product. Products without a rule are evaluated
+    with the INVENTORY defaults (see inventory.reorders).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="reorder_rule")
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="reorder_rules")
+
+    # Fixed reorder point; empty = daily sales x lead time + safety stock
+    reorder_point = models.PositiveIntegerField(null=True, blank=True)
+    safety_stock = models.PositiveIntegerField(default=0)
+    lead_time_days = models.PositiveIntegerField(null=True, blank=True)
+    # Days of sales a purchase should cover after arriving
+    review_days = models.PositiveIntegerField(null=True, blank=True)
+    order_multiple = models.PositiveIntegerField(default=1)
+    is_active = models.BooleanField(default=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+
+class ReorderSuggestion(models.Model):
+    """
+    Product below its reorder point at the last compute_reorders run, with
+    the quantity to purchase. Only flagged products have a row.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="reorder_suggestion")
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="reorder_suggestions")
+
+    stock = models.IntegerField()
+    daily_sales = models.DecimalField(max_digits=12, decimal_places=4)
+    reorder_point = models.PositiveIntegerField()
+    suggested_quantity = models.PositiveIntegerField()
+
+    computed_at = models.DateTimeField()
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
@@ -0,0 +1,115 @@
+"""
+Low-stock evaluation and purchase suggestions.
+
+compute() runs over a chunk of businesses at a time with three queries per
+chunk: the reorder rules, the products' stock and their daily sales, all
+read from reports.DailyProductRollup (one row per product and day, already
+maintained from paid orders) instead of scanning OrderItem.
+
+Daily sales is the higher of the average over SALES_WINDOW_DAYS and over
+the last RECENT_WINDOW_DAYS, both from the same conditional aggregate, so a
+product that started selling faster is flagged before the long average
+catches up. A product is flagged when its stock is at or below its reorder
+point, either fixed in its ReorderRule or daily sales x lead time + safety
+stock. The suggested quantity brings the stock up to daily sales x
+(lead time + review days) + safety stock, rounded up to the order multiple.
+
+Flagged products are written to ReorderSuggestion, replacing the previous
+rows of each business in one transaction, so the POS reads a small table
+by business.
+"""
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from operations.models import Business, Product
+from reports.models import DailyProductRollup
+from . import models
+from .valuation import get_setting
+
+ZERO = Decimal("0")
+DAILY_SALES = Decimal("0.0001")
+
+
+def evaluate(stock, daily_sales, rule):
+    """(reorder point, suggested quantity) of a product, quantity 0 if it needs none."""
+    lead_time = rule.lead_time_days if rule and rule.lead_time_days is not None else get_setting('LEAD_TIME_DAYS')
+    review = rule.review_days if rule and rule.review_days is not None else get_setting('REVIEW_DAYS')
+    safety = rule.safety_stock if rule else 0
+    multiple = max(rule.order_multiple if rule else 1, 1)
+
+    if rule and rule.reorder_point is not None:
+        reorder_point = rule.reorder_point
+    else:
+        reorder_point = math.ceil(daily_sales * lead_time) + safety
+    # Without a fixed point, products that do not sell are never flagged
+    if stock > reorder_point or (not reorder_point and not daily_sales):
+        return reorder_point, 0
+
+    target = max(math.ceil(daily_sales * (lead_time + review)) + safety, reorder_point + 1)
+    quantity = max(target - stock, 0)
+    return reorder_point, math.ceil(quantity / multiple) * multiple
+
+
+def compute(business_ids, today=None):
+    """Recomputes the suggestions of `business_ids`. Returns the number of products flagged."""
+    today = today or timezone.localdate()
+    window = get_setting('SALES_WINDOW_DAYS')
+    recent = get_setting('RECENT_WINDOW_DAYS')
+
+    rules = {
+        rule.product_id: rule
+        for rule in models.ReorderRule.objects.filter(business_id__in=business_ids)
+    }
+    sales = {
+        row["product_id"]: max(
+            Decimal(row["window_units"] or 0) / window,
+            Decimal(row["recent_units"] or 0) / recent,
+        ).quantize(DAILY_SALES)
+        for row in DailyProductRollup.objects.filter(
+            business_id__in=business_ids,
+            date__gt=today - timedelta(days=window),
+            date__lte=today,
+        ).values("product_id").annotate(
+            window_units=Sum("units"),
+            recent_units=Sum("units", filter=Q(date__gt=today - timedelta(days=recent))),
+        ).order_by()
+    }
+
+    now = timezone.now()
+    suggestions = {business_id: [] for business_id in business_ids}
+    products = Product.objects.filter(business_id__in=business_ids).values_list("id", "business_id", "stock")
+    for product_id, business_id, stock in products.iterator(chunk_size=5000):
+        rule = rules.get(product_id)
+        if rule is not None and not rule.is_active:
+            continue
+        daily_sales = sales.get(product_id, ZERO)
+        reorder_point, quantity = evaluate(stock, daily_sales, rule)
+        if quantity:
+            suggestions[business_id].append(models.ReorderSuggestion(
+                product_id=product_id, business_id=business_id, stock=stock,
+                daily_sales=daily_sales, reorder_point=reorder_point,
+                suggested_quantity=quantity, computed_at=now,
+            ))
+
+    for business_id, rows in suggestions.items():
+        with transaction.atomic():
+            models.ReorderSuggestion.objects.filter(business_id=business_id).delete()
+            models.ReorderSuggestion.objects.bulk_create(rows, batch_size=1000)
+    return sum(len(rows) for rows in suggestions.values())
+
+
+def compute_all(business_id=None, chunk_size=100):
+    """Runs compute() over every business (or one), `chunk_size` businesses at a time."""
+    businesses = Business.objects.order_by("id").values_list("id", flat=True)
+    if business_id is not None:
+        businesses = businesses.filter(pk=business_id)
+    business_ids = list(businesses)
+    flagged = 0
+    for start in range(0, len(business_ids), chunk_size):
+        flagged += compute(business_ids[start:start + chunk_size])
+    return len(business_ids), flagged
@@ -0,0 +1,64 @@
+from django.utils import timezone
+from rest_framework import serializers
+from . import models
+
+
+class ProductCostSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_code = serializers.CharField(source='product.code', read_only=True)
+    unit_cost = serializers.DecimalField(max_digits=14, decimal_places=6, read_only=True)
+
+    class Meta:
+        model = models.ProductCost
+        fields = ['product', 'product_name', 'product_code', 'method', 'quantity', 'value', 'unit_cost', 'updated_at']
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.StockMovement
+        fields = ['id', 'product', 'date', 'kind', 'quantity', 'value', 'source_type', 'source_id', 'is_reversal', 'created_at']
+
+
+class ReorderRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.ReorderRule
+        fields = ['product', 'reorder_point', 'safety_stock', 'lead_time_days', 'review_days', 'order_multiple', 'is_active', 'updated_at']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            # El producto de una regla no se cambia
+            fields['product'].read_only = True
+        return fields
+
+
+class ReorderSuggestionSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_code = serializers.CharField(source='product.code', read_only=True)
+
+    class Meta:
+        model = models.ReorderSuggestion
+        fields = ['product', 'product_name', 'product_code', 'stock', 'daily_sales', 'reorder_point', 'suggested_quantity', 'computed_at']
+
+
+class ValuationParamsSerializer(serializers.Serializer):
+    """Fecha de la valorización (por defecto, hoy)."""
+    date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('date', timezone.localdate())
+        return attrs
+
+
+class ValuationRowSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    code = serializers.CharField(allow_null=True)
+    name = serializers.CharField()
+    quantity = serializers.DecimalField(max_digits=14, decimal_places=4)
+    value = serializers.DecimalField(max_digits=16, decimal_places=4)
+
+
+class ValuationSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    products = ValuationRowSerializer(many=True)
+    total_value = serializers.DecimalField(max_digits=18, decimal_places=4)
@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import User
+from operations.models import Business, Category, Order, OrderItem, Product
+from reports.models import DailyProductRollup
+from taxes.models import DocumentType, Party, SunatDocument, SunatDocumentItem
+from . import reorders, valuation
+from .models import InventorySnapshot, ProductCost, PurchaseLot, ReorderRule, ReorderSuggestion, StockMovement
+
+
+class InventoryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.user = User.objects.create_user('cajero', password='x')
+        cls.category = Category.objects.create(business=cls.business, name='Bebidas')
+        cls.product = Product.objects.create(
+            business=cls.business, category=cls.category, name='Agua', sell_price=Decimal('3.00'),
+            buy_price=Decimal('1.00'), unit_of_measurement='U',
+        )
+        cls.supplier = Party.objects.create(business=cls.business, doc_type='6', doc_number='20111111111', name='Proveedor')
+        cls.invoice = DocumentType.objects.create(code='01', name='Factura')
+        cls.credit_note = DocumentType.objects.create(code='07', name='Nota de crédito')
+
+    def purchase(self, number, quantity, unit_cost, issue_date, document_type=None, ref_document=None):
+        document = SunatDocument.objects.create(
+            business=self.business, direction='PURCHASE', document_type=document_type or self.invoice,
+            series='F001', number=number, issue_date=issue_date, party=self.supplier, ref_document=ref_document,
+        )
+        SunatDocumentItem.objects.create(
+            document=document, product=self.product, description='Agua', quantity=quantity,
+            line_total=Decimal(quantity) * Decimal(unit_cost),
+        )
+        document.status = 'ISSUED'
+        document.save()
+        return document
+
+    def sell(self, quantity):
+        order = Order.objects.create(business=self.business)
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=quantity, price=Decimal('3.00'), created_by=self.user
+        )
+        order.status = 'PAID'
+        order.save()
+        return order
+
+    def issued_value(self, source_type, source_id):
+        return -sum(
+            StockMovement.objects.filter(source_type=source_type, source_id=source_id).values_list('value', flat=True)
+        )
+
+    def position(self):
+        cost = ProductCost.objects.get(product=self.product)
+        self.product.refresh_from_db()
+        return cost.quantity, cost.value, self.product.stock
+
+
+class CostingTests(InventoryTestCase):
+    """Issues are valued with the product's costing method."""
+
+    @override_settings(INVENTORY={'COSTING_METHOD': 'FIFO'})
+    def test_fifo_consumes_the_oldest_lots_first(self):
+        self.purchase(1, 10, '1.00', date(2026, 1, 5))
+        self.purchase(2, 10, '2.00', date(2026, 1, 6))
+        order = self.sell(15)
+        self.assertEqual(self.issued_value('ORDER', order.pk), Decimal('20.0000'))
+        self.assertEqual(
+            list(PurchaseLot.objects.order_by('date').values_list('remaining', flat=True)),
+            [Decimal('0.0000'), Decimal('5.0000')],
+        )
+        self.assertEqual(self.position(), (Decimal('5.0000'), Decimal('10.0000'), 5))
+
+    def test_average_cost_after_a_partial_issue(self):
+        self.purchase(1, 10, '1.00', date(2026, 1, 5))
+        self.purchase(2, 10, '2.00', date(2026, 1, 6))
+        first = self.sell(5)
+        self.assertEqual(self.issued_value('ORDER', first.pk), Decimal('7.5000'))
+        self.assertEqual(self.position(), (Decimal('15.0000'), Decimal('22.5000'), 15))
+        # A later receipt moves the average: (22.5 + 5 x 3.9) / 20 = 2.10
+        self.purchase(3, 5, '3.90', date(2026, 1, 7))
+        second = self.sell(10)
+        self.assertEqual(self.issued_value('ORDER', second.pk), Decimal('21.0000'))
+        # Issuing the whole stock takes the whole value, without rounding leftovers
+        last = self.sell(10)
+        self.assertEqual(self.issued_value('ORDER', last.pk), Decimal('21.0000'))
+        self.assertEqual(self.position(), (Decimal('0.0000'), Decimal('0.0000'), 0))
+
+    def test_unpaid_order_returns_its_units_at_their_cost(self):
+        self.purchase(1, 10, '1.00', date(2026, 1, 5))
+        order = self.sell(4)
+        self.purchase(2, 10, '4.00', date(2026, 1, 6))
+        order.status = 'CANCELLED'
+        order.save()
+        movement = StockMovement.objects.get(source_type='ORDER', source_id=order.pk, is_reversal=True)
+        self.assertEqual((movement.kind, movement.quantity, movement.value), ('RETURN', Decimal('4.0000'), Decimal('4.0000')))
+        self.assertEqual(self.issued_value('ORDER', order.pk), 0)
+        self.assertEqual(self.position(), (Decimal('20.0000'), Decimal('50.0000'), 20))
+
+    @override_settings(INVENTORY={'COSTING_METHOD': 'FIFO'})
+    def test_credit_note_returns_the_units_of_its_purchase(self):
+        first = self.purchase(1, 10, '1.00', date(2026, 1, 5))
+        invoice = self.purchase(2, 10, '2.00', date(2026, 1, 6))
+        note = self.purchase(3, 4, '2.00', date(2026, 1, 8), document_type=self.credit_note, ref_document=invoice)
+        self.assertEqual(self.issued_value('DOCUMENT', note.pk), Decimal('8.0000'))
+        self.assertEqual(
+            dict(PurchaseLot.objects.values_list('source_id', 'remaining')),
+            {first.pk: Decimal('10.0000'), invoice.pk: Decimal('6.0000')},
+        )
+        self.assertEqual(self.position(), (Decimal('16.0000'), Decimal('22.0000'), 16))
+
+        # Voiding the note puts the units back at the same cost
+        note.status = 'VOID'
+        note.save()
+        self.assertEqual(self.position(), (Decimal('20.0000'), Decimal('30.0000'), 20))
+
+
+class SnapshotTests(InventoryTestCase):
+    """Movements dated in a snapshotted month update its snapshot."""
+
+    def test_back_dated_purchase_updates_the_snapshot(self):
+        self.purchase(1, 10, '1.00', date(2026, 1, 10))
+        valuation.snapshot_period(self.business.pk, date(2026, 1, 1))
+        self.purchase(2, 10, '2.00', date(2026, 1, 20))
+
+        snapshot = InventorySnapshot.objects.get(business=self.business, period=date(2026, 1, 1))
+        self.assertEqual((snapshot.quantity, snapshot.value), (Decimal('20.0000'), Decimal('30.0000')))
+        as_of = valuation.valuation_as_of(self.business.pk, date(2026, 2, 15))
+        self.assertEqual(as_of['total_value'], Decimal('30.0000'))
+        self.assertEqual(as_of['products'][0]['quantity'], Decimal('20.0000'))
+        self.assertEqual(valuation.valuation_as_of(self.business.pk, date(2026, 1, 15))['total_value'], Decimal('10.0000'))
+
+    def test_open_month_cannot_be_snapshotted(self):
+        with self.assertRaises(ValueError):
+            valuation.snapshot_period(self.business.pk, timezone.localdate())
+
+
+class ReorderTests(InventoryTestCase):
+    """Products at or below their reorder point get a purchase suggestion."""
+
+    def sales(self, product, units, days):
+        today = timezone.localdate()
+        DailyProductRollup.objects.bulk_create([
+            DailyProductRollup(business=self.business, product=product, date=today - timedelta(days=day), units=units)
+            for day in range(days)
+        ])
+
+    def test_recent_sales_drive_the_suggestion(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=3)
+        ReorderRule.objects.create(product=self.product, business=self.business, order_multiple=10)
+        # 2 units a day over the last week: the 28-day average (0.5) would lag behind
+        self.sales(self.product, 2, 7)
+        self.assertEqual(reorders.compute([self.business.pk]), 1)
+        suggestion = ReorderSuggestion.objects.get(product=self.product)
+        self.assertEqual(suggestion.daily_sales, Decimal('2.0000'))
+        # Reorder point 2 x 7 = 14; target 2 x (7 + 14) = 42, rounded up to tens
+        self.assertEqual((suggestion.reorder_point, suggestion.suggested_quantity), (14, 40))
+
+    def test_stocked_idle_and_inactive_products_are_not_flagged(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=100)
+        idle = Product.objects.create(
+            business=self.business, category=self.category, name='Hielo', sell_price=Decimal('1.00'),
+            buy_price=Decimal('0.50'), unit_of_measurement='U',
+        )
+        paused = Product.objects.create(
+            business=self.business, category=self.category, name='Gaseosa', sell_price=Decimal('2.00'),
+            buy_price=Decimal('1.00'), unit_of_measurement='U',
+        )
+        ReorderRule.objects.create(product=paused, business=self.business, reorder_point=5, is_active=False)
+        self.sales(self.product, 2, 7)
+        ReorderSuggestion.objects.create(
+            product=idle, business=self.business, stock=0, daily_sales=1, reorder_point=1,
+            suggested_quantity=1, computed_at=timezone.now(),
+        )
+        self.assertEqual(reorders.compute([self.business.pk]), 0)
+        self.assertFalse(ReorderSuggestion.objects.exists())
+
+    def test_evaluate_with_a_fixed_reorder_point(self):
+        rule = ReorderRule(reorder_point=10, safety_stock=2, lead_time_days=3, review_days=4, order_multiple=6)
+        self.assertEqual(reorders.evaluate(11, Decimal('1'), rule), (10, 0))
+        # Target max(1 x 7 + 2, 11) = 11 -> 11 - 10 = 1, rounded up to 6
+        self.assertEqual(reorders.evaluate(10, Decimal('1'), rule), (10, 6))
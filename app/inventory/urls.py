@@ -0,0 +1,11 @@
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'costs', views.ProductCostViewSet, basename='product-costs')
+router.register(r'movements', views.StockMovementViewSet, basename='stock-movements')
+router.register(r'reorder-rules', views.ReorderRuleViewSet, basename='reorder-rules')
+router.register(r'reorders', views.ReorderSuggestionViewSet, basename='reorders')
+router.register(r'valuation', views.ValuationViewSet, basename='valuation')
+
+urlpatterns = router.urls
@@ -0,0 +1,430 @@
+"""
+Inventory valuation over stock movements.
+
+Every receipt and issue of a product is a StockMovement (kardex line) with
+its signed quantity and cost, recorded in the same transaction as its source:
+
+- Issued purchase document (direction PURCHASE): one receipt per product,
+  at the item's taxable amount per unit in soles, which also opens a
+  PurchaseLot. Purchase credit notes (07) issue the units back, from the
+  lots of the document they reference first.
+- Paid order: one issue per product.
+- An order that stops being paid or a voided document records the opposite
+  movements (kind RETURN), at the cost they were recorded with.
+- Bulk stock changes of products (operations.bulk): one ADJUSTMENT per
+  product, receipts at the current cost.
+
+ProductCost keeps the running quantity and value of each product (the row
+is locked while a movement is recorded), so issues are valued without
+reading the history: AVERAGE at value / quantity, FIFO at the cost of the
+oldest open lots. Product.stock follows the movements.
+
+"Inventory as of a date" starts from the latest InventorySnapshot before
+it (monthly, taken by the snapshot_inventory command) and adds only the
+movements after it. Movements dated in an already snapshotted month also
+update that month's snapshots, so they never go stale.
+
+Settings (all optional):
+
+    INVENTORY = {
+        'COSTING_METHOD': 'AVERAGE',   # or 'FIFO'; for products valued from now on
+        'SALES_WINDOW_DAYS': 28,       # see inventory.reorders
+        'RECENT_WINDOW_DAYS': 7,
+        'LEAD_TIME_DAYS': 7,
+        'REVIEW_DAYS': 14,
+    }
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Sum, Value, When
+from django.utils import timezone
+
+from core.db import upsert_increment
+from operations.models import Business, Order, OrderItem, Product
+from taxes.models import SunatDocument, SunatDocumentItem
+from . import models
+
+DEFAULTS = {
+    'COSTING_METHOD': 'AVERAGE',
+    # Reorder defaults (see inventory.reorders)
+    'SALES_WINDOW_DAYS': 28,
+    'RECENT_WINDOW_DAYS': 7,
+    'LEAD_TIME_DAYS': 7,
+    'REVIEW_DAYS': 14,
+}
+
+ZERO = Decimal("0.0000")
+QUANTITY = Decimal("0.0001")
+VALUE = Decimal("0.0001")
+UNIT_COST = Decimal("0.000001")
+
+CREDIT_NOTE = "07"
+
+
+def get_setting(name):
+    return getattr(settings, 'INVENTORY', {}).get(name, DEFAULTS[name])
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def month_end(period):
+    return date(period.year + period.month // 12, period.month % 12 + 1, 1) - timedelta(days=1)
+
+
+def cost_for_update(business_id, product_id):
+    """ProductCost of a product, locked until the end of the transaction."""
+    cost = models.ProductCost.objects.select_for_update().filter(product_id=product_id).first()
+    if cost is None:
+        buy_price = Product.objects.filter(pk=product_id).values_list("buy_price", flat=True).first()
+        models.ProductCost.objects.bulk_create(
+            [models.ProductCost(
+                product_id=product_id, business_id=business_id,
+                method=get_setting('COSTING_METHOD'), last_unit_cost=buy_price or ZERO,
+            )],
+            ignore_conflicts=True,
+        )
+        cost = models.ProductCost.objects.select_for_update().get(product_id=product_id)
+    return cost
+
+
+def _record(cost, day, kind, quantity, value, source_type, source_id, is_reversal, sync_stock):
+    models.StockMovement.objects.create(
+        business_id=cost.business_id, product_id=cost.product_id, date=day, kind=kind,
+        quantity=quantity, value=value, source_type=source_type, source_id=source_id,
+        is_reversal=is_reversal,
+    )
+    cost.quantity += quantity
+    cost.value = cost.value + value if cost.quantity else ZERO
+    cost.save(update_fields=["quantity", "value", "last_unit_cost", "updated_at"])
+
+    # Snapshots of the months already taken that this movement changes
+    periods = models.InventoryPeriod.objects.filter(
+        business_id=cost.business_id, period__gte=month_start(day),
+    ).values_list("period", flat=True)
+    upsert_increment(
+        models.InventorySnapshot,
+        ["business_id", "period", "product_id"],
+        [
+            {"business_id": cost.business_id, "period": period, "product_id": cost.product_id,
+             "quantity": quantity, "value": value}
+            for period in periods
+        ],
+    )
+    if sync_stock:
+        units = int(quantity.to_integral_value(ROUND_HALF_UP))
+        if units:
+            Product.objects.filter(pk=cost.product_id).update(stock=F("stock") + units)
+
+
+def receive(cost, quantity, unit_cost, day, kind, source_type, source_id, is_reversal=False, sync_stock=True):
+    """Receives `quantity` units at `unit_cost` into a new lot. Returns the value received."""
+    quantity = Decimal(quantity).quantize(QUANTITY)
+    unit_cost = Decimal(unit_cost).quantize(UNIT_COST)
+    models.PurchaseLot.objects.create(
+        business_id=cost.business_id, product_id=cost.product_id, date=day,
+        quantity=quantity, remaining=quantity, unit_cost=unit_cost,
+        source_type=source_type, source_id=source_id,
+    )
+    cost.last_unit_cost = unit_cost
+    value = (quantity * unit_cost).quantize(VALUE)
+    _record(cost, day, kind, quantity, value, source_type, source_id, is_reversal, sync_stock)
+    return value
+
+
+def issue(cost, quantity, day, kind, source_type, source_id, is_reversal=False, sync_stock=True,
+          unit_cost=None, from_source=None):
+    """
+    Issues `quantity` units, consuming the oldest open lots (first those of
+    `from_source`, a (source_type, source_id) pair, when given). Valued at
+    the product's average cost, or `unit_cost`, or with FIFO at the cost of
+    the lots consumed. Returns the value issued.
+    """
+    quantity = Decimal(quantity).quantize(QUANTITY)
+    lots = models.PurchaseLot.objects.select_for_update().filter(product_id=cost.product_id, remaining__gt=0)
+    ordering = ["date", "id"]
+    if from_source is not None:
+        lots = lots.annotate(own=Case(
+            When(source_type=from_source[0], source_id=from_source[1], then=Value(0)),
+            default=Value(1), output_field=IntegerField(),
+        ))
+        ordering.insert(0, "own")
+
+    pending, lots_value, consumed = quantity, ZERO, []
+    for lot in lots.order_by(*ordering):
+        if not pending:
+            break
+        taken = min(lot.remaining, pending)
+        lot.remaining -= taken
+        pending -= taken
+        lots_value += taken * lot.unit_cost
+        consumed.append(lot)
+    models.PurchaseLot.objects.bulk_update(consumed, ["remaining"])
+
+    if cost.method == "FIFO":
+        # Units without a lot (stock issued before being received) at the last cost
+        value = lots_value + pending * cost.last_unit_cost
+    elif unit_cost is not None:
+        value = quantity * unit_cost
+    elif quantity == cost.quantity:
+        value = cost.value
+    else:
+        value = quantity * cost.unit_cost
+    value = value.quantize(VALUE)
+    _record(cost, day, kind, -quantity, -value, source_type, source_id, is_reversal, sync_stock)
+    return value
+
+
+def reverse(source_type, source_id, day, sync_stock=True):
+    """Records the opposite of the net movements of a source, at the cost they had."""
+    net = (
+        models.StockMovement.objects.filter(source_type=source_type, source_id=source_id)
+        .values("business_id", "product_id")
+        .annotate(quantity=Sum("quantity"), value=Sum("value"))
+        .order_by("product_id")
+    )
+    for row in net:
+        if not row["quantity"]:
+            continue
+        cost = cost_for_update(row["business_id"], row["product_id"])
+        if row["quantity"] < 0:
+            receive(cost, -row["quantity"], row["value"] / row["quantity"], day, "RETURN",
+                    source_type, source_id, is_reversal=True, sync_stock=sync_stock)
+        else:
+            issue(cost, row["quantity"], day, "RETURN", source_type, source_id, is_reversal=True,
+                  sync_stock=sync_stock, unit_cost=row["value"] / row["quantity"],
+                  from_source=(source_type, source_id))
+
+
+# -- sources --------------------------------------------------------------
+
+def issue_order(order, day=None, sync_stock=True):
+    day = day or timezone.localdate()
+    rows = (
+        OrderItem.objects.filter(order=order)
+        .values("product_id").annotate(quantity=Sum("quantity")).order_by("product_id")
+    )
+    for row in rows:
+        if row["quantity"] > 0:
+            cost = cost_for_update(order.business_id, row["product_id"])
+            issue(cost, row["quantity"], day, "SALE", "ORDER", order.pk, sync_stock=sync_stock)
+
+
+def _in_soles(document, amount):
+    if document.currency != "PEN" and document.exchange_rate:
+        return amount * document.exchange_rate
+    return amount
+
+
+def receive_document(document, day=None, sync_stock=True):
+    day = day or document.issue_date
+    rows = (
+        SunatDocumentItem.objects.filter(
+            document_id=document.pk, issue_date=document.issue_date, product__isnull=False,
+        )
+        .values("product_id").annotate(quantity=Sum("quantity"), amount=Sum("line_total"))
+        .order_by("product_id")
+    )
+    credit_note = document.document_type.code == CREDIT_NOTE
+    returned = ("DOCUMENT", document.ref_document_id) if credit_note and document.ref_document_id else None
+    for row in rows:
+        cost = cost_for_update(document.business_id, row["product_id"])
+        unit_cost = _in_soles(document, row["amount"]) / row["quantity"]
+        if credit_note:
+            issue(cost, row["quantity"], day, "RETURN", "DOCUMENT", document.pk,
+                  sync_stock=sync_stock, unit_cost=unit_cost, from_source=returned)
+        else:
+            receive(cost, row["quantity"], unit_cost, day, "PURCHASE", "DOCUMENT", document.pk,
+                    sync_stock=sync_stock)
+
+
+def on_order_status_changed(sender, order, previous_status, **kwargs):
+    if order.status == "PAID" and previous_status != "PAID":
+        issue_order(order)
+    elif previous_status == "PAID" and order.status != "PAID":
+        reverse("ORDER", order.pk, timezone.localdate())
+
+
+def on_document_status_changed(sender, document, previous_status, **kwargs):
+    if document.direction != "PURCHASE":
+        return
+    if document.status == "ISSUED" and previous_status != "ISSUED":
+        receive_document(document)
+    elif previous_status == "ISSUED" and document.status != "ISSUED":
+        reverse("DOCUMENT", document.pk, timezone.localdate())
+
+
+def adjust(business_id, deltas, day=None, source_id=None):
+    """
+    ADJUSTMENT movements for stock already changed in Product.stock
+    ({product id: units added}): receipts at the product's current cost.
+    """
+    day = day or timezone.localdate()
+    for product_id in sorted(deltas):
+        units = deltas[product_id]
+        if not units:
+            continue
+        cost = cost_for_update(business_id, product_id)
+        if units > 0:
+            receive(cost, units, cost.unit_cost, day, "ADJUSTMENT", "MANUAL", source_id, sync_stock=False)
+        else:
+            issue(cost, -units, day, "ADJUSTMENT", "MANUAL", source_id, sync_stock=False)
+
+
+def on_products_bulk_stock_locking(sender, business_id, product_ids, **kwargs):
+    # Costs before products, as a paid order does (see operations.bulk)
+    for product_id in product_ids:
+        cost_for_update(business_id, product_id)
+
+
+def on_products_bulk_updated(sender, business_id, stock_deltas, operation, **kwargs):
+    if stock_deltas:
+        adjust(business_id, stock_deltas, source_id=operation.pk)
+
+
+def backfill(business_id=None):
+    """
+    Records, in date order, the movements of the issued purchase documents
+    and paid orders that have none yet (history from before the inventory
+    app). Product.stock is left as is, since it already reflects that
+    history: each product first gets an opening ADJUSTMENT at its buy_price,
+    dated on the first day replayed, with the units that make the replayed
+    quantity end at its current stock. Returns the number of sources processed.
+    """
+    orders = Order.objects.filter(status="PAID")
+    documents = SunatDocument.objects.filter(status="ISSUED", direction="PURCHASE").select_related("document_type")
+    movements = models.StockMovement.objects.all()
+    if business_id is not None:
+        orders = orders.filter(business_id=business_id)
+        documents = documents.filter(business_id=business_id)
+        movements = movements.filter(business_id=business_id)
+    recorded = set(movements.values_list("source_type", "source_id").distinct().iterator())
+
+    sources = [
+        (document.issue_date, 0, document) for document in documents.iterator()
+        if ("DOCUMENT", document.pk) not in recorded
+    ] + [
+        (timezone.localdate(order.created_at), 1, order) for order in orders.iterator()
+        if ("ORDER", order.pk) not in recorded
+    ]
+    if not sources:
+        return 0
+    # Purchases of a day before its sales, so FIFO finds their lots
+    sources.sort(key=lambda source: (source[0], source[1], source[2].pk))
+
+    with transaction.atomic():
+        _opening(sources, sources[0][0])
+    for day, is_order, source in sources:
+        with transaction.atomic():
+            if is_order:
+                issue_order(source, day=day, sync_stock=False)
+            else:
+                receive_document(source, day=day, sync_stock=False)
+    return len(sources)
+
+
+def _opening(sources, day):
+    """Opening adjustments of the products moved by the `sources` about to be replayed."""
+    order_ids = [source.pk for _, is_order, source in sources if is_order]
+    document_ids = [source.pk for _, is_order, source in sources if not is_order]
+    delta = defaultdict(lambda: ZERO)
+    rows = OrderItem.objects.filter(order_id__in=order_ids).values("product_id").annotate(quantity=Sum("quantity"))
+    for row in rows.order_by():
+        delta[row["product_id"]] -= row["quantity"]
+    rows = (
+        SunatDocumentItem.objects.filter(document_id__in=document_ids, product__isnull=False)
+        .values("product_id", "document__document_type__code").annotate(quantity=Sum("quantity"))
+    )
+    for row in rows.order_by():
+        sign = -1 if row["document__document_type__code"] == CREDIT_NOTE else 1
+        delta[row["product_id"]] += sign * row["quantity"]
+
+    products = Product.objects.filter(pk__in=list(delta)).values_list("id", "business_id", "stock", "buy_price")
+    current = dict(models.ProductCost.objects.filter(product_id__in=list(delta)).values_list("product_id", "quantity"))
+    for product_id, business_id, stock, buy_price in products.order_by("id"):
+        opening = stock - current.get(product_id, ZERO) - delta[product_id]
+        if not opening:
+            continue
+        cost = cost_for_update(business_id, product_id)
+        if opening > 0:
+            receive(cost, opening, buy_price, day, "ADJUSTMENT", "MANUAL", None, sync_stock=False)
+        else:
+            issue(cost, -opening, day, "ADJUSTMENT", "MANUAL", None, sync_stock=False)
+
+
+# -- valuation ------------------------------------------------------------
+
+def last_snapshot_period(business_id, before=None):
+    periods = models.InventoryPeriod.objects.filter(business_id=business_id)
+    if before is not None:
+        periods = periods.filter(period__lt=before)
+    return periods.aggregate(last=Max("period"))["last"]
+
+
+def _positions(business_id, day):
+    """{product id: [quantity, value]} at the end of `day`."""
+    totals = defaultdict(lambda: [ZERO, ZERO])
+    movements = models.StockMovement.objects.filter(business_id=business_id, date__lte=day)
+    period = last_snapshot_period(business_id, before=month_start(day))
+    if period is not None:
+        snapshots = models.InventorySnapshot.objects.filter(business_id=business_id, period=period)
+        for product_id, quantity, value in snapshots.values_list("product_id", "quantity", "value"):
+            totals[product_id] = [quantity, value]
+        movements = movements.filter(date__gt=month_end(period))
+    rows = movements.values("product_id").annotate(quantity=Sum("quantity"), value=Sum("value")).order_by()
+    for row in rows:
+        totals[row["product_id"]][0] += row["quantity"]
+        totals[row["product_id"]][1] += row["value"]
+    return totals
+
+
+def valuation_as_of(business_id, day):
+    """Units and value of each product in stock at the end of `day`, and the total value."""
+    totals = _positions(business_id, day)
+    products = Product.objects.filter(pk__in=[pk for pk, (quantity, value) in totals.items() if quantity or value])
+    rows = [
+        {
+            "product_id": product["id"],
+            "code": product["code"],
+            "name": product["name"],
+            "quantity": totals[product["id"]][0].quantize(QUANTITY),
+            "value": totals[product["id"]][1].quantize(VALUE),
+        }
+        for product in products.values("id", "code", "name").order_by("name")
+    ]
+    return {
+        "date": day,
+        "products": rows,
+        "total_value": sum((row["value"] for row in rows), ZERO),
+    }
+
+
+def snapshot_period(business_id, period):
+    """
+    Snapshots the inventory of a business at the end of `period` (first day
+    of a month that already ended). Returns the InventoryPeriod.
+    """
+    period = month_start(period)
+    if period >= month_start(timezone.localdate()):
+        raise ValueError(f"El periodo {period:%Y-%m} aún no ha terminado.")
+    with transaction.atomic():
+        # Serializes snapshots of the same business
+        Business.objects.select_for_update().get(pk=business_id)
+        existing = models.InventoryPeriod.objects.filter(business_id=business_id, period=period).first()
+        if existing is not None:
+            return existing
+        totals = _positions(business_id, month_end(period))
+        inventory_period = models.InventoryPeriod.objects.create(business_id=business_id, period=period)
+        models.InventorySnapshot.objects.bulk_create([
+            models.InventorySnapshot(
+                business_id=business_id, period=period, product_id=product_id,
+                quantity=quantity, value=value,
+            )
+            for product_id, (quantity, value) in totals.items() if quantity or value
+        ], batch_size=1000)
+    return inventory_period
@@ -0,0 +1,91 @@
+from rest_framework import exceptions, status, viewsets
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from operations.tenancy import TenantViewSetMixin
+from . import models, serializers, valuation
+
+
+class StockMovementPagination(PageNumberPagination):
+    """Paginación del kardex"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ProductCostViewSet(TenantViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """Costo actual (cantidad, valor y costo unitario) de cada producto."""
+    queryset = models.ProductCost.objects.select_related('product').order_by('product__name')
+    serializer_class = serializers.ProductCostSerializer
+    tenant_resource = 'inventory'
+
+
+class StockMovementViewSet(TenantViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Kardex del negocio. Filtros opcionales: product, date_from, date_to y kind.
+    """
+    queryset = models.StockMovement.objects.order_by('-date', '-id')
+    serializer_class = serializers.StockMovementSerializer
+    pagination_class = StockMovementPagination
+    tenant_resource = 'inventory'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('product', '').isdigit():
+            queryset = queryset.filter(product_id=params['product'])
+        if params.get('date_from'):
+            queryset = queryset.filter(date__gte=params['date_from'])
+        if params.get('date_to'):
+            queryset = queryset.filter(date__lte=params['date_to'])
+        if params.get('kind'):
+            queryset = queryset.filter(kind=params['kind'])
+        return queryset
+
+
+class ReorderRuleViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
+    """Parámetros de reposición por producto."""
+    queryset = models.ReorderRule.objects.all()
+    serializer_class = serializers.ReorderRuleSerializer
+    tenant_resource = 'catalog'
+
+    def perform_create(self, serializer):
+        product = serializer.validated_data['product']
+        tenant = self.get_tenant()
+        if not tenant.is_platform_admin and product.business_id != tenant.business_id:
+            raise exceptions.PermissionDenied('El registro relacionado pertenece a otro negocio.')
+        serializer.save(business_id=product.business_id)
+
+    def perform_update(self, serializer):
+        serializer.save()
+
+
+class ReorderSuggestionViewSet(TenantViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Productos por reponer según el último cálculo nocturno (compute_reorders),
+    con la cantidad sugerida de compra.
+    """
+    queryset = models.ReorderSuggestion.objects.select_related('product').order_by('product__name')
+    serializer_class = serializers.ReorderSuggestionSerializer
+    tenant_resource = 'catalog'
+
+
+class ValuationViewSet(TenantViewSetMixin, viewsets.GenericViewSet):
+    """Valorización del inventario a una fecha."""
+    queryset = models.InventorySnapshot.objects.all()
+    tenant_resource = 'inventory'
+
+    def list(self, request):
+        """
+        Unidades y valor de cada producto al cierre de una fecha, desde el
+        último snapshot mensual más los movimientos posteriores. Parámetros: date.
+        """
+        params = serializers.ValuationParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        tenant = self.get_tenant()
+        if tenant.business_id is None:
+            return Response(
+                {'detail': 'Indique business_id para consultar la valorización.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = valuation.valuation_as_of(tenant.business_id, params.validated_data['date'])
+        return Response(serializers.ValuationSerializer(data).data)
@@ -0,0 +1,5 @@
+from django.contrib import admin
+from . import models
+
+admin.site.register(models.Job)
+admin.site.register(models.Schedule)
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+        from core.instrumentation import registry
+        from . import metrics
+
+        # Registers the @task functions of every app
+        autodiscover_modules('tasks')
+        registry.add_collector(metrics.render)
@@ -0,0 +1,94 @@
+"""
+Cron expressions for the job schedules: the five usual fields (minute,
+hour, day of month, month, day of week with 0 or 7 = Sunday), each one
+"*", a number, a range "a-b", a step "*/n" or "a-b/n", or a list of those
+separated by commas. As in cron, when both the day of month and the day of
+week are restricted, a day matching either one matches.
+
+Times are evaluated in the current time zone (settings.TIME_ZONE).
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+
+# Search horizon: enough for any valid expression (29 February included)
+MAX_DAYS = 8 * 366
+
+
+class CronError(ValueError):
+    pass
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        body, _, step = part.partition("/")
+        step = int(step) if step.isdigit() else None
+        if step is not None and step < 1 or "/" in part and step is None:
+            raise CronError(f"Paso inválido: {part!r}")
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start, _, end = body.partition("-")
+            if not (start.isdigit() and end.isdigit()):
+                raise CronError(f"Rango inválido: {part!r}")
+            start, end = int(start), int(end)
+        elif body.isdigit():
+            start = end = int(body)
+            if step is not None:
+                end = high
+        else:
+            raise CronError(f"Valor inválido: {part!r}")
+        if not low <= start <= end <= high:
+            raise CronError(f"Fuera de rango ({low}-{high}): {part!r}")
+        values.update(range(start, end + 1, step or 1))
+    return frozenset(values)
+
+
+def parse(expression):
+    """(minutes, hours, days, months, weekdays, day_any, weekday_any) of a cron expression."""
+    parts = expression.split()
+    if len(parts) != len(FIELDS):
+        raise CronError(f"Se esperan 5 campos: {expression!r}")
+    minutes, hours, days, months, weekdays = (
+        _parse_field(text, low, high) for text, (_, low, high) in zip(parts, FIELDS)
+    )
+    # 7 is also Sunday; Python weekdays start on Monday (0)
+    weekdays = frozenset((value - 1) % 7 for value in weekdays)
+    return minutes, hours, days, months, weekdays, parts[2] == "*", parts[4] == "*"
+
+
+def next_after(expression, after):
+    """First time matching `expression` strictly after the aware datetime `after`."""
+    minutes, hours, days, months, weekdays, day_any, weekday_any = parse(expression)
+    current_tz = timezone.get_current_timezone()
+    start = timezone.localtime(after, current_tz).replace(second=0, microsecond=0, tzinfo=None) + timedelta(minutes=1)
+    hour_list, minute_list = sorted(hours), sorted(minutes)
+
+    day = start.date()
+    for _ in range(MAX_DAYS):
+        if day.month in months:
+            day_match = day.day in days
+            weekday_match = day.weekday() in weekdays
+            if day_any or weekday_any:
+                matches = day_match and weekday_match
+            else:
+                matches = day_match or weekday_match
+            if matches:
+                floor = start.time() if day == start.date() else time.min
+                for hour in hour_list:
+                    if hour < floor.hour:
+                        continue
+                    for minute in minute_list:
+                        if (hour, minute) >= (floor.hour, floor.minute):
+                            return timezone.make_aware(datetime.combine(day, time(hour, minute)), current_tz)
+        day += timedelta(days=1)
+    raise CronError(f"La expresión no coincide con ninguna fecha: {expression!r}")
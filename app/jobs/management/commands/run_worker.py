@@ -0,0 +1,53 @@
+"""
+Django management command to run a job worker (see jobs.worker). Run one
+or more per deployment; they coordinate through the jobs table only.
+"""
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.queue import get_setting
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en cola y las programadas (worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queues',
+            type=str,
+            help='Colas separadas por comas (por defecto, todas las de JOBS[\'QUEUES\'])',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Tareas simultáneas por cola en este worker (por defecto y como máximo, la concurrencia configurada de cada cola, que es el total entre todos los workers)',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Termina cuando no quedan tareas listas en vez de seguir esperando',
+        )
+
+    def handle(self, *args, **options):
+        queues = [name.strip() for name in (options['queues'] or '').split(',') if name.strip()]
+        unknown = sorted(set(queues) - set(get_setting('QUEUES')))
+        if unknown:
+            raise CommandError(f'Colas no configuradas: {", ".join(unknown)}')
+        if options['concurrency'] is not None and options['concurrency'] < 1:
+            raise CommandError('--concurrency debe ser mayor a 0')
+
+        worker = Worker(queues=queues or None, concurrency=options['concurrency'])
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        limits = ', '.join(f'{name} ({limit})' for name, limit in worker.limits.items())
+        self.stdout.write(f'  ✓ Worker {worker.id}: {limits}')
+        processed = worker.run(burst=options['burst'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Tareas ejecutadas: {processed}'
+            )
+        )
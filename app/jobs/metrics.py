@@ -0,0 +1,82 @@
+"""
+Queue metrics for /internal/metrics/, read from the jobs table at scrape
+time (the workers are other processes): depth (ready, delayed, running),
+age of the oldest ready job, and for the jobs finished in the last
+RECENT_WINDOW seconds their count and average wait and run time.
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min, Q
+from django.utils import timezone
+
+from .models import Job
+
+RECENT_WINDOW = 300
+
+
+def _seconds(duration):
+    if duration is None:
+        return 0.0
+    if isinstance(duration, timedelta):
+        return duration.total_seconds()
+    return duration / 1_000_000  # backends that average durations as microseconds
+
+
+def render():
+    """Prometheus text exposition of the queue metrics."""
+    now = timezone.now()
+    depth = (
+        Job.objects.filter(status__in=("QUEUED", "RUNNING"))
+        .values("queue")
+        .annotate(
+            ready=Count("id", filter=Q(status="QUEUED", run_at__lte=now)),
+            delayed=Count("id", filter=Q(status="QUEUED", run_at__gt=now)),
+            running=Count("id", filter=Q(status="RUNNING")),
+            oldest=Min("run_at", filter=Q(status="QUEUED", run_at__lte=now)),
+        )
+        .order_by("queue")
+    )
+    recent = (
+        Job.objects.filter(finished_at__gte=now - timedelta(seconds=RECENT_WINDOW))
+        .values("queue", "status")
+        .annotate(
+            count=Count("id"),
+            wait=Avg(ExpressionWrapper(F("started_at") - F("run_at"), output_field=DurationField())),
+            run=Avg(ExpressionWrapper(F("finished_at") - F("started_at"), output_field=DurationField())),
+        )
+        .order_by("queue", "status")
+    )
+
+    lines = []
+
+    def family(name, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+
+    depth = list(depth)
+    for name, key, help_text in (
+        ('sisfac_jobs_ready', 'ready', 'Jobs ready to run.'),
+        ('sisfac_jobs_delayed', 'delayed', 'Jobs waiting for their run time (retries included).'),
+        ('sisfac_jobs_running', 'running', 'Jobs being run.'),
+    ):
+        family(name, help_text)
+        for row in depth:
+            lines.append(f'{name}{{queue="{row["queue"]}"}} {row[key]}')
+
+    family('sisfac_jobs_oldest_ready_age_seconds', 'Time the oldest ready job has been waiting.')
+    for row in depth:
+        age = (now - row["oldest"]).total_seconds() if row["oldest"] else 0.0
+        lines.append(f'sisfac_jobs_oldest_ready_age_seconds{{queue="{row["queue"]}"}} {age}')
+
+    recent = list(recent)
+    family('sisfac_jobs_finished_recent', f'Jobs finished in the last {RECENT_WINDOW} seconds.')
+    for row in recent:
+        lines.append(f'sisfac_jobs_finished_recent{{queue="{row["queue"]}",status="{row["status"]}"}} {row["count"]}')
+    for name, key, help_text in (
+        ('sisfac_jobs_wait_seconds_avg', 'wait', 'Average time from run_at to start of the recently finished jobs.'),
+        ('sisfac_jobs_run_seconds_avg', 'run', 'Average run time of the recently finished jobs.'),
+    ):
+        family(name, help_text)
+        for row in recent:
+            lines.append(f'{name}{{queue="{row["queue"]}",status="{row["status"]}"}} {_seconds(row[key])}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,76 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A task run by the workers (see jobs.worker). Workers claim QUEUED jobs
+    whose run_at has passed with SELECT ... FOR UPDATE SKIP LOCKED, so
+    several of them never take the same job nor wait on each other.
+    """
+    STATUS_CHOICES = [
+        ("QUEUED", "En cola"),
+        ("RUNNING", "En ejecución"),
+        ("DONE", "Completado"),
+        ("FAILED", "Fallido"),
+    ]
+
+    queue = models.CharField(max_length=50, default="default")
+    task = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Lower runs first
+    priority = models.SmallIntegerField(default=0)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="QUEUED")
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True, default="")
+
+    # Worker running the job and its last sign of life (see STALE_AFTER)
+    worker = models.CharField(max_length=100, blank=True, default="")
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    # Schedule that enqueued the job, if any
+    schedule = models.CharField(max_length=100, blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["queue", "priority", "run_at"], condition=Q(status="QUEUED"), name="job_ready_idx",
+            ),
+            models.Index(fields=["heartbeat_at"], condition=Q(status="RUNNING"), name="job_running_idx"),
+            models.Index(fields=["finished_at"], name="job_finished_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class Schedule(models.Model):
+    """
+    Periodic task, kept in sync with JOBS['SCHEDULE'] by the workers. The
+    worker that locks a due schedule enqueues its job and moves
+    next_run_at to the following match of `cron` (missed runs are not
+    repeated).
+    """
+    name = models.CharField(max_length=100, unique=True)
+    cron = models.CharField(max_length=100)
+    task = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    queue = models.CharField(max_length=50, default="default")
+    is_active = models.BooleanField(default=True)
+
+    next_run_at = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.cron})"
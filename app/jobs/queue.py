@@ -0,0 +1,92 @@
+"""
+Task registry and enqueueing.
+
+A task is a function registered with @task, looked up by its name
+("<module>.<function>" unless given) in the `tasks` modules of the
+installed apps, which JobsConfig.ready() imports. Its keyword arguments
+must be JSON serializable:
+
+    @task(queue="exports", max_attempts=5, retry_delay=60)
+    def export_register(business_id, period): ...
+
+    enqueue(export_register, business_id=9, period="2026-09")
+
+enqueue() inserts the job in the current transaction: if it rolls back,
+the job never existed, and workers only see it once it commits.
+
+Settings (all optional):
+
+    JOBS = {
+        'QUEUES': {'default': {'concurrency': 4}},   # running jobs per queue, across all workers
+        'POLL_INTERVAL': 1.0,    # seconds between claims when idle
+        'STALE_AFTER': 300,      # seconds without heartbeat before a running job is retried
+        'RETENTION_DAYS': 7,     # finished jobs kept
+        'SCHEDULE': {
+            '<name>': {'cron': '30 2 * * *', 'task': '<task name>', 'kwargs': {}, 'queue': 'default'},
+        },
+    }
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULTS = {
+    'QUEUES': {'default': {'concurrency': 4}},
+    'POLL_INTERVAL': 1.0,
+    'STALE_AFTER': 300,
+    'RETENTION_DAYS': 7,
+    'SCHEDULE': {},
+}
+
+
+class Task:
+    def __init__(self, func, name, queue, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def backoff(self, attempts):
+        """Delay before retrying after `attempts` failed runs (exponential)."""
+        return timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+
+
+registry = {}
+
+
+def get_setting(name):
+    return getattr(settings, 'JOBS', {}).get(name, DEFAULTS[name])
+
+
+def task(name=None, queue="default", max_attempts=3, retry_delay=30):
+    """Registers the decorated function as a task."""
+    def register(func):
+        registered = Task(func, name or f"{func.__module__}.{func.__name__}", queue, max_attempts, retry_delay)
+        registry[registered.name] = registered
+        return registered
+    return register
+
+
+def get_task(name):
+    return registry.get(name)
+
+
+def enqueue(task_or_name, queue=None, run_at=None, delay=None, priority=0, schedule="", **kwargs):
+    """Inserts a job for the task with `kwargs`. Returns the Job."""
+    from .models import Job
+
+    name = task_or_name.name if isinstance(task_or_name, Task) else task_or_name
+    registered = get_task(name)
+    if registered is None:
+        raise KeyError(f"Tarea no registrada: {name}")
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta(0))
+    return Job.objects.create(
+        queue=queue or registered.queue, task=name, kwargs=kwargs, priority=priority,
+        run_at=run_at, max_attempts=registered.max_attempts, schedule=schedule,
+    )
@@ -0,0 +1,14 @@
+"""
+Built-in tasks.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+
+from .queue import task
+
+
+@task(name="call_command", max_attempts=1)
+def run_command(command, args=(), options=None):
+    """Runs a management command (e.g. the maintenance commands from JOBS['SCHEDULE'])."""
+    call_command(command, *args, stdout=StringIO(), **(options or {}))
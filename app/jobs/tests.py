@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import cron, worker
+from .models import Job
+from .queue import enqueue, registry, task
+
+QUEUES = {'QUEUES': {'default': {'concurrency': 2}}, 'STALE_AFTER': 300}
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class JobTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        @task(name='tests.record', retry_delay=10, max_attempts=2)
+        def record(fail=False):
+            self.calls.append(fail)
+            if fail:
+                raise RuntimeError('falló')
+
+        self.addCleanup(registry.pop, 'tests.record')
+
+
+@override_settings(JOBS=QUEUES)
+class ClaimTests(JobTestCase):
+    """The queue's concurrency bounds the running jobs of all workers together."""
+
+    def test_workers_share_the_queue_concurrency(self):
+        for _ in range(4):
+            enqueue('tests.record')
+        first = worker.claim('default', 4, 'worker-1')
+        self.assertEqual(len(first), 2)
+        self.assertEqual(worker.claim('default', 4, 'worker-2'), [])
+
+        worker.execute(first[0], 'worker-1')
+        second = worker.claim('default', 4, 'worker-2')
+        self.assertEqual(len(second), 1)
+        self.assertNotIn(second[0].pk, [job.pk for job in first])
+        self.assertEqual(Job.objects.filter(status='RUNNING').count(), 2)
+
+    def test_jobs_are_claimed_once_and_in_priority_order(self):
+        low = enqueue('tests.record', priority=5)
+        high = enqueue('tests.record', priority=-1)
+        enqueue('tests.record', delay=timedelta(hours=1))
+        claimed = worker.claim('default', 1, 'worker-1')
+        self.assertEqual([job.pk for job in claimed], [high.pk])
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual([job.pk for job in worker.claim('default', 1, 'worker-2')], [low.pk])
+        # Not ready yet, and both slots are taken
+        self.assertEqual(worker.claim('default', 1, 'worker-3'), [])
+
+    def test_worker_threads_do_not_exceed_the_queue_concurrency(self):
+        self.assertEqual(worker.Worker(queues=['default'], concurrency=8).limits, {'default': 2})
+        self.assertEqual(worker.Worker(queues=['default'], concurrency=1).limits, {'default': 1})
+
+
+@override_settings(JOBS=QUEUES)
+class RetryTests(JobTestCase):
+    """A failed job is retried after the task's exponential backoff until max_attempts."""
+
+    def test_failed_job_backs_off_then_fails(self):
+        job = enqueue('tests.record', fail=True)
+        [claimed] = worker.claim('default', 1, 'worker-1')
+        before = timezone.now()
+        with self.assertLogs('sisfac.jobs', 'ERROR'):
+            worker.execute(claimed, 'worker-1')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), ('QUEUED', 1, ''))
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=10))
+        self.assertIn('falló', job.last_error)
+
+        # Not claimed before the backoff elapses
+        self.assertEqual(worker.claim('default', 1, 'worker-1'), [])
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        [claimed] = worker.claim('default', 1, 'worker-1')
+        with self.assertLogs('sisfac.jobs', 'ERROR'):
+            worker.execute(claimed, 'worker-1')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.calls, [True, True])
+
+    def test_backoff_doubles(self):
+        registered = registry['tests.record']
+        self.assertEqual(
+            [registered.backoff(attempts).total_seconds() for attempts in (1, 2, 3)], [10, 20, 40]
+        )
+
+
+@override_settings(JOBS=QUEUES)
+class StaleTests(JobTestCase):
+    """Jobs of a worker that stopped beating are taken back."""
+
+    def test_dead_worker_job_is_requeued_and_its_outcome_ignored(self):
+        job = enqueue('tests.record')
+        [claimed] = worker.claim('default', 1, 'dead-worker')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=301))
+        self.assertEqual(worker.reap_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), ('QUEUED', ''))
+
+        [reclaimed] = worker.claim('default', 1, 'worker-2')
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+        # The dead worker finishing late does not overwrite the new run
+        worker.execute(claimed, 'dead-worker')
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'RUNNING')
+        worker.execute(reclaimed, 'worker-2')
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'DONE')
+
+    def test_stale_job_out_of_attempts_fails(self):
+        job = enqueue('tests.record')
+        Job.objects.filter(pk=job.pk).update(
+            status='RUNNING', worker='dead-worker', attempts=2,
+            heartbeat_at=timezone.now() - timedelta(seconds=301),
+        )
+        worker.reap_stale()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+
+    def test_beating_job_is_left_alone(self):
+        enqueue('tests.record')
+        worker.claim('default', 1, 'worker-1')
+        self.assertEqual(worker.reap_stale(), 0)
+
+
+@override_settings(TIME_ZONE='UTC')
+class CronTests(TestCase):
+    """next_after() returns the first match strictly after the given time."""
+
+    def test_daily(self):
+        self.assertEqual(cron.next_after('30 2 * * *', utc(2026, 3, 1, 1, 0)), utc(2026, 3, 1, 2, 30))
+        self.assertEqual(cron.next_after('30 2 * * *', utc(2026, 3, 1, 2, 30)), utc(2026, 3, 2, 2, 30))
+
+    def test_steps_lists_and_ranges(self):
+        self.assertEqual(cron.next_after('*/15 * * * *', utc(2026, 3, 1, 10, 7, 59)), utc(2026, 3, 1, 10, 15))
+        self.assertEqual(cron.next_after('0 8-10,20 * * *', utc(2026, 3, 1, 10, 0)), utc(2026, 3, 1, 20, 0))
+
+    def test_day_of_month_skips_short_months(self):
+        self.assertEqual(cron.next_after('0 0 31 * *', utc(2026, 3, 31, 0, 0)), utc(2026, 5, 31, 0, 0))
+        self.assertEqual(cron.next_after('0 0 29 2 *', utc(2026, 1, 1)), utc(2028, 2, 29))
+
+    def test_day_or_weekday(self):
+        # 2026-03-01 is a Sunday: either the 15th or a Monday matches
+        self.assertEqual(cron.next_after('0 9 15 * 1', utc(2026, 3, 1)), utc(2026, 3, 2, 9, 0))
+        self.assertEqual(cron.next_after('0 9 * * 7', utc(2026, 3, 2)), utc(2026, 3, 8, 9, 0))
+
+    def test_invalid_expressions(self):
+        for expression in ('* * * *', '61 * * * *', '*/0 * * * *', 'a * * * *', '0 0 31 2 *'):
+            with self.assertRaises(cron.CronError, msg=expression):
+                cron.next_after(expression, utc(2026, 3, 1))
@@ -0,0 +1,263 @@
+"""
+Job worker: claims the ready jobs of its queues and runs them on a thread
+pool. JOBS['QUEUES'][queue]['concurrency'] bounds the running jobs of a
+queue across all workers; it is also the thread count of each worker for
+the queue, unless the worker is started with a lower --concurrency.
+
+- Claiming locks the oldest ready jobs of a queue with FOR UPDATE SKIP
+  LOCKED and marks them RUNNING in the same transaction. Claims of the
+  same queue take an advisory lock (core.db.advisory_lock) and count the
+  queue's RUNNING jobs first, so workers never exceed the concurrency
+  together. A job of a dead worker holds its slot until it is requeued
+  as stale.
+- A failed job is queued again after the task's exponential backoff until
+  it reaches max_attempts, then it stays FAILED with the traceback.
+- Every MAINTENANCE_INTERVAL seconds the worker refreshes the heartbeat of
+  its running jobs, requeues (or fails) those of workers that stopped
+  beating for STALE_AFTER seconds and deletes finished jobs older than
+  RETENTION_DAYS, in batches.
+- Due schedules are claimed the same way (SKIP LOCKED), so with several
+  workers each run is enqueued once.
+
+Tasks manage their own transactions; the job row is only updated after the
+task returns. A worker stopped with SIGTERM/SIGINT claims nothing more and
+waits for the running jobs.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.db import advisory_lock
+from . import cron
+from .models import Job, Schedule
+from .queue import enqueue, get_setting, get_task
+
+logger = logging.getLogger('sisfac.jobs')
+
+MAINTENANCE_INTERVAL = 30
+PURGE_BATCH_SIZE = 1000
+
+FINISHED = ("DONE", "FAILED")
+
+
+# -- schedules ------------------------------------------------------------
+
+def sync_schedules(now=None):
+    """Brings the Schedule rows in line with JOBS['SCHEDULE']; the others are deactivated."""
+    now = now or timezone.now()
+    configured = get_setting('SCHEDULE')
+    existing = {schedule.name: schedule for schedule in Schedule.objects.all()}
+    for name, entry in configured.items():
+        values = {
+            "cron": entry["cron"],
+            "task": entry["task"],
+            "kwargs": entry.get("kwargs", {}),
+            "queue": entry.get("queue", "default"),
+            "is_active": True,
+        }
+        schedule = existing.get(name)
+        if schedule is None:
+            try:
+                with transaction.atomic():
+                    Schedule.objects.create(name=name, next_run_at=cron.next_after(entry["cron"], now), **values)
+            except IntegrityError:
+                pass  # created by another worker starting at the same time
+            continue
+        if all(getattr(schedule, field) == value for field, value in values.items()):
+            continue
+        if schedule.cron != values["cron"] or not schedule.is_active:
+            schedule.next_run_at = cron.next_after(values["cron"], now)
+        for field, value in values.items():
+            setattr(schedule, field, value)
+        schedule.save()
+    Schedule.objects.filter(is_active=True).exclude(name__in=list(configured)).update(is_active=False)
+
+
+def run_schedules(now=None):
+    """Enqueues the jobs of the due schedules. Returns how many were enqueued."""
+    now = now or timezone.now()
+    enqueued = 0
+    with transaction.atomic():
+        due = Schedule.objects.select_for_update(skip_locked=True).filter(is_active=True, next_run_at__lte=now)
+        for schedule in due:
+            try:
+                enqueue(schedule.task, queue=schedule.queue, schedule=schedule.name, **schedule.kwargs)
+                enqueued += 1
+            except KeyError:
+                logger.error("Schedule %s: task %s is not registered", schedule.name, schedule.task)
+            schedule.last_run_at = schedule.next_run_at
+            # Missed runs are not repeated: the next one is the next match from now
+            schedule.next_run_at = cron.next_after(schedule.cron, now)
+            schedule.save(update_fields=["last_run_at", "next_run_at"])
+    return enqueued
+
+
+# -- jobs -----------------------------------------------------------------
+
+def queue_concurrency(queue):
+    return get_setting('QUEUES').get(queue, {}).get('concurrency', 1)
+
+
+def claim(queue, limit, worker_id):
+    """
+    Marks up to `limit` ready jobs of `queue` as RUNNING by `worker_id` and
+    returns them, never more than the free slots of the queue's concurrency.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        advisory_lock(f"jobs:claim:{queue}")
+        running = Job.objects.filter(status="RUNNING", queue=queue).count()
+        limit = min(limit, queue_concurrency(queue) - running)
+        if limit <= 0:
+            return []
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="QUEUED", queue=queue, run_at__lte=now)
+            .order_by("priority", "run_at", "id")[:limit]
+        )
+        if not jobs:
+            return []
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status="RUNNING", worker=worker_id, attempts=F("attempts") + 1,
+            started_at=now, heartbeat_at=now, finished_at=None,
+        )
+    for job in jobs:
+        job.status, job.worker, job.attempts = "RUNNING", worker_id, job.attempts + 1
+        job.started_at = job.heartbeat_at = now
+    return jobs
+
+
+def _finish(job, worker_id, **values):
+    # Only while the job is still ours (not requeued by another worker as stale)
+    Job.objects.filter(pk=job.pk, worker=worker_id, status="RUNNING").update(**values)
+
+
+def execute(job, worker_id):
+    """Runs a claimed job and records its outcome."""
+    registered = get_task(job.task)
+    if registered is None:
+        _finish(job, worker_id, status="FAILED", finished_at=timezone.now(),
+                last_error=f"Tarea no registrada: {job.task}")
+        return
+    try:
+        registered(**job.kwargs)
+    except Exception:
+        logger.exception("Job %s (%s) failed, attempt %s of %s", job.pk, job.task, job.attempts, job.max_attempts)
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            _finish(job, worker_id, status="QUEUED", run_at=now + registered.backoff(job.attempts),
+                    last_error=error, worker="", heartbeat_at=None)
+        else:
+            _finish(job, worker_id, status="FAILED", finished_at=now, last_error=error)
+    else:
+        _finish(job, worker_id, status="DONE", finished_at=timezone.now())
+
+
+def heartbeat(worker_id):
+    return Job.objects.filter(status="RUNNING", worker=worker_id).update(heartbeat_at=timezone.now())
+
+
+def reap_stale(now=None):
+    """Requeues the running jobs whose worker stopped beating (failed if out of attempts)."""
+    now = now or timezone.now()
+    stale = Job.objects.filter(status="RUNNING", heartbeat_at__lt=now - timedelta(seconds=get_setting('STALE_AFTER')))
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status="FAILED", finished_at=now, last_error="El worker dejó de responder.",
+    )
+    requeued = stale.update(status="QUEUED", run_at=now, worker="", heartbeat_at=None)
+    return requeued + failed
+
+
+def purge_finished(now=None, batch_size=PURGE_BATCH_SIZE):
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=get_setting('RETENTION_DAYS'))
+    deleted = 0
+    while True:
+        ids = list(
+            Job.objects.filter(status__in=FINISHED, finished_at__lt=cutoff)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(pk__in=ids).delete()[0]
+
+
+class Worker:
+    def __init__(self, queues=None, concurrency=None, worker_id=None):
+        configured = get_setting('QUEUES')
+        self.limits = {
+            name: min(concurrency or queue_concurrency(name), queue_concurrency(name))
+            for name in (queues or list(configured))
+        }
+        self.id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.running = dict.fromkeys(self.limits, 0)
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def maintenance(self):
+        heartbeat(self.id)
+        reap_stale()
+        purge_finished()
+
+    def run(self, burst=False):
+        """Claims and runs jobs until stopped (or, with `burst`, until no job is ready)."""
+        sync_schedules()
+        last_maintenance = None
+        with ThreadPoolExecutor(max_workers=sum(self.limits.values()), thread_name_prefix="job") as pool:
+            while not self._stopping.is_set():
+                close_old_connections()
+                if last_maintenance is None or time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                    self.maintenance()
+                    last_maintenance = time.monotonic()
+                run_schedules()
+
+                claimed = 0
+                for queue, limit in self.limits.items():
+                    free = limit - self.running[queue]
+                    if free <= 0:
+                        continue
+                    for job in claim(queue, free, self.id):
+                        with self._lock:
+                            self.running[queue] += 1
+                        pool.submit(self._execute, job)
+                        claimed += 1
+                if claimed:
+                    continue
+                with self._lock:
+                    idle = not any(self.running.values())
+                if burst and idle:
+                    break
+                self._wakeup.wait(get_setting('POLL_INTERVAL'))
+                self._wakeup.clear()
+        close_old_connections()
+        return self.processed
+
+    def _execute(self, job):
+        close_old_connections()
+        try:
+            execute(job, self.id)
+        except Exception:
+            logger.exception("Could not record the outcome of job %s", job.pk)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self.running[job.queue] -= 1
+                self.processed += 1
+            # A slot is free: claim again without waiting for the poll interval
+            self._wakeup.set()
@@ -5,3 +5,4 @@ admin.site.register(models.Business)
 admin.site.register(models.Category)
 admin.site.register(models.Product)
 admin.site.register(models.Profile)
+admin.site.register(models.ProductBulkOperation)
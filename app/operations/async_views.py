@@ -0,0 +1,128 @@
+"""
+Vistas asíncronas (ASGI) para los endpoints de lectura más consultados.
+
+Usan el ORM asíncrono de Django (aget, acount, async for) para que clientes
+lentos no ocupen un hilo del servidor mientras esperan. Devuelven la misma
+estructura que sus equivalentes síncronos en views.py.
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.authentication import async_login_required
+from core.fieldsets import split_param, trim_queryset
+from core.renderers import json_response
+from . import models, serializers
+from .filters import filter_products
+from .tenancy import TenantPermission, aresolve_tenant
+from .views import ProductPagination
+
+
+async def aget_profile(user, full=False):
+    """
+    Retorna el perfil del usuario o None si no existe. Si el usuario viene de
+    los claims del token, usa el perfil ya armado (id, negocio, rol) sin
+    consultar la base de datos; full=True lo carga completo, con usuario y negocio.
+    """
+    if not full and getattr(user, 'from_claims', False):
+        try:
+            return user.profile
+        except models.Profile.DoesNotExist:
+            return None
+    try:
+        return await models.Profile.objects.select_related('user', 'business').aget(user=user)
+    except models.Profile.DoesNotExist:
+        return None
+
+
+async def arequire_tenant(request, resource):
+    """
+    Negocio de la request con permiso de lectura sobre `resource`, igual que
+    TenantPermission en las vistas síncronas. Retorna (tenant, None) o
+    (None, respuesta de error): 400 si business_id no es un número, 403 si el
+    usuario no tiene negocio o permiso.
+    """
+    try:
+        tenant = await aresolve_tenant(request)
+    except exceptions.ValidationError as error:
+        return None, JsonResponse(error.detail, status=400)
+    if tenant is None or not tenant.has_perm(f'{resource}.view'):
+        return None, JsonResponse({'detail': TenantPermission.message}, status=403)
+    return tenant, None
+
+
+def _page_size(request):
+    page_size = ProductPagination.page_size
+    try:
+        requested = int(request.GET[ProductPagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return page_size
+    if requested <= 0:
+        return page_size
+    return min(requested, ProductPagination.max_page_size)
+
+
+@require_GET
+@async_login_required
+async def product_list(request):
+    """
+    Versión asíncrona de GET /api/products/ (búsqueda y listado paginado).
+    Acepta los mismos parámetros: category, search, ordering, page, page_size, business_id,
+    fields y expand.
+    """
+    tenant, error = await arequire_tenant(request, 'catalog')
+    if error is not None:
+        return error
+
+    fields, expand = split_param(request.GET, 'fields'), split_param(request.GET, 'expand') or ()
+    queryset = trim_queryset(
+        models.Product.objects.for_tenant(tenant), serializers.ProductListSerializer, fields, expand
+    )
+    queryset = filter_products(queryset, request.GET)
+
+    page_size = _page_size(request)
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+
+    count = await queryset.acount()
+    last_page = max((count + page_size - 1) // page_size, 1)
+    if page < 1 or page > last_page:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    offset = (page - 1) * page_size
+    products = [product async for product in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page + 1) if page < last_page else None
+    if page <= 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page - 1)
+
+    return json_response({
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': serializers.ProductListSerializer(products, many=True, fields=fields, expand=expand).data,
+    })
+
+
+@require_GET
+@async_login_required
+async def profile_me(request):
+    """
+    Versión asíncrona de GET /api/profiles/me/.
+    Retorna el perfil del usuario autenticado con estructura aplanada.
+    """
+    profile = await aget_profile(request.user, full=True)
+    if profile is None:
+        return JsonResponse(
+            {'detail': 'No se encontró un perfil para este usuario.'},
+            status=404,
+        )
+    return json_response(serializers.ProfileMeSerializer(profile).data)
@@ -0,0 +1,97 @@
+"""
+Set-based bulk changes of products: prices, stock and category.
+
+Each change is one UPDATE over the products selected by the filters, with
+the new value computed by the database from F() expressions, instead of a
+PATCH (and a full_clean()) per product. A dry run returns how many products
+would change and a preview computed with the same expression, without
+writing anything. An applied change writes a ProductBulkOperation audit
+record in the same transaction and sends products_bulk_updated, so the
+apps that follow product saves (sync log, inventory) see it.
+
+The products are locked in id order before the UPDATE, and a stock change
+first lets the inventory lock their ProductCost rows
+(products_bulk_stock_locking): a paid order locks the cost and then the
+product, one product at a time in id order, so taking the locks in the
+same order cannot deadlock with it.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, IntegerField, Value
+from django.db.models.functions import Greatest, Now, Round
+
+from .filters import filter_products
+from .models import ProductBulkOperation
+from .signals import products_bulk_stock_locking, products_bulk_updated
+
+PREVIEW_SIZE = 20
+
+PRICE = DecimalField(max_digits=10, decimal_places=2)
+
+
+def select_products(queryset, filters):
+    """Products of `queryset` (already scoped to the business) matching the bulk filters."""
+    if filters.get("ids"):
+        queryset = queryset.filter(pk__in=filters["ids"])
+    # Same category/search semantics as the product list
+    return filter_products(queryset, {
+        "category": filters.get("category"),
+        "search": filters.get("search") or "",
+        "ordering": "name",
+    })
+
+
+def price_expression(field, mode, value):
+    if mode == "percent":
+        new_price = F(field) * Value(1 + value / 100, output_field=PRICE)
+    else:
+        new_price = F(field) + Value(value, output_field=PRICE)
+    return Greatest(Round(new_price, 2, output_field=PRICE), Value(Decimal("0.00"), output_field=PRICE))
+
+
+def stock_expression(mode, value):
+    if mode == "set":
+        return Value(value, output_field=IntegerField())
+    # A negative amount empties the stock without going below zero
+    return Greatest(F("stock") + Value(value, output_field=IntegerField()), Value(0, output_field=IntegerField()))
+
+
+def preview(queryset, field, expression):
+    rows = (
+        queryset.annotate(new_value=expression)
+        .values("id", "code", "name", "new_value", current_value=F(field))[:PREVIEW_SIZE]
+    )
+    return {"affected": queryset.count(), "preview": list(rows)}
+
+
+def apply(queryset, business_id, user_id, kind, params, updates, stock=False):
+    """
+    Runs the UPDATE of `updates` ({field: expression}) over `queryset` and
+    audits it. With `stock`, the units added to each product are passed
+    along with the signal.
+    """
+    with transaction.atomic():
+        product_ids = sorted(queryset.values_list("id", flat=True))
+        if stock:
+            products_bulk_stock_locking.send(sender=queryset.model, business_id=business_id, product_ids=product_ids)
+        products = queryset.model.objects.filter(pk__in=product_ids)
+        stock_before = dict(products.select_for_update().order_by("id").values_list("id", "stock"))
+        affected = products.update(**updates, updated_at=Now())
+
+        operation = ProductBulkOperation.objects.create(
+            business_id=business_id, user_id=user_id, kind=kind, params=params, affected=affected,
+        )
+        stock_deltas = {}
+        if stock:
+            stock_after = products.values_list("id", "stock")
+            stock_deltas = {
+                product_id: units - stock_before[product_id]
+                for product_id, units in stock_after
+                if units != stock_before[product_id]
+            }
+        products_bulk_updated.send(
+            sender=queryset.model, business_id=business_id, product_ids=product_ids,
+            stock_deltas=stock_deltas, operation=operation,
+        )
+    return operation
@@ -0,0 +1,41 @@
+from django.db.models import Q
+
+
+# Campos permitidos para ordenamiento de productos
+PRODUCT_ORDERING_FIELDS = ['name', 'code', 'stock', 'buy_price', 'sell_price', 'created_at']
+
+
+def filter_products(queryset, params):
+    """
+    Aplica los filtros de catálogo sobre un queryset de productos ya acotado al negocio:
+    - Categoría (parámetro 'category')
+    - Búsqueda por nombre o código (parámetro 'search')
+    - Ordenamiento dinámico (parámetro 'ordering')
+
+    Compartido por ProductViewSet y la vista asíncrona de productos.
+    """
+    # Filtrar por categoría si se proporciona
+    category_id = params.get('category', None)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+
+    # Búsqueda por nombre o código
+    search = params.get('search')
+    if search:
+        # Limpiar espacios en blanco del término de búsqueda
+        search = search.strip()
+        if search:
+            # Buscar en nombre O código
+            queryset = queryset.filter(Q(name__icontains=search) | Q(code__icontains=search))
+
+    # Ordenamiento dinámico
+    ordering = params.get('ordering', '-created_at')
+
+    # Validar que el campo de ordenamiento sea permitido
+    # Remover el prefijo '-' si existe para validar
+    ordering_field = ordering.lstrip('-')
+
+    if ordering_field in PRODUCT_ORDERING_FIELDS:
+        return queryset.order_by(ordering)
+    # Si el campo no es válido, usar orden por defecto
+    return queryset.order_by('-created_at')
@@ -0,0 +1,96 @@
+"""
+Bulk loader for product catalogs (see core.bulkload).
+
+CSV columns: business_ruc, category, code, name, sell_price, buy_price and
+optionally description, stock, unit_of_measurement. Products are matched by
+(business, code): existing ones are updated, new ones inserted. Missing
+categories are created by name.
+"""
+from core.bulkload import STAGE_TABLE, Loader
+
+from .models import Business, Category, Product
+
+UNITS = [code for code, _ in Product.UNIT_OF_MEASUREMENT_CHOICES]
+
+# Product prices are numeric(10, 2)
+MAX_PRICE = 99999999
+
+
+class ProductLoader(Loader):
+    kind = 'products'
+    columns = [
+        'business_ruc', 'category', 'code', 'name', 'description',
+        'stock', 'sell_price', 'buy_price', 'unit_of_measurement',
+    ]
+    required = ['business_ruc', 'category', 'code', 'name', 'sell_price', 'buy_price']
+    resolve_columns = {'business_id': 'bigint', 'category_id': 'bigint', 'product_id': 'bigint'}
+
+    def resolve(self, cursor):
+        business = Business._meta.db_table
+        category = Category._meta.db_table
+        product = Product._meta.db_table
+
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET business_id = b.id FROM {business} b WHERE b.ruc = s.business_ruc'
+        )
+        self.reject(cursor, 'business_id IS NULL', 'RUC de negocio desconocido')
+        self.reject(cursor, "code = '' OR name = '' OR category = ''", 'Código, nombre y categoría son obligatorios')
+        self.reject(cursor, 'GREATEST(length(code), length(name), length(category)) > 255',
+                    'Código, nombre o categoría de más de 255 caracteres')
+        for column, reason in (('sell_price', 'Precio de venta inválido'), ('buy_price', 'Precio de compra inválido')):
+            self.reject(cursor, f'pg_temp.try_numeric({column}) IS NULL OR '
+                                f'pg_temp.try_numeric({column}) NOT BETWEEN 0 AND {MAX_PRICE}', reason)
+        self.reject(cursor, r"stock <> '' AND stock !~ '^-?\d+$'", 'Stock inválido')
+        self.reject(cursor, "unit_of_measurement <> '' AND NOT (unit_of_measurement = ANY(%s))",
+                    'Unidad de medida inválida', [UNITS])
+        # Si el código se repite en el archivo, gana la última línea
+        self.reject(
+            cursor,
+            f'EXISTS (SELECT 1 FROM {STAGE_TABLE} later WHERE later.error IS NULL '
+            f'AND later.business_id = {STAGE_TABLE}.business_id AND later.code = {STAGE_TABLE}.code '
+            f'AND later.line > {STAGE_TABLE}.line)',
+            'Código repetido más adelante en el archivo',
+        )
+
+        # Categorías faltantes, creadas una sola vez por (negocio, nombre)
+        cursor.execute(
+            f'INSERT INTO {category} (business_id, name, description, created_at, updated_at) '
+            f'SELECT DISTINCT s.business_id, s.category, NULL, now(), now() FROM {STAGE_TABLE} s '
+            f'WHERE s.error IS NULL AND NOT EXISTS ('
+            f'  SELECT 1 FROM {category} c WHERE c.business_id = s.business_id AND c.name = s.category)'
+        )
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET category_id = c.id FROM ('
+            f'  SELECT DISTINCT ON (business_id, name) id, business_id, name FROM {category} '
+            f'  WHERE business_id IN (SELECT DISTINCT business_id FROM {STAGE_TABLE}) '
+            f'  ORDER BY business_id, name, id'
+            f') c WHERE s.error IS NULL AND c.business_id = s.business_id AND c.name = s.category'
+        )
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET product_id = p.id FROM ('
+            f'  SELECT DISTINCT ON (business_id, code) id, business_id, code FROM {product} '
+            f'  WHERE business_id IN (SELECT DISTINCT business_id FROM {STAGE_TABLE}) '
+            f'  ORDER BY business_id, code, id'
+            f') p WHERE s.error IS NULL AND p.business_id = s.business_id AND p.code = s.code'
+        )
+
+    def merge(self, cursor):
+        product = Product._meta.db_table
+        cursor.execute(
+            f'UPDATE {product} p SET '
+            f'  category_id = s.category_id, name = s.name, '
+            f"  description = COALESCE(NULLIF(s.description, ''), p.description), "
+            f"  stock = COALESCE(NULLIF(s.stock, '')::integer, p.stock), "
+            f'  sell_price = s.sell_price::numeric, buy_price = s.buy_price::numeric, '
+            f"  unit_of_measurement = COALESCE(NULLIF(s.unit_of_measurement, ''), p.unit_of_measurement), "
+            f'  updated_at = now() '
+            f'FROM {STAGE_TABLE} s WHERE s.error IS NULL AND p.id = s.product_id'
+        )
+        cursor.execute(
+            f'INSERT INTO {product} (business_id, category_id, code, name, description, stock, '
+            f'  sell_price, buy_price, unit_of_measurement, created_at, updated_at) '
+            f"SELECT business_id, category_id, code, name, NULLIF(description, ''), "
+            f"  COALESCE(NULLIF(stock, '')::integer, 0), sell_price::numeric, buy_price::numeric, "
+            f"  COALESCE(NULLIF(unit_of_measurement, ''), 'U'), now(), now() "
+            f'FROM {STAGE_TABLE} WHERE error IS NULL AND product_id IS NULL ORDER BY line'
+        )
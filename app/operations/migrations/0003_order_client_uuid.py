@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0002_profile_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='client_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('business', 'client_uuid'), name='uq_order_business_client_uuid'),
+        ),
+    ]
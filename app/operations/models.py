@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from audit.history import HistoryMixin
+from .signals import order_status_changed
+from .tenancy import TenantQuerySet
 
 
-class Business(models.Model):
+class Business(HistoryMixin, models.Model):
     """
     Issuer entity (RUC owner).
     MVP: keep simple but add constraints to avoid future pain.
@@ -26,6 +29,13 @@ class Business(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "id"
+
+    HISTORY_FIELDS = ("name", "description", "ruc", "sol_key", "tax_enabled")
+    HISTORY_MASKED = ("sol_key",)
+    HISTORY_BUSINESS_FIELD = "id"
+
     class Meta:
         indexes = [models.Index(fields=["ruc"])]
 
@@ -42,15 +52,20 @@ class Business(models.Model):
         return super().save(*args, **kwargs)
 
 
-class Category(models.Model):
+class Category(HistoryMixin, models.Model):
     business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="categories")
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    HISTORY_FIELDS = ("name", "description")
 
-class Product(models.Model):
+
+class Product(HistoryMixin, models.Model):
     UNIT_OF_MEASUREMENT_CHOICES = [
         ('KG', 'Kilogramo'),
         ('G', 'Gramo'),
@@ -78,6 +93,13 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    HISTORY_FIELDS = (
+        "category_id", "code", "name", "description", "stock", "sell_price", "buy_price", "unit_of_measurement",
+    )
+
     def clean(self):
         super().clean()
         if self.business_id and self.category_id:
@@ -89,7 +111,31 @@ class Product(models.Model):
         return super().save(*args, **kwargs)
 
 
-class Profile(models.Model):
+class ProductBulkOperation(models.Model):
+    """Audit record of a bulk product change (see operations.bulk)."""
+    KIND_CHOICES = [
+        ("PRICE", "Cambio de precios"),
+        ("STOCK", "Ajuste de stock"),
+        ("CATEGORY", "Cambio de categoría"),
+    ]
+
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="product_bulk_operations")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Filters and parameters as sent
+    params = models.JSONField(default=dict)
+    affected = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        ordering = ["-created_at"]
+
+
+class Profile(HistoryMixin, models.Model):
     ROLE_CHOICES = [
         ("PR", "Propietario"),
         ("AD", "Administrador"),
@@ -112,10 +158,20 @@ class Profile(models.Model):
     address = models.TextField(blank=True, null=True)
 
     is_active = models.BooleanField(default=True)
+    # Claim of the access tokens (see core.tokens); bumped to revoke them
+    token_version = models.PositiveIntegerField(default=1, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    # Changes to these fields revoke the tokens already issued
+    TOKEN_FIELDS = ("role", "business_id", "is_active")
+
+    HISTORY_FIELDS = ("user_id", "business_id", "role", "is_active", "employee_id", "phone_number", "address")
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -132,9 +188,39 @@ class Profile(models.Model):
         if self.role == "PA" and self.business:
             raise ValidationError({"business": "Los Administradores de la plataforma no deben estar asociados a un negocio."})
 
+    @property
+    def is_platform_admin(self):
+        return self.role == "PA"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_token_fields = {
+            name: instance.__dict__[name] for name in cls.TOKEN_FIELDS if name in instance.__dict__
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         self.full_clean()
-        return super().save(*args, **kwargs)
+        loaded = getattr(self, "_loaded_token_fields", {})
+        if any(getattr(self, name) != value for name, value in loaded.items()):
+            self.token_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "token_version"}
+        result = super().save(*args, **kwargs)
+        self._loaded_token_fields = {name: getattr(self, name) for name in self.TOKEN_FIELDS}
+        self._forget_token_state()
+        return result
+
+    def delete(self, *args, **kwargs):
+        self._forget_token_state()
+        return super().delete(*args, **kwargs)
+
+    def _forget_token_state(self):
+        from core.authentication import forget_token_state
+
+        user_id = self.user_id
+        transaction.on_commit(lambda: forget_token_state(user_id))
 
 
 class Order(models.Model):
@@ -160,9 +246,41 @@ class Order(models.Model):
 
     issued_at = models.DateTimeField(null=True, blank=True, help_text="Cuando se emitió el comprobante (si aplica)")
 
+    # Generated by the POS for orders made offline; deduplicates batch uploads (see sync.batches)
+    client_uuid = models.UUIDField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["business", "client_uuid"], name="uq_order_business_client_uuid"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status so save() can detect transitions without a query
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        previous_status = getattr(self, "_loaded_status", None)
+        try:
+            # The receivers (ledger, inventory, rollups) commit or roll back with the order
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                self._loaded_status = self.status
+                if self.status != previous_status:
+                    order_status_changed.send(sender=type(self), order=self, previous_status=previous_status)
+        except Exception:
+            # Rolled back: saving again must send the transition again
+            self._loaded_status = previous_status
+            raise
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
@@ -175,4 +293,7 @@ class OrderItem(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "order__business_id"
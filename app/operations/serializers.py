@@ -1,29 +1,67 @@
 from rest_framework import serializers
+from core.fieldsets import LeanSerializer, SparseFieldsetMixin
+from core.instrumentation import TimedSerializerMixin
 from django.contrib.auth import get_user_model
 from . import models
 
 User = get_user_model()
 
 
-class BusinessSerializer(serializers.ModelSerializer):
+class BusinessSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Business
-        fields = '__all__'
+        fields = ['id', 'name', 'description', 'ruc', 'sol_key', 'tax_enabled', 'created_at', 'updated_at']
+        # La clave SOL se puede escribir pero nunca se devuelve
+        extra_kwargs = {'sol_key': {'write_only': True}}
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class BusinessSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Datos públicos del negocio, para anidar en otros recursos"""
+    class Meta:
+        model = models.Business
+        fields = ['id', 'name', 'ruc', 'tax_enabled']
+
+
+class CategorySerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = {'business': BusinessSummarySerializer}
+
     class Meta:
         model = models.Category
-        fields = '__all__'
+        fields = ['id', 'business', 'name', 'description', 'created_at', 'updated_at']
+
 
+class CategoryListSerializer(LeanSerializer):
+    """Versión liviana de solo lectura de CategorySerializer para listados"""
+    mirror = CategorySerializer
+
+
+class ProductSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = {'business': BusinessSummarySerializer, 'category': CategorySerializer}
 
-class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Product
-        fields = '__all__'
+        fields = [
+            'id',
+            'business',
+            'category',
+            'code',
+            'name',
+            'description',
+            'stock',
+            'sell_price',
+            'buy_price',
+            'unit_of_measurement',
+            'created_at',
+            'updated_at',
+        ]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class ProductListSerializer(LeanSerializer):
+    """Versión liviana de solo lectura de ProductSerializer para listados"""
+    mirror = ProductSerializer
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer para datos básicos del usuario"""
     full_name = serializers.SerializerMethodField()
 
@@ -37,10 +75,10 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.get_full_name() or obj.username
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer para el perfil con datos del usuario incluidos"""
     user = UserSerializer(read_only=True)
-    business = BusinessSerializer(read_only=True)
+    business = BusinessSummarySerializer(read_only=True)
     role_display = serializers.CharField(source='get_role_display', read_only=True)
 
     class Meta:
@@ -61,7 +99,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProfileMeSerializer(serializers.ModelSerializer):
+class ProfileMeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer aplanado para el endpoint /me/ - estructura simplificada"""
     # Campos del usuario (aplanados)
     email = serializers.EmailField(source='user.email', read_only=True)
@@ -104,12 +142,102 @@ class ProfileMeSerializer(serializers.ModelSerializer):
         return obj.business.name if obj.business else None
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = {'business': BusinessSummarySerializer}
+
     class Meta:
         model = models.Order
-        fields = '__all__'
+        fields = ['id', 'business', 'status', 'payment_term', 'currency', 'issued_at', 'created_at', 'updated_at']
+
+    def validate_status(self, value):
+        # Los totales se calculan al pasar a PAID con los ítems que el pedido ya tiene
+        if self.instance is None and value == 'PAID':
+            raise serializers.ValidationError(
+                'El pedido se crea abierto: agregue sus ítems y luego márquelo como pagado.'
+            )
+        return value
+
+
+class OrderListSerializer(LeanSerializer):
+    """Versión liviana de solo lectura de OrderSerializer para listados"""
+    mirror = OrderSerializer
+
+
+class OrderItemSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = {'order': OrderSerializer, 'product': ProductSerializer}
 
-class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.OrderItem
-        fields = '__all__'
\ No newline at end of file
+        fields = [
+            'id',
+            'order',
+            'product',
+            'quantity',
+            'price',
+            'discount',
+            'created_by',
+            'created_at',
+            'updated_at',
+        ]
+
+
+class OrderItemListSerializer(LeanSerializer):
+    """Versión liviana de solo lectura de OrderItemSerializer para listados"""
+    mirror = OrderItemSerializer
+
+
+class ProductBulkFilterSerializer(serializers.Serializer):
+    """
+    Productos afectados por una operación masiva: ids, categoría y/o búsqueda
+    (mismo criterio que el listado). Sin filtros se exige all=true.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=5000)
+    category = serializers.IntegerField(required=False, min_value=1)
+    search = serializers.CharField(required=False, allow_blank=True, max_length=255)
+    all = serializers.BooleanField(required=False, default=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if not (attrs.get('ids') or attrs.get('category') or (attrs.get('search') or '').strip() or attrs['all']):
+            raise serializers.ValidationError(
+                'Indique ids, category o search, o all=true para afectar todo el catálogo.'
+            )
+        return attrs
+
+
+class ProductBulkPriceSerializer(ProductBulkFilterSerializer):
+    """Cambio de precios: porcentaje (10 = +10%, -5 = -5%) o monto a sumar."""
+    field = serializers.ChoiceField(choices=['sell_price', 'buy_price'], default='sell_price')
+    mode = serializers.ChoiceField(choices=['percent', 'amount'])
+    value = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs['mode'] == 'percent' and attrs['value'] <= -100:
+            raise serializers.ValidationError({'value': 'El porcentaje debe ser mayor que -100.'})
+        return attrs
+
+
+class ProductBulkStockSerializer(ProductBulkFilterSerializer):
+    """Ajuste de stock: sumar unidades (negativas para restar) o fijar el stock."""
+    mode = serializers.ChoiceField(choices=['add', 'set'])
+    value = serializers.IntegerField()
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs['mode'] == 'set' and attrs['value'] < 0:
+            raise serializers.ValidationError({'value': 'El stock no puede ser negativo.'})
+        return attrs
+
+
+class ProductBulkCategorySerializer(ProductBulkFilterSerializer):
+    """Reasignación de categoría."""
+    target_category = serializers.PrimaryKeyRelatedField(queryset=models.Category.objects.all())
+
+
+class ProductBulkOperationSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True, default=None)
+
+    class Meta:
+        model = models.ProductBulkOperation
+        fields = ['id', 'business', 'user', 'username', 'kind', 'params', 'affected', 'created_at']
@@ -0,0 +1,18 @@
+from django.dispatch import Signal
+
+# Sent by Order.save() when the status of an order changes (including
+# creation). Arguments: order, previous_status.
+order_status_changed = Signal()
+
+# Sent by operations.bulk after a set-based UPDATE of products (which sends
+# no post_save). Arguments: business_id, product_ids, stock_deltas ({product
+# id: units added}, empty unless the stock changed) and operation (the
+# ProductBulkOperation).
+products_bulk_updated = Signal()
+
+# Sent by operations.bulk before it locks the products of a stock change,
+# inside its transaction. Arguments: business_id, product_ids (sorted).
+# Receivers that lock rows of their own before updating Product.stock (the
+# inventory's ProductCost) lock them here, so both paths take the locks in
+# the same order.
+products_bulk_stock_locking = Signal()
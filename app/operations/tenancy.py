@@ -0,0 +1,248 @@
+"""
+Tenant (business) scoping and role permissions for the API.
+
+Every request is resolved once into a Tenant from request.user.profile,
+which ClaimsJWTAuthentication builds from the token claims, so scoping
+costs no query. Platform admins (role PA, or superusers without a profile)
+see every business, or only the one given with ?business_id= (a value that
+is not a number is rejected with a 400). Async views resolve it with
+aresolve_tenant().
+
+TenantQuerySet.for_tenant() applies the business filter at the ORM level
+through the model's TENANT_FIELD, the lookup of its business id (e.g.
+"order__business_id" for order items), so it always lands on an indexed
+business_id column. TenantViewSetMixin scopes a viewset's queryset with it,
+checks the role permissions with TenantPermission and pins created/updated
+rows to the user's business. The querysets of the serializer's related
+fields are scoped the same way, so a write can only point at rows of the
+tenant (another business's id is rejected as nonexistent).
+
+Role permissions are computed once at import time into frozensets of
+"<resource>.<verb>" strings, verbs being view/add/change/delete.
+"""
+from asgiref.sync import sync_to_async
+from django.db import models
+from rest_framework import exceptions, permissions, relations
+
+PLATFORM_ADMIN = "PA"
+
+VERBS = ("view", "add", "change", "delete")
+
+# Verbs granted per resource to each business role; platform admins get all
+ROLE_GRANTS = {
+    "PR": {
+        "business": ("view", "change"),
+        "catalog": VERBS,
+        "orders": VERBS,
+        "taxes": VERBS,
+        "sunat_catalogs": ("view",),
+        "profiles": ("view",),
+        "books": ("view",),
+        "inventory": ("view",),
+        "history": ("view",),
+        "reports": ("view",),
+    },
+    "AD": {
+        "business": ("view",),
+        "catalog": VERBS,
+        "orders": VERBS,
+        "taxes": VERBS,
+        "sunat_catalogs": ("view",),
+        "profiles": ("view",),
+        "books": ("view",),
+        "inventory": ("view",),
+        "history": ("view",),
+        "reports": ("view",),
+    },
+    "EM": {
+        "business": ("view",),
+        "catalog": ("view",),
+        "orders": ("view", "add", "change"),
+        "taxes": ("view", "add"),
+        "sunat_catalogs": ("view",),
+    },
+}
+
+RESOURCES = (
+    "business", "catalog", "orders", "taxes", "sunat_catalogs", "profiles", "books", "inventory", "history",
+    "reports",
+)
+
+ROLE_PERMISSIONS = {
+    role: frozenset(f"{resource}.{verb}" for resource, verbs in grants.items() for verb in verbs)
+    for role, grants in ROLE_GRANTS.items()
+}
+ROLE_PERMISSIONS[PLATFORM_ADMIN] = frozenset(f"{resource}.{verb}" for resource in RESOURCES for verb in VERBS)
+
+METHOD_VERBS = {
+    "GET": "view",
+    "HEAD": "view",
+    "OPTIONS": "view",
+    "POST": "add",
+    "PUT": "change",
+    "PATCH": "change",
+    "DELETE": "delete",
+}
+
+
+class Tenant:
+    """
+    Business scope of a request. business_id is None for a platform admin
+    who did not pick a business (no filter).
+    """
+    __slots__ = ("profile", "role", "business_id", "is_platform_admin", "permissions")
+
+    def __init__(self, profile, role, business_id, is_platform_admin):
+        self.profile = profile
+        self.role = role
+        self.business_id = business_id
+        self.is_platform_admin = is_platform_admin
+        self.permissions = ROLE_PERMISSIONS.get(role, frozenset())
+
+    def has_perm(self, perm):
+        return perm in self.permissions
+
+
+def _requested_business_id(request):
+    business_id = request.GET.get("business_id", "")
+    if not business_id:
+        return None
+    if not business_id.isdigit():
+        raise exceptions.ValidationError({"business_id": "Debe ser un número."})
+    return int(business_id)
+
+
+def resolve_tenant(request):
+    """Tenant of the authenticated user of `request`, or None if it has none."""
+    user = request.user
+    if not user or not user.is_authenticated:
+        return None
+    try:
+        profile = user.profile
+    except user._meta.get_field("profile").related_model.DoesNotExist:
+        profile = None
+
+    if profile is None:
+        if not user.is_superuser:
+            return None
+        return Tenant(None, PLATFORM_ADMIN, _requested_business_id(request), True)
+    if profile.role == PLATFORM_ADMIN:
+        return Tenant(profile, PLATFORM_ADMIN, _requested_business_id(request), True)
+    if not profile.business_id:
+        return None
+    return Tenant(profile, profile.role, profile.business_id, False)
+
+
+async def aresolve_tenant(request):
+    """
+    resolve_tenant() for async views. A user built from the token claims
+    has its profile cached; for any other user the lazy user.profile query
+    cannot run in the event loop, so it is resolved in a thread.
+    """
+    if getattr(request.user, "from_claims", False):
+        return resolve_tenant(request)
+    return await sync_to_async(resolve_tenant)(request)
+
+
+def scope_queryset(queryset, tenant, lookup):
+    """Restricts `queryset` to the tenant's business through `lookup`."""
+    if tenant is None:
+        return queryset.none()
+    if tenant.business_id is None:
+        return queryset
+    return queryset.filter(**{lookup: tenant.business_id})
+
+
+def scope_related_fields(serializer, tenant):
+    """
+    Restricts the querysets of the related fields of `serializer` whose
+    model is scoped by business (TenantQuerySet) to the tenant's business.
+    """
+    for field in serializer.fields.values():
+        if isinstance(field, relations.ManyRelatedField):
+            field = field.child_relation
+        if not isinstance(field, relations.RelatedField) or field.read_only:
+            continue
+        queryset = field.queryset
+        if isinstance(queryset, models.Manager):
+            # ModelSerializer passes the model's default manager
+            queryset = queryset.all()
+        if isinstance(queryset, TenantQuerySet):
+            field.queryset = queryset.for_tenant(tenant)
+    return serializer
+
+
+class TenantQuerySet(models.QuerySet):
+    """
+    QuerySet of the models scoped by business (objects = TenantQuerySet.as_manager()).
+    The model defines TENANT_FIELD, the lookup of its business id.
+    """
+
+    def for_tenant(self, tenant):
+        return scope_queryset(self, tenant, self.model.TENANT_FIELD)
+
+    def for_business(self, business_id):
+        return self.filter(**{self.model.TENANT_FIELD: business_id})
+
+
+class TenantPermission(permissions.BasePermission):
+    """
+    Requires a tenant and the "<view.tenant_resource>.<verb>" permission of
+    its role, the verb following the HTTP method. Also usable on views of
+    models that are not scoped (e.g. SUNAT catalogs).
+    """
+    message = "No tiene permisos para realizar esta acción."
+
+    def has_permission(self, request, view):
+        tenant = view.get_tenant() if hasattr(view, "get_tenant") else resolve_tenant(request)
+        if tenant is None:
+            return False
+        verb = METHOD_VERBS.get(request.method)
+        return verb is not None and tenant.has_perm(f"{view.tenant_resource}.{verb}")
+
+
+class TenantViewSetMixin:
+    """
+    ViewSet mixin: queryset scoped with for_tenant(), TenantPermission, and
+    create/update pinned to the user's business for models with a direct
+    business foreign key. Platform admins write to the business they send.
+    """
+    tenant_resource = None
+    permission_classes = [permissions.IsAuthenticated, TenantPermission]
+
+    def get_tenant(self):
+        if not hasattr(self, "_tenant"):
+            self._tenant = resolve_tenant(self.request)
+        return self._tenant
+
+    def get_queryset(self):
+        return super().get_queryset().for_tenant(self.get_tenant())
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if not getattr(serializer, "many", False):
+            scope_related_fields(serializer, self.get_tenant())
+        return serializer
+
+    def tenant_save_kwargs(self, serializer):
+        """
+        Business of the rows written by a non platform admin: set on models
+        with a business foreign key, checked on the parent (order, document)
+        of the others.
+        """
+        tenant = self.get_tenant()
+        lookup = self.queryset.model.TENANT_FIELD
+        if tenant.is_platform_admin:
+            return {}
+        if lookup == "business_id":
+            return {"business_id": tenant.business_id}
+        parent = serializer.validated_data.get(lookup.split("__")[0])
+        if parent is not None and parent.business_id != tenant.business_id:
+            raise exceptions.PermissionDenied("El registro relacionado pertenece a otro negocio.")
+        return {}
+
+    def perform_create(self, serializer):
+        serializer.save(**self.tenant_save_kwargs(serializer))
+
+    def perform_update(self, serializer):
+        serializer.save(**self.tenant_save_kwargs(serializer))
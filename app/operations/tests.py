@@ -1,3 +1,254 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+from core.tokens import add_claims
+from inventory.models import ReorderRule, StockMovement
+from . import bulk
+from .models import Business, Category, Order, OrderItem, Product, Profile
+from .signals import order_status_changed
+
+
+class TenantIsolationTests(TestCase):
+    """A business user can neither read nor point a write at another business's rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.other = Business.objects.create(name='Ferretería', ruc='20987654321')
+        cls.user = User.objects.create_user('admin', password='x')
+        Profile.objects.create(user=cls.user, business=cls.business, role='AD')
+
+        cls.category = Category.objects.create(business=cls.business, name='Bebidas')
+        cls.product = Product.objects.create(
+            business=cls.business, category=cls.category, name='Agua', sell_price=Decimal('2.00'),
+            buy_price=Decimal('1.00'), unit_of_measurement='U',
+        )
+        cls.order = Order.objects.create(business=cls.business)
+
+        cls.other_category = Category.objects.create(business=cls.other, name='Herramientas')
+        cls.other_product = Product.objects.create(
+            business=cls.other, category=cls.other_category, name='Martillo', sell_price=Decimal('30.00'),
+            buy_price=Decimal('20.00'), unit_of_measurement='U',
+        )
+        cls.other_order = Order.objects.create(business=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(self.user), self.user))
+
+    def test_other_business_rows_are_not_readable(self):
+        self.assertEqual(self.client.get(f'/api/products/{self.other_product.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/orders/{self.other_order.pk}/').status_code, 404)
+        ids = [row['id'] for row in self.client.get('/api/products/').json()['results']]
+        self.assertEqual(ids, [self.product.pk])
+
+    def test_product_cannot_use_another_business_category(self):
+        response = self.client.post('/api/products/', {
+            'business': self.business.pk, 'category': self.other_category.pk, 'name': 'Clavo', 'sell_price': '1.00',
+            'buy_price': '0.50', 'unit_of_measurement': 'U',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('category', response.json())
+
+        response = self.client.patch(
+            f'/api/products/{self.product.pk}/', {'category': self.other_category.pk}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.category_id, self.category.pk)
+
+    def test_order_item_cannot_use_another_business_product(self):
+        response = self.client.post('/api/order-items/', {
+            'order': self.order.pk, 'product': self.other_product.pk, 'quantity': 1,
+            'price': '30.00', 'created_by': self.user.pk,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('product', response.json())
+
+        response = self.client.post('/api/order-items/', {
+            'order': self.other_order.pk, 'product': self.product.pk, 'quantity': 1,
+            'price': '2.00', 'created_by': self.user.pk,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('order', response.json())
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_reorder_rule_cannot_use_another_business_product(self):
+        response = self.client.post('/api/inventory/reorder-rules/', {'product': self.other_product.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ReorderRule.objects.exists())
+
+    def test_async_product_list_is_scoped_to_the_business(self):
+        response = self.client.get('/api/async/products/', {'business_id': self.other.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.product.pk])
+
+    def test_async_views_resolve_platform_admins_like_the_sync_views(self):
+        admin = User.objects.create_superuser('root', password='x')
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(admin), admin))
+        response = self.client.get('/api/async/products/', {'business_id': self.other.pk})
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.other_product.pk])
+        self.assertEqual(self.client.get('/api/async/products/').json()['count'], 2)
+
+        for path in ('/api/async/products/', '/taxes/async/sunat-documents/status/', '/api/products/'):
+            response = self.client.get(path, {'business_id': 'abc'})
+            self.assertEqual(response.status_code, 400, path)
+            self.assertIn('business_id', response.json())
+
+    def test_async_views_reject_users_without_a_business(self):
+        user = User.objects.create_user('sin-perfil', password='x')
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(user), user))
+        self.assertEqual(self.client.get('/api/async/products/').status_code, 403)
+        self.assertEqual(self.client.get('/taxes/async/sunat-documents/1/status/').status_code, 403)
+
+    def test_bulk_category_cannot_target_another_business_category(self):
+        response = self.client.post('/api/products/bulk-category/', {'target_category': self.other_category.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('target_category', response.json())
+
+
+class OrderSaveAtomicityTests(TestCase):
+    """Order.save() and its status receivers commit or roll back together."""
+
+    def test_failing_receiver_rolls_back_the_order(self):
+        order = Order.objects.create(business=Business.objects.create(name='Bodega'))
+
+        def fail(sender, **kwargs):
+            raise RuntimeError('receiver failed')
+
+        order_status_changed.connect(fail, dispatch_uid='test-fail')
+        try:
+            order.status = 'CANCELLED'
+            with self.assertRaises(RuntimeError):
+                order.save()
+        finally:
+            order_status_changed.disconnect(dispatch_uid='test-fail')
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'OPEN')
+
+        # The transition is sent again on the next save
+        sent = []
+        order_status_changed.connect(lambda sender, **kwargs: sent.append(kwargs['previous_status']),
+                                     dispatch_uid='test-sent', weak=False)
+        try:
+            order.save()
+        finally:
+            order_status_changed.disconnect(dispatch_uid='test-sent')
+        self.assertEqual(sent, ['OPEN'])
+
+
+class BulkStockTests(TestCase):
+    """Bulk stock changes take the inventory's locks in the same order as a paid order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega')
+        category = Category.objects.create(business=cls.business, name='Bebidas')
+        cls.products = [
+            Product.objects.create(
+                business=cls.business, category=category, name=f'Agua {number}', sell_price=Decimal('2.00'),
+                buy_price=Decimal('1.00'), unit_of_measurement='U',
+            )
+            for number in (2, 1)
+        ]
+
+    def test_costs_are_locked_before_the_products(self):
+        queryset = Product.objects.for_business(self.business.pk)
+        updates = {'stock': bulk.stock_expression('add', 5)}
+        with CaptureQueriesContext(connection) as queries:
+            bulk.apply(queryset, self.business.pk, None, 'STOCK', {}, updates, stock=True)
+        statements = [query['sql'] for query in queries.captured_queries]
+        first_cost = next(i for i, sql in enumerate(statements) if 'inventory_productcost' in sql)
+        product_update = next(i for i, sql in enumerate(statements) if sql.startswith('UPDATE "operations_product"'))
+        self.assertLess(first_cost, product_update)
+
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list('product_id', 'quantity')),
+            sorted((product.pk, 5) for product in self.products),
+        )
+        self.assertEqual(set(Product.objects.values_list('stock', flat=True)), {5})
+
+    def test_removing_units_stops_at_zero(self):
+        low, high = self.products
+        Product.objects.filter(pk=low.pk).update(stock=3)
+        Product.objects.filter(pk=high.pk).update(stock=10)
+        queryset = Product.objects.for_business(self.business.pk)
+        updates = {'stock': bulk.stock_expression('add', -5)}
+        self.assertEqual(
+            sorted(row['new_value'] for row in bulk.preview(queryset, 'stock', updates['stock'])['preview']), [0, 5]
+        )
+
+        bulk.apply(queryset, self.business.pk, None, 'STOCK', {}, updates, stock=True)
+        self.assertEqual(dict(Product.objects.values_list('pk', 'stock')), {low.pk: 0, high.pk: 5})
+        self.assertEqual(
+            dict(StockMovement.objects.values_list('product_id', 'quantity')), {low.pk: -3, high.pk: -5}
+        )
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= and ?expand= shape the product list, sync and async alike, and trim its SQL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.user = User.objects.create_user('admin', password='x')
+        Profile.objects.create(user=cls.user, business=cls.business, role='AD')
+        cls.category = Category.objects.create(business=cls.business, name='Bebidas')
+        for name in ('Agua', 'Gaseosa', 'Jugo'):
+            Product.objects.create(
+                business=cls.business, category=cls.category, name=name, description='Botella',
+                sell_price=Decimal('2.00'), buy_price=Decimal('1.00'), unit_of_measurement='U',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(self.user), self.user))
+
+    def product_select(self, queries):
+        return next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "operations_product"' in query['sql']
+            and 'COUNT(' not in query['sql']
+        )
+
+    def test_fields_limit_the_response_and_the_columns(self):
+        for path in ('/api/products/', '/api/async/products/'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path, {'fields': 'id,name'})
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual([set(row) for row in response.json()['results']], [{'id', 'name'}] * 3, path)
+            self.assertNotIn('"description"', self.product_select(queries), path)
+
+    def test_expand_joins_the_relation_once(self):
+        for path in ('/api/products/', '/api/async/products/'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path, {'fields': 'id,category', 'expand': 'category'})
+            self.assertEqual(response.status_code, 200, path)
+            categories = [row['category'] for row in response.json()['results']]
+            self.assertEqual([category['name'] for category in categories], ['Bebidas'] * 3, path)
+            self.assertEqual(categories[0]['id'], self.category.pk)
+            self.assertIn('JOIN "operations_category"', self.product_select(queries), path)
+            self.assertFalse(
+                any('FROM "operations_category"' in query['sql'] for query in queries.captured_queries), path
+            )
+
+    def test_lean_list_matches_the_detail(self):
+        for params in ({}, {'expand': 'business,category'}):
+            listed = self.client.get('/api/products/', params).json()['results'][0]
+            detail = self.client.get(f'/api/products/{listed["id"]}/', params).json()
+            self.assertEqual(listed, detail, params)
+            self.assertEqual(self.client.get('/api/async/products/', params).json()['results'][0], listed, params)
 
-# Create your tests here.
+    def test_writes_ignore_the_selection(self):
+        product = Product.objects.first()
+        response = self.client.patch(
+            f'/api/products/{product.pk}/?fields=id', {'name': 'Agua mineral'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Agua mineral')
+        self.assertIn('sell_price', response.json())
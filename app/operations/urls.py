@@ -1,12 +1,18 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'businesses', views.BusinessViewSet)
 router.register(r'categories', views.CategoryViewSet)
 router.register(r'products', views.ProductViewSet)
+router.register(r'product-bulk-operations', views.ProductBulkOperationViewSet)
 router.register(r'profiles', views.ProfileViewSet)
 router.register(r'orders', views.OrderViewSet)
 router.register(r'order-items', views.OrderItemViewSet)
 
-urlpatterns = router.urls
\ No newline at end of file
+# Endpoints de lectura asíncronos (servidos por ASGI/daphne)
+urlpatterns = router.urls + [
+    path('async/products/', async_views.product_list, name='async-product-list'),
+    path('async/profiles/me/', async_views.profile_me, name='async-profile-me'),
+]
\ No newline at end of file
@@ -1,50 +1,38 @@
 from rest_framework import viewsets
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
-from . import models, serializers
+from core.fieldsets import SparseFieldsetViewMixin
+from core.idempotency import IdempotentCreateMixin
+from . import bulk, models, serializers
+from .filters import PRODUCT_ORDERING_FIELDS, filter_products
+from .tenancy import TenantViewSetMixin, scope_related_fields
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import permissions
+from rest_framework import exceptions
+from django.db import transaction
+from django.db.models import Value
 
 
 # Create your views here.
-class BusinessViewSet(viewsets.ModelViewSet):
+class BusinessViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = models.Business.objects.all()
     serializer_class = serializers.BusinessSerializer
+    tenant_resource = 'business'
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(TenantViewSetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = models.Category.objects.select_related('business').all()
     serializer_class = serializers.CategorySerializer
-    permission_classes = [permissions.IsAuthenticated]
+    lean_serializer_class = serializers.CategoryListSerializer
+    tenant_resource = 'catalog'
 
     def get_queryset(self):
         """
-        Filtra categorías por el negocio del usuario autenticado.
+        Categorías del negocio del usuario autenticado (los administradores de
+        plataforma ven todas o filtran con business_id).
         """
-        queryset = super().get_queryset()
-
-        # Obtener el negocio del usuario desde su perfil
-        try:
-            profile = models.Profile.objects.get(user=self.request.user)
-            # Si es admin de plataforma, puede ver todas las categorías
-            if profile.is_platform_admin:
-                business_id = self.request.query_params.get('business_id', None)
-                if business_id:
-                    queryset = queryset.filter(business_id=business_id)
-            else:
-                # Usuarios normales solo ven categorías de su negocio
-                if profile.business:
-                    queryset = queryset.filter(business=profile.business)
-                else:
-                    # Si no tiene negocio, no puede ver categorías
-                    return models.Category.objects.none()
-        except models.Profile.DoesNotExist:
-            # Si no tiene perfil, no puede ver categorías
-            return models.Category.objects.none()
-
-        return queryset.order_by('name')
+        return super().get_queryset().order_by('name')
 
 
 class ProductPagination(PageNumberPagination):
@@ -54,85 +42,102 @@ class ProductPagination(PageNumberPagination):
     max_page_size = 10
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(TenantViewSetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = models.Product.objects.select_related('category', 'business').all()
     serializer_class = serializers.ProductSerializer
+    lean_serializer_class = serializers.ProductListSerializer
     pagination_class = ProductPagination
-    permission_classes = [permissions.IsAuthenticated]
+    tenant_resource = 'catalog'
 
     # Campos permitidos para ordenamiento
-    ORDERING_FIELDS = ['name', 'code', 'stock', 'buy_price', 'sell_price', 'created_at']
+    ORDERING_FIELDS = PRODUCT_ORDERING_FIELDS
 
     def get_queryset(self):
         """
         Filtra productos por:
-        - Negocio del usuario autenticado (basado en su perfil)
+        - Negocio del usuario autenticado (los administradores de plataforma
+          ven todos o filtran con business_id)
         - Categoría (si se proporciona como query parameter)
         - Búsqueda por nombre o código (parámetro 'search')
         Ordena por el campo especificado en el parámetro 'ordering'
         """
-        queryset = super().get_queryset()
+        return filter_products(super().get_queryset(), self.request.query_params)
 
-        # Obtener el negocio del usuario desde su perfil
-        try:
-            profile = models.Profile.objects.get(user=self.request.user)
-            # Si es admin de plataforma, puede ver todos los productos
-            if profile.is_platform_admin:
-                business_id = self.request.query_params.get('business_id', None)
-                if business_id:
-                    queryset = queryset.filter(business_id=business_id)
-            else:
-                # Usuarios normales solo ven productos de su negocio
-                if profile.business:
-                    queryset = queryset.filter(business=profile.business)
-                else:
-                    # Si no tiene negocio, no puede ver productos
-                    return models.Product.objects.none()
-        except models.Profile.DoesNotExist:
-            # Si no tiene perfil, no puede ver productos
-            return models.Product.objects.none()
-
-        # Filtrar por categoría si se proporciona
-        category_id = self.request.query_params.get('category', None)
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-
-        # Búsqueda por nombre o código
-        search = self.request.query_params.get('search')
-        if search:
-            # Limpiar espacios en blanco del término de búsqueda
-            search = search.strip()
-            if search:
-                # Construir el filtro de búsqueda
-                # Buscar en nombre O código
-                search_filter = Q(name__icontains=search) | Q(code__icontains=search)
-                # Aplicar el filtro
-                queryset = queryset.filter(search_filter)
-
-        # Ordenamiento dinámico
-        ordering = self.request.query_params.get('ordering', '-created_at')
-        
-        # Validar que el campo de ordenamiento sea permitido
-        # Remover el prefijo '-' si existe para validar
-        ordering_field = ordering.lstrip('-')
-        
-        if ordering_field in self.ORDERING_FIELDS:
-            queryset = queryset.order_by(ordering)
-        else:
-            # Si el campo no es válido, usar orden por defecto
-            queryset = queryset.order_by('-created_at')
-
-        return queryset
-
-
-class ProfileViewSet(viewsets.ModelViewSet):
+    def bulk_change(self, request, serializer_class, kind, build):
+        """
+        Operación masiva sobre los productos filtrados del negocio: valida los
+        parámetros, obtiene de build(data) el campo mostrado en la vista
+        previa y los cambios del UPDATE, y con dry_run solo los previsualiza.
+        """
+        tenant = self.get_tenant()
+        if tenant.business_id is None:
+            return Response(
+                {'detail': 'Indique business_id para operaciones masivas.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = scope_related_fields(serializer_class(data=request.data), tenant)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = bulk.select_products(models.Product.objects.for_business(tenant.business_id), data)
+        field, updates = build(data)
+        if data['dry_run']:
+            return Response(bulk.preview(queryset, field, updates[field]), status=status.HTTP_200_OK)
+
+        # Parámetros tal como se representan en JSON (decimales como texto)
+        params = {key: value for key, value in serializer.data.items() if key != 'dry_run'}
+        operation = bulk.apply(
+            queryset, tenant.business_id, request.user.pk, kind, params, updates, stock=(kind == 'STOCK')
+        )
+        return Response(serializers.ProductBulkOperationSerializer(operation).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-price', url_name='bulk-price')
+    def bulk_price(self, request):
+        """
+        Cambia el precio de venta o de compra de los productos filtrados en un
+        solo UPDATE: porcentaje (redondeado a 2 decimales) o monto fijo, sin
+        bajar de cero.
+        """
+        def build(data):
+            return data['field'], {data['field']: bulk.price_expression(data['field'], data['mode'], data['value'])}
+        return self.bulk_change(request, serializers.ProductBulkPriceSerializer, 'PRICE', build)
+
+    @action(detail=False, methods=['post'], url_path='bulk-stock', url_name='bulk-stock')
+    def bulk_stock(self, request):
+        """
+        Ajusta el stock de los productos filtrados en un solo UPDATE (sumar o
+        fijar). El inventario valorizado registra los ajustes.
+        """
+        def build(data):
+            return 'stock', {'stock': bulk.stock_expression(data['mode'], data['value'])}
+        return self.bulk_change(request, serializers.ProductBulkStockSerializer, 'STOCK', build)
+
+    @action(detail=False, methods=['post'], url_path='bulk-category', url_name='bulk-category')
+    def bulk_category(self, request):
+        """Mueve los productos filtrados a otra categoría del mismo negocio."""
+        def build(data):
+            # target_category ya está limitada a las categorías del negocio
+            return 'category_id', {'category_id': Value(data['target_category'].pk)}
+        return self.bulk_change(request, serializers.ProductBulkCategorySerializer, 'CATEGORY', build)
+
+
+class ProductBulkOperationViewSet(TenantViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """Historial de operaciones masivas sobre productos."""
+    queryset = models.ProductBulkOperation.objects.select_related('user').all()
+    serializer_class = serializers.ProductBulkOperationSerializer
+    pagination_class = ProductPagination
+    tenant_resource = 'catalog'
+
+
+class ProfileViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = models.Profile.objects.select_related('user', 'business').all()
     serializer_class = serializers.ProfileSerializer
-    # permission_classes = [permissions.IsAdminUser]
+    tenant_resource = 'profiles'
 
     def get_permissions(self):
         if self.action == 'get_my_profile':
             return [permissions.IsAuthenticated()]
+        # Solo staff; dentro de su negocio salvo que sea administrador de plataforma
         return [permissions.IsAdminUser()]
 
     @action(detail=False, methods=['get'], url_path='me', url_name='me')
@@ -156,15 +161,50 @@ class ProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = models.Order.objects.select_related('business', 'document').all()
+def orders_are_open(*orders):
+    """
+    Bloquea los pedidos hasta el commit e indica si siguen abiertos: los totales
+    de rollups, libro diario e inventario se calculan al pasar a PAID, así que
+    un pedido pagado o cancelado (y sus ítems) ya no puede cambiar ni borrarse.
+    """
+    ids = {order.pk for order in orders if order is not None}
+    locked = models.Order.objects.select_for_update().filter(pk__in=ids).order_by('pk')
+    return all(order_status == 'OPEN' for order_status in locked.values_list('status', flat=True))
+
+
+class OrderViewSet(IdempotentCreateMixin, TenantViewSetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    queryset = models.Order.objects.select_related('business', 'sunat_document').all()
     serializer_class = serializers.OrderSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    lean_serializer_class = serializers.OrderListSerializer
+    tenant_resource = 'orders'
 
-    def get_queryset(self):
-        return self.queryset.filter(business=self.request.user.profile.business)
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            if not orders_are_open(instance):
+                raise exceptions.ValidationError({'status': 'Solo se pueden eliminar pedidos abiertos.'})
+            super().perform_destroy(instance)
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(IdempotentCreateMixin, TenantViewSetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = models.OrderItem.objects.select_related('order', 'product').all()
     serializer_class = serializers.OrderItemSerializer
-    permission_classes = [permissions.IsAuthenticated]
\ No newline at end of file
+    lean_serializer_class = serializers.OrderItemListSerializer
+    tenant_resource = 'orders'
+
+    def lock_open_orders(self, *orders):
+        if not orders_are_open(*orders):
+            raise exceptions.ValidationError({'order': 'Solo se pueden modificar los ítems de pedidos abiertos.'})
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            self.lock_open_orders(serializer.validated_data.get('order'))
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            self.lock_open_orders(serializer.instance.order, serializer.validated_data.get('order'))
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            self.lock_open_orders(instance.order)
+            super().perform_destroy(instance)
\ No newline at end of file
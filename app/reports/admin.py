@@ -0,0 +1,7 @@
+from django.contrib import admin
+from . import models
+
+admin.site.register(models.DailySalesRollup)
+admin.site.register(models.DailyCategoryRollup)
+admin.site.register(models.DailyProductRollup)
+admin.site.register(models.DailyDocumentRollup)
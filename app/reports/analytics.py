@@ -0,0 +1,222 @@
+"""
+Analytics queries over orders and products.
+
+Every report is a single aggregated SQL statement (annotate + window
+functions); nothing is summed in Python. Results are cached per business,
+report parameters and the business' data version, which is bumped whenever
+sales or catalog data change, so a cached report is never stale:
+
+- The bump runs once the writing transaction commits (on_commit). A report
+  computed before the commit is stored under the previous version, which
+  is no longer read after the bump.
+- Paid orders (status and items), catalog saves and deletes, bulk product
+  updates and documents that move stock (Product.stock F-updates made by
+  inventory) all bump it.
+- Versions are random tokens rather than a counter, so a version key
+  evicted from the cache never comes back as a value that old entries
+  were stored under.
+- Reports are computed on the primary database (core.routing
+  primary_reads): a lagging read replica could otherwise store data from
+  before a bump under the bumped version.
+- Versions and reports live in the cache named by settings.REPORTS_CACHE,
+  which every process must share: with a process-local cache (LocMemCache,
+  DummyCache) a bump would only reach the process that made it, so reports
+  are then computed on every request instead of cached.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import (
+    Count, DecimalField, ExpressionWrapper, F, Func, IntegerField, Max, Q, Sum, Value, Window,
+)
+from django.db.models.functions import Coalesce, NullIf, Rank
+
+from core.routing import PROCESS_LOCAL_CACHES, primary_reads
+from operations.models import Order, OrderItem, Product
+from .rollups import LINE_REVENUE, ZERO, day_bounds
+
+AMOUNT = DecimalField(max_digits=14, decimal_places=2)
+RATIO = DecimalField(max_digits=9, decimal_places=4)
+
+LINE_COST = ExpressionWrapper(F("quantity") * F("product__buy_price"), output_field=AMOUNT)
+
+
+class GrandTotal(Func):
+    """SUM(<aggregate>) OVER (): total of a grouped aggregate across all groups."""
+    template = "SUM(%(expressions)s) OVER ()"
+    contains_over_clause = True
+
+
+def _version_key(business_id):
+    return f"reports:version:{business_id}"
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def report_cache():
+    """Cache of the reports, or None while it is not shared between processes."""
+    cache = caches[getattr(settings, "REPORTS_CACHE", "default")]
+    return None if isinstance(cache, PROCESS_LOCAL_CACHES) else cache
+
+
+def data_version(cache, business_id):
+    """Current data version of a business' reports."""
+    return cache.get_or_set(_version_key(business_id), _new_version, timeout=None)
+
+
+def bump_data_version(business_id):
+    """Invalidates every cached report of a business once the current transaction commits."""
+    cache = report_cache()
+    if cache is not None:
+        transaction.on_commit(lambda: cache.set(_version_key(business_id), _new_version(), timeout=None))
+
+
+def cached_report(business_id, name, params, compute):
+    """Returns compute() from the cache, keyed by business, report, parameters and data version."""
+    cache = report_cache()
+    with primary_reads():
+        if cache is None:
+            return compute()
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        key = f"reports:{business_id}:{name}:{data_version(cache, business_id)}:{digest}"
+        return cache.get_or_set(key, compute, timeout=getattr(settings, "REPORTS_CACHE_TIMEOUT", 600))
+
+
+def _paid_items(business_id, date_from, date_to):
+    start, end = day_bounds(date_from, date_to)
+    return OrderItem.objects.filter(
+        order__business_id=business_id,
+        order__status="PAID",
+        order__created_at__gte=start,
+        order__created_at__lt=end,
+    )
+
+
+def top_products(business_id, date_from, date_to, top):
+    """Best-selling products by revenue, with their rank and share of total revenue."""
+    revenue = Sum(LINE_REVENUE)
+    return list(
+        _paid_items(business_id, date_from, date_to)
+        .values("product_id", product_name=F("product__name"), product_code=F("product__code"))
+        .annotate(
+            units=Sum("quantity"),
+            revenue=revenue,
+            orders=Count("order_id", distinct=True),
+            rank=Window(Rank(), order_by=revenue.desc()),
+            share=ExpressionWrapper(
+                revenue / NullIf(GrandTotal(revenue), Value(ZERO)),
+                output_field=RATIO,
+            ),
+        )
+        .order_by("-revenue")[:top]
+    )
+
+
+def margins(business_id, date_from, date_to, top):
+    """
+    Realized margin per product: actual selling price of each OrderItem against
+    the product's current buy_price, next to the list margin (sell_price - buy_price).
+    """
+    revenue = Sum(LINE_REVENUE)
+    cost = Sum(LINE_COST)
+    units = Sum("quantity")
+    return list(
+        _paid_items(business_id, date_from, date_to)
+        .values(
+            "product_id",
+            product_name=F("product__name"),
+            sell_price=F("product__sell_price"),
+            buy_price=F("product__buy_price"),
+        )
+        .annotate(
+            units=units,
+            revenue=revenue,
+            cost=cost,
+            margin=ExpressionWrapper(revenue - cost, output_field=AMOUNT),
+            margin_pct=ExpressionWrapper(
+                (revenue - cost) / NullIf(revenue, Value(ZERO)), output_field=RATIO
+            ),
+            avg_price=ExpressionWrapper(revenue / NullIf(units, Value(0)), output_field=AMOUNT),
+            list_margin=ExpressionWrapper(F("product__sell_price") - F("product__buy_price"), output_field=AMOUNT),
+        )
+        .order_by("-margin")[:top]
+    )
+
+
+def sales_by_category(business_id, date_from, date_to):
+    """Units and revenue per category, with rank and share of total revenue."""
+    revenue = Sum(LINE_REVENUE)
+    return list(
+        _paid_items(business_id, date_from, date_to)
+        .values(category_id=F("product__category_id"), category_name=F("product__category__name"))
+        .annotate(
+            units=Sum("quantity"),
+            revenue=revenue,
+            products=Count("product_id", distinct=True),
+            rank=Window(Rank(), order_by=revenue.desc()),
+            share=ExpressionWrapper(
+                revenue / NullIf(GrandTotal(revenue), Value(ZERO)),
+                output_field=RATIO,
+            ),
+        )
+        .order_by("-revenue")
+    )
+
+
+def slow_movers(business_id, date_from, date_to, top):
+    """Products with stock that sold least in the period (including products that never sold)."""
+    start, end = day_bounds(date_from, date_to)
+    sold = Q(
+        order_items__order__status="PAID",
+        order_items__order__created_at__gte=start,
+        order_items__order__created_at__lt=end,
+    )
+    return list(
+        Product.objects.filter(business_id=business_id, stock__gt=0)
+        .values("id", "name", "code", "stock", category_name=F("category__name"))
+        .annotate(
+            units_sold=Coalesce(Sum("order_items__quantity", filter=sold), Value(0), output_field=IntegerField()),
+            last_sold_at=Max("order_items__order__created_at", filter=Q(order_items__order__status="PAID")),
+            stock_value=ExpressionWrapper(F("stock") * F("buy_price"), output_field=AMOUNT),
+        )
+        .order_by("units_sold", "-stock_value")[:top]
+    )
+
+
+def on_order_status_changed(sender, order, previous_status, **kwargs):
+    if "PAID" in (order.status, previous_status):
+        bump_data_version(order.business_id)
+
+
+def on_order_deleted(sender, instance, **kwargs):
+    if instance.status == "PAID":
+        bump_data_version(instance.business_id)
+
+
+def on_order_item_changed(sender, instance, **kwargs):
+    if OrderItem.order.is_cached(instance):
+        order = {"business_id": instance.order.business_id, "status": instance.order.status}
+    else:
+        order = Order.objects.filter(pk=instance.order_id).values("business_id", "status").first()
+    if order is not None and order["status"] == "PAID":
+        bump_data_version(order["business_id"])
+
+
+def on_document_status_changed(sender, document, previous_status, **kwargs):
+    # Issued documents move stock (inventory), which slow_movers reports
+    if "ISSUED" in (document.status, previous_status):
+        bump_data_version(document.business_id)
+
+
+def on_catalog_changed(sender, instance, **kwargs):
+    bump_data_version(instance.business_id)
+
+
+def on_products_bulk_updated(sender, business_id, **kwargs):
+    bump_data_version(business_id)
@@ -0,0 +1,27 @@
+from django.apps import AppConfig
+
+
+class ReportsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'reports'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from operations.models import Category, Order, OrderItem, Product
+        from operations.signals import order_status_changed, products_bulk_updated
+        from taxes.signals import document_status_changed
+        from . import analytics, rollups
+
+        order_status_changed.connect(rollups.on_order_status_changed, dispatch_uid='reports.rollups.order')
+        document_status_changed.connect(rollups.on_document_status_changed, dispatch_uid='reports.rollups.document')
+
+        # Cached analytics are invalidated by bumping the business' data version
+        order_status_changed.connect(analytics.on_order_status_changed, dispatch_uid='reports.analytics.order')
+        post_delete.connect(analytics.on_order_deleted, sender=Order, dispatch_uid='reports.analytics.delete.Order')
+        post_save.connect(analytics.on_order_item_changed, sender=OrderItem, dispatch_uid='reports.analytics.save.OrderItem')
+        post_delete.connect(analytics.on_order_item_changed, sender=OrderItem, dispatch_uid='reports.analytics.delete.OrderItem')
+        document_status_changed.connect(analytics.on_document_status_changed, dispatch_uid='reports.analytics.document')
+        products_bulk_updated.connect(analytics.on_products_bulk_updated, dispatch_uid='reports.analytics.bulk')
+        for model in (Product, Category):
+            post_save.connect(analytics.on_catalog_changed, sender=model, dispatch_uid=f'reports.analytics.save.{model.__name__}')
+            post_delete.connect(analytics.on_catalog_changed, sender=model, dispatch_uid=f'reports.analytics.delete.{model.__name__}')
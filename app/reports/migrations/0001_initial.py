@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('operations', '0001_initial'),
+        ('taxes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_category_sales', to='operations.business')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='operations.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'date', 'category'), name='uq_dailycategory_business_date_category')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyDocumentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('direction', models.CharField(max_length=10)),
+                ('documents', models.IntegerField(default=0)),
+                ('total_taxable', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_igv', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_documents', to='operations.business')),
+                ('document_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='taxes.documenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'date', 'direction', 'document_type'), name='uq_dailydocument_business_date_dir_type')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_product_sales', to='operations.business')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='operations.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'date', 'product'), name='uq_dailyproduct_business_date_product')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='operations.business')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'date'), name='uq_dailysales_business_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+from decimal import Decimal
+from django.db import models
+from operations.models import Business, Category, Product
+from taxes.models import DocumentType
+
+
+class DailySalesRollup(models.Model):
+    """
+    Paid sales per business and day.
+    Maintained incrementally from Order status transitions (see reports.rollups)
+    and rebuilt by the backfill_rollups command.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="daily_sales")
+    date = models.DateField()
+
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["business", "date"], name="uq_dailysales_business_date"),
+        ]
+
+
+class DailyCategoryRollup(models.Model):
+    """Paid sales per business, day and category."""
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="daily_category_sales")
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="daily_sales")
+
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business", "date", "category"],
+                name="uq_dailycategory_business_date_category",
+            ),
+        ]
+
+
+class DailyProductRollup(models.Model):
+    """Paid sales per business, day and product."""
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="daily_product_sales")
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_sales")
+
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business", "date", "product"],
+                name="uq_dailyproduct_business_date_product",
+            ),
+        ]
+
+
+class DailyDocumentRollup(models.Model):
+    """
+    Issued SUNAT documents per business, issue date, direction and document type.
+    Maintained incrementally from SunatDocument status transitions.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="daily_documents")
+    date = models.DateField()
+    direction = models.CharField(max_length=10)
+    document_type = models.ForeignKey(DocumentType, on_delete=models.CASCADE, related_name="daily_rollups")
+
+    documents = models.IntegerField(default=0)
+    total_taxable = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    total_igv = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business", "date", "direction", "document_type"],
+                name="uq_dailydocument_business_date_dir_type",
+            ),
+        ]
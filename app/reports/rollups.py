@@ -0,0 +1,248 @@
+"""
+Daily sales rollups.
+
+Paid orders are added to (or removed from) the rollups when their status
+changes, and issued documents likewise, so dashboards only read a few rows
+per day instead of aggregating Order/OrderItem/SunatDocument on every
+request. Sales are dated by the order's creation day; documents by their
+issue_date. Status transitions are the only changes to follow: the API
+keeps the items of non-open orders fixed, only deletes open orders and
+draft or voided documents, and rejects edits to the amounts, date and type
+of issued documents.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from core.db import upsert_increment
+from operations.models import Order, OrderItem
+from taxes.archive import period_bounds
+from taxes.models import ArchivedPeriod, SunatDocument
+from . import models
+
+ZERO = Decimal("0.00")
+
+# quantity * price - discount, per order item
+LINE_REVENUE = ExpressionWrapper(
+    F("quantity") * F("price") - Coalesce(F("discount"), Value(ZERO)),
+    output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def _order_rows(order, sign):
+    items = list(
+        OrderItem.objects.filter(order=order)
+        .values("product_id", "product__category_id")
+        .annotate(units=Sum("quantity"), revenue=Sum(LINE_REVENUE))
+    )
+    day = timezone.localdate(order.created_at)
+    base = {"business_id": order.business_id, "date": day}
+
+    sales = [{
+        **base,
+        "orders": sign,
+        "units": sign * sum(item["units"] for item in items),
+        "revenue": sign * sum((item["revenue"] for item in items), ZERO),
+    }]
+
+    categories = defaultdict(lambda: [0, ZERO])
+    for item in items:
+        totals = categories[item["product__category_id"]]
+        totals[0] += item["units"]
+        totals[1] += item["revenue"]
+
+    category_rows = [
+        {**base, "category_id": category_id, "units": sign * units, "revenue": sign * revenue}
+        for category_id, (units, revenue) in categories.items()
+    ]
+    product_rows = [
+        {**base, "product_id": item["product_id"], "units": sign * item["units"], "revenue": sign * item["revenue"]}
+        for item in items
+    ]
+    return sales, category_rows, product_rows
+
+
+def apply_order(order, sign):
+    """Adds (sign=1) or removes (sign=-1) a paid order from the daily rollups."""
+    sales, category_rows, product_rows = _order_rows(order, sign)
+    upsert_increment(models.DailySalesRollup, ["business_id", "date"], sales)
+    upsert_increment(models.DailyCategoryRollup, ["business_id", "date", "category_id"], category_rows)
+    upsert_increment(models.DailyProductRollup, ["business_id", "date", "product_id"], product_rows)
+
+
+def apply_document(document, sign):
+    """Adds (sign=1) or removes (sign=-1) an issued document from the daily rollups."""
+    upsert_increment(
+        models.DailyDocumentRollup,
+        ["business_id", "date", "direction", "document_type_id"],
+        [{
+            "business_id": document.business_id,
+            "date": document.issue_date,
+            "direction": document.direction,
+            "document_type_id": document.document_type_id,
+            "documents": sign,
+            "total_taxable": sign * document.total_taxable,
+            "total_igv": sign * document.total_igv,
+            "total": sign * document.total,
+        }],
+    )
+
+
+def on_order_status_changed(sender, order, previous_status, **kwargs):
+    if order.status == "PAID" and previous_status != "PAID":
+        apply_order(order, 1)
+    elif previous_status == "PAID" and order.status != "PAID":
+        apply_order(order, -1)
+
+
+def on_document_status_changed(sender, document, previous_status, **kwargs):
+    if document.status == "ISSUED" and previous_status != "ISSUED":
+        apply_document(document, 1)
+    elif previous_status == "ISSUED" and document.status != "ISSUED":
+        apply_document(document, -1)
+
+
+def day_bounds(date_from, date_to):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(date_from, time.min), tz)
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def archived_ranges(date_from, date_to, business_id=None):
+    """
+    (business id, first day, last day) of the archived tax periods that
+    overlap [date_from, date_to]. Their documents left the hot tables
+    (taxes.archive), so their document rollups cannot be recomputed.
+    """
+    periods = ArchivedPeriod.objects.all()
+    if business_id is not None:
+        periods = periods.filter(business_id=business_id)
+    ranges = []
+    for period_business_id, year, month in periods.values_list("business_id", "year", "month"):
+        first, last = period_bounds(year, month)
+        if first <= date_to and last >= date_from:
+            ranges.append((period_business_id, first, last))
+    return ranges
+
+
+def _in_ranges(ranges, field):
+    condition = Q()
+    for business_id, first, last in ranges:
+        condition |= Q(business_id=business_id, **{f"{field}__gte": first, f"{field}__lte": last})
+    return condition
+
+
+def rebuild(date_from, date_to, business_id=None, batch_size=1000):
+    """
+    Recomputes every rollup in [date_from, date_to] from the source tables,
+    in one transaction. Document rollups of archived periods are kept as
+    they are. Returns the number of rollup rows written.
+    """
+    start, end = day_bounds(date_from, date_to)
+
+    orders = Order.objects.filter(status="PAID", created_at__gte=start, created_at__lt=end)
+    items = OrderItem.objects.filter(order__status="PAID", order__created_at__gte=start, order__created_at__lt=end)
+    documents = SunatDocument.objects.filter(status="ISSUED", issue_date__gte=date_from, issue_date__lte=date_to)
+    scopes = {"date__gte": date_from, "date__lte": date_to}
+    if business_id is not None:
+        orders = orders.filter(business_id=business_id)
+        items = items.filter(order__business_id=business_id)
+        documents = documents.filter(business_id=business_id)
+        scopes["business_id"] = business_id
+
+    with transaction.atomic():
+        for model in (
+            models.DailySalesRollup,
+            models.DailyCategoryRollup,
+            models.DailyProductRollup,
+        ):
+            model.objects.filter(**scopes).delete()
+        archived = archived_ranges(date_from, date_to, business_id)
+        models.DailyDocumentRollup.objects.filter(**scopes).exclude(_in_ranges(archived, "date")).delete()
+        documents = documents.exclude(_in_ranges(archived, "issue_date"))
+
+        sales = {}
+        for row in orders.values("business_id", day=TruncDate("created_at")).annotate(orders=Count("id")):
+            sales[row["business_id"], row["day"]] = models.DailySalesRollup(
+                business_id=row["business_id"], date=row["day"], orders=row["orders"]
+            )
+        for row in (
+            items.values("order__business_id", day=TruncDate("order__created_at"))
+            .annotate(units=Sum("quantity"), revenue=Sum(LINE_REVENUE))
+        ):
+            rollup = sales[row["order__business_id"], row["day"]]
+            rollup.units, rollup.revenue = row["units"], row["revenue"]
+
+        categories = (
+            models.DailyCategoryRollup(
+                business_id=row["order__business_id"],
+                date=row["day"],
+                category_id=row["product__category_id"],
+                units=row["units"],
+                revenue=row["revenue"],
+            )
+            for row in items.values("order__business_id", "product__category_id", day=TruncDate("order__created_at"))
+            .annotate(units=Sum("quantity"), revenue=Sum(LINE_REVENUE))
+            .iterator()
+        )
+        products = (
+            models.DailyProductRollup(
+                business_id=row["order__business_id"],
+                date=row["day"],
+                product_id=row["product_id"],
+                units=row["units"],
+                revenue=row["revenue"],
+            )
+            for row in items.values("order__business_id", "product_id", day=TruncDate("order__created_at"))
+            .annotate(units=Sum("quantity"), revenue=Sum(LINE_REVENUE))
+            .iterator()
+        )
+        document_rows = (
+            models.DailyDocumentRollup(
+                business_id=row["business_id"],
+                date=row["issue_date"],
+                direction=row["direction"],
+                document_type_id=row["document_type_id"],
+                documents=row["documents"],
+                total_taxable=row["total_taxable"],
+                total_igv=row["total_igv"],
+                total=row["total"],
+            )
+            for row in documents.values("business_id", "issue_date", "direction", "document_type_id")
+            .annotate(
+                documents=Count("id"),
+                total_taxable=Sum("total_taxable"),
+                total_igv=Sum("total_igv"),
+                total=Sum("total"),
+            )
+            .order_by()
+            .iterator()
+        )
+
+        written = len(models.DailySalesRollup.objects.bulk_create(sales.values(), batch_size=batch_size))
+        for model, rows in (
+            (models.DailyCategoryRollup, categories),
+            (models.DailyProductRollup, products),
+            (models.DailyDocumentRollup, document_rows),
+        ):
+            written += _bulk_create_stream(model, rows, batch_size)
+    return written
+
+
+def _bulk_create_stream(model, rows, batch_size):
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            written += len(model.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        written += len(model.objects.bulk_create(batch))
+    return written
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+# Rango máximo consultable en un reporte
+MAX_RANGE_DAYS = 366 * 2
+
+
+class DateRangeSerializer(serializers.Serializer):
+    """Rango de fechas de un reporte (por defecto, los últimos 30 días)."""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('date_to', timezone.localdate())
+        attrs.setdefault('date_from', attrs['date_to'] - timedelta(days=29))
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_from': 'Debe ser anterior o igual a date_to.'})
+        if (attrs['date_to'] - attrs['date_from']).days > MAX_RANGE_DAYS:
+            raise serializers.ValidationError(f'El rango máximo es de {MAX_RANGE_DAYS} días.')
+        return attrs
+
+
+class DashboardSerializer(DateRangeSerializer):
+    group_by = serializers.ChoiceField(choices=['day', 'month'], default='day')
+    top = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class AnalyticsSerializer(DateRangeSerializer):
+    top = serializers.IntegerField(min_value=1, max_value=100, default=20)
@@ -0,0 +1,206 @@
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+from core.tokens import add_claims
+from operations.models import Business, Category, Order, OrderItem, Product, Profile
+from taxes import archive
+from taxes.models import DocumentType, Party, SunatDocument
+from . import analytics, rollups
+from .models import DailyDocumentRollup, DailySalesRollup
+
+
+class RollupIntegrityTests(TestCase):
+    """Writes that the rollups cannot follow are rejected instead of leaving them stale."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.user = User.objects.create_user('admin', password='x')
+        Profile.objects.create(user=cls.user, business=cls.business, role='AD')
+        category = Category.objects.create(business=cls.business, name='Bebidas')
+        cls.product = Product.objects.create(
+            business=cls.business, category=category, name='Agua', sell_price=Decimal('2.00'),
+            buy_price=Decimal('1.00'), unit_of_measurement='U', stock=100,
+        )
+        cls.document_type = DocumentType.objects.create(code='03', name='Boleta')
+        cls.party = Party.objects.create(business=cls.business, doc_type='1', doc_number='12345678', name='Juan')
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(self.user), self.user))
+
+    def paid_order(self):
+        order = Order.objects.create(business=self.business)
+        OrderItem.objects.create(order=order, product=self.product, quantity=3, price=Decimal('2.00'), created_by=self.user)
+        order.status = 'PAID'
+        order.save()
+        return order
+
+    def issued_document(self):
+        document = SunatDocument.objects.create(
+            business=self.business, document_type=self.document_type, series='B001', number=1,
+            issue_date=date(2026, 3, 2), party=self.party, total_taxable=Decimal('100.00'),
+            total_igv=Decimal('18.00'), total=Decimal('118.00'),
+        )
+        document.status = 'ISSUED'
+        document.save()
+        return document
+
+    def sales(self):
+        return DailySalesRollup.objects.get(business=self.business, date=timezone.localdate())
+
+    def test_paid_order_cannot_be_deleted(self):
+        order = self.paid_order()
+        response = self.client.delete(f'/api/orders/{order.pk}/')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+        self.assertEqual((self.sales().orders, self.sales().revenue), (1, Decimal('6.00')))
+
+    def test_open_order_can_be_deleted(self):
+        order = Order.objects.create(business=self.business)
+        self.assertEqual(self.client.delete(f'/api/orders/{order.pk}/').status_code, 204)
+
+    def test_issued_document_amounts_are_frozen(self):
+        document = self.issued_document()
+        invoice = DocumentType.objects.create(code='01', name='Factura')
+        for changes in ({'total': '200.00'}, {'issue_date': '2026-03-05'}, {'document_type': invoice.pk}):
+            response = self.client.patch(
+                f'/taxes/sunat-documents/{document.pk}/', changes, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400, changes)
+            self.assertIn(next(iter(changes)), response.json())
+        # Fields outside the rollups can still be edited
+        response = self.client.patch(
+            f'/taxes/sunat-documents/{document.pk}/', {'due_date': '2026-04-01'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        rollup = DailyDocumentRollup.objects.get(business=self.business, date=date(2026, 3, 2))
+        self.assertEqual((rollup.documents, rollup.total), (1, Decimal('118.00')))
+
+    def test_draft_document_amounts_can_change(self):
+        document = SunatDocument.objects.create(
+            business=self.business, document_type=self.document_type, series='B001', number=2,
+            issue_date=date(2026, 3, 2), party=self.party,
+        )
+        response = self.client.patch(
+            f'/taxes/sunat-documents/{document.pk}/', {'total': '50.00'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_issued_document_cannot_be_deleted_but_voiding_reverses_it(self):
+        document = self.issued_document()
+        self.assertEqual(self.client.delete(f'/taxes/sunat-documents/{document.pk}/').status_code, 400)
+        response = self.client.patch(
+            f'/taxes/sunat-documents/{document.pk}/', {'status': 'VOID'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        rollup = DailyDocumentRollup.objects.get(business=self.business, date=date(2026, 3, 2))
+        self.assertEqual((rollup.documents, rollup.total), (0, Decimal('0.00')))
+
+
+class RebuildTests(TestCase):
+    """rebuild() recomputes from the hot tables but keeps what archiving moved out of them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.document_type = DocumentType.objects.create(code='03', name='Boleta')
+        cls.party = Party.objects.create(business=cls.business, doc_type='1', doc_number='12345678', name='Juan')
+
+    def issue(self, number, issue_date):
+        document = SunatDocument.objects.create(
+            business=self.business, document_type=self.document_type, series='B001', number=number,
+            issue_date=issue_date, party=self.party, total=Decimal('118.00'),
+        )
+        document.status = 'ISSUED'
+        document.save()
+
+    def totals(self):
+        return dict(DailyDocumentRollup.objects.values_list('date', 'total'))
+
+    def test_archived_period_keeps_its_document_rollups(self):
+        self.issue(1, date(2025, 1, 10))
+        self.issue(2, date(2025, 2, 10))
+        with tempfile.TemporaryDirectory() as directory, override_settings(TAX_ARCHIVE={'DIR': directory}):
+            archive.archive_period(self.business, 2025, 1)
+        self.assertFalse(SunatDocument.objects.filter(issue_date__month=1).exists())
+        # A stale row in a hot month is recomputed
+        DailyDocumentRollup.objects.filter(date=date(2025, 2, 10)).update(total=Decimal('1.00'))
+
+        rollups.rebuild(date(2025, 1, 1), date(2025, 2, 28))
+        self.assertEqual(
+            self.totals(), {date(2025, 1, 10): Decimal('118.00'), date(2025, 2, 10): Decimal('118.00')}
+        )
+
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_shared_cache'},
+}
+
+
+class ReportAccessTests(TestCase):
+    """Reports are cached only in a shared cache and readable only by roles granted "reports"."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        category = Category.objects.create(business=cls.business, name='Bebidas')
+        cls.product = Product.objects.create(
+            business=cls.business, category=category, name='Agua', sell_price=Decimal('2.00'),
+            buy_price=Decimal('1.00'), unit_of_measurement='U', stock=100,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, role):
+        user = User.objects.create_user(f'user-{role}', password='x')
+        Profile.objects.create(user=user, business=self.business, role=role)
+        self.user = user
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(user), user))
+
+    def sell(self, quantity):
+        order = Order.objects.create(business=self.business)
+        OrderItem.objects.create(order=order, product=self.product, quantity=quantity, price=Decimal('2.00'), created_by=self.user)
+        order.status = 'PAID'
+        order.save()
+
+    def units(self):
+        response = self.client.get('/api/reports/top-products/')
+        self.assertEqual(response.status_code, 200)
+        return [row['units'] for row in response.json()['results']]
+
+    def test_employee_cannot_read_reports(self):
+        self.login('EM')
+        self.assertEqual(self.client.get('/api/reports/margins/').status_code, 403)
+        self.assertEqual(self.client.get('/api/reports/dashboard/').status_code, 403)
+
+    def test_process_local_cache_is_not_used(self):
+        self.login('AD')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(2)
+        self.assertEqual(self.units(), [2])
+        self.assertIsNone(analytics.report_cache())
+        self.assertIsNone(cache.get(analytics._version_key(self.business.pk)))
+
+    @override_settings(CACHES=SHARED_CACHES, REPORTS_CACHE='shared')
+    def test_shared_cache_is_invalidated_on_commit(self):
+        call_command('createcachetable', verbosity=0)
+        self.addCleanup(caches['shared'].clear)
+        self.login('AD')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(2)
+        self.assertEqual(self.units(), [2])
+        self.assertIsNotNone(caches['shared'].get(analytics._version_key(self.business.pk)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(3)
+        self.assertEqual(self.units(), [5])
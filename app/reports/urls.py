@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'', views.ReportViewSet, basename='reports')
+
+urlpatterns = router.urls
\ No newline at end of file
@@ -0,0 +1,142 @@
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from operations.models import Business
+from operations.tenancy import TenantPermission, resolve_tenant
+from . import analytics, models, serializers
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Reportes de ventas del negocio del usuario autenticado. Muestran costos y
+    márgenes, así que solo los roles con el recurso "reports" pueden verlos.
+    """
+    permission_classes = [permissions.IsAuthenticated, TenantPermission]
+    tenant_resource = 'reports'
+
+    def get_tenant(self):
+        if not hasattr(self, '_tenant'):
+            self._tenant = resolve_tenant(self.request)
+        return self._tenant
+
+    def get_business_id(self):
+        """
+        Negocio del usuario desde su perfil. Los administradores de plataforma
+        deben indicar business_id. Retorna None si no hay negocio.
+        """
+        tenant = self.get_tenant()
+        if tenant is None or tenant.business_id is None:
+            return None
+        if tenant.is_platform_admin and not Business.objects.filter(pk=tenant.business_id).exists():
+            return None
+        return tenant.business_id
+
+    def no_business_response(self):
+        return Response(
+            {'detail': 'No se encontró un negocio para este usuario.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    @action(detail=False, methods=['get'], url_path='dashboard', url_name='dashboard')
+    def dashboard(self, request):
+        """
+        Resumen de ventas y comprobantes leído solo de los rollups diarios.
+        Parámetros: date_from, date_to, group_by (day|month), top.
+        """
+        params = serializers.DashboardSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        business_id = self.get_business_id()
+        if business_id is None:
+            return self.no_business_response()
+
+        scope = {
+            'business_id': business_id,
+            'date__gte': params['date_from'],
+            'date__lte': params['date_to'],
+        }
+        sales = models.DailySalesRollup.objects.filter(**scope)
+        if params['group_by'] == 'month':
+            series = sales.annotate(period=TruncMonth('date')).values('period')
+        else:
+            series = sales.annotate(period=F('date')).values('period')
+        series = series.annotate(
+            orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')
+        ).order_by('period')
+
+        top_categories = (
+            models.DailyCategoryRollup.objects.filter(**scope)
+            .values('category_id', category_name=F('category__name'))
+            .annotate(units=Sum('units'), revenue=Sum('revenue'))
+            .order_by('-revenue')[:params['top']]
+        )
+        top_products = (
+            models.DailyProductRollup.objects.filter(**scope)
+            .values('product_id', product_name=F('product__name'), product_code=F('product__code'))
+            .annotate(units=Sum('units'), revenue=Sum('revenue'))
+            .order_by('-revenue')[:params['top']]
+        )
+        documents = (
+            models.DailyDocumentRollup.objects.filter(**scope)
+            .values('direction', document_type_code=F('document_type__code'))
+            .annotate(
+                documents=Sum('documents'),
+                total_taxable=Sum('total_taxable'),
+                total_igv=Sum('total_igv'),
+                total=Sum('total'),
+            )
+            .order_by('direction', 'document_type_code')
+        )
+
+        return Response({
+            'date_from': params['date_from'],
+            'date_to': params['date_to'],
+            'totals': sales.aggregate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')),
+            'series': list(series),
+            'top_categories': list(top_categories),
+            'top_products': list(top_products),
+            'documents': list(documents),
+        })
+
+    def analytics_response(self, name, compute, with_top=True):
+        """Valida parámetros, resuelve el negocio y retorna el reporte desde caché."""
+        params = serializers.AnalyticsSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        business_id = self.get_business_id()
+        if business_id is None:
+            return self.no_business_response()
+
+        args = [business_id, params['date_from'], params['date_to']]
+        if with_top:
+            args.append(params['top'])
+        results = analytics.cached_report(business_id, name, args, lambda: compute(*args))
+        return Response({
+            'date_from': params['date_from'],
+            'date_to': params['date_to'],
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], url_path='top-products', url_name='top-products')
+    def top_products(self, request):
+        """Productos más vendidos por ingresos, con ranking y participación."""
+        return self.analytics_response('top-products', analytics.top_products)
+
+    @action(detail=False, methods=['get'], url_path='margins', url_name='margins')
+    def margins(self, request):
+        """Margen real por producto (precio vendido vs. precio de compra) y margen de lista."""
+        return self.analytics_response('margins', analytics.margins)
+
+    @action(detail=False, methods=['get'], url_path='sales-by-category', url_name='sales-by-category')
+    def sales_by_category(self, request):
+        """Ventas por categoría, con ranking y participación."""
+        return self.analytics_response('sales-by-category', analytics.sales_by_category, with_top=False)
+
+    @action(detail=False, methods=['get'], url_path='slow-movers', url_name='slow-movers')
+    def slow_movers(self, request):
+        """Productos con stock que menos se vendieron en el periodo."""
+        return self.analytics_response('slow-movers', analytics.slow_movers)
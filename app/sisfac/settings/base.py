@@ -45,9 +45,17 @@ INSTALLED_APPS = [
     'operations',
     'corsheaders',
     'taxes',
+    'reports',
+    'books',
+    'inventory',
+    'sync',
+    'audit',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware', # métricas por endpoint (primero para medir todo)
+    'core.compression.CompressionMiddleware', # gzip/br/zstd y ETag de respuestas de la API
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware', # cors headers
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -55,6 +63,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'audit.history.HistoryMiddleware', # usuario de los cambios registrados en el historial
+    'core.routing.ReplicaRoutingMiddleware', # lecturas seguras a réplicas, primario tras escribir
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -126,13 +136,156 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
+    # Usuario y perfil desde los claims del token, sin consultas (ver core/authentication.py)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
+    ),
+    # JSON con orjson (ver core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# False para volver al json de la librería estándar sin cambiar las clases de DRF
+FAST_JSON = os.environ.get('FAST_JSON', '1') == '1'
+
 SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('JWT',),
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+    # Tokens con negocio, rol y versión del perfil (ver core/tokens.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'core.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.tokens.ClaimsTokenRefreshSerializer',
+}
+
+# Segundos que se cachea (is_active, token_version) por usuario para revocar tokens
+JWT_CLAIMS = {
+    'STATE_CACHE_TIMEOUT': 60,
+}
+
+# Instrumentación por endpoint (ver core/instrumentation.py).
+# Presupuestos por vista/acción: al superarlos se registra un warning con la
+# consulta más repetida, para detectar regresiones N+1.
+INSTRUMENTATION = {
+    'ENABLED': os.environ.get('INSTRUMENTATION_ENABLED', '1') == '1',
+    'SERVER_TIMING': True,
+    'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),
+    'DEFAULT_BUDGET': {'queries': 50, 'ms': 1000},
+    'BUDGETS': {
+        'ProductViewSet.list': {'queries': 4, 'ms': 300},
+        'ProfileViewSet.get_my_profile': {'queries': 3, 'ms': 200},
+        'SunatDocumentViewSet.list': {'queries': 4, 'ms': 300},
+        'ReportViewSet.dashboard': {'queries': 8, 'ms': 500},
+    },
+    'DUPLICATE_QUERY_THRESHOLD': 5,
+}
+
+# Archivo en frío de periodos tributarios cerrados (ver taxes/archive.py).
+TAX_ARCHIVE = {
+    'DIR': os.environ.get('TAX_ARCHIVE_DIR', '/vol/web/archive'),
+    'CLOSED_AFTER_MONTHS': 1,
+    'CACHE_TIMEOUT': 60 * 60,
+}
+
+# Compresión de respuestas de la API y ETags (ver core/compression.py).
+# Niveles bajos: en enlaces móviles lentos importa el tamaño, pero sin
+# gastar CPU del servidor en los últimos puntos de compresión.
+COMPRESSION = {
+    'ENABLED': os.environ.get('COMPRESSION_ENABLED', '1') == '1',
+    'MIN_SIZE': 1024,
+    'LEVELS': {'zstd': 3, 'br': 4, 'gzip': 6},
+    'STREAMING_LEVELS': {'zstd': 1, 'br': 2, 'gzip': 4},
+}
+
+# Claves de idempotencia de los POST del POS (ver core/idempotency.py).
+# TTL: segundos durante los que se reproduce la respuesta a los reintentos.
+IDEMPOTENCY = {
+    'TTL': 24 * 60 * 60,
+}
+
+# Valorización del inventario (ver inventory/valuation.py).
+# Método de costeo de los productos que se empiezan a valorizar: AVERAGE o FIFO.
+INVENTORY = {
+    'COSTING_METHOD': os.environ.get('INVENTORY_COSTING_METHOD', 'AVERAGE'),
+}
+
+# Historial de cambios (ver audit/history.py). Los registros se escriben por
+# lotes después del commit: en un hilo cada FLUSH_INTERVAL segundos o, sin
+# BACKGROUND, al terminar cada request.
+HISTORY = {
+    'BACKGROUND': os.environ.get('HISTORY_BACKGROUND', '1') == '1',
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Tareas en segundo plano (ver jobs/queue.py y jobs/worker.py), ejecutadas
+# por `python manage.py run_worker`. La concurrencia es el máximo de tareas
+# en ejecución de cada cola entre todos los workers. SCHEDULE usa expresiones
+# cron en TIME_ZONE (UTC: 07:30 son las 02:30 en Lima).
+JOBS = {
+    'QUEUES': {
+        'default': {'concurrency': 4},
+        'maintenance': {'concurrency': 1},
+    },
+    'POLL_INTERVAL': 1.0,
+    'STALE_AFTER': 300,
+    'RETENTION_DAYS': 7,
+    'SCHEDULE': {
+        'purge-idempotency-keys': {
+            'cron': '17 * * * *', 'task': 'call_command', 'queue': 'maintenance',
+            'kwargs': {'command': 'purge_idempotency_keys'},
+        },
+        'compute-reorders': {
+            'cron': '30 7 * * *', 'task': 'call_command', 'queue': 'maintenance',
+            'kwargs': {'command': 'compute_reorders'},
+        },
+        'prune-sync-changes': {
+            'cron': '45 8 * * *', 'task': 'call_command', 'queue': 'maintenance',
+            'kwargs': {'command': 'prune_sync_changes'},
+        },
+        # El mes anterior, una vez cerrado
+        'snapshot-inventory': {
+            'cron': '15 5 1 * *', 'task': 'call_command', 'queue': 'maintenance',
+            'kwargs': {'command': 'snapshot_inventory'},
+        },
+    },
+}
+
+# Enrutamiento a réplicas de lectura (ver core/routing.py). Las réplicas se
+# definen en DATABASES (todas las que no son 'default'); una réplica con más
+# de MAX_LAG segundos de retraso no se usa. Tras escribir, el cliente lee del
+# primario durante PIN_SECONDS. Los pines se guardan en la caché CACHE, que debe
+# ser compartida entre procesos: con una caché local (LocMemCache) no se usan
+# réplicas.
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+
+READ_REPLICAS = {
+    'MAX_LAG': 5.0,
+    'LAG_CHECK_INTERVAL': 5.0,
+    'PIN_SECONDS': 10,
+}
+
+# Caché de los reportes analíticos (ver reports/analytics.py). Debe ser
+# compartida entre procesos: con una caché local (LocMemCache) un proceso no
+# vería la invalidación hecha por otro, así que los reportes no se cachean.
+REPORTS_CACHE = 'default'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sisfac.instrumentation': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'sisfac.history': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'sisfac.jobs': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'sisfac.routing': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
@@ -1,5 +1,6 @@
 from .base import *
 import os
+from corsheaders.defaults import default_headers
 
 DEBUG = True
 
@@ -18,9 +19,35 @@ DATABASES = {
     }
 }
 
+# Réplicas de lectura (ver core/routing.py): DB_REPLICA_HOSTS=host1,host2:5433
+# con las mismas credenciales. Sin réplicas todo va a 'default'.
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        # Una réplica caída no debe bloquear la request: se usa el primario
+        'OPTIONS': {'connect_timeout': 2},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Los pines al primario y los reportes deben verse desde todos los procesos:
+# se guardan en una tabla del primario (manage.py createcachetable)
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'sisfac_shared_cache'},
+}
+READ_REPLICAS = {**READ_REPLICAS, 'CACHE': 'shared'}
+REPORTS_CACHE = 'shared'
+
 CORS_ALLOWED_ORIGINS = ["http://localhost:5173"]
 CORS_ALLOWED_ORIGINS.extend(
     filter(None, os.environ.get("DJANGO_CORS_ALLOWED_ORIGINS", "").split(","))
 )
 
 CORS_ALLOW_CREDENTIALS = True
+
+# Cabeceras de las claves de idempotencia (ver core/idempotency.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
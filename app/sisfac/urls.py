@@ -18,9 +18,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from core import views as core_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('internal/metrics/', core_views.metrics, name='internal-metrics'),
+    path('api/reports/', include('reports.urls')),
+    path('api/books/', include('books.urls')),
+    path('api/inventory/', include('inventory.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('api/history/', include('audit.urls')),
     path('api/', include('operations.urls')),
     path('taxes/', include('taxes.urls')),
     path('auth/', include('djoser.urls')),
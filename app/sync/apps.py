@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sync'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from operations.signals import products_bulk_updated
+        from . import changes
+
+        for name, model in changes.TRACKED.items():
+            post_save.connect(changes.on_saved, sender=model, dispatch_uid=f'sync.changes.save.{name}')
+            post_delete.connect(changes.on_deleted, sender=model, dispatch_uid=f'sync.changes.delete.{name}')
+        products_bulk_updated.connect(changes.on_products_bulk_updated, dispatch_uid='sync.changes.bulk')
@@ -0,0 +1,71 @@
+"""
+Batch upload of the orders made offline by the POS.
+
+A batch is applied in one transaction: either every new order is created or
+none is. Orders are identified by the client_uuid generated by the POS, so
+uploading the same batch again (e.g. after a lost response) creates nothing
+and answers with the ids already assigned. A retry sent while the first
+upload is still running waits on the unique (business, client_uuid) index;
+each order is inserted in a savepoint, so when the first upload commits
+the retry reads the id it assigned instead of failing.
+
+Each order is created OPEN, its items inserted in bulk, and then moved to
+its final status with save(), so the status signals (rollups, ledger,
+inventory) see the items.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework import exceptions
+
+from operations.models import Order, OrderItem, Product
+
+
+def apply_orders(business_id, user_id, orders):
+    """Creates the new `orders` (validated dicts). Returns [{client_uuid, id, created}] in order."""
+    product_ids = {item["product"] for order in orders for item in order["items"]}
+    found = set(Product.objects.filter(business_id=business_id, pk__in=product_ids).values_list("id", flat=True))
+    missing = sorted(product_ids - found)
+    if missing:
+        raise exceptions.ValidationError({"orders": f"Productos inexistentes o de otro negocio: {missing}"})
+
+    results = []
+    with transaction.atomic():
+        assigned = dict(
+            Order.objects.filter(business_id=business_id, client_uuid__in=[order["client_uuid"] for order in orders])
+            .values_list("client_uuid", "id")
+        )
+        for data in orders:
+            client_uuid = data["client_uuid"]
+            if client_uuid in assigned:
+                results.append({"client_uuid": client_uuid, "id": assigned[client_uuid], "created": False})
+                continue
+            order = Order(
+                business_id=business_id, client_uuid=client_uuid,
+                payment_term=data["payment_term"], currency=data["currency"],
+            )
+            try:
+                with transaction.atomic():
+                    order.save()
+            except IntegrityError:
+                # Created by a concurrent upload of the same order that committed first
+                existing = (
+                    Order.objects.filter(business_id=business_id, client_uuid=client_uuid)
+                    .values_list("id", flat=True).first()
+                )
+                if existing is None:
+                    raise
+                assigned[client_uuid] = existing
+                results.append({"client_uuid": client_uuid, "id": existing, "created": False})
+                continue
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order, product_id=item["product"], quantity=item["quantity"],
+                    price=item["price"], discount=item.get("discount"), created_by_id=user_id,
+                )
+                for item in data["items"]
+            ])
+            if data["status"] != order.status:
+                order.status = data["status"]
+                order.save()
+            assigned[client_uuid] = order.pk
+            results.append({"client_uuid": client_uuid, "id": order.pk, "created": True})
+    return results
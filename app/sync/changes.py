@@ -0,0 +1,146 @@
+"""
+Change log of the catalog synced to the POS (products, categories, parties).
+
+Every save or delete of a tracked object appends a SyncChange with the next
+sequence number of its business (SyncCounter). The counter row stays locked
+until the writing transaction commits, so a business' numbers are assigned
+in commit order and a client that has read up to `seq` never misses a
+change committed later with a lower number. Catalog writes of one business
+serialize on that row; writes of different businesses do not contend.
+
+changes_since(cursor) returns the objects changed after a cursor, one entry
+per object (the last operation wins) with the current row for updates and
+only the id (a tombstone) for deletes. Without a cursor, or with one older
+than the pruned part of the log, it returns the whole catalog.
+
+Set-based writes that bypass the signals (queryset.update()) must call
+record_changes() with the affected ids (operations.bulk sends
+products_bulk_updated, handled here). Stock updates from inventory
+movements are not logged: the POS gets the stock with the next change of
+the product or a full sync.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from operations.models import Business, Category, Product
+from taxes.models import Party
+from . import models
+
+TRACKED = {
+    "product": Product,
+    "category": Category,
+    "party": Party,
+}
+MODEL_NAMES = {model: name for name, model in TRACKED.items()}
+
+# Response key and fields sent for each model
+COLLECTIONS = {
+    "product": "products",
+    "category": "categories",
+    "party": "parties",
+}
+FIELDS = {
+    "product": ("id", "category_id", "code", "name", "description", "stock", "sell_price", "unit_of_measurement", "updated_at"),
+    "category": ("id", "name", "description", "updated_at"),
+    "party": ("id", "doc_type", "doc_number", "name", "address", "email", "phone", "is_active"),
+}
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 5000
+
+
+def next_seq(business_id, count=1):
+    """Reserves `count` sequence numbers for a business and returns the first one."""
+    updated = models.SyncCounter.objects.filter(business_id=business_id).update(seq=F("seq") + count)
+    if not updated:
+        models.SyncCounter.objects.bulk_create([models.SyncCounter(business_id=business_id)], ignore_conflicts=True)
+        models.SyncCounter.objects.filter(business_id=business_id).update(seq=F("seq") + count)
+    last = models.SyncCounter.objects.filter(business_id=business_id).values_list("seq", flat=True).get()
+    return last - count + 1
+
+
+def record_changes(business_id, name, object_ids, op="U"):
+    """Logs a change of the `name` model ("product", ...) for each of `object_ids`."""
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    with transaction.atomic():
+        first = next_seq(business_id, len(object_ids))
+        models.SyncChange.objects.bulk_create([
+            models.SyncChange(business_id=business_id, seq=first + offset, model=name, object_id=object_id, op=op)
+            for offset, object_id in enumerate(object_ids)
+        ], batch_size=1000)
+
+
+def on_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_changes(instance.business_id, MODEL_NAMES[sender], [instance.pk])
+
+
+def on_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting the business takes its log with it
+    if not isinstance(origin, Business):
+        record_changes(instance.business_id, MODEL_NAMES[sender], [instance.pk], op="D")
+
+
+def on_products_bulk_updated(sender, business_id, product_ids, **kwargs):
+    # Set-based updates send no post_save
+    record_changes(business_id, "product", product_ids)
+
+
+def _rows(name, business_id, ids=None):
+    queryset = TRACKED[name].objects.filter(business_id=business_id)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return list(queryset.order_by("pk").values(*FIELDS[name]))
+
+
+def changes_since(business_id, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Changes of a business after `cursor` (at most `limit` log entries):
+    {"cursor", "reset", "has_more", "<collection>": {"updated": [...], "deleted": [ids]}}.
+    `reset` means the response is the whole catalog and replaces the client's.
+    """
+    counter = models.SyncCounter.objects.filter(business_id=business_id).values("seq", "pruned_seq").first()
+    seq, pruned_seq = (counter["seq"], counter["pruned_seq"]) if counter else (0, 0)
+
+    if cursor is None or cursor < pruned_seq or cursor > seq:
+        # Read after the counter: changes committed meanwhile are sent again next time
+        return {
+            "cursor": seq,
+            "reset": True,
+            "has_more": False,
+            **{
+                collection: {"updated": _rows(name, business_id), "deleted": []}
+                for name, collection in COLLECTIONS.items()
+            },
+        }
+
+    entries = list(
+        models.SyncChange.objects.filter(business_id=business_id, seq__gt=cursor)
+        .order_by("seq").values_list("seq", "model", "object_id", "op")[:limit]
+    )
+    latest = {}
+    for _, name, object_id, op in entries:
+        latest[name, object_id] = op
+
+    response = {
+        "cursor": entries[-1][0] if entries else cursor,
+        "reset": False,
+        "has_more": len(entries) == limit,
+    }
+    for name, collection in COLLECTIONS.items():
+        updated = [object_id for (model, object_id), op in latest.items() if model == name and op == "U"]
+        response[collection] = {
+            "updated": _rows(name, business_id, updated) if updated else [],
+            "deleted": sorted(object_id for (model, object_id), op in latest.items() if model == name and op == "D"),
+        }
+    return response
+
+
+def prune(business_id, before_seq):
+    """Deletes the log entries of a business up to `before_seq`. Returns the number deleted."""
+    with transaction.atomic():
+        models.SyncCounter.objects.filter(business_id=business_id, pruned_seq__lt=before_seq).update(pruned_seq=before_seq)
+        deleted, _ = models.SyncChange.objects.filter(business_id=business_id, seq__lte=before_seq).delete()
+    return deleted
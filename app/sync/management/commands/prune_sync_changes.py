@@ -0,0 +1,45 @@
+"""
+Django management command to delete the old entries of the sync change log.
+POS clients whose cursor falls in the pruned part get a full catalog on
+their next sync.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from sync import changes
+from sync.models import SyncChange
+
+
+class Command(BaseCommand):
+    help = 'Elimina los cambios de sincronización más antiguos que el número de días indicado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Días de cambios que se conservan (30 por defecto)',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days debe ser mayor a 0')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        rows = (
+            SyncChange.objects.filter(created_at__lt=cutoff)
+            .values('business_id').annotate(last_seq=Max('seq')).order_by('business_id')
+        )
+        total = 0
+        for row in rows:
+            deleted = changes.prune(row['business_id'], row['last_seq'])
+            total += deleted
+            self.stdout.write(f"  ✓ Negocio {row['business_id']}: {deleted} cambios")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Cambios eliminados: {total}'
+            )
+        )
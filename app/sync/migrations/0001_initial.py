@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('operations', '0003_order_client_uuid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCounter',
+            fields=[
+                ('business', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sync_counter', serialize=False, to='operations.business')),
+                ('seq', models.BigIntegerField(default=0)),
+                ('pruned_seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField()),
+                ('model', models.CharField(choices=[('product', 'Producto'), ('category', 'Categoría'), ('party', 'Cliente/Proveedor')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('U', 'Creado o modificado'), ('D', 'Eliminado')], max_length=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_changes', to='operations.business')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'seq'), name='uq_syncchange_business_seq')],
+            },
+        ),
+    ]
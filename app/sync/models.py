@@ -0,0 +1,43 @@
+from django.db import models
+from operations.models import Business
+from operations.tenancy import TenantQuerySet
+
+
+class SyncCounter(models.Model):
+    """
+    Last change sequence number of a business. The row is updated (and so
+    locked) by every change, which makes the numbers follow commit order.
+    """
+    business = models.OneToOneField(Business, on_delete=models.CASCADE, primary_key=True, related_name="sync_counter")
+    seq = models.BigIntegerField(default=0)
+    # Changes up to here were pruned: older cursors need a full resync
+    pruned_seq = models.BigIntegerField(default=0)
+
+
+class SyncChange(models.Model):
+    """Change log entry: an object of a synced model was saved or deleted."""
+    MODEL_CHOICES = [
+        ("product", "Producto"),
+        ("category", "Categoría"),
+        ("party", "Cliente/Proveedor"),
+    ]
+    OP_CHOICES = [
+        ("U", "Creado o modificado"),
+        ("D", "Eliminado"),
+    ]
+
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="sync_changes")
+    seq = models.BigIntegerField()
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=1, choices=OP_CHOICES)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["business", "seq"], name="uq_syncchange_business_seq"),
+        ]
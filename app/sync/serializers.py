@@ -0,0 +1,31 @@
+from rest_framework import serializers
+from operations.models import Order
+from . import changes
+
+# Pedidos por lote
+MAX_BATCH_ORDERS = 500
+
+
+class ChangesParamsSerializer(serializers.Serializer):
+    """Cursor de la última sincronización (vacío = catálogo completo) y máximo de cambios."""
+    cursor = serializers.IntegerField(min_value=0, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=changes.MAX_LIMIT, default=changes.DEFAULT_LIMIT)
+
+
+class OfflineOrderItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    discount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+
+
+class OfflineOrderSerializer(serializers.Serializer):
+    client_uuid = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, default='PAID')
+    payment_term = serializers.ChoiceField(choices=Order.PAYMENT_TERM_CHOICES, default='CASH')
+    currency = serializers.ChoiceField(choices=Order.CURRENCY_CHOICES, default='PEN')
+    items = OfflineOrderItemSerializer(many=True, allow_empty=False)
+
+
+class OrderBatchSerializer(serializers.Serializer):
+    orders = OfflineOrderSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_ORDERS)
@@ -0,0 +1,57 @@
+import uuid
+from decimal import Decimal
+
+from django.db.models.signals import pre_save
+from django.test import TestCase
+
+from core.models import User
+from operations.models import Business, Category, Order, Product
+from .batches import apply_orders
+
+
+class ApplyOrdersTests(TestCase):
+    """Offline orders are created once per client_uuid."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega')
+        cls.user = User.objects.create_user('cajero', password='x')
+        category = Category.objects.create(business=cls.business, name='Bebidas')
+        cls.product = Product.objects.create(
+            business=cls.business, category=category, name='Agua', sell_price=Decimal('2.00'),
+            buy_price=Decimal('1.00'), unit_of_measurement='U',
+        )
+
+    def orders(self, *uuids):
+        items = [{'product': self.product.pk, 'quantity': 1, 'price': Decimal('2.00')}]
+        return [
+            {'client_uuid': client_uuid, 'status': 'OPEN', 'payment_term': 'CASH', 'currency': 'PEN', 'items': items}
+            for client_uuid in uuids
+        ]
+
+    def test_repeated_batch_returns_the_assigned_ids(self):
+        orders = self.orders(uuid.uuid4(), uuid.uuid4())
+        first = apply_orders(self.business.pk, self.user.pk, orders)
+        retry = apply_orders(self.business.pk, self.user.pk, orders)
+        self.assertEqual([result['id'] for result in retry], [result['id'] for result in first])
+        self.assertFalse(any(result['created'] for result in retry))
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_order_created_concurrently_is_read_back(self):
+        first, raced = uuid.uuid4(), uuid.uuid4()
+        concurrent = []
+
+        def create_raced(sender, instance, **kwargs):
+            # Another upload commits the raced order after this one looked it up
+            if instance.client_uuid == first and not concurrent:
+                concurrent.append(None)
+                concurrent[0] = Order.objects.create(business=self.business, client_uuid=raced)
+
+        pre_save.connect(create_raced, sender=Order, dispatch_uid='test-race')
+        try:
+            results = apply_orders(self.business.pk, self.user.pk, self.orders(first, raced))
+        finally:
+            pre_save.disconnect(sender=Order, dispatch_uid='test-race')
+        self.assertTrue(results[0]['created'])
+        self.assertEqual(results[1], {'client_uuid': raced, 'id': concurrent[0].pk, 'created': False})
+        self.assertEqual(Order.objects.filter(client_uuid=raced).count(), 1)
@@ -0,0 +1,8 @@
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'orders', views.OrderBatchViewSet, basename='sync-orders')
+router.register(r'', views.ChangesViewSet, basename='sync')
+
+urlpatterns = router.urls
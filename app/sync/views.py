@@ -0,0 +1,56 @@
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+from operations.tenancy import TenantViewSetMixin
+from . import batches, changes, models, serializers
+
+
+def no_business_response():
+    return Response(
+        {'detail': 'Indique business_id para sincronizar.'},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+class ChangesViewSet(TenantViewSetMixin, viewsets.GenericViewSet):
+    """Cambios del catálogo (productos, categorías, clientes) para el POS."""
+    queryset = models.SyncChange.objects.all()
+    tenant_resource = 'catalog'
+
+    def list(self, request):
+        """
+        Cambios posteriores a `cursor`: filas actuales de lo creado o
+        modificado e ids de lo eliminado. Sin cursor (o con uno ya depurado)
+        devuelve el catálogo completo con reset=true. El POS repite con el
+        cursor devuelto mientras has_more sea true.
+        """
+        params = serializers.ChangesParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        business_id = self.get_tenant().business_id
+        if business_id is None:
+            return no_business_response()
+        params = params.validated_data
+        return Response(changes.changes_since(business_id, params.get('cursor'), params['limit']))
+
+
+class OrderBatchViewSet(TenantViewSetMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+    """Subida por lotes de los pedidos registrados sin conexión."""
+    queryset = models.SyncChange.objects.all()
+    serializer_class = serializers.OrderBatchSerializer
+    tenant_resource = 'orders'
+
+    def create(self, request, *args, **kwargs):
+        """
+        Crea en una sola transacción los pedidos del lote que aún no existen
+        (por client_uuid) y devuelve el id asignado a cada uno.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        business_id = self.get_tenant().business_id
+        if business_id is None:
+            return no_business_response()
+        results = batches.apply_orders(business_id, request.user.pk, serializer.validated_data['orders'])
+        created = any(result['created'] for result in results)
+        return Response(
+            {'orders': results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TaxesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'taxes'
+
+    def ready(self):
+        from . import broker, signals
+        signals.submission_status_changed.connect(
+            broker.publish_submission_status, dispatch_uid='taxes.broker.publish_submission_status'
+        )
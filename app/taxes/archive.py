@@ -0,0 +1,383 @@
+"""
+Cold storage of closed tax periods.
+
+Once a month is closed (its monthly declaration is due, see
+TAX_ARCHIVE['CLOSED_AFTER_MONTHS']), the documents of a business for that
+month never change again. archive_period() writes them, with their items,
+submissions and the precomputed sales register row, to a gzip JSON-lines
+file (one document per line) under TAX_ARCHIVE['DIR'], records its SHA-256
+in ArchivedPeriod and deletes the rows from the hot tables. Only a narrow
+ArchivedDocument locator (id, period, line, offset) stays in the database.
+
+The file is a series of gzip members of MEMBER_DOCUMENTS lines each: read
+whole it is a regular gzip file, and the locator's offset (where the
+member holding the document starts) lets find_document() decompress that
+member alone instead of the month up to the document. Files written before
+offsets existed are a single member and are still scanned from the start.
+
+Reads go through this module: find_document() serves the document detail
+endpoint and register_rows() feeds the sales register export, so archived
+periods stay visible to clients. restore_period() puts the rows back.
+
+Rollups are not touched: they were computed when the documents were hot,
+and reports.rollups.rebuild() keeps the document rollups of archived
+periods instead of recomputing them from the now empty hot tables.
+
+Journal entries, stock movements and purchase lots refer to their document
+by a plain source_id, which outlives the row: it still resolves through
+SunatDocumentKey (kept for archived documents) and ArchivedDocument (same
+id), and find_document() returns the document itself. Nothing reverses an
+archived document, since the period is closed.
+"""
+import gzip
+import json
+import os
+import zlib
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.bulkload import file_checksum
+
+from .models import (
+    ArchivedDocument, ArchivedPeriod, DocumentType, SunatDocument, SunatDocumentItem, SunatSubmission,
+)
+
+DEFAULTS = {
+    'DIR': 'archive',
+    # Months after the end of a period before it can be archived
+    'CLOSED_AFTER_MONTHS': 1,
+    'CACHE_TIMEOUT': 60 * 60,
+}
+
+# Documents whose items and submissions are fetched per query while archiving
+BATCH_SIZE = 1000
+
+# Documents (lines) per gzip member of an archive file
+MEMBER_DOCUMENTS = 100
+
+# Bytes read at a time when decompressing a single member
+READ_SIZE = 64 * 1024
+
+REGISTER_DATES = ('issue_date', 'due_date', 'ref_document__issue_date')
+REGISTER_AMOUNTS = ('exchange_rate', 'total_taxable', 'total_igv', 'total', 'exonerated', 'unaffected')
+
+
+class ArchiveError(Exception):
+    """The period cannot be archived or restored."""
+
+
+def get_setting(name):
+    return getattr(settings, 'TAX_ARCHIVE', {}).get(name, DEFAULTS[name])
+
+
+def period_bounds(year, month):
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    return first, following - timedelta(days=1)
+
+
+def is_closed(year, month, today=None):
+    today = today or timezone.localdate()
+    index = year * 12 + month - 1 + 1 + get_setting('CLOSED_AFTER_MONTHS')
+    return date(index // 12, index % 12 + 1, 1) <= today
+
+
+def archive_path(business, year, month):
+    return Path(get_setting('DIR')) / str(business.id) / f'{year:04d}-{month:02d}.jsonl.gz'
+
+
+def _values(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _from_values(model, values):
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    return model(**{name: fields[name].to_python(value) for name, value in values.items()})
+
+
+def _records(business, first, last):
+    """Yields one dict per document of the period, ordered by id."""
+    from .exports import sales_register_queryset
+
+    documents = (
+        SunatDocument.objects
+        .filter(business=business, issue_date__gte=first, issue_date__lte=last)
+        .order_by('id')
+        .values(*_values(SunatDocument))
+    )
+    register = sales_register_queryset(business.id, first, last)
+    batch = []
+    for document in documents.iterator(chunk_size=BATCH_SIZE):
+        batch.append(document)
+        if len(batch) == BATCH_SIZE:
+            yield from _with_children(batch, register, first, last)
+            batch = []
+    if batch:
+        yield from _with_children(batch, register, first, last)
+
+
+def _with_children(documents, register, first, last):
+    ids = [document['id'] for document in documents]
+    items, submissions, rows = {}, {}, {}
+    item_rows = (
+        SunatDocumentItem.objects
+        .filter(document_id__in=ids, issue_date__gte=first, issue_date__lte=last)
+        .order_by('id')
+        .values(*_values(SunatDocumentItem))
+    )
+    for item in item_rows:
+        items.setdefault(item['document_id'], []).append(item)
+    for submission in SunatSubmission.objects.filter(document_id__in=ids).order_by('id').values(*_values(SunatSubmission)):
+        submissions.setdefault(submission['document_id'], []).append(submission)
+    for row in register.filter(id__in=ids):
+        rows[row['id']] = row
+    for document in documents:
+        yield {
+            'document': document,
+            'items': items.get(document['id'], []),
+            'submissions': submissions.get(document['id'], []),
+            'register': rows.get(document['id']),
+        }
+
+
+def archive_period(business, year, month):
+    """
+    Moves the documents of `business` issued in year/month to an archive
+    file. Returns the ArchivedPeriod, or None when the period is empty.
+    """
+    if not is_closed(year, month):
+        raise ArchiveError(f'El periodo {year}-{month:02d} aún no está cerrado.')
+    if ArchivedPeriod.objects.filter(business=business, year=year, month=month).exists():
+        raise ArchiveError(f'El periodo {year}-{month:02d} ya está archivado.')
+
+    first, last = period_bounds(year, month)
+    documents = SunatDocument.objects.filter(business=business, issue_date__gte=first, issue_date__lte=last)
+    if not documents.exists():
+        return None
+    if documents.filter(status='DRAFT').exists():
+        raise ArchiveError(f'El periodo {year}-{month:02d} tiene comprobantes en borrador.')
+    if SunatSubmission.objects.filter(document__in=documents, status='PENDING').exists():
+        raise ArchiveError(f'El periodo {year}-{month:02d} tiene envíos a SUNAT pendientes.')
+
+    path = archive_path(business, year, month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    locators, items_count, submissions_count = [], 0, 0
+    with open(temporary, 'wb') as file:
+        lines = []
+
+        def write_member():
+            file.write(gzip.compress(''.join(lines).encode('utf-8'), mtime=0))
+            lines.clear()
+
+        for record in _records(business, first, last):
+            if not lines:
+                offset = file.tell()
+            lines.append(json.dumps(record, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n')
+            locators.append((record['document']['id'], offset))
+            items_count += len(record['items'])
+            submissions_count += len(record['submissions'])
+            if len(lines) == MEMBER_DOCUMENTS:
+                write_member()
+        if lines:
+            write_member()
+    os.replace(temporary, path)
+
+    try:
+        with transaction.atomic():
+            archived = ArchivedPeriod.objects.create(
+                business=business, year=year, month=month, path=str(path),
+                checksum=file_checksum(path), size=path.stat().st_size,
+                documents_count=len(locators), items_count=items_count, submissions_count=submissions_count,
+            )
+            ArchivedDocument.objects.bulk_create(
+                [
+                    ArchivedDocument(id=pk, period=archived, line=line, offset=offset)
+                    for line, (pk, offset) in enumerate(locators, start=1)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            deleted = _delete_rows(business.id, first, last, locators[0][0], locators[-1][0])
+            if deleted != len(locators):
+                # A document was added to the period while the file was written
+                raise ArchiveError(f'El periodo {year}-{month:02d} cambió durante el archivo; reintente.')
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    return archived
+
+
+def _delete_rows(business_id, first, last, first_id, last_id):
+    """
+    Deletes the period rows with plain SQL: the ORM would load every row to
+    run cascades and signals, and rollups must keep the archived amounts.
+    Rows that point at the documents by source_id (ledger, inventory) stay,
+    resolved through SunatDocumentKey and ArchivedDocument.
+    """
+    document = SunatDocument._meta.db_table
+    period = 'business_id = %s AND issue_date >= %s AND issue_date <= %s AND id >= %s AND id <= %s'
+    params = [business_id, first, last, first_id, last_id]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SunatDocumentItem._meta.db_table} WHERE issue_date >= %s AND issue_date <= %s '
+            f'AND document_id IN (SELECT id FROM {document} WHERE {period})',
+            [first, last, *params],
+        )
+        cursor.execute(
+            f'DELETE FROM {SunatSubmission._meta.db_table} WHERE document_id IN (SELECT id FROM {document} WHERE {period})',
+            params,
+        )
+        cursor.execute(f'DELETE FROM {document} WHERE {period}', params)
+        return cursor.rowcount
+
+
+def read_records(archived, verify=False):
+    """Yields the records of an archive file, oldest document first."""
+    path = Path(archived.path)
+    if not path.exists():
+        raise ArchiveError(f'No se encuentra el archivo {path}.')
+    if verify and file_checksum(path) != archived.checksum:
+        raise ArchiveError(f'El checksum de {path} no coincide.')
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            yield json.loads(line)
+
+
+def verify_period(archived):
+    """True when the archive file exists and matches its recorded checksum."""
+    path = Path(archived.path)
+    return path.exists() and file_checksum(path) == archived.checksum
+
+
+def restore_period(archived, keep_file=False):
+    """Moves an archived period back into the hot tables."""
+    records = read_records(archived, verify=True)
+    with transaction.atomic():
+        documents, items, submissions = [], [], []
+        for record in records:
+            documents.append(_from_values(SunatDocument, record['document']))
+            items.extend(_from_values(SunatDocumentItem, item) for item in record['items'])
+            submissions.extend(_from_values(SunatSubmission, submission) for submission in record['submissions'])
+            if len(documents) >= BATCH_SIZE:
+                _insert(documents, items, submissions)
+                documents, items, submissions = [], [], []
+        _insert(documents, items, submissions)
+        path = archived.path
+        archived.delete()
+        if not keep_file:
+            transaction.on_commit(lambda: Path(path).unlink(missing_ok=True))
+
+
+def _insert(documents, items, submissions):
+    # bulk_create skips save(): no signals, no auto_now, ids and timestamps kept
+    SunatDocument.objects.bulk_create(documents)
+    SunatDocumentItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    SunatSubmission.objects.bulk_create(submissions, batch_size=BATCH_SIZE)
+
+
+# -- read-through ---------------------------------------------------------
+
+def find_document(pk):
+    """Archived record (document, items, submissions) of document `pk`, or None."""
+    key = f'taxes:archived-document:{pk}'
+    record = cache.get(key)
+    if record is not None:
+        return record
+
+    locator = ArchivedDocument.objects.select_related('period').filter(pk=pk).first()
+    if locator is None:
+        return None
+    if locator.offset is None:
+        records = enumerate(read_records(locator.period), start=1)
+        record = next((record for line, record in records if line == locator.line), None)
+    else:
+        records = (json.loads(line) for line in _read_member(locator.period, locator.offset).splitlines())
+        record = next((record for record in records if record['document']['id'] == pk), None)
+    if record is not None:
+        cache.set(key, record, get_setting('CACHE_TIMEOUT'))
+    return record
+
+
+def _read_member(archived, offset):
+    """Decompressed text of the gzip member starting at `offset` of an archive file."""
+    path = Path(archived.path)
+    if not path.exists():
+        raise ArchiveError(f'No se encuentra el archivo {path}.')
+    decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    parts = []
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        while not decompressor.eof:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise ArchiveError(f'El archivo {path} está truncado.')
+            parts.append(decompressor.decompress(chunk))
+    return b''.join(parts).decode('utf-8')
+
+
+def register_rows(business_id, date_from, date_to):
+    """
+    Sales register rows of the archived periods of a business within
+    [date_from, date_to], in the export's order; None when none is archived.
+    """
+    periods = [
+        archived for archived in ArchivedPeriod.objects.filter(business_id=business_id).order_by('year', 'month')
+        if period_bounds(archived.year, archived.month)[1] >= date_from
+        and period_bounds(archived.year, archived.month)[0] <= date_to
+    ]
+    if not periods:
+        return None
+    return _register_rows(periods, date_from, date_to)
+
+
+def _register_rows(periods, date_from, date_to):
+    for archived in periods:
+        rows = [
+            _register_row(record['register']) for record in read_records(archived)
+            if record['register'] is not None
+        ]
+        rows = [row for row in rows if date_from <= row['issue_date'] <= date_to]
+        rows.sort(key=register_key)
+        yield from fill_archived_refs(rows)
+
+
+def _register_row(row):
+    row = dict(row)
+    for name in REGISTER_DATES:
+        row[name] = parse_date(row[name]) if row.get(name) else None
+    for name in REGISTER_AMOUNTS:
+        row[name] = Decimal(row[name]) if row.get(name) is not None else None
+    return row
+
+
+def fill_archived_refs(rows):
+    """
+    Completes the referenced document columns of register rows (credit and
+    debit notes) whose reference was archived and is no longer joinable.
+    """
+    codes = None
+    for row in rows:
+        if row.get('ref_document') and row['ref_document__series'] is None:
+            record = find_document(row['ref_document'])
+            if record is not None:
+                if codes is None:
+                    codes = dict(DocumentType.objects.values_list('id', 'code'))
+                reference = record['document']
+                row['ref_document__issue_date'] = parse_date(reference['issue_date'])
+                row['ref_document__document_type__code'] = codes.get(reference['document_type_id'])
+                row['ref_document__series'] = reference['series']
+                row['ref_document__number'] = reference['number']
+        yield row
+
+
+def register_key(row):
+    # Same order as exports.sales_register_queryset (text by code point)
+    return row['issue_date'], row['document_type__code'], row['series'], row['number']
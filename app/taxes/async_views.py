@@ -0,0 +1,178 @@
+"""
+Vistas asíncronas (ASGI) de consulta de estado de comprobantes.
+"""
+import asyncio
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import OuterRef, Subquery
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.authentication import async_login_required
+from core.renderers import json_response
+from operations.async_views import arequire_tenant
+from . import models
+from .broker import ALL_BUSINESSES, broker
+
+# Máximo de comprobantes por consulta de estado en lote
+MAX_STATUS_IDS = 100
+
+# Segundos entre comentarios keep-alive del stream SSE
+SSE_HEARTBEAT = 15
+
+# Máximo de eventos reenviados al reconectar con Last-Event-ID
+SSE_CATCH_UP_LIMIT = 500
+
+STATUS_FIELDS = [
+    'id',
+    'series',
+    'number',
+    'issue_date',
+    'status',
+    'document_type__code',
+    'last_submission_status',
+    'last_submission_at',
+]
+
+
+def _with_last_submission(queryset):
+    """Anota el estado y la fecha del último envío a SUNAT en la misma consulta."""
+    last = models.SunatSubmission.objects.filter(document=OuterRef('pk')).order_by('-created_at')
+    return queryset.annotate(
+        last_submission_status=Subquery(last.values('status')[:1]),
+        last_submission_at=Subquery(last.values('updated_at')[:1]),
+    )
+
+
+@require_GET
+@async_login_required
+async def sunat_document_status(request, pk):
+    """
+    GET /taxes/async/sunat-documents/<pk>/status/
+    Estado del comprobante y de su último envío a SUNAT.
+    """
+    tenant, error = await arequire_tenant(request, 'taxes')
+    if error is not None:
+        return error
+    queryset = models.SunatDocument.objects.for_tenant(tenant).filter(pk=pk)
+    document = await _with_last_submission(queryset).values(*STATUS_FIELDS).afirst()
+    if document is None:
+        return JsonResponse({'detail': 'No encontrado.'}, status=404)
+    return json_response(document)
+
+
+@require_GET
+@async_login_required
+async def sunat_document_statuses(request):
+    """
+    GET /taxes/async/sunat-documents/status/?ids=1,2,3
+    Estado en lote de varios comprobantes en una sola consulta.
+    """
+    try:
+        ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return JsonResponse({'ids': 'Debe ser una lista de IDs separados por comas.'}, status=400)
+    if len(ids) > MAX_STATUS_IDS:
+        return JsonResponse({'ids': f'Máximo {MAX_STATUS_IDS} comprobantes por consulta.'}, status=400)
+
+    tenant, error = await arequire_tenant(request, 'taxes')
+    if error is not None:
+        return error
+    results = []
+    if ids:
+        queryset = models.SunatDocument.objects.for_tenant(tenant).filter(pk__in=ids)
+        documents = _with_last_submission(queryset).values(*STATUS_FIELDS)
+        results = [document async for document in documents]
+    return json_response({'results': results})
+
+
+def _sse(event, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append('event: status')
+    lines.append(f'data: {json.dumps(event, cls=JSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _catch_up(business_id, since):
+    """Transiciones ocurridas desde `since` (reconexión con Last-Event-ID)."""
+    queryset = models.SunatSubmission.objects.filter(updated_at__gt=since)
+    if business_id is not ALL_BUSINESSES:
+        queryset = queryset.filter(document__business_id=business_id)
+    submissions = queryset.order_by('updated_at').values(
+        'id', 'document', 'document__business_id', 'status', 'apisunat_document_id', 'updated_at'
+    )[:SSE_CATCH_UP_LIMIT]
+    async for submission in submissions:
+        yield {
+            'id': submission['id'],
+            'document': submission['document'],
+            'business_id': submission['document__business_id'],
+            'status': submission['status'],
+            'previous_status': None,
+            'apisunat_document_id': submission['apisunat_document_id'],
+            'updated_at': submission['updated_at'].isoformat(),
+        }
+
+
+@require_GET
+@async_login_required
+async def sunat_submission_stream(request):
+    """
+    GET /taxes/async/sunat-submissions/stream/
+    Server-Sent Events con los cambios de estado de los envíos a SUNAT del negocio.
+    Reemplaza el polling de /taxes/sunat-submissions/: el cliente mantiene una
+    conexión abierta y recibe un evento `status` por cada transición. Al reconectar,
+    el navegador envía Last-Event-ID y se reenvían las transiciones perdidas.
+    Solo se sirve con ASGI (daphne, SERVER=asgi): bajo WSGI el stream nunca termina
+    y ocuparía un hilo por cliente, así que responde 501.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'El stream de estados requiere el servidor ASGI.'}, status=501
+        )
+
+    tenant, error = await arequire_tenant(request, 'taxes')
+    if error is not None:
+        return error
+    # Admin de plataforma sin business_id: todos los negocios
+    business_id = ALL_BUSINESSES if tenant.business_id is None else tenant.business_id
+
+    try:
+        since = parse_datetime(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        since = None
+
+    async def events():
+        # Suscribirse antes del catch-up para no perder eventos intermedios
+        queue = broker.subscribe(business_id)
+        # Transiciones enviadas en el catch-up: pueden llegar también por la cola
+        sent = set()
+        try:
+            yield f'retry: {SSE_HEARTBEAT * 1000}\n\n'
+            if since is not None:
+                async for event in _catch_up(business_id, since):
+                    sent.add((event['id'], event['updated_at']))
+                    yield _sse(event, event['updated_at'])
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                key = (event['id'], event['updated_at'])
+                if key in sent:
+                    sent.discard(key)
+                    continue
+                yield _sse(event, event['updated_at'])
+        finally:
+            broker.unsubscribe(business_id, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Evita que proxies (nginx) acumulen el stream en buffer
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,159 @@
+"""
+Push channel for SunatSubmission status transitions.
+
+Writers publish an event when a submission changes status (see
+SunatSubmission.save). On PostgreSQL the event travels through
+NOTIFY so every server process receives it; each process runs a single
+LISTEN thread that fans events out to its connected SSE clients. On other
+databases (tests, local sqlite) events are dispatched in-process.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection, connections, transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'sunat_submission_status'
+
+# Events kept per subscriber before dropping (a stuck client must not grow memory)
+QUEUE_SIZE = 100
+
+# Subscriber key for platform admins listening to every business
+ALL_BUSINESSES = None
+
+
+def submission_event(submission, previous_status):
+    """Compact event describing a status transition."""
+    from .models import SunatDocument
+
+    if type(submission).document.is_cached(submission):
+        business_id = submission.document.business_id
+    else:
+        business_id = (
+            SunatDocument.objects.filter(pk=submission.document_id)
+            .values_list('business_id', flat=True)
+            .first()
+        )
+    return {
+        'id': submission.pk,
+        'document': submission.document_id,
+        'business_id': business_id,
+        'status': submission.status,
+        'previous_status': previous_status,
+        'apisunat_document_id': submission.apisunat_document_id,
+        'updated_at': submission.updated_at.isoformat() if submission.updated_at else None,
+    }
+
+
+class SubmissionBroker:
+    """Per-process registry of SSE subscribers, keyed by business id."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, business_id):
+        """Registers a subscriber for the running event loop and returns its queue."""
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers[business_id].add((loop, queue))
+        self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, business_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(business_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({item for item in subscribers if item[1] is queue})
+            if not subscribers:
+                del self._subscribers[business_id]
+
+    def dispatch(self, event):
+        """Delivers an event to the subscribers of its business and to global subscribers."""
+        keys = {event.get('business_id'), ALL_BUSINESSES}
+        with self._lock:
+            targets = [(key, item) for key in keys for item in self._subscribers.get(key, ())]
+        for key, (loop, queue) in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # Event loop already closed; the subscriber is gone
+                self.unsubscribe(key, queue)
+
+    def _ensure_listener(self):
+        if connection.vendor != 'postgresql':
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name='sunat-submission-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        """LISTEN loop on a dedicated connection; reconnects on failure."""
+        import psycopg2
+
+        wrapper = connections['default']
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**wrapper.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self.dispatch(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning('Ignoring malformed %s payload', CHANNEL)
+            except psycopg2.Error:
+                logger.exception('Submission status listener lost its connection, retrying')
+                time.sleep(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.warning('Dropping submission event for a slow SSE client')
+
+
+broker = SubmissionBroker()
+
+
+def publish_submission_status(sender, submission, previous_status, **kwargs):
+    """
+    Receiver for submission_status_changed. The event is only published
+    once the surrounding transaction commits, so clients never see a
+    status that was rolled back.
+    """
+    event = submission_event(submission, previous_status)
+
+    if connection.vendor == 'postgresql':
+        def notify():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(event, cls=JSONEncoder)])
+    else:
+        def notify():
+            broker.dispatch(event)
+
+    transaction.on_commit(notify)
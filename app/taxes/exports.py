@@ -0,0 +1,268 @@
+"""
+Registro de Ventas export (CSV and SUNAT PLE format 14.1).
+
+Rows are produced from a single aggregated query over SunatDocument,
+read through a server-side cursor with iterator(chunk_size=...), and
+formatted one line at a time, so memory stays flat regardless of how many
+documents the period has. Both the API (StreamingHttpResponse) and the
+export_sales_register command consume these generators. Under ASGI the API
+streams them through aiter_lines(): Django would otherwise collect a sync
+iterator into a list before sending it.
+
+Rows of archived periods are sorted in Python and merged with the query's
+rows, so the query orders its text columns by code point (COLLATE "C" on
+PostgreSQL, whose default collation would put "b001" before "B002"),
+the order Python compares strings in.
+"""
+import csv
+import heapq
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import DecimalField, F, FilteredRelation, Q, Sum, Value
+from django.db.models.functions import Coalesce, Collate
+
+from .models import SunatDocument
+
+EXPORT_CHUNK_SIZE = 2000
+
+ZERO = Decimal('0.00')
+
+CSV_HEADER = [
+    'fecha_emision',
+    'fecha_vencimiento',
+    'tipo_comprobante',
+    'serie',
+    'numero',
+    'tipo_doc_cliente',
+    'numero_doc_cliente',
+    'cliente',
+    'moneda',
+    'tipo_cambio',
+    'base_imponible',
+    'exonerado',
+    'inafecto',
+    'igv',
+    'total',
+    'estado',
+    'ref_tipo_comprobante',
+    'ref_serie',
+    'ref_numero',
+]
+
+ROW_FIELDS = [
+    'id',
+    'issue_date',
+    'due_date',
+    'document_type__code',
+    'series',
+    'number',
+    'party__doc_type',
+    'party__doc_number',
+    'party__name',
+    'currency',
+    'exchange_rate',
+    'total_taxable',
+    'total_igv',
+    'total',
+    'status',
+    'exonerated',
+    'unaffected',
+    'ref_document',
+    'ref_document__issue_date',
+    'ref_document__document_type__code',
+    'ref_document__series',
+    'ref_document__number',
+]
+
+
+def _code_point_order(field):
+    if connection.vendor == 'postgresql':
+        return Collate(field, 'C')
+    # SQLite compares text bytewise (BINARY), which for UTF-8 is code point order
+    return F(field)
+
+
+def sales_register_queryset(business_id, date_from, date_to):
+    """
+    Issued and voided sales documents of a business in [date_from, date_to].
+    Filtering by (business, issue_date) uses the existing composite index.
+    The items join repeats the date range so PostgreSQL only scans the
+    item partitions of the period (see taxes.partitions).
+    """
+    amount = DecimalField(max_digits=12, decimal_places=2)
+    return (
+        SunatDocument.objects
+        .filter(
+            business_id=business_id,
+            direction='SALE',
+            issue_date__gte=date_from,
+            issue_date__lte=date_to,
+        )
+        .exclude(status='DRAFT')
+        .annotate(
+            period_items=FilteredRelation(
+                'items',
+                condition=Q(items__issue_date__gte=date_from, items__issue_date__lte=date_to),
+            ),
+        )
+        .annotate(
+            exonerated=Coalesce(
+                Sum('period_items__line_total', filter=Q(period_items__tax_affectation='20')),
+                Value(ZERO), output_field=amount,
+            ),
+            unaffected=Coalesce(
+                Sum('period_items__line_total', filter=Q(period_items__tax_affectation='30')),
+                Value(ZERO), output_field=amount,
+            ),
+        )
+        .order_by(
+            'issue_date', _code_point_order('document_type__code'), _code_point_order('series'), 'number',
+        )
+        .values(*ROW_FIELDS)
+    )
+
+
+def sales_register_rows(business_id, date_from, date_to, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Streams register rows as dicts, chunk_size rows per database fetch.
+    Rows of archived periods are read from their archive files and merged
+    in order (see taxes.archive).
+    """
+    from . import archive
+
+    rows = archive.fill_archived_refs(
+        sales_register_queryset(business_id, date_from, date_to).iterator(chunk_size=chunk_size)
+    )
+    archived = archive.register_rows(business_id, date_from, date_to)
+    if archived is None:
+        return rows
+    return heapq.merge(archived, rows, key=archive.register_key)
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer streaming."""
+
+    def write(self, value):
+        return value
+
+
+def _amount(value):
+    return f'{(value or ZERO):.2f}'
+
+
+def _date(value, fmt='%Y-%m-%d'):
+    return value.strftime(fmt) if value else ''
+
+
+def csv_lines(rows):
+    """Yields the register as CSV lines (UTF-8 BOM first, so Excel detects the encoding)."""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(CSV_HEADER)
+    for row in rows:
+        yield writer.writerow([
+            _date(row['issue_date']),
+            _date(row['due_date']),
+            row['document_type__code'],
+            row['series'],
+            row['number'],
+            row['party__doc_type'],
+            row['party__doc_number'],
+            row['party__name'],
+            row['currency'],
+            row['exchange_rate'] or '',
+            _amount(row['total_taxable']),
+            _amount(row['exonerated']),
+            _amount(row['unaffected']),
+            _amount(row['total_igv']),
+            _amount(row['total']),
+            row['status'],
+            row['ref_document__document_type__code'] or '',
+            row['ref_document__series'] or '',
+            row['ref_document__number'] or '',
+        ])
+
+
+def ple_lines(rows, year, month):
+    """
+    Yields the register in PLE format 14.1 (Registro de Ventas e Ingresos):
+    35 pipe-separated fields per line, each line ending with '|'.
+    Voided documents are reported with zero amounts and estado 2.
+    """
+    period = f'{year:04d}{month:02d}00'
+    for correlative, row in enumerate(rows, start=1):
+        voided = row['status'] == 'VOID'
+
+        def amount(value):
+            return _amount(ZERO if voided else value)
+
+        fields = [
+            period,                                         # 1 Periodo
+            str(row['id']),                                 # 2 CUO
+            f'M{correlative}',                              # 3 Correlativo del asiento
+            _date(row['issue_date'], '%d/%m/%Y'),           # 4 Fecha de emisión
+            _date(row['due_date'], '%d/%m/%Y'),             # 5 Fecha de vencimiento
+            row['document_type__code'],                     # 6 Tipo de comprobante
+            row['series'],                                  # 7 Serie
+            str(row['number']),                             # 8 Número
+            '',                                             # 9 Número final (resúmenes)
+            row['party__doc_type'],                         # 10 Tipo doc. identidad
+            row['party__doc_number'],                       # 11 Número doc. identidad
+            row['party__name'].replace('|', ' '),           # 12 Razón social
+            amount(ZERO),                                   # 13 Valor facturado exportación
+            amount(row['total_taxable']),                   # 14 Base imponible gravada
+            amount(ZERO),                                   # 15 Descuento base imponible
+            amount(row['total_igv']),                       # 16 IGV
+            amount(ZERO),                                   # 17 Descuento IGV
+            amount(row['exonerated']),                      # 18 Importe exonerado
+            amount(row['unaffected']),                      # 19 Importe inafecto
+            amount(ZERO),                                   # 20 ISC
+            amount(ZERO),                                   # 21 Base arroz pilado
+            amount(ZERO),                                   # 22 IVAP
+            amount(ZERO),                                   # 23 ICBPER
+            amount(ZERO),                                   # 24 Otros tributos
+            amount(row['total']),                           # 25 Importe total
+            row['currency'],                                # 26 Moneda
+            f"{(row['exchange_rate'] or Decimal('1')):.3f}",  # 27 Tipo de cambio
+            _date(row['ref_document__issue_date'], '%d/%m/%Y'),  # 28 Fecha doc. modificado
+            row['ref_document__document_type__code'] or '',      # 29 Tipo doc. modificado
+            row['ref_document__series'] or '',                   # 30 Serie doc. modificado
+            str(row['ref_document__number'] or ''),              # 31 Número doc. modificado
+            '',                                             # 32 Identificación del contrato
+            '',                                             # 33 Error tipo 1
+            '',                                             # 34 Indicador medio de pago
+            '2' if voided else '1',                         # 35 Estado
+        ]
+        yield '|'.join(fields) + '|\r\n'
+
+
+def _next_batch(lines, size):
+    return list(islice(lines, size))
+
+
+async def aiter_lines(lines, size=EXPORT_CHUNK_SIZE):
+    """
+    Async iterator over a line generator, for StreamingHttpResponse under
+    ASGI. Each batch of `size` lines is produced by sync_to_async on the
+    request's thread (the one holding the server-side cursor) and sent as
+    one chunk, so memory stays flat as with WSGI.
+    """
+    lines = iter(lines)
+    next_batch = sync_to_async(_next_batch)
+    try:
+        while True:
+            batch = await next_batch(lines, size)
+            if not batch:
+                return
+            yield ''.join(batch)
+    finally:
+        # Client gone or done: close the generator (and its cursor) on the same thread
+        if hasattr(lines, 'close'):
+            await sync_to_async(lines.close)()
+
+
+def ple_filename(ruc, year, month):
+    """Nombre de archivo PLE: LE + RUC + AAAAMM00 + 140100 + oportunidad + indicadores."""
+    return f'LE{ruc}{year:04d}{month:02d}00140100001111.txt'
@@ -0,0 +1,199 @@
+"""
+Bulk loader for historical SUNAT documents (see core.bulkload).
+
+One CSV line per document item; the document columns are repeated on each
+of its lines, and the lines of a document must be consecutive:
+
+    business_ruc, document_type, series, number, issue_date, party_doc_type,
+    party_doc_number, party_name, total_taxable, total_igv, total,
+    item_description, item_quantity, item_unit_price, item_line_total
+
+Optional: direction (SALE), due_date, currency (PEN), exchange_rate,
+payment_term (CASH), status (ISSUED), party_address, ref_document_type,
+ref_series, ref_number, item_product_code, item_discount,
+item_tax_affectation (10), item_igv_rate (0.18).
+
+Businesses are resolved by RUC, document types by code, parties by
+(business, doc type, doc number) and created when missing, products by
+code. Documents already present are rejected as duplicates, so a file can
+be loaded only once. Loaded documents bypass the model signals: run
+backfill_rollups for the loaded dates afterwards.
+"""
+from core.bulkload import STAGE_TABLE, Loader
+from operations.models import Business, Product
+
+from .models import DocumentType, Party, SunatDocument, SunatDocumentItem, SunatDocumentKey
+
+DOC_TYPES = [code for code, _ in Party.DOC_TYPE_CHOICES]
+TAX_AFFECTATIONS = [code for code, _ in SunatDocumentItem.TAX_AFFECTATION_CHOICES]
+DIRECTIONS = [code for code, _ in SunatDocument.DIRECTION_CHOICES]
+STATUSES = [code for code, _ in SunatDocument.STATUS_CHOICES]
+CURRENCIES = [code for code, _ in SunatDocument.CURRENCY_CHOICES]
+PAYMENT_TERMS = [code for code, _ in SunatDocument.PAYMENT_TERM_CHOICES]
+
+# Amounts are numeric(12, 2) / numeric(12, 4)
+MAX_AMOUNT = 9999999999
+
+
+class DocumentLoader(Loader):
+    kind = 'documents'
+    columns = [
+        'business_ruc', 'direction', 'document_type', 'series', 'number', 'issue_date', 'due_date',
+        'currency', 'exchange_rate', 'payment_term', 'status',
+        'party_doc_type', 'party_doc_number', 'party_name', 'party_address',
+        'total_taxable', 'total_igv', 'total',
+        'ref_document_type', 'ref_series', 'ref_number',
+        'item_description', 'item_product_code', 'item_quantity', 'item_unit_price',
+        'item_discount', 'item_tax_affectation', 'item_igv_rate', 'item_line_total',
+    ]
+    required = [
+        'business_ruc', 'document_type', 'series', 'number', 'issue_date',
+        'party_doc_type', 'party_doc_number', 'party_name', 'total_taxable', 'total_igv', 'total',
+        'item_description', 'item_quantity', 'item_unit_price', 'item_line_total',
+    ]
+    group_by = ['business_ruc', 'direction', 'document_type', 'series', 'number']
+    resolve_columns = {
+        'business_id': 'bigint',
+        'document_type_id': 'bigint',
+        'party_id': 'bigint',
+        'product_id': 'bigint',
+        'document_id': 'bigint',
+    }
+
+    def resolve(self, cursor):
+        business = Business._meta.db_table
+        document_type = DocumentType._meta.db_table
+        key = SunatDocumentKey._meta.db_table
+
+        # Valores por defecto de columnas opcionales
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} SET '
+            f"  direction = COALESCE(NULLIF(direction, ''), 'SALE'), "
+            f"  currency = COALESCE(NULLIF(currency, ''), 'PEN'), "
+            f"  payment_term = COALESCE(NULLIF(payment_term, ''), 'CASH'), "
+            f"  status = COALESCE(NULLIF(status, ''), 'ISSUED'), "
+            f"  item_tax_affectation = COALESCE(NULLIF(item_tax_affectation, ''), '10'), "
+            f"  item_igv_rate = COALESCE(NULLIF(item_igv_rate, ''), '0.18'), "
+            f"  item_discount = COALESCE(NULLIF(item_discount, ''), '0')"
+        )
+
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET business_id = b.id FROM {business} b WHERE b.ruc = s.business_ruc'
+        )
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET document_type_id = t.id FROM {document_type} t WHERE t.code = s.document_type'
+        )
+
+        self.reject(cursor, 'business_id IS NULL', 'RUC de negocio desconocido')
+        self.reject(cursor, 'document_type_id IS NULL', 'Tipo de comprobante desconocido')
+        self.reject(cursor, "series = '' OR length(series) > 10", 'Serie inválida')
+        self.reject(cursor, r"number !~ '^\d{1,9}$'", 'Número inválido')
+        self.reject(cursor, 'pg_temp.try_date(issue_date) IS NULL', 'Fecha de emisión inválida')
+        self.reject(cursor, "due_date <> '' AND pg_temp.try_date(due_date) IS NULL", 'Fecha de vencimiento inválida')
+        self.reject(cursor, 'NOT (direction = ANY(%s))', 'Dirección inválida', [DIRECTIONS])
+        self.reject(cursor, 'NOT (status = ANY(%s))', 'Estado inválido', [STATUSES])
+        self.reject(cursor, 'NOT (currency = ANY(%s))', 'Moneda inválida', [CURRENCIES])
+        self.reject(cursor, 'NOT (payment_term = ANY(%s))', 'Forma de pago inválida', [PAYMENT_TERMS])
+        self.reject(cursor, "exchange_rate <> '' AND NOT pg_temp.try_numeric(exchange_rate) BETWEEN 0.0001 AND 999999",
+                    'Tipo de cambio inválido')
+        self.reject(cursor, 'NOT (party_doc_type = ANY(%s))', 'Tipo de documento del cliente inválido', [DOC_TYPES])
+        self.reject(cursor, "party_doc_number = '' OR length(party_doc_number) > 20 OR party_name = '' "
+                            'OR length(party_name) > 255 OR length(party_address) > 255',
+                    'Datos del cliente inválidos')
+        for column in ('total_taxable', 'total_igv', 'total', 'item_discount', 'item_line_total', 'item_unit_price'):
+            self.reject(cursor, f'pg_temp.try_numeric({column}) IS NULL '
+                                f'OR abs(pg_temp.try_numeric({column})) > {MAX_AMOUNT}', f'Importe inválido: {column}')
+        self.reject(cursor, f'NOT pg_temp.try_numeric(item_quantity) BETWEEN 0.0001 AND {MAX_AMOUNT}',
+                    'Cantidad inválida')
+        self.reject(cursor, 'NOT pg_temp.try_numeric(item_igv_rate) BETWEEN 0 AND 1', 'Tasa de IGV inválida')
+        self.reject(cursor, 'NOT (item_tax_affectation = ANY(%s))', 'Afectación de IGV inválida', [TAX_AFFECTATIONS])
+        self.reject(cursor, "item_description = '' OR length(item_description) > 255", 'Descripción del ítem inválida')
+        self.reject(cursor, r"ref_number <> '' AND (ref_number !~ '^\d{1,9}$' OR ref_series = '' "
+                            "OR ref_document_type = '')", 'Comprobante de referencia inválido')
+
+        # Un comprobante se carga completo o no se carga
+        self.reject_groups(cursor, 'Otra línea del comprobante es inválida')
+
+        # Las claves incluyen los comprobantes de periodos archivados
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET error = %s FROM {key} k '
+            f'WHERE s.error IS NULL AND k.business_id = s.business_id AND k.direction = s.direction '
+            f'AND k.document_type_id = s.document_type_id AND k.series = s.series AND k.number = s.number::integer',
+            ['Comprobante ya existe'],
+        )
+
+        self.resolve_parties(cursor)
+        self.resolve_products(cursor)
+
+    def resolve_parties(self, cursor):
+        party = Party._meta.db_table
+        # Clientes faltantes: la primera línea de cada cliente define sus datos
+        cursor.execute(
+            f'INSERT INTO {party} (business_id, doc_type, doc_number, name, address, email, phone, is_active) '
+            f'SELECT DISTINCT ON (business_id, party_doc_type, party_doc_number) '
+            f"  business_id, party_doc_type, party_doc_number, party_name, COALESCE(party_address, ''), '', '', true "
+            f'FROM {STAGE_TABLE} WHERE error IS NULL '
+            f'ORDER BY business_id, party_doc_type, party_doc_number, line '
+            f'ON CONFLICT (business_id, doc_type, doc_number) DO NOTHING'
+        )
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET party_id = p.id FROM {party} p '
+            f'WHERE s.error IS NULL AND p.business_id = s.business_id '
+            f'AND p.doc_type = s.party_doc_type AND p.doc_number = s.party_doc_number'
+        )
+
+    def resolve_products(self, cursor):
+        product = Product._meta.db_table
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET product_id = p.id FROM ('
+            f'  SELECT DISTINCT ON (business_id, code) id, business_id, code FROM {product} '
+            f'  WHERE business_id IN (SELECT DISTINCT business_id FROM {STAGE_TABLE}) '
+            f'  ORDER BY business_id, code, id'
+            f") p WHERE s.error IS NULL AND s.item_product_code <> '' "
+            f'AND p.business_id = s.business_id AND p.code = s.item_product_code'
+        )
+
+    def merge(self, cursor):
+        document = SunatDocument._meta.db_table
+        document_type = DocumentType._meta.db_table
+        item = SunatDocumentItem._meta.db_table
+        key = 'business_id, direction, document_type_id, series, number'
+
+        cursor.execute(
+            f'INSERT INTO {document} (business_id, direction, document_type_id, series, number, issue_date, '
+            f'  party_id, order_id, currency, exchange_rate, payment_term, due_date, '
+            f'  total_taxable, total_igv, total, status, ref_document_id) '
+            f'SELECT DISTINCT ON ({key}) '
+            f'  business_id, direction, document_type_id, series, number::integer, issue_date::date, '
+            f"  party_id, NULL, currency, NULLIF(exchange_rate, '')::numeric, payment_term, "
+            f"  NULLIF(due_date, '')::date, total_taxable::numeric, total_igv::numeric, total::numeric, status, NULL "
+            f'FROM {STAGE_TABLE} WHERE error IS NULL ORDER BY {key}, line'
+        )
+        cursor.execute(
+            f'UPDATE {STAGE_TABLE} s SET document_id = d.id FROM {document} d '
+            f'WHERE s.error IS NULL AND d.business_id = s.business_id AND d.direction = s.direction '
+            f'AND d.document_type_id = s.document_type_id AND d.series = s.series AND d.number = s.number::integer'
+        )
+        cursor.execute(
+            f'INSERT INTO {SunatDocumentKey._meta.db_table} '
+            f'  (document_id, business_id, direction, document_type_id, series, number, order_id) '
+            f'SELECT DISTINCT document_id, business_id, direction, document_type_id, series, number::integer, NULL::bigint '
+            f'FROM {STAGE_TABLE} WHERE error IS NULL'
+        )
+        cursor.execute(
+            f'INSERT INTO {item} (document_id, issue_date, product_id, description, quantity, unit_price, discount, '
+            f'  tax_affectation, igv_rate, line_total) '
+            f'SELECT document_id, issue_date::date, product_id, item_description, item_quantity::numeric, item_unit_price::numeric, '
+            f'  item_discount::numeric, item_tax_affectation, item_igv_rate::numeric, item_line_total::numeric '
+            f'FROM {STAGE_TABLE} WHERE error IS NULL ORDER BY line'
+        )
+        # Notas de crédito/débito: la referencia puede estar en este chunk o ya cargada
+        cursor.execute(
+            f'UPDATE {document} d SET ref_document_id = r.id '
+            f'FROM (SELECT DISTINCT document_id, business_id, direction, ref_document_type, ref_series, ref_number '
+            f"      FROM {STAGE_TABLE} WHERE error IS NULL AND ref_number <> '') s "
+            f'JOIN {document_type} rt ON rt.code = s.ref_document_type '
+            f'JOIN {document} r ON r.business_id = s.business_id AND r.direction = s.direction '
+            f'  AND r.document_type_id = rt.id AND r.series = s.ref_series AND r.number = s.ref_number::integer '
+            f'WHERE d.id = s.document_id'
+        )
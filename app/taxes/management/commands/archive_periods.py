@@ -0,0 +1,106 @@
+"""
+Django management command to move closed tax periods to cold storage
+(see taxes/archive.py). Without --period, archives every closed month that
+still has documents in the database.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import ExtractMonth, ExtractYear
+from operations.models import Business
+from taxes import archive
+from taxes.models import ArchivedPeriod, SunatDocument
+
+
+class Command(BaseCommand):
+    help = 'Archiva comprobantes, ítems y envíos de periodos tributarios cerrados en archivos comprimidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            help='ID del negocio (si no se especifica, procesa todos)',
+        )
+        parser.add_argument(
+            '--period',
+            type=str,
+            help='Periodo AAAA-MM (por defecto, todos los periodos cerrados)',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Solo verifica el checksum de los archivos existentes',
+        )
+
+    def handle(self, *args, **options):
+        business_id = options.get('business_id')
+        if options['verify']:
+            self._verify(business_id)
+            return
+
+        periods = self._periods(business_id, options.get('period'))
+        if not periods:
+            self.stdout.write(self.style.WARNING('No hay periodos cerrados para archivar.'))
+            return
+
+        businesses = Business.objects.in_bulk({business for business, _, _ in periods})
+        archived = documents = size = 0
+        for business, year, month in periods:
+            try:
+                result = archive.archive_period(businesses[business], year, month)
+            except archive.ArchiveError as exc:
+                self.stdout.write(self.style.WARNING(f'  ✗ Negocio {business} {year}-{month:02d}: {exc}'))
+                continue
+            if result is None:
+                continue
+            archived += 1
+            documents += result.documents_count
+            size += result.size
+            self.stdout.write(
+                f'  ✓ Negocio {business} {year}-{month:02d}: {result.documents_count} comprobantes '
+                f'({result.size / 1024:,.0f} KB)'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Periodos archivados: {archived}\n'
+                f'   Comprobantes archivados: {documents}\n'
+                f'   Tamaño total: {size / 1024 / 1024:,.1f} MB'
+            )
+        )
+
+    def _periods(self, business_id, period):
+        """(business_id, year, month) with documents in the database, oldest first."""
+        documents = SunatDocument.objects.all()
+        if business_id is not None:
+            documents = documents.filter(business_id=business_id)
+        if period:
+            try:
+                year, month = (int(part) for part in period.split('-'))
+                first, last = archive.period_bounds(year, month)
+            except ValueError:
+                raise CommandError('--period debe tener el formato AAAA-MM')
+            if not archive.is_closed(year, month):
+                raise CommandError(f'El periodo {period} aún no está cerrado.')
+            documents = documents.filter(issue_date__gte=first, issue_date__lte=last)
+
+        rows = (
+            documents
+            .annotate(year=ExtractYear('issue_date'), month=ExtractMonth('issue_date'))
+            .values_list('business_id', 'year', 'month')
+            .distinct()
+            .order_by('year', 'month', 'business_id')
+        )
+        return [row for row in rows if archive.is_closed(row[1], row[2])]
+
+    def _verify(self, business_id):
+        periods = ArchivedPeriod.objects.all()
+        if business_id is not None:
+            periods = periods.filter(business_id=business_id)
+        failed = 0
+        for archived in periods:
+            if not archive.verify_period(archived):
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'  ✗ {archived}: {archived.path}'))
+        if failed:
+            raise CommandError(f'{failed} archivo(s) faltantes o con checksum distinto')
+        self.stdout.write(self.style.SUCCESS(f'✅ {periods.count()} archivos verificados'))
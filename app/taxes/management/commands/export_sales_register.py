@@ -0,0 +1,95 @@
+"""
+Django management command to export the Registro de Ventas of a business.
+Streams rows to a file (or stdout) in CSV or SUNAT PLE 14.1 format.
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from core.routing import replica_reads
+from operations.models import Business
+from taxes import exports
+from taxes.serializers import SalesRegisterExportSerializer
+
+
+class Command(BaseCommand):
+    help = 'Exporta el Registro de Ventas de un negocio (CSV o PLE 14.1)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            required=True,
+            help='ID del negocio a exportar',
+        )
+        parser.add_argument(
+            '--period',
+            type=str,
+            help='Periodo AAAA-MM (obligatorio para PLE)',
+        )
+        parser.add_argument('--date-from', type=str, help='Fecha inicial AAAA-MM-DD')
+        parser.add_argument('--date-to', type=str, help='Fecha final AAAA-MM-DD')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ple'],
+            default='csv',
+            help='Formato de salida (csv por defecto)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Archivo de salida (por defecto stdout; para PLE se sugiere el nombre oficial)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=exports.EXPORT_CHUNK_SIZE,
+            help='Filas leídas por cada fetch del cursor',
+        )
+
+    def handle(self, *args, **options):
+        params = SalesRegisterExportSerializer(data={
+            key: value for key, value in {
+                'export_format': options['format'],
+                'period': options.get('period'),
+                'date_from': options.get('date_from'),
+                'date_to': options.get('date_to'),
+            }.items() if value
+        })
+        if not params.is_valid():
+            raise CommandError(params.errors)
+        params = params.validated_data
+
+        try:
+            business = Business.objects.get(id=options['business_id'])
+        except Business.DoesNotExist:
+            raise CommandError(f'No se encontró un negocio con ID {options["business_id"]}')
+
+        rows = exports.sales_register_rows(
+            business.id, params['date_from'], params['date_to'], chunk_size=options['chunk_size']
+        )
+        if params['export_format'] == 'ple':
+            lines = exports.ple_lines(rows, params['year'], params['month'])
+        else:
+            lines = exports.csv_lines(rows)
+
+        output = options.get('output')
+        out = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+        count = 0
+        try:
+            # Lectura pesada: a una réplica si hay alguna al día
+            with replica_reads():
+                for line in lines:
+                    out.write(line)
+                    count += 1
+        finally:
+            if output:
+                out.close()
+
+        if output:
+            if params['export_format'] == 'csv':
+                count -= 1  # cabecera
+            self.stderr.write(self.style.SUCCESS(f'✅ {count} comprobantes exportados a {output}'))
+            if params['export_format'] == 'ple':
+                self.stderr.write(
+                    f'   Nombre PLE sugerido: {exports.ple_filename(business.ruc or "", params["year"], params["month"])}'
+                )
@@ -0,0 +1,115 @@
+"""
+Django management command to maintain the monthly partitions of the tax
+tables (see taxes.partitions): creates the coming months ahead of time and
+detaches (or drops) the months older than a retention limit. Meant to run
+daily or monthly from cron; running it again is harmless.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from taxes import partitions
+
+
+class Command(BaseCommand):
+    help = 'Crea particiones mensuales futuras y separa las antiguas de las tablas de comprobantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=3,
+            help='Meses a crear por adelantado después del actual (3 por defecto)',
+        )
+        parser.add_argument(
+            '--from',
+            dest='from_month',
+            type=str,
+            help='Crea también los meses desde AAAA-MM (para cargas históricas; mueve las filas de la partición default)',
+        )
+        parser.add_argument(
+            '--detach-before',
+            type=str,
+            help='Separa las particiones de meses anteriores a AAAA-MM (quedan como tablas independientes)',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Con --detach-before, elimina las particiones separadas en lugar de conservarlas',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Solo lista las particiones existentes',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El particionamiento requiere PostgreSQL.')
+        if options['ahead'] < 0:
+            raise CommandError('--ahead no puede ser negativo')
+        if options['drop'] and not options['detach_before']:
+            raise CommandError('--drop requiere --detach-before')
+
+        with connection.cursor() as cursor:
+            missing = [table for table in partitions.PARTITIONED_TABLES if not partitions.is_partitioned(cursor, table)]
+        if missing:
+            raise CommandError(f'Tablas sin particionar (¿faltan migraciones?): {", ".join(missing)}')
+
+        if options['list']:
+            self._list()
+            return
+
+        this_month = partitions.month_start(timezone.localdate())
+        first = self._parse(options['from_month'], '--from') or this_month
+        last = partitions.add_months(this_month, options['ahead'])
+        detach_before = self._parse(options['detach_before'], '--detach-before')
+        if detach_before and detach_before > first:
+            raise CommandError('--detach-before no puede ser posterior a los meses a crear')
+
+        created = detached = 0
+        for table in partitions.PARTITIONED_TABLES:
+            # One transaction per partition: moving rows out of the default partition locks it
+            for month in partitions.month_range(first, last):
+                with transaction.atomic(), connection.cursor() as cursor:
+                    if partitions.create_partition(cursor, table, month):
+                        created += 1
+                        self.stdout.write(f'  ✓ {partitions.partition_name(table, month)} creada')
+
+            if detach_before:
+                with connection.cursor() as cursor:
+                    old = [
+                        month for _, month, _ in partitions.list_partitions(cursor, table)
+                        if month and month < detach_before
+                    ]
+                for month in old:
+                    with transaction.atomic(), connection.cursor() as cursor:
+                        partitions.detach_partition(cursor, table, month, drop=options['drop'])
+                    detached += 1
+                    action = 'eliminada' if options['drop'] else 'separada'
+                    self.stdout.write(f'  ✓ {partitions.partition_name(table, month)} {action}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado!\n'
+                f'   Particiones creadas: {created}\n'
+                f'   Particiones {"eliminadas" if options["drop"] else "separadas"}: {detached}'
+            )
+        )
+
+    def _list(self):
+        with connection.cursor() as cursor:
+            for table in partitions.PARTITIONED_TABLES:
+                self.stdout.write(self.style.SUCCESS(table))
+                for name, _, rows in partitions.list_partitions(cursor, table):
+                    self.stdout.write(f'   {name:<45} ~{rows} filas')
+
+    def _parse(self, value, option):
+        if not value:
+            return None
+        try:
+            year, month = (int(part) for part in value.split('-'))
+            return date(year, month, 1)
+        except ValueError:
+            raise CommandError(f'{option} debe tener el formato AAAA-MM')
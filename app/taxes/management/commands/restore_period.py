@@ -0,0 +1,56 @@
+"""
+Django management command to move an archived tax period back into the
+database (see taxes/archive.py), after verifying its checksum.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from taxes import archive
+from taxes.models import ArchivedPeriod
+
+
+class Command(BaseCommand):
+    help = 'Restaura en la base de datos un periodo tributario archivado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business-id',
+            type=int,
+            required=True,
+            help='ID del negocio',
+        )
+        parser.add_argument(
+            '--period',
+            type=str,
+            required=True,
+            help='Periodo AAAA-MM',
+        )
+        parser.add_argument(
+            '--keep-file',
+            action='store_true',
+            help='Conserva el archivo comprimido después de restaurar',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            year, month = (int(part) for part in options['period'].split('-'))
+        except ValueError:
+            raise CommandError('--period debe tener el formato AAAA-MM')
+
+        archived = ArchivedPeriod.objects.filter(
+            business_id=options['business_id'], year=year, month=month
+        ).first()
+        if archived is None:
+            raise CommandError(f'El periodo {options["period"]} no está archivado para ese negocio.')
+
+        try:
+            archive.restore_period(archived, keep_file=options['keep_file'])
+        except archive.ArchiveError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Periodo restaurado!\n'
+                f'   Comprobantes: {archived.documents_count}\n'
+                f'   Ítems: {archived.items_count}\n'
+                f'   Envíos: {archived.submissions_count}'
+            )
+        )
@@ -0,0 +1,134 @@
+"""
+Converts SunatDocument, SunatDocumentItem and SunatSubmission into monthly
+range-partitioned tables on PostgreSQL (see taxes.partitions).
+
+Each table is rebuilt: renamed, recreated as a partitioned table with the
+same columns, filled with INSERT ... SELECT and the old one dropped; its
+indexes and constraints are recreated with the same names so later
+migrations can still find them. This rewrites the tables under an exclusive
+lock, so run it in a maintenance window on large databases. Other database
+backends only get the schema changes (item issue_date, no FK constraints).
+"""
+import django.db.models.deletion
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+from taxes import partitions
+
+# Months created ahead of the current one
+MONTHS_AHEAD = 3
+
+
+def backfill_item_issue_date(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # No deferred FK checks left pending before the ALTER TABLE that follows
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+    SunatDocument = apps.get_model('taxes', 'SunatDocument')
+    SunatDocumentItem = apps.get_model('taxes', 'SunatDocumentItem')
+    SunatDocumentItem.objects.update(
+        issue_date=Subquery(SunatDocument.objects.filter(pk=OuterRef('document_id')).values('issue_date')[:1])
+    )
+
+
+def _partition_table(cursor, table, column):
+    # Definitions to recreate once the old table is gone (index names are schema-wide)
+    cursor.execute(
+        'SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x WHERE x.indrelid = %s::regclass '
+        'AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)',
+        [table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        'SELECT c.conname, c.contype, array_agg(a.attname::text ORDER BY k.n) FROM pg_constraint c '
+        'CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY k(attnum, n) '
+        'JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum '
+        "WHERE c.conrelid = %s::regclass AND c.contype IN ('p', 'u') GROUP BY c.conname, c.contype",
+        [table],
+    )
+    keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(f'SELECT min({column}) FROM {table}')
+    first = cursor.fetchone()[0]
+
+    old = f'{table}_unpartitioned'
+    sequence = f'{table}_id_seq'
+    cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE ({column})'
+    )
+    # PostgreSQL < 17 has no identity columns on partitioned tables
+    cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {table}.id')
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+    today = date.today()
+    first = partitions.month_start(first) if first else partitions.month_start(today)
+    partitions.create_default_partition(cursor, table)
+    for month in partitions.month_range(first, partitions.add_months(today, MONTHS_AHEAD)):
+        partitions.create_partition(cursor, table, month)
+
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    cursor.execute(f"SELECT setval('{sequence}', COALESCE(max(id), 0) + 1, false) FROM {table}")
+    cursor.execute(f'DROP TABLE {old}')
+
+    for name, kind, columns in keys:
+        if column not in columns:
+            columns.append(column)
+        constraint = 'PRIMARY KEY' if kind == 'p' else 'UNIQUE'
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {constraint} ({", ".join(columns)})')
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    cursor.execute(f'ANALYZE {table}')
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in partitions.PARTITIONED_TABLES.items():
+            _partition_table(cursor, table, column)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taxes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sunatdocument',
+            name='ref_document',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='referenced_by', to='taxes.sunatdocument'),
+        ),
+        migrations.AlterField(
+            model_name='sunatdocumentitem',
+            name='document',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='taxes.sunatdocument'),
+        ),
+        migrations.AlterField(
+            model_name='sunatsubmission',
+            name='document',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='taxes.sunatdocument'),
+        ),
+        migrations.AddField(
+            model_name='sunatdocumentitem',
+            name='issue_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_item_issue_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='sunatdocumentitem',
+            name='issue_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.RunPython(partition_tables),
+    ]
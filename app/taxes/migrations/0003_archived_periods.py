@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0001_initial'),
+        ('taxes', '0002_partition_tax_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('path', models.CharField(max_length=500)),
+                ('checksum', models.CharField(help_text='SHA-256 del archivo comprimido', max_length=64)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('documents_count', models.PositiveIntegerField(default=0)),
+                ('items_count', models.PositiveIntegerField(default=0)),
+                ('submissions_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_periods', to='operations.business')),
+            ],
+            options={
+                'ordering': ['business', 'year', 'month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedDocument',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('line', models.PositiveIntegerField()),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='taxes.archivedperiod')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='archivedperiod',
+            constraint=models.UniqueConstraint(fields=('business', 'year', 'month'), name='uq_archivedperiod_business_period'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:33
+"""
+Adds SunatDocumentKey and fills it with the documents of the hot table and
+of the archived periods (read from their files, which must be reachable).
+Fails with IntegrityError if the database already holds duplicates that the
+date-qualified constraints of the partitioned table let through.
+"""
+import gzip
+import json
+from pathlib import Path
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+KEY_FIELDS = ('business_id', 'direction', 'document_type_id', 'series', 'number', 'order_id')
+
+BATCH_SIZE = 2000
+
+
+def _archived_documents(ArchivedPeriod):
+    for archived in ArchivedPeriod.objects.order_by('id').iterator():
+        path = Path(archived.path)
+        if not path.exists():
+            raise RuntimeError(f'Archive file {path} not found: mount TAX_ARCHIVE[\'DIR\'] and migrate again.')
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                yield json.loads(line)['document']
+
+
+def backfill_keys(apps, schema_editor):
+    SunatDocument = apps.get_model('taxes', 'SunatDocument')
+    SunatDocumentKey = apps.get_model('taxes', 'SunatDocumentKey')
+    ArchivedPeriod = apps.get_model('taxes', 'ArchivedPeriod')
+
+    hot = SunatDocument.objects.order_by('id').values('id', *KEY_FIELDS).iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    for documents in (hot, _archived_documents(ArchivedPeriod)):
+        for document in documents:
+            batch.append(SunatDocumentKey(document_id=document['id'], **{name: document[name] for name in KEY_FIELDS}))
+            if len(batch) == BATCH_SIZE:
+                SunatDocumentKey.objects.bulk_create(batch)
+                batch = []
+    SunatDocumentKey.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0004_productbulkoperation'),
+        ('taxes', '0003_archived_periods'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SunatDocumentKey',
+            fields=[
+                ('document', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='key', serialize=False, to='taxes.sunatdocument')),
+                ('direction', models.CharField(max_length=10)),
+                ('series', models.CharField(max_length=10)),
+                ('number', models.PositiveIntegerField()),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='operations.business')),
+                ('document_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='taxes.documenttype')),
+                ('order', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='operations.order')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business', 'direction', 'document_type', 'series', 'number'), name='uq_sunatdockey_business_dir_type_series_number')],
+            },
+        ),
+        migrations.RunPython(backfill_keys, migrations.RunPython.noop),
+    ]
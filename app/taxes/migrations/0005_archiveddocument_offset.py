@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taxes', '0004_sunatdocumentkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archiveddocument',
+            name='offset',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,8 +1,10 @@
 # taxes/models.py
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from operations.models import Business, Order, Product
+from operations.tenancy import TenantQuerySet
+from .signals import document_status_changed, submission_status_changed
 
 
 class BusinessSunatConfig(models.Model):
@@ -20,6 +22,9 @@ class BusinessSunatConfig(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
 
 class Party(models.Model):
     """
@@ -46,6 +51,9 @@ class Party(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
     class Meta:
         indexes = [models.Index(fields=["business", "doc_type", "doc_number"])]
         constraints = [
@@ -127,13 +135,20 @@ class SunatDocument(models.Model):
         null=True,
         blank=True,
         related_name="referenced_by",
+        db_constraint=False,  # partitioned table (see taxes.partitions)
     )
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
     class Meta:
         indexes = [
             models.Index(fields=["business", "issue_date"]),
             models.Index(fields=["business", "document_type", "series", "number"]),
         ]
+        # On PostgreSQL the table is partitioned by issue_date and its unique
+        # constraints (this one and order) also include issue_date; see taxes.partitions.
+        # SunatDocumentKey enforces them without the date.
         constraints = [
             models.UniqueConstraint(
                 fields=["business", "direction", "document_type", "series", "number"],
@@ -141,9 +156,88 @@ class SunatDocument(models.Model):
             )
         ]
 
+    # Fields copied to SunatDocumentKey
+    KEY_FIELDS = ("business_id", "direction", "document_type_id", "series", "number", "order_id")
+
     def __str__(self) -> str:
         return f"{self.business.ruc}-{self.document_type.code}-{self.series}-{self.number}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status so save() can detect transitions without a query
+        instance._loaded_status = instance.__dict__.get("status")
+        instance._loaded_issue_date = instance.__dict__.get("issue_date")
+        instance._loaded_keys = {name: instance.__dict__[name] for name in cls.KEY_FIELDS if name in instance.__dict__}
+        return instance
+
+    def save(self, *args, **kwargs):
+        previous_status = getattr(self, "_loaded_status", None)
+        previous_issue_date = getattr(self, "_loaded_issue_date", None)
+        previous_keys = getattr(self, "_loaded_keys", {})
+        adding = self._state.adding
+        try:
+            # Key, items and the receivers (ledger, inventory) commit or roll back with the document
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                self._save_key(adding)
+                if previous_issue_date is not None and self.issue_date != previous_issue_date:
+                    # Items are partitioned by the document's issue_date
+                    self.items.update(issue_date=self.issue_date)
+                self._loaded_status = self.status
+                self._loaded_issue_date = self.issue_date
+                if self.status != previous_status:
+                    document_status_changed.send(sender=type(self), document=self, previous_status=previous_status)
+        except Exception:
+            # Rolled back: saving again must write the same changes again
+            self._loaded_status = previous_status
+            self._loaded_issue_date = previous_issue_date
+            self._loaded_keys = previous_keys
+            raise
+
+    def _save_key(self, adding):
+        """Writes the document's SunatDocumentKey; a duplicate number or order raises IntegrityError."""
+        keys = {name: getattr(self, name) for name in self.KEY_FIELDS}
+        loaded = getattr(self, "_loaded_keys", {})
+        if adding:
+            SunatDocumentKey.objects.create(document_id=self.pk, **keys)
+        elif any(keys[name] != value for name, value in loaded.items()):
+            if not SunatDocumentKey.objects.filter(pk=self.pk).update(**keys):
+                SunatDocumentKey.objects.create(document_id=self.pk, **keys)
+        self._loaded_keys = keys
+
+
+class SunatDocumentKey(models.Model):
+    """
+    Unique keys of a SunatDocument in a plain (not partitioned) table.
+
+    PostgreSQL only enforces unique constraints of a partitioned table when
+    they include the partition key, so the constraints of SunatDocument also
+    include issue_date there, and archived periods leave the hot table
+    altogether. One row per document, hot or archived, written by
+    SunatDocument.save() (and the bulk loaders) in the same transaction,
+    keeps a series and number, or an order, to a single document. Archiving
+    keeps the rows.
+    """
+    document = models.OneToOneField(
+        SunatDocument, on_delete=models.CASCADE, primary_key=True, related_name="key",
+        db_constraint=False,  # partitioned table (see taxes.partitions)
+    )
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="+")
+    direction = models.CharField(max_length=10)
+    document_type = models.ForeignKey(DocumentType, on_delete=models.PROTECT, related_name="+")
+    series = models.CharField(max_length=10)
+    number = models.PositiveIntegerField()
+    order = models.OneToOneField(Order, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business", "direction", "document_type", "series", "number"],
+                name="uq_sunatdockey_business_dir_type_series_number",
+            )
+        ]
+
 
 class SunatDocumentItem(models.Model):
     """
@@ -156,7 +250,11 @@ class SunatDocumentItem(models.Model):
         ("21", "Gratuito (referencial)"),
     ]
 
-    document = models.ForeignKey(SunatDocument, on_delete=models.CASCADE, related_name="items")
+    document = models.ForeignKey(
+        SunatDocument, on_delete=models.CASCADE, related_name="items", db_constraint=False
+    )
+    # Copy of document.issue_date: partition key of this table
+    issue_date = models.DateField(editable=False)
 
     product = models.ForeignKey(Product, on_delete=models.PROTECT, null=True, blank=True, related_name="sunat_items")
 
@@ -177,6 +275,13 @@ class SunatDocumentItem(models.Model):
 
     line_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
 
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "document__business_id"
+
+    def save(self, *args, **kwargs):
+        self.issue_date = self.document.issue_date
+        super().save(*args, **kwargs)
+
 
 class SunatSubmission(models.Model):
     """
@@ -191,7 +296,9 @@ class SunatSubmission(models.Model):
         ("ERROR", "Error interno"),
     ]
 
-    document = models.ForeignKey(SunatDocument, on_delete=models.CASCADE, related_name="submissions")
+    document = models.ForeignKey(
+        SunatDocument, on_delete=models.CASCADE, related_name="submissions", db_constraint=False
+    )
 
     production = models.BooleanField(default=False)
 
@@ -218,4 +325,74 @@ class SunatSubmission(models.Model):
     raw_response = models.JSONField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "document__business_id"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status so save() can detect transitions without a query
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        previous_status = getattr(self, "_loaded_status", None)
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                self._loaded_status = self.status
+                if self.status != previous_status:
+                    submission_status_changed.send(
+                        sender=type(self), submission=self, previous_status=previous_status
+                    )
+        except Exception:
+            self._loaded_status = previous_status
+            raise
+
+
+class ArchivedPeriod(models.Model):
+    """
+    Closed tax period (business + month) moved to cold storage: its
+    documents, items and submissions live in a gzip JSON-lines file
+    instead of the database. See taxes/archive.py.
+    """
+    business = models.ForeignKey(Business, on_delete=models.PROTECT, related_name="archived_periods")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+
+    path = models.CharField(max_length=500)
+    checksum = models.CharField(max_length=64, help_text="SHA-256 del archivo comprimido")
+    size = models.PositiveBigIntegerField(default=0)
+
+    documents_count = models.PositiveIntegerField(default=0)
+    items_count = models.PositiveIntegerField(default=0)
+    submissions_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantQuerySet.as_manager()
+    TENANT_FIELD = "business_id"
+
+    class Meta:
+        ordering = ["business", "year", "month"]
+        constraints = [
+            models.UniqueConstraint(fields=["business", "year", "month"], name="uq_archivedperiod_business_period")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.business_id} {self.year}-{self.month:02d}"
+
+
+class ArchivedDocument(models.Model):
+    """
+    Locator of an archived SunatDocument (same id): which archive holds it,
+    at which line, and the byte offset of the gzip member holding that line,
+    so a detail request decompresses a single member of a single file.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    period = models.ForeignKey(ArchivedPeriod, on_delete=models.CASCADE, related_name="documents")
+    line = models.PositiveIntegerField()
+    # None for files written as a single gzip member (read from the start)
+    offset = models.PositiveBigIntegerField(null=True, blank=True)
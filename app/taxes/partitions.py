@@ -0,0 +1,136 @@
+"""
+Monthly range partitions of the tax tables (PostgreSQL only).
+
+SunatDocument and SunatDocumentItem are partitioned by issue_date (items
+carry a copy of their document's date) and SunatSubmission by created_at.
+Each table has one partition per month, named <table>_YYYYMM, plus a
+<table>_default partition catching rows outside the created months, so an
+insert never fails for lack of a partition.
+
+Queries filtering on the partition key only scan the matching months.
+Because PostgreSQL requires unique constraints of a partitioned table to
+include the partition key, the primary keys are (id, <key>) and the
+business unique constraints include issue_date; ids still come from a
+single sequence per table. Document numbers and orders stay unique across
+months through the SunatDocumentKey table. Foreign keys pointing at these tables are not
+enforced by the database (db_constraint=False); the ORM still cascades.
+
+The manage_partitions command creates future months and detaches old ones.
+"""
+from datetime import date, datetime, timezone
+
+PARTITIONED_TABLES = {
+    'taxes_sunatdocument': 'issue_date',
+    'taxes_sunatdocumentitem': 'issue_date',
+    'taxes_sunatsubmission': 'created_at',
+}
+
+# Timestamp columns get their monthly bounds in UTC
+TIMESTAMP_KEYS = {'created_at'}
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(first, last):
+    """Month starts from first to last, both included."""
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _bound(table, month):
+    if PARTITIONED_TABLES[table] in TIMESTAMP_KEYS:
+        return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    return month
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [table]
+    )
+    return cursor.fetchone()[0]
+
+
+def list_partitions(cursor, table):
+    """
+    Returns [(name, month, estimated_rows)] of the monthly partitions of
+    `table`, oldest first. The default partition has month None.
+    """
+    cursor.execute(
+        'SELECT c.relname, c.reltuples::bigint FROM pg_inherits i '
+        'JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname',
+        [table],
+    )
+    partitions = []
+    for name, rows in cursor.fetchall():
+        suffix = name[len(table) + 1:]
+        month = date(int(suffix[:4]), int(suffix[4:]), 1) if suffix.isdigit() else None
+        partitions.append((name, month, max(rows, 0)))
+    return partitions
+
+
+def create_default_partition(cursor, table):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT'
+    )
+
+
+def create_partition(cursor, table, month):
+    """
+    Creates the partition of `month` unless it exists. Rows of that month
+    already stored in the default partition are moved into it. Returns
+    True when the partition was created.
+    """
+    name = partition_name(table, month)
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    if cursor.fetchone()[0]:
+        return False
+
+    column = PARTITIONED_TABLES[table]
+    start, end = _bound(table, month), _bound(table, add_months(month, 1))
+    # Built detached and attached afterwards: attaching checks that the
+    # default partition no longer holds rows of the new range
+    cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS ('
+        f'  DELETE FROM {default_partition_name(table)} WHERE {column} >= %s AND {column} < %s RETURNING *'
+        f') INSERT INTO {name} SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', [start, end])
+    return True
+
+
+def detach_partition(cursor, table, month, drop=False):
+    """
+    Detaches the partition of `month`, leaving it as a standalone table
+    (or dropping it). Returns False when it did not exist.
+    """
+    name = partition_name(table, month)
+    cursor.execute(
+        'SELECT 1 FROM pg_inherits WHERE inhparent = to_regclass(%s) AND inhrelid = to_regclass(%s)',
+        [table, name],
+    )
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+    if drop:
+        cursor.execute(f'DROP TABLE {name}')
+    return True
@@ -1,34 +1,92 @@
+import calendar
+from datetime import date
+
 from rest_framework import serializers
+from core.instrumentation import TimedSerializerMixin
 from . import models
 
-class DocumentTypeSerializer(serializers.ModelSerializer):
+class DocumentTypeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.DocumentType
         fields = ['id', 'code', 'name']
 
 
-class BusinessSunatConfigSerializer(serializers.ModelSerializer):
+class BusinessSunatConfigSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.BusinessSunatConfig
         fields = ['id', 'business', 'persona_id', 'persona_token', 'production_enabled']
 
-class PartySerializer(serializers.ModelSerializer):
+class PartySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Party
         fields = ['id', 'business', 'doc_type', 'doc_number', 'name', 'address', 'email', 'phone', 'is_active']
 
-class SunatDocumentSerializer(serializers.ModelSerializer):
+class SunatDocumentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.SunatDocument
         fields = ['id', 'business', 'document_type', 'series', 'number', 'issue_date', 'party', 'order', 'currency', 'exchange_rate', 'payment_term', 'due_date', 'total_taxable', 'total_igv', 'total', 'status', 'ref_document']
 
-class SunatDocumentItemSerializer(serializers.ModelSerializer):
+    # Campos que los rollups, el libro diario y el inventario tomaron al emitir
+    ISSUED_FROZEN_FIELDS = (
+        'business', 'document_type', 'issue_date', 'currency', 'exchange_rate', 'total_taxable', 'total_igv', 'total',
+    )
+
+    def validate(self, attrs):
+        """
+        Serie/número y pedido únicos también frente a comprobantes de otros
+        meses o de periodos archivados (ver SunatDocumentKey). Los importes,
+        fechas y tipo de un comprobante emitido no se modifican: se anula y se
+        emite otro.
+        """
+        attrs = super().validate(attrs)
+
+        if self.instance is not None and self.instance.status == 'ISSUED':
+            changed = [
+                name for name in self.ISSUED_FROZEN_FIELDS
+                if name in attrs and attrs[name] != getattr(self.instance, name)
+            ]
+            if changed:
+                raise serializers.ValidationError(
+                    {name: 'No se puede modificar en un comprobante emitido.' for name in changed}
+                )
+
+        def value(name, default=None):
+            return attrs[name] if name in attrs else getattr(self.instance, name, default)
+
+        keys = models.SunatDocumentKey.objects.exclude(pk=getattr(self.instance, 'pk', None))
+        if keys.filter(
+            business=value('business'), direction=value('direction', 'SALE'), document_type=value('document_type'),
+            series=value('series'), number=value('number'),
+        ).exists():
+            raise serializers.ValidationError('Ya existe un comprobante con este tipo, serie y número.')
+        order = value('order')
+        if order is not None and keys.filter(order=order).exists():
+            raise serializers.ValidationError({'order': 'El pedido ya tiene un comprobante.'})
+        return attrs
+
+class SunatDocumentItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.SunatDocumentItem
         fields = ['id', 'document', 'product', 'description', 'quantity', 'unit_price', 'discount', 'tax_affectation', 'igv_rate', 'line_total']
 
 
-class SunatSubmissionSerializer(serializers.ModelSerializer):
+def archived_document_data(record):
+    """
+    Representación de un comprobante archivado (ver taxes.archive) con los
+    mismos campos que SunatDocumentSerializer, más sus ítems.
+    """
+    def fields(model, names, values):
+        return {name: values[model._meta.get_field(name).attname] for name in names}
+
+    data = fields(models.SunatDocument, SunatDocumentSerializer.Meta.fields, record['document'])
+    data['items'] = [
+        fields(models.SunatDocumentItem, SunatDocumentItemSerializer.Meta.fields, item) for item in record['items']
+    ]
+    data['archived'] = True
+    return data
+
+
+class SunatSubmissionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.SunatSubmission
         fields = [
@@ -51,3 +109,26 @@ class SunatSubmissionSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
 
+
+class SalesRegisterExportSerializer(serializers.Serializer):
+    """Parámetros de exportación del Registro de Ventas."""
+    export_format = serializers.ChoiceField(choices=['csv', 'ple'], default='csv')
+    period = serializers.RegexField(r'^\d{4}-(0[1-9]|1[0-2])$', required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        period = attrs.get('period')
+        if period:
+            year, month = (int(part) for part in period.split('-'))
+            attrs['year'], attrs['month'] = year, month
+            attrs['date_from'] = date(year, month, 1)
+            attrs['date_to'] = date(year, month, calendar.monthrange(year, month)[1])
+        elif attrs['export_format'] == 'ple':
+            raise serializers.ValidationError({'period': 'El formato PLE requiere un periodo (AAAA-MM).'})
+        elif not attrs.get('date_from') or not attrs.get('date_to'):
+            raise serializers.ValidationError('Indique period o date_from y date_to.')
+
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_from': 'Debe ser anterior o igual a date_to.'})
+        return attrs
@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# Sent by SunatSubmission.save() when the status of a submission changes
+# (including creation). Arguments: submission, previous_status.
+submission_status_changed = Signal()
+
+# Sent by SunatDocument.save() when the status of a document changes
+# (including creation). Arguments: document, previous_status.
+document_status_changed = Signal()
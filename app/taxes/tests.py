@@ -1,3 +1,209 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+from core.tokens import add_claims
+from operations.models import Business, Order, Profile
+from . import archive, exports
+from .broker import broker, submission_event
+from .models import DocumentType, Party, SunatDocument, SunatDocumentKey, SunatSubmission
+
+
+class SunatDocumentKeyTests(TestCase):
+    """
+    On PostgreSQL the unique constraints of the partitioned table include
+    issue_date; SunatDocumentKey keeps numbers and orders unique across
+    months and archived periods.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.document_type = DocumentType.objects.create(code='03', name='Boleta')
+        cls.party = Party.objects.create(business=cls.business, doc_type='1', doc_number='12345678', name='Juan')
+
+    def create_document(self, number, issue_date, **extra):
+        return SunatDocument.objects.create(
+            business=self.business, document_type=self.document_type, series='B001', number=number,
+            issue_date=issue_date, party=self.party, total=Decimal('118.00'), **extra
+        )
+
+    def test_duplicate_number_in_another_month_is_rejected(self):
+        self.create_document(1, date(2026, 1, 5))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_document(1, date(2026, 2, 5))
+        self.assertEqual(SunatDocument.objects.count(), 1)
+
+    def test_number_of_archived_document_stays_taken(self):
+        document = self.create_document(1, date(2026, 1, 5))
+        # Archiving deletes the hot rows with plain SQL and keeps the key
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SunatDocument._meta.db_table} WHERE id = %s', [document.pk])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_document(1, date(2026, 3, 5))
+
+    def test_order_gets_a_single_document(self):
+        order = Order.objects.create(business=self.business)
+        self.create_document(1, date(2026, 1, 5), order=order)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_document(2, date(2026, 2, 5), order=order)
+
+    def test_key_follows_the_document(self):
+        document = self.create_document(1, date(2026, 1, 5))
+        document.number = 7
+        document.save()
+        self.assertEqual(SunatDocumentKey.objects.get(pk=document.pk).number, 7)
+        self.create_document(1, date(2026, 1, 6))
+        document.delete()
+        self.assertFalse(SunatDocumentKey.objects.filter(pk=document.pk).exists())
+
+
+class AsyncStatusTests(TestCase):
+    """The async status views scope documents like the sync viewsets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.other = Business.objects.create(name='Ferretería', ruc='20987654321')
+        cls.user = User.objects.create_user('cajero', password='x')
+        Profile.objects.create(user=cls.user, business=cls.business, role='EM')
+        document_type = DocumentType.objects.create(code='03', name='Boleta')
+        cls.documents = [
+            SunatDocument.objects.create(
+                business=business, document_type=document_type, series='B001', number=1,
+                issue_date=date(2026, 1, 5), party=Party.objects.create(
+                    business=business, doc_type='1', doc_number='12345678', name='Juan'
+                ),
+            )
+            for business in (cls.business, cls.other)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'JWT ' + str(add_claims(AccessToken.for_user(self.user), self.user))
+
+    def test_other_business_documents_are_not_visible(self):
+        own, other = self.documents
+        self.assertEqual(self.client.get(f'/taxes/async/sunat-documents/{own.pk}/status/').status_code, 200)
+        self.assertEqual(self.client.get(f'/taxes/async/sunat-documents/{other.pk}/status/').status_code, 404)
+        response = self.client.get('/taxes/async/sunat-documents/status/', {
+            'ids': f'{own.pk},{other.pk}', 'business_id': self.other.pk,
+        })
+        self.assertEqual([row['id'] for row in response.json()['results']], [own.pk])
+
+    def test_bad_ids_are_rejected(self):
+        response = self.client.get('/taxes/async/sunat-documents/status/', {'ids': '1,x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SubmissionStreamTests(TestCase):
+    """The SSE stream replays missed transitions once, even if they also arrive live."""
+
+    @classmethod
+    def setUpTestData(cls):
+        business = Business.objects.create(name='Bodega', ruc='20123456789')
+        user = User.objects.create_user('cajero', password='x')
+        Profile.objects.create(user=user, business=business, role='EM')
+        cls.token = 'JWT ' + str(add_claims(AccessToken.for_user(user), user))
+        cls.document = SunatDocument.objects.create(
+            business=business, document_type=DocumentType.objects.create(code='03', name='Boleta'),
+            series='B001', number=1, issue_date=date(2026, 1, 5),
+            party=Party.objects.create(business=business, doc_type='1', doc_number='12345678', name='Juan'),
+        )
+        cls.submission = SunatSubmission.objects.create(document=cls.document, file_name='B001-1', status='ACCEPTED')
+
+    def test_wsgi_request_is_refused(self):
+        cache.clear()
+        response = self.client.get('/taxes/async/sunat-submissions/stream/', HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(response.status_code, 501)
+
+    async def test_catch_up_events_are_not_sent_twice(self):
+        await cache.aclear()
+        since = self.submission.updated_at - timedelta(seconds=1)
+        response = await self.async_client.get(
+            '/taxes/async/sunat-submissions/stream/',
+            headers={'Authorization': self.token, 'Last-Event-ID': since.isoformat()},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        replayed = (await anext(stream)).decode()
+        self.assertIn(f'"id": {self.submission.pk}', replayed)
+
+        # The same transition delivered live after the catch-up is skipped
+        broker.dispatch(submission_event(self.submission, 'PENDING'))
+        later = SunatSubmission(pk=self.submission.pk + 1, document=self.document, status='REJECTED')
+        later.updated_at = self.submission.updated_at + timedelta(seconds=5)
+        broker.dispatch(submission_event(later, 'PENDING'))
+        live = (await anext(stream)).decode()
+        self.assertIn('"status": "REJECTED"', live)
+        await stream.aclose()
+
+
+class SalesRegisterExportTests(TestCase):
+    """The register is formatted as CSV and PLE 14.1 and merges archived rows in order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name='Bodega', ruc='20123456789')
+        cls.invoice = DocumentType.objects.create(code='01', name='Factura')
+        cls.boleta = DocumentType.objects.create(code='03', name='Boleta')
+        cls.party = Party.objects.create(business=cls.business, doc_type='1', doc_number='12345678', name='Juan|Pérez')
+
+    def issue(self, document_type, series, number, issue_date, status='ISSUED'):
+        document = SunatDocument.objects.create(
+            business=self.business, document_type=document_type, series=series, number=number,
+            issue_date=issue_date, party=self.party, total_taxable=Decimal('100.00'),
+            total_igv=Decimal('18.00'), total=Decimal('118.00'),
+        )
+        document.status = status
+        document.save()
+        return document
+
+    def rows(self, date_from, date_to):
+        return list(exports.sales_register_rows(self.business.pk, date_from, date_to, chunk_size=2))
+
+    def test_csv_format(self):
+        self.issue(self.invoice, 'F001', 7, date(2026, 1, 10))
+        header, line = exports.csv_lines(self.rows(date(2026, 1, 1), date(2026, 1, 31)))
+        self.assertEqual(header, '\ufeff' + ','.join(exports.CSV_HEADER) + '\r\n')
+        self.assertEqual(
+            line, '2026-01-10,,01,F001,7,1,12345678,Juan|Pérez,PEN,,100.00,0.00,0.00,18.00,118.00,ISSUED,,,\r\n'
+        )
+
+    def test_ple_format(self):
+        issued = self.issue(self.invoice, 'F001', 7, date(2026, 1, 10))
+        self.issue(self.invoice, 'F001', 8, date(2026, 1, 11), status='VOID')
+        lines = list(exports.ple_lines(self.rows(date(2026, 1, 1), date(2026, 1, 31)), 2026, 1))
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertTrue(line.endswith('|\r\n'))
+            self.assertEqual(len(line[:-3].split('|')), 35)
+        fields = lines[0].split('|')
+        self.assertEqual(fields[:8], ['20260100', str(issued.pk), 'M1', '10/01/2026', '', '01', 'F001', '7'])
+        self.assertEqual((fields[11], fields[13], fields[15], fields[24], fields[34]),
+                         ('Juan Pérez', '100.00', '18.00', '118.00', '1'))
+        voided = lines[1].split('|')
+        self.assertEqual((voided[2], voided[13], voided[24], voided[34]), ('M2', '0.00', '0.00', '2'))
+
+    def test_archived_rows_merge_in_the_query_order(self):
+        self.issue(self.boleta, 'B001', 1, date(2025, 1, 10))
+        self.issue(self.invoice, 'F001', 1, date(2025, 1, 10))
+        self.issue(self.boleta, 'B001', 3, date(2025, 2, 3))
+        with tempfile.TemporaryDirectory() as directory, override_settings(TAX_ARCHIVE={'DIR': directory}):
+            archive.archive_period(self.business, 2025, 1)
+            # Documents registered late in the archived month sit between its archived rows
+            self.issue(self.boleta, 'b001', 2, date(2025, 1, 10))
+            self.issue(self.boleta, 'B002', 1, date(2025, 1, 10))
+            rows = self.rows(date(2025, 1, 1), date(2025, 2, 28))
+        self.assertEqual(
+            [(row['issue_date'].day, row['document_type__code'], row['series']) for row in rows],
+            [(10, '01', 'F001'), (10, '03', 'B001'), (10, '03', 'B002'), (10, '03', 'b001'), (3, '03', 'B001')],
+        )
+        self.assertEqual(rows, sorted(rows, key=archive.register_key))
@@ -1,5 +1,6 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'document-types', views.DocumentTypeViewSet)
@@ -9,4 +10,9 @@ router.register(r'sunat-documents', views.SunatDocumentViewSet)
 router.register(r'sunat-document-items', views.SunatDocumentItemViewSet)
 router.register(r'sunat-submissions', views.SunatSubmissionViewSet)
 
-urlpatterns = router.urls
\ No newline at end of file
+# Endpoints de lectura asíncronos (servidos por ASGI/daphne)
+urlpatterns = router.urls + [
+    path('async/sunat-documents/status/', async_views.sunat_document_statuses, name='async-sunat-document-statuses'),
+    path('async/sunat-documents/<int:pk>/status/', async_views.sunat_document_status, name='async-sunat-document-status'),
+    path('async/sunat-submissions/stream/', async_views.sunat_submission_stream, name='async-sunat-submission-stream'),
+]
\ No newline at end of file
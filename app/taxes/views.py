@@ -1,28 +1,137 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets
-from . import models, serializers
+from django.utils.dateparse import parse_date
+from rest_framework import exceptions, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from core.idempotency import IdempotentCreateMixin
+from operations.models import Business
+from operations.tenancy import TenantPermission, TenantViewSetMixin
+from . import archive, exports, models, serializers
 
 class DocumentTypeViewSet(viewsets.ModelViewSet):
+    # Catálogo SUNAT común a todos los negocios: solo se limita quién lo modifica
     queryset = models.DocumentType.objects.all()
     serializer_class = serializers.DocumentTypeSerializer
+    permission_classes = [permissions.IsAuthenticated, TenantPermission]
+    tenant_resource = 'sunat_catalogs'
 
-class BusinessSunatConfigViewSet(viewsets.ModelViewSet):
+class BusinessSunatConfigViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = models.BusinessSunatConfig.objects.all()
     serializer_class = serializers.BusinessSunatConfigSerializer
+    tenant_resource = 'taxes'
 
-class PartyViewSet(viewsets.ModelViewSet):
+class PartyViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = models.Party.objects.all()
     serializer_class = serializers.PartySerializer
+    tenant_resource = 'taxes'
 
-class SunatDocumentViewSet(viewsets.ModelViewSet):
+def filter_issue_date(queryset, params):
+    """
+    Filtra por date_from/date_to (AAAA-MM-DD) sobre issue_date, la clave de
+    partición: PostgreSQL solo lee las particiones de esas fechas.
+    """
+    date_from = parse_date(params.get('date_from') or '')
+    date_to = parse_date(params.get('date_to') or '')
+    if date_from:
+        queryset = queryset.filter(issue_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(issue_date__lte=date_to)
+    return queryset
+
+class SunatDocumentViewSet(IdempotentCreateMixin, TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = models.SunatDocument.objects.all()
     serializer_class = serializers.SunatDocumentSerializer
+    tenant_resource = 'taxes'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_issue_date(queryset, self.request.query_params)
+        return queryset
+
+    def perform_destroy(self, instance):
+        # Un comprobante emitido está en rollups, libro diario e inventario: se anula
+        if instance.status == 'ISSUED':
+            raise exceptions.ValidationError({'status': 'No se puede eliminar un comprobante emitido; anúlelo.'})
+        super().perform_destroy(instance)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Comprobantes de periodos archivados: se leen del archivo comprimido
+            pk = str(kwargs.get(self.lookup_field, ''))
+            record = archive.find_document(int(pk)) if pk.isdigit() else None
+            tenant = self.get_tenant()
+            if record is None or tenant.business_id not in (None, record['document']['business_id']):
+                raise
+            return Response(serializers.archived_document_data(record))
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        url_name='export',
+    )
+    def export(self, request):
+        """
+        Exporta el Registro de Ventas del negocio del usuario en streaming.
+        Parámetros: export_format (csv|ple), period (AAAA-MM) o date_from/date_to.
+        Los administradores de plataforma deben indicar business_id.
+        Con WSGI o ASGI el archivo se genera por bloques, sin cargarlo entero en memoria.
+        """
+        params = serializers.SalesRegisterExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
 
-class SunatDocumentItemViewSet(viewsets.ModelViewSet):
+        business_id = self.get_tenant().business_id
+        business = Business.objects.filter(pk=business_id).first() if business_id else None
+        if business is None:
+            return Response(
+                {'business_id': 'No se encontró el negocio a exportar.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = exports.sales_register_rows(business.id, params['date_from'], params['date_to'])
+        if params['export_format'] == 'ple':
+            lines = exports.ple_lines(rows, params['year'], params['month'])
+            filename = exports.ple_filename(business.ruc or '', params['year'], params['month'])
+            content_type = 'text/plain; charset=utf-8'
+        else:
+            lines = exports.csv_lines(rows)
+            filename = f"registro-ventas-{business.id}-{params['date_from']}-{params['date_to']}.csv"
+            content_type = 'text/csv; charset=utf-8'
+
+        if isinstance(request._request, ASGIRequest):
+            # Con ASGI el iterador síncrono se leería completo en memoria antes de enviarse
+            lines = exports.aiter_lines(lines)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class SunatDocumentItemViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = models.SunatDocumentItem.objects.all()
     serializer_class = serializers.SunatDocumentItemSerializer
+    tenant_resource = 'taxes'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+        document_id = params.get('document', '')
+        if document_id.isdigit():
+            # La fecha del comprobante limita la búsqueda a una sola partición
+            issue_date = (
+                models.SunatDocument.objects.filter(pk=document_id).values_list('issue_date', flat=True).first()
+            )
+            queryset = queryset.filter(document_id=document_id, issue_date=issue_date)
+        return filter_issue_date(queryset, params)
 
-class SunatSubmissionViewSet(viewsets.ModelViewSet):
+class SunatSubmissionViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = models.SunatSubmission.objects.all()
     serializer_class = serializers.SunatSubmissionSerializer
+    tenant_resource = 'taxes'
 
@@ -0,0 +1,24 @@
+#!/bin/sh
+
+# Run the API benchmarks inside the docker-compose app container (against its
+# Postgres) and store the report as app/benchmarks/<commit>.json.
+#
+# Usage (from the repository root, with `docker compose up -d` running):
+#   scripts/benchmark.sh                    # generates the dataset if missing
+#   scripts/benchmark.sh --compare /app/benchmarks/<older-commit>.json
+#
+# Dataset size: BENCH_BUSINESSES, BENCH_PRODUCTS, BENCH_ORDERS.
+
+set -e
+
+COMMIT=$(git rev-parse HEAD)
+SHORT=$(git rev-parse --short HEAD)
+
+docker compose exec app python manage.py generate_dataset \
+    --businesses "${BENCH_BUSINESSES:-3}" \
+    --products "${BENCH_PRODUCTS:-5000}" \
+    --orders "${BENCH_ORDERS:-20000}" \
+    || echo "Dataset already present, reusing it (run generate_dataset --reset to rebuild)."
+
+docker compose exec -e GIT_COMMIT="$COMMIT" app python manage.py run_benchmarks \
+    --output "/app/benchmarks/$SHORT.json" "$@"
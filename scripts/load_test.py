@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Minimal HTTP load test for comparing the WSGI (gunicorn) and ASGI (daphne)
+deployments of the read endpoints.
+
+Example:
+    SERVER=asgi docker compose up -d
+    python scripts/load_test.py http://localhost:8000/api/async/products/?search=foco \
+        --token "$JWT" --concurrency 200 --requests 5000
+
+    python scripts/load_test.py http://localhost:8000/api/products/?search=foco \
+        --token "$JWT" --concurrency 200 --requests 5000
+
+Prints a JSON summary (throughput, latency percentiles, error count).
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('url')
+    parser.add_argument('--token', help='JWT de acceso (se envía como "Authorization: JWT <token>")')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'JWT {args.token}'} if args.token else {}
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+            local.session.headers.update(headers)
+        return local.session
+
+    def hit(_):
+        start = time.perf_counter()
+        try:
+            ok = session().get(args.url, timeout=args.timeout).status_code < 400
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(hit, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(duration for duration, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    json.dump({
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(args.requests / elapsed, 1),
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 1),
+            'p50': round(percentile(latencies, 50) * 1000, 1),
+            'p95': round(percentile(latencies, 95) * 1000, 1),
+            'p99': round(percentile(latencies, 99) * 1000, 1),
+        },
+    }, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,9 @@ python manage.py collectstatic --noinput
 # Apply any pending database migrations.
 python manage.py migrate
 
+# Create the cache tables of the database caches (the read replica pins).
+python manage.py createcachetable
+
 # Start the uWSGI server with 4 worker processes, using the WSGI module.
 # --socket :9000: Binds to port 9000.
 # --workers 4: Spawns 4 worker processes to handle requests.
@@ -25,6 +28,11 @@ python manage.py migrate
 if [ "$ENVIRONMENT" = "development" ]; then
     echo "Starting server with Daphne for development..."
     exec python manage.py runserver 0.0.0.0:8000
+elif [ "$SERVER" = "asgi" ]; then
+    # ASGI: the async read endpoints (/api/async/..., /taxes/async/...) wait on the
+    # database without holding a thread, so slow clients do not exhaust workers.
+    echo "Starting server with Daphne (ASGI)..."
+    exec daphne -b 0.0.0.0 -p 8000 sisfac.asgi:application
 else
     echo "Starting server with Gunicorn for production..."
     exec gunicorn sisfac.wsgi:application --bind 0.0.0.0:8000 --timeout=5 --threads=10